@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Peak memory of the cleanup sync plan as the managed tree grows.
+
+Builds a repository and a worktree whose `.claude/` holds N files (100 per directory),
+records the baseline, changes every tenth file in the worktree, then measures with
+tracemalloc:
+
+- eager:  the three-dict planner (snapshot main, worktree and baseline, sort the union)
+- list:   plan_sync, which streams the join but returns the actions as a list
+- stream: iter_sync_plan consumed one action at a time, as print_sync_plan/apply_sync do
+
+Usage: python3 bench_plan_memory.py [--sizes 1000,10000,50000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+import config_sync  # noqa: E402
+
+
+def build_tree(root: Path, size: int) -> tuple[Path, Path]:
+    repo = root / "repo"
+    worktree = root / "task"
+    repo.mkdir()
+    (repo / "AGENTS.md").write_text("agents\n", encoding="utf-8")
+    for args in (["init", "-q"], ["add", "AGENTS.md"], ["-c", "user.name=b", "-c", "user.email=b@b", "commit", "-qm", "init"]):
+        subprocess.run(["git", *args], cwd=repo, check=True, stdout=subprocess.DEVNULL)
+    subprocess.run(["git", "worktree", "add", "-q", "-b", "task", str(worktree)], cwd=repo, check=True)
+    for tree in (repo, worktree):
+        for index in range(size):
+            path = tree / ".claude" / f"dir-{index // 100:05d}" / f"file-{index % 100:02d}.md"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(f"content {index}\n", encoding="utf-8")
+    config_sync.write_baseline(worktree)
+    for index in range(0, size, 10):
+        path = worktree / ".claude" / f"dir-{index // 100:05d}" / f"file-{index % 100:02d}.md"
+        path.write_text(f"changed {index}\n", encoding="utf-8")
+    return repo, worktree
+
+
+def eager(repo: Path, worktree: Path) -> int:
+    baseline = config_sync.load_baseline(worktree) or {}
+    main = config_sync.snapshot_managed_paths(repo)
+    target = config_sync.snapshot_managed_paths(worktree)
+    actions = []
+    for path in sorted(set(main) | set(target) | set(baseline)):
+        action = config_sync.classify(path, baseline.get(path), main.get(path), target.get(path), True)
+        if action is not None:
+            actions.append(action)
+    return len(actions)
+
+
+def materialized(repo: Path, worktree: Path) -> int:
+    return len(config_sync.plan_sync(repo, worktree)[0])
+
+
+def streamed(repo: Path, worktree: Path) -> int:
+    actions, _ = config_sync.iter_sync_plan(repo, worktree)
+    return sum(1 for _ in actions)
+
+
+def measure(planner, repo: Path, worktree: Path) -> tuple[int, float, int]:
+    """Return (peak bytes, seconds, action count)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = planner(repo, worktree)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, elapsed, count
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Peak memory of eager vs streaming sync planning.")
+    parser.add_argument("--sizes", default="1000,10000,50000", help="Comma-separated managed file counts.")
+    args = parser.parse_args(argv)
+
+    print(f"{'files':>8} {'mode':>7} {'peak KiB':>10} {'seconds':>8} {'actions':>8}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as directory:
+            repo, worktree = build_tree(Path(directory), size)
+            for name, planner in (("eager", eager), ("list", materialized), ("stream", streamed)):
+                peak, elapsed, count = measure(planner, repo, worktree)
+                print(f"{size:>8} {name:>7} {peak / 1024:>10.0f} {elapsed:>8.2f} {count:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
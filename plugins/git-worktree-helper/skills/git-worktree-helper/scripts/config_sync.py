@@ -3,15 +3,19 @@
 
 from __future__ import annotations
 
+import contextlib
 import hashlib
+import heapq
+import itertools
 import json
 import os
 import shutil
 import tempfile
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
 from pathlib import Path
 
-from worktree_common import WorktreeError, run_git
+from worktree_common import WorktreeError, rev_parse
 
 
 MANAGED_PATHS = [
@@ -22,7 +26,13 @@ MANAGED_PATHS = [
     "AGENTS.md",
 ]
 BASELINE_FILE = "git-worktree-helper-baseline.json"
-BASELINE_VERSION = 1
+BASELINE_VERSION = 2
+# 不超过该条目数的基线仍写成旧版本也能读取的版本 1
+BASELINE_V1_LIMIT = 10000
+DIGEST_CACHE_LIMIT = 65536
+
+# 仅常驻服务启用：按 (路径, inode, 大小, mtime) 缓存文件摘要，避免重复读取未变化的文件
+_DIGEST_CACHE: dict[tuple[str, int, int, int, int], str] | None = None
 
 
 @dataclass(frozen=True)
@@ -39,8 +49,7 @@ class SyncAction:
 
 
 def worktree_metadata_dir(worktree: Path) -> Path:
-    git_dir = run_git(worktree, ["rev-parse", "--git-dir"]).stdout.strip()
-    path = Path(git_dir)
+    path = Path(rev_parse(worktree, "--git-dir"))
     if not path.is_absolute():
         path = worktree / path
     return path.resolve()
@@ -50,127 +59,295 @@ def baseline_path(worktree: Path) -> Path:
     return worktree_metadata_dir(worktree) / BASELINE_FILE
 
 
+def enable_digest_cache() -> None:
+    global _DIGEST_CACHE
+    if _DIGEST_CACHE is None:
+        _DIGEST_CACHE = {}
+
+
+def file_digest(path: Path) -> str:
+    key = None
+    if _DIGEST_CACHE is not None:
+        stat = path.stat()
+        key = (str(path), stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        cached = _DIGEST_CACHE.get(key)
+        if cached is not None:
+            return cached
+
+    digest = hashlib.sha256()
+    with path.open("rb") as source:
+        for chunk in iter(lambda: source.read(1024 * 1024), b""):
+            digest.update(chunk)
+    value = digest.hexdigest()
+
+    if key is not None:
+        if len(_DIGEST_CACHE) >= DIGEST_CACHE_LIMIT:
+            _DIGEST_CACHE.clear()
+        _DIGEST_CACHE[key] = value
+    return value
+
+
 def describe_path(path: Path) -> Entry | None:
     if path.is_symlink():
         return Entry("symlink", os.readlink(path))
     if path.is_file():
-        digest = hashlib.sha256()
-        with path.open("rb") as source:
-            for chunk in iter(lambda: source.read(1024 * 1024), b""):
-                digest.update(chunk)
-        return Entry("file", digest.hexdigest())
+        return Entry("file", file_digest(path))
     if path.exists():
         return Entry("other", "")
     return None
 
 
-def snapshot_managed_paths(root: Path) -> dict[str, Entry]:
-    snapshot: dict[str, Entry] = {}
-    for managed_path in MANAGED_PATHS:
-        source = root / managed_path
-        entry = describe_path(source)
-        if entry is None:
+def iter_managed_paths(root: Path) -> Iterator[tuple[str, Entry]]:
+    """Yield (relative path, entry) for every managed path under root, sorted by path string.
+
+    Directories are expanded only when the walk reaches them, so memory holds the pending
+    siblings along the current path rather than the whole tree. A directory's own entry sorts
+    before siblings such as `name-x`, but its children sort after them, so children are
+    queued under the `name/` key instead of being yielded depth-first.
+    """
+    # (排序键, 路径, 是否为待展开的目录)
+    pending: list[tuple[str, Path, bool]] = [(managed_path, root / managed_path, False) for managed_path in MANAGED_PATHS]
+    heapq.heapify(pending)
+    while pending:
+        key, path, expand = heapq.heappop(pending)
+        if expand:
+            with os.scandir(path) as children:
+                for child in children:
+                    heapq.heappush(pending, (key + child.name, path / child.name, False))
             continue
-        if entry.kind != "other":
-            snapshot[managed_path] = entry
-            continue
-        if not source.is_dir():
-            snapshot[managed_path] = entry
+        entry = describe_path(path)
+        if entry is None:
             continue
-        snapshot[managed_path] = Entry("dir", "")
-        for child in sorted(source.rglob("*")):
-            child_entry = describe_path(child)
-            if child_entry is None:
-                continue
-            if child_entry.kind == "other" and child.is_dir():
-                child_entry = Entry("dir", "")
-            snapshot[child.relative_to(root).as_posix()] = child_entry
-    return snapshot
+        if entry.kind == "other" and path.is_dir():
+            entry = Entry("dir", "")
+            heapq.heappush(pending, (key + "/", path, True))
+        yield key, entry
+
+
+def snapshot_managed_paths(root: Path) -> dict[str, Entry]:
+    return dict(iter_managed_paths(root))
 
 
 def write_baseline(worktree: Path) -> Path:
+    """Record the worktree's managed paths as the cleanup baseline.
+
+    Up to BASELINE_V1_LIMIT entries are written as the version 1 JSON object that older
+    helpers also read; larger trees use version 2 JSON lines so nothing is held whole.
+    """
     destination = baseline_path(worktree)
-    payload = {
-        "version": BASELINE_VERSION,
-        "paths": {
-            path: {"kind": entry.kind, "digest": entry.digest}
-            for path, entry in snapshot_managed_paths(worktree).items()
-        },
-    }
-    destination.write_text(
-        json.dumps(payload, ensure_ascii=True, indent=2, sort_keys=True) + "\n",
-        encoding="utf-8",
-    )
+    entries = iter_managed_paths(worktree)
+    head = list(itertools.islice(entries, BASELINE_V1_LIMIT + 1))
+    if len(head) <= BASELINE_V1_LIMIT:
+        payload = {
+            "version": 1,
+            "paths": {path: {"kind": entry.kind, "digest": entry.digest} for path, entry in head},
+        }
+        destination.write_text(json.dumps(payload, ensure_ascii=True, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        return destination
+    with destination.open("w", encoding="utf-8") as target:
+        target.write(json.dumps({"version": BASELINE_VERSION}) + "\n")
+        for path, entry in itertools.chain(head, entries):
+            record = {"digest": entry.digest, "kind": entry.kind, "path": path}
+            target.write(json.dumps(record, ensure_ascii=True, sort_keys=True) + "\n")
     return destination
 
 
-def load_baseline(worktree: Path) -> dict[str, Entry] | None:
+def _baseline_error(source: Path, exc: Exception) -> WorktreeError:
+    return WorktreeError(f"无法读取配置同步基线 {source}: {exc}")
+
+
+def _read_baseline_lines(source: Path, stream) -> Iterator[tuple[str, Entry]]:
+    previous = None
+    try:
+        for line in stream:
+            value = json.loads(line)
+            path = value["path"]
+            if previous is not None and path <= previous:
+                raise ValueError(f"entries out of order at {path}")
+            previous = path
+            yield path, Entry(value["kind"], value["digest"])
+    except (OSError, KeyError, TypeError, ValueError) as exc:
+        raise _baseline_error(source, exc) from exc
+
+
+@contextlib.contextmanager
+def open_baseline(worktree: Path) -> Iterator[Iterator[tuple[str, Entry]] | None]:
+    """Yield the baseline entries sorted by path, or None when the worktree has no baseline.
+
+    Version 2 baselines are JSON lines read one entry at a time while the context is open;
+    version 1 files are a single JSON object and are loaded whole.
+    """
     source = baseline_path(worktree)
-    if not source.exists():
-        return None
     try:
-        payload = json.loads(source.read_text(encoding="utf-8"))
-        if payload.get("version") != BASELINE_VERSION:
-            raise ValueError(f"unsupported version: {payload.get('version')}")
-        return {
-            path: Entry(value["kind"], value["digest"])
-            for path, value in payload["paths"].items()
-        }
-    except (OSError, KeyError, TypeError, ValueError, json.JSONDecodeError) as exc:
-        raise WorktreeError(f"无法读取配置同步基线 {source}: {exc}") from exc
+        stream = source.open(encoding="utf-8")
+    except FileNotFoundError:
+        yield None
+        return
+    except OSError as exc:
+        raise _baseline_error(source, exc) from exc
+    with stream:
+        try:
+            first_line = stream.readline()
+            header = None
+            with contextlib.suppress(ValueError):
+                header = json.loads(first_line)
+            if header == {"version": BASELINE_VERSION}:
+                entries = _read_baseline_lines(source, stream)
+            else:
+                payload = json.loads(first_line + stream.read())
+                if payload.get("version") != 1:
+                    raise ValueError(f"unsupported version: {payload.get('version')}")
+                paths = {path: Entry(value["kind"], value["digest"]) for path, value in payload["paths"].items()}
+                entries = iter(sorted(paths.items()))
+        except (OSError, AttributeError, KeyError, TypeError, ValueError) as exc:
+            raise _baseline_error(source, exc) from exc
+        yield entries
+
+
+def load_baseline(worktree: Path) -> dict[str, Entry] | None:
+    with open_baseline(worktree) as entries:
+        return dict(entries) if entries is not None else None
+
+
+def _merge_join(*sources: Iterable[tuple[str, Entry]]) -> Iterator[tuple[str, list[Entry | None]]]:
+    """Join path-sorted sources; yields each path once with its entry from every source."""
+    iterators = [iter(source) for source in sources]
+    heads = [next(iterator, None) for iterator in iterators]
+    while True:
+        paths = [head[0] for head in heads if head is not None]
+        if not paths:
+            return
+        path = min(paths)
+        entries: list[Entry | None] = []
+        for index, head in enumerate(heads):
+            if head is not None and head[0] == path:
+                entries.append(head[1])
+                heads[index] = next(iterators[index], None)
+            else:
+                entries.append(None)
+        yield path, entries
+
+
+def classify(
+    relative_path: str,
+    base: Entry | None,
+    main: Entry | None,
+    target: Entry | None,
+    has_baseline: bool,
+) -> SyncAction | None:
+    """Decide the sync action for one path from its baseline, main and worktree entries."""
+    if target is None:
+        if base is not None:
+            return SyncAction("IGNORE_DELETE", relative_path)
+        return None
+    if target.kind == "dir":
+        if (main is not None and main.kind != "dir") or (base is not None and base.kind != "dir"):
+            return SyncAction("CONFLICT", relative_path, "file type changed")
+        return None
+    if (main is not None and main.kind != target.kind) or (
+        base is not None and base.kind != target.kind
+    ):
+        return SyncAction("CONFLICT", relative_path, "file type changed")
+    if main == target:
+        return SyncAction("SKIP", relative_path, "same content")
+
+    if not has_baseline:
+        if main is None:
+            return SyncAction("COPY", relative_path)
+        return SyncAction("CONFLICT", relative_path, "legacy worktree has no baseline")
+
+    if base is None:
+        if main is None:
+            return SyncAction("COPY", relative_path)
+        return SyncAction("CONFLICT", relative_path, "both sides added different content")
+
+    if target == base:
+        return SyncAction("SKIP", relative_path, "worktree unchanged")
+    if main == base:
+        return SyncAction("UPDATE", relative_path)
+    return SyncAction("CONFLICT", relative_path, "both sides changed")
+
+
+def iter_sync_plan(main_repo: Path, worktree: Path) -> tuple[Iterator[SyncAction], bool]:
+    """Stream the sync plan in path order without holding any of the three trees in memory.
+
+    The baseline header is validated before returning; the walk and digests happen as the
+    returned iterator is consumed, so errors can also surface during iteration. The baseline
+    stays open only while the iterator runs and is closed when it is exhausted or closed.
+    """
+    with open_baseline(worktree) as baseline:
+        has_baseline = baseline is not None
+
+    def actions() -> Iterator[SyncAction]:
+        with open_baseline(worktree) as baseline:
+            if (baseline is not None) != has_baseline:
+                raise WorktreeError(f"配置同步基线在规划期间发生变化: {baseline_path(worktree)}")
+            joined = _merge_join(iter_managed_paths(main_repo), iter_managed_paths(worktree), baseline or ())
+            for relative_path, (main, target, base) in joined:
+                action = classify(relative_path, base, main, target, has_baseline)
+                if action is not None:
+                    yield action
+
+    return actions(), has_baseline
 
 
 def plan_sync(main_repo: Path, worktree: Path) -> tuple[list[SyncAction], bool]:
-    baseline = load_baseline(worktree)
-    main_snapshot = snapshot_managed_paths(main_repo)
-    worktree_snapshot = snapshot_managed_paths(worktree)
-    paths = sorted(set(main_snapshot) | set(worktree_snapshot) | set(baseline or {}))
-    actions: list[SyncAction] = []
-
-    for relative_path in paths:
-        base = baseline.get(relative_path) if baseline is not None else None
-        main = main_snapshot.get(relative_path)
-        target = worktree_snapshot.get(relative_path)
-
-        if target is None:
-            if base is not None:
-                actions.append(SyncAction("IGNORE_DELETE", relative_path))
-            continue
-        if target.kind == "dir":
-            if (main is not None and main.kind != "dir") or (base is not None and base.kind != "dir"):
-                actions.append(SyncAction("CONFLICT", relative_path, "file type changed"))
-            continue
-        if (main is not None and main.kind != target.kind) or (
-            base is not None and base.kind != target.kind
-        ):
-            actions.append(SyncAction("CONFLICT", relative_path, "file type changed"))
-            continue
-        if main == target:
-            actions.append(SyncAction("SKIP", relative_path, "same content"))
-            continue
+    actions, has_baseline = iter_sync_plan(main_repo, worktree)
+    return list(actions), has_baseline
 
-        if baseline is None:
-            if main is None:
-                actions.append(SyncAction("COPY", relative_path))
-            else:
-                actions.append(SyncAction("CONFLICT", relative_path, "legacy worktree has no baseline"))
-            continue
 
-        if base is None:
-            if main is None:
-                actions.append(SyncAction("COPY", relative_path))
-            else:
-                actions.append(SyncAction("CONFLICT", relative_path, "both sides added different content"))
-            continue
+class SpooledSyncPlan:
+    """Actions of a plan too large to keep in memory, spooled to an anonymous temporary file.
 
-        if target == base:
-            actions.append(SyncAction("SKIP", relative_path, "worktree unchanged"))
-        elif main == base:
-            actions.append(SyncAction("UPDATE", relative_path))
-        else:
-            actions.append(SyncAction("CONFLICT", relative_path, "both sides changed"))
+    Iterating replays exactly the actions that were checked, so printing and applying the
+    plan cannot pick up conflicts or copies that appear on disk after the precheck.
+    Close it (or use it as a context manager) once the plan is no longer needed.
+    """
 
-    return actions, baseline is not None
+    def __init__(self, actions: Iterable[SyncAction] = ()) -> None:
+        try:
+            self._spool = tempfile.TemporaryFile()
+        except OSError as exc:
+            raise WorktreeError(f"无法创建同步计划临时文件: {exc}") from exc
+        self._count = 0
+        self.extend(actions)
+
+    def extend(self, actions: Iterable[SyncAction]) -> None:
+        try:
+            self._spool.seek(0, os.SEEK_END)
+            for action in actions:
+                record = [action.action, action.relative_path, action.detail]
+                self._spool.write(json.dumps(record, ensure_ascii=True).encode("ascii") + b"\n")
+                self._count += 1
+        except OSError as exc:
+            raise WorktreeError(f"无法写入同步计划临时文件: {exc}") from exc
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[SyncAction]:
+        # 每次迭代各自记录读取位置，多个迭代器交替读取也互不干扰
+        offset = 0
+        for _ in range(self._count):
+            try:
+                self._spool.seek(offset)
+                line = self._spool.readline()
+            except OSError as exc:
+                raise WorktreeError(f"无法读取同步计划临时文件: {exc}") from exc
+            offset += len(line)
+            yield SyncAction(*json.loads(line))
+
+    def close(self) -> None:
+        self._spool.close()
+
+    def __enter__(self) -> SpooledSyncPlan:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"SpooledSyncPlan(<{self._count} actions>)"
 
 
 def _remove_destination(path: Path) -> None:
@@ -203,7 +380,7 @@ def _copy_atomically(source: Path, destination: Path) -> None:
             temporary.unlink()
 
 
-def apply_sync(main_repo: Path, worktree: Path, actions: list[SyncAction]) -> None:
+def apply_sync(main_repo: Path, worktree: Path, actions: Iterable[SyncAction]) -> None:
     for action in actions:
         if action.action not in {"COPY", "UPDATE"}:
             continue
@@ -215,13 +392,12 @@ def apply_sync(main_repo: Path, worktree: Path, actions: list[SyncAction]) -> No
             raise WorktreeError(f"同步 {action.relative_path} 失败: {exc}") from exc
 
 
-def print_sync_plan(actions: list[SyncAction], has_baseline: bool) -> None:
+def print_sync_plan(actions: Iterable[SyncAction], has_baseline: bool) -> None:
     print(f"Config baseline: {'found' if has_baseline else 'missing (legacy mode)'}")
+    counts: dict[str, int] = {}
     for action in actions:
         suffix = f" ({action.detail})" if action.detail else ""
         print(f"{action.action} {action.relative_path}{suffix}")
-    counts: dict[str, int] = {}
-    for action in actions:
         counts[action.action] = counts.get(action.action, 0) + 1
     summary = ", ".join(f"{key.lower()}={value}" for key, value in sorted(counts.items()))
     print(f"Config sync summary: {summary or 'no managed files'}")
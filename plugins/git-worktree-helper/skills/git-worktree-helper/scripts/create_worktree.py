@@ -8,7 +8,8 @@ import shutil
 import sys
 from pathlib import Path
 
-from worktree_common import WorktreeError, run_git
+from worktree_api import CreateResult, create
+from worktree_common import WorktreeError, rev_parse, run_git
 
 
 COPY_PATHS = [
@@ -22,8 +23,7 @@ COPY_PATHS = [
 
 
 def resolve_repo(path: Path) -> Path:
-    result = run_git(path, ["rev-parse", "--show-toplevel"])
-    return Path(result.stdout.strip()).resolve()
+    return Path(rev_parse(path, "--show-toplevel")).resolve()
 
 
 def current_branch(repo: Path) -> str:
@@ -84,22 +84,18 @@ def copy_config_paths(source_repo: Path, target_repo: Path, dry_run: bool) -> li
     return messages
 
 
-def create_worktree(repo: Path, target: Path, base_branch: str, new_branch: str, dry_run: bool) -> None:
-    command = ["git", "worktree", "add", "-b", new_branch, str(target), base_branch]
-    print(f"Repository: {repo}")
-    print(f"Target: {target}")
-    print(f"Base branch: {base_branch}")
-    print(f"New branch: {new_branch}")
-    print(f"Command: {' '.join(command)}")
-
-    if dry_run:
+def print_creation(result: CreateResult) -> None:
+    print(f"Repository: {result.repo}")
+    print(f"Target: {result.target}")
+    print(f"Base branch: {result.base_branch}")
+    print(f"New branch: {result.new_branch}")
+    print(f"Command: {' '.join(result.command)}")
+    if result.dry_run:
         print("Dry run: worktree will not be created.")
-        return
-
-    result = run_git(repo, ["worktree", "add", "-b", new_branch, str(target), base_branch], check=False)
-    if result.returncode != 0:
-        detail = result.stderr.strip() or result.stdout.strip()
-        raise WorktreeError(detail or "git worktree add failed")
+    for message in result.copy_messages:
+        print(message)
+    if result.baseline is not None:
+        print(f"BASELINE {result.baseline}")
 
 
 def parse_args(argv: list[str]) -> argparse.Namespace:
@@ -115,33 +111,31 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
 
 
 def main(argv: list[str]) -> int:
-    args = parse_args(argv)
-
-    try:
-        repo = resolve_repo(Path(args.repo).expanduser().resolve())
-        target = validate_target(Path(args.target_dir))
-        base_branch = args.base_branch or current_branch(repo)
-        new_branch = args.new_branch or target.name
-        validate_base_ref(repo, base_branch)
-        validate_new_branch(repo, new_branch)
-
-        create_worktree(repo, target, base_branch, new_branch, args.dry_run)
-
-        copy_target = target if not args.dry_run else target
-        for message in copy_config_paths(repo, copy_target, args.dry_run):
-            print(message)
+    parse_args(argv)
+    from worktree_service import dispatch_to_service
 
-        if not args.dry_run:
-            from config_sync import write_baseline
+    exit_code = dispatch_to_service("create", argv)
+    if exit_code is not None:
+        return exit_code
+    return run_cli(argv)
 
-            baseline = write_baseline(target)
-            print(f"BASELINE {baseline}")
 
-        print("Done")
-        return 0
+def run_cli(argv: list[str]) -> int:
+    args = parse_args(argv)
+    try:
+        result = create(
+            args.target_dir,
+            repo=args.repo,
+            base_branch=args.base_branch,
+            new_branch=args.new_branch,
+            dry_run=args.dry_run,
+        )
     except WorktreeError as exc:
         print(f"ERROR: {exc}", file=sys.stderr)
         return 1
+    print_creation(result)
+    print("Done")
+    return 0
 
 
 if __name__ == "__main__":
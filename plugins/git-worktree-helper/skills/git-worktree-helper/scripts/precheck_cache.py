@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""Cache remove_worktree precheck results for repeated dry runs on unchanged worktrees."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import stat as stat_module
+from dataclasses import dataclass
+from pathlib import Path
+
+from config_sync import BASELINE_FILE, MANAGED_PATHS, SyncAction, worktree_metadata_dir
+from worktree_common import WorktreeError, rev_parse, run_git
+
+
+CACHE_FILE = "git-worktree-helper-precheck.json"
+CACHE_VERSION = 1
+# 设置为非空值时跳过缓存，每次都完整预检
+DISABLE_ENV = "GIT_WORKTREE_HELPER_NO_PRECHECK_CACHE"
+
+
+@dataclass(frozen=True)
+class PrecheckResult:
+    sync_actions: list[SyncAction]
+    has_baseline: bool
+    failures: list[tuple[str, str]]
+    managed_dirty: bool
+
+
+def _stat_line(relative_path: str, stat: os.stat_result) -> bytes:
+    # ctime 兼顾 copy2 / touch -r 保留 mtime 的写入与权限位变化
+    return f"{relative_path}\0{stat.st_mtime_ns}\0{stat.st_ctime_ns}\0{stat.st_size}\0{stat.st_ino}\n".encode(
+        "utf-8", "surrogateescape"
+    )
+
+
+def _walk(root: Path, relative_path: str, skip: frozenset[str], digest) -> None:
+    try:
+        stat = os.lstat(root / relative_path) if relative_path else os.lstat(root)
+    except FileNotFoundError:
+        digest.update(f"{relative_path}\0missing\n".encode("utf-8", "surrogateescape"))
+        return
+    digest.update(_stat_line(relative_path, stat))
+    if not stat_module.S_ISDIR(stat.st_mode):
+        return
+    with os.scandir(root / relative_path) as children:
+        names = sorted(child.name for child in children)
+    for name in names:
+        child = f"{relative_path}/{name}" if relative_path else name
+        if child not in skip:
+            _walk(root, child, skip, digest)
+
+
+def tree_digest(root: Path, paths: list[str] | None = None, skip: frozenset[str] = frozenset()) -> str:
+    """Digest of path names and stat data under root (or the given relative paths), skipping `skip`."""
+    digest = hashlib.sha256()
+    for relative_path in paths if paths is not None else [""]:
+        _walk(root, relative_path, skip, digest)
+    return digest.hexdigest()
+
+
+def ignored_paths(worktree: Path) -> list[str]:
+    """Untracked ignored files and directories; changes under them never affect `git status`."""
+    result = run_git(worktree, ["ls-files", "-z", "--others", "--ignored", "--exclude-standard", "--directory"])
+    return sorted(path.rstrip("/") for path in result.stdout.split("\0") if path)
+
+
+def _file_stat(path: Path) -> list[int]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return []
+    return [stat.st_mtime_ns, stat.st_ctime_ns, stat.st_size, stat.st_ino]
+
+
+def _file_sha256(path: Path) -> str:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return ""
+
+
+def _metadata_dirs(worktree: Path) -> tuple[Path, Path]:
+    """Return (git dir, common dir) of a linked worktree without spawning git when possible."""
+    marker = worktree / ".git"
+    if marker.is_file():
+        content = marker.read_text(encoding="utf-8").strip()
+        if content.startswith("gitdir: "):
+            git_dir = (worktree / content[len("gitdir: "):]).resolve()
+            common = (git_dir / "commondir").read_text(encoding="utf-8").strip()
+            return git_dir, (git_dir / common).resolve()
+    git_dir = worktree_metadata_dir(worktree)
+    common_dir = Path(rev_parse(worktree, "--git-common-dir"))
+    if not common_dir.is_absolute():
+        common_dir = worktree / common_dir
+    return git_dir, common_dir.resolve()
+
+
+def _head_state(git_dir: Path, common_dir: Path) -> list[str]:
+    """HEAD target and its loose ref value; packed refs are covered by the packed-refs stat."""
+    head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    if not head.startswith("ref: "):
+        return [head]
+    ref = head[len("ref: "):]
+    try:
+        return [ref, (common_dir / ref).read_text(encoding="utf-8").strip()]
+    except FileNotFoundError:
+        return [ref, ""]
+
+
+def cache_key(
+    main_repo: Path,
+    worktree: Path,
+    git_dir: Path,
+    common_dir: Path,
+    ignored: list[str],
+    options: dict[str, bool],
+) -> dict:
+    """Everything a precheck result depends on; any change invalidates the cached result."""
+    if (common_dir / "reftable").exists():
+        # reftable 存储没有可直接读取的引用文件，改用 git 解析两个 HEAD
+        refs = [
+            run_git(main_repo, ["rev-parse", "HEAD", "--symbolic-full-name", "HEAD"]).stdout.split(),
+            run_git(worktree, ["rev-parse", "HEAD"]).stdout.split(),
+        ]
+    else:
+        # 主仓库 HEAD 决定合并检查的基准；worktree 的 HEAD 即分支最新提交（detached 时为检出的提交）
+        refs = [_head_state(common_dir, common_dir), _head_state(git_dir, common_dir)]
+    skip = frozenset([".git", *ignored])
+    return {
+        "options": options,
+        "main_head": refs[0],
+        "branch_tip": refs[1],
+        "packed_refs": _file_stat(common_dir / "packed-refs"),
+        "index": _file_stat(git_dir / "index"),
+        "exclude": _file_stat(common_dir / "info" / "exclude"),
+        "worktree": tree_digest(worktree, skip=skip),
+        "main_managed": tree_digest(main_repo, paths=MANAGED_PATHS),
+        "baseline": _file_sha256(git_dir / BASELINE_FILE),
+    }
+
+
+class PrecheckCache:
+    """A cached precheck result stored next to the worktree's configuration baseline.
+
+    `open` computes the key before the prechecks run, so changes made while they run
+    invalidate the stored result on the next dry run instead of being hidden by it.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        name: str,
+        key: dict,
+        ignored: list[str],
+        result: PrecheckResult | None,
+    ) -> None:
+        self.path = path
+        self.name = name
+        self.key = key
+        self.ignored = ignored
+        self.result = result
+
+    @classmethod
+    def open(cls, main_repo: Path, worktree: Path, options: dict[str, bool]) -> PrecheckCache | None:
+        """Return the cache for worktree, or None when caching is disabled or the key cannot be built."""
+        if os.environ.get(DISABLE_ENV):
+            return None
+        try:
+            git_dir, common_dir = _metadata_dirs(worktree)
+            path = git_dir / CACHE_FILE
+            # 每种选项组合各保留一份结果，不同选项交替 dry run 时互不覆盖
+            name = ",".join(f"{option}={int(value)}" for option, value in sorted(options.items()))
+            stored = _read(path).get(name)
+            if stored is not None:
+                key = cache_key(main_repo, worktree, git_dir, common_dir, stored["ignored"], options)
+                if key == stored["key"]:
+                    return cls(path, name, key, stored["ignored"], _decode_result(stored["result"]))
+            ignored = ignored_paths(worktree)
+            return cls(path, name, cache_key(main_repo, worktree, git_dir, common_dir, ignored, options), ignored, None)
+        except (WorktreeError, OSError):
+            # 无法计算键（如尚无提交）时不缓存，按原流程完整预检
+            return None
+
+    def store(self, result: PrecheckResult) -> None:
+        entries = _read(self.path)
+        entries[self.name] = {
+            "key": self.key,
+            "ignored": self.ignored,
+            "result": {
+                "sync_actions": [[action.action, action.relative_path, action.detail] for action in result.sync_actions],
+                "has_baseline": result.has_baseline,
+                "failures": [list(failure) for failure in result.failures],
+                "managed_dirty": result.managed_dirty,
+            },
+        }
+        payload = {"version": CACHE_VERSION, "entries": entries}
+        temporary = self.path.with_name(f"{self.path.name}.tmp-{os.getpid()}")
+        try:
+            temporary.write_text(json.dumps(payload, ensure_ascii=True, sort_keys=True) + "\n", encoding="utf-8")
+            os.replace(temporary, self.path)
+        except OSError:
+            # 缓存写入失败不影响预检结果
+            if temporary.exists():
+                temporary.unlink()
+
+
+def _read(path: Path) -> dict[str, dict]:
+    """Stored entries by option name; unreadable or outdated files count as empty."""
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(payload, dict) or payload.get("version") != CACHE_VERSION:
+        return {}
+    entries = payload.get("entries")
+    if not isinstance(entries, dict):
+        return {}
+    return {
+        name: entry
+        for name, entry in entries.items()
+        if isinstance(entry, dict) and all(field in entry for field in ("key", "ignored", "result"))
+    }
+
+
+def _decode_result(payload: dict) -> PrecheckResult | None:
+    try:
+        return PrecheckResult(
+            sync_actions=[SyncAction(*action) for action in payload["sync_actions"]],
+            has_baseline=bool(payload["has_baseline"]),
+            failures=[(code, detail) for code, detail in payload["failures"]],
+            managed_dirty=bool(payload["managed_dirty"]),
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
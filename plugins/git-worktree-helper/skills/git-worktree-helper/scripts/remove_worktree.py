@@ -7,13 +7,9 @@ import argparse
 import sys
 from pathlib import Path
 
-from config_sync import (
-    apply_sync,
-    is_managed_status_path,
-    plan_sync,
-    print_sync_plan,
-)
-from worktree_common import WorktreeError, run_git
+from config_sync import is_managed_status_path, print_sync_plan
+from worktree_api import RemoveError, RemoveResult, remove
+from worktree_common import WorktreeError, rev_parse, run_git
 
 
 EXIT_OK = 0
@@ -23,10 +19,9 @@ EXIT_PRECHECK = 2
 
 def resolve_main_repo(start: Path) -> Path:
     """Return the main worktree path even when invoked inside a linked worktree."""
-    common_dir = run_git(start, ["rev-parse", "--git-common-dir"]).stdout.strip()
-    common_path = Path(common_dir)
+    common_path = Path(rev_parse(start, "--git-common-dir"))
     if not common_path.is_absolute():
-        toplevel = run_git(start, ["rev-parse", "--show-toplevel"]).stdout.strip()
+        toplevel = rev_parse(start, "--show-toplevel")
         common_path = (Path(toplevel) / common_path).resolve()
     else:
         common_path = common_path.resolve()
@@ -34,7 +29,7 @@ def resolve_main_repo(start: Path) -> Path:
     if common_path.name == ".git":
         return common_path.parent
     # bare 仓库或自定义 GIT_DIR：退化为 show-toplevel
-    return Path(run_git(start, ["rev-parse", "--show-toplevel"]).stdout.strip()).resolve()
+    return Path(rev_parse(start, "--show-toplevel")).resolve()
 
 
 def parse_worktree_list(repo: Path) -> list[dict]:
@@ -87,7 +82,8 @@ def repo_head_branch(repo: Path) -> str | None:
 
 
 def worktree_dirty_paths(target: Path) -> tuple[list[str], list[str]]:
-    result = run_git(target, ["status", "--porcelain=v1", "-z", "--untracked-files=all"])
+    # 不顺带刷新 index：轮询 dry run 时既不与用户的 git 操作争用 index.lock，也不使预检缓存失效
+    result = run_git(target, ["--no-optional-locks", "status", "--porcelain=v1", "-z", "--untracked-files=all"])
     managed: list[str] = []
     unmanaged: list[str] = []
     records = result.stdout.split("\0")
@@ -170,47 +166,24 @@ def print_precheck_report(failures: list[tuple[str, str]]) -> None:
         print("ACTION REQUIRED: 若确认丢弃这些改动 / 强制删除未合并分支，请使用 --force 重新执行。")
 
 
-def remove_worktree(
-    main_repo: Path,
-    target: Path,
-    branch: str | None,
-    force_remove: bool,
-    force_branch: bool,
-    keep_branch: bool,
-    dry_run: bool,
-) -> None:
-    remove_cmd = ["worktree", "remove"]
-    if force_remove:
-        remove_cmd.append("--force")
-    remove_cmd.append(str(target))
-
-    branch_cmd: list[str] | None = None
-    if branch and not keep_branch:
-        branch_cmd = ["branch", "-D" if force_branch else "-d", branch]
-
-    print(f"Repository: {main_repo}")
-    print(f"Target: {target}")
-    print(f"Branch: {branch or '(无 / detached)'}")
-    print(f"Command: git {' '.join(remove_cmd)}")
-    if branch_cmd:
-        print(f"Command: git {' '.join(branch_cmd)}")
-
-    if dry_run:
+def print_removal(result: RemoveResult) -> None:
+    """Render a RemoveResult that passed its prechecks (see worktree_api)."""
+    check = result.precheck
+    if result.dry_run:
+        print("Dry run: 不执行配置同步。")
+    elif result.synced:
+        print("SYNCED managed configuration")
+    print(f"Repository: {check.main_repo}")
+    print(f"Target: {check.target}")
+    print(f"Branch: {check.branch or '(无 / detached)'}")
+    for command in result.commands:
+        print(f"Command: git {' '.join(command)}")
+    if result.dry_run:
         print("Dry run: 不执行删除。")
-        return
-
-    result = run_git(main_repo, remove_cmd, check=False)
-    if result.returncode != 0:
-        detail = result.stderr.strip() or result.stdout.strip()
-        raise WorktreeError(detail or "git worktree remove failed")
-    print(f"REMOVED worktree {target}")
-
-    if branch_cmd:
-        result = run_git(main_repo, branch_cmd, check=False)
-        if result.returncode != 0:
-            detail = result.stderr.strip() or result.stdout.strip()
-            raise WorktreeError(detail or f"git branch 删除失败：{branch}")
-        print(f"DELETED branch {branch}")
+    if result.removed:
+        print(f"REMOVED worktree {check.target}")
+    if result.branch_deleted:
+        print(f"DELETED branch {check.branch}")
 
 
 def parse_args(argv: list[str]) -> argparse.Namespace:
@@ -226,65 +199,54 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
 
 
 def main(argv: list[str]) -> int:
+    parse_args(argv)
+    from worktree_service import dispatch_to_service
+
+    exit_code = dispatch_to_service("remove", argv)
+    if exit_code is not None:
+        return exit_code
+    return run_cli(argv)
+
+
+def run_cli(argv: list[str]) -> int:
     args = parse_args(argv)
+    error: RemoveError | None = None
     try:
-        main_repo = resolve_main_repo(Path(args.repo).expanduser().resolve())
-        target = Path(args.target_dir).expanduser().resolve()
-        entries = parse_worktree_list(main_repo)
-        entry = find_target_entry(entries, target)
-        if entry is None:
-            raise WorktreeError(f"目标不是该仓库已注册的 worktree：{target}")
-        if main_worktree_path(entries, main_repo) == target:
-            print_precheck_report([("main_worktree", "拒绝清理主 worktree，--force 也不放行")])
-            return EXIT_PRECHECK
-
-        try:
-            sync_actions, has_baseline = plan_sync(main_repo, target)
-        except (WorktreeError, OSError) as exc:
-            print_precheck_report([("config_sync_error", str(exc))])
-            return EXIT_PRECHECK
-        print_sync_plan(sync_actions, has_baseline)
-        conflicts = [action for action in sync_actions if action.action == "CONFLICT"]
-        if conflicts:
-            detail = ", ".join(action.relative_path for action in conflicts[:10])
-            print_precheck_report([("config_sync_conflict", detail)])
-            return EXIT_PRECHECK
-
-        if args.force:
-            branch = entry.get("branch")
-            managed_dirty = bool(worktree_dirty_paths(target)[0])
-        else:
-            failures, entry, managed_dirty = run_prechecks(main_repo, target, entries, args.keep_branch)
-            if failures:
-                print_precheck_report(failures)
-                return EXIT_PRECHECK
-            branch = entry.get("branch") if entry else None
-
-        if args.dry_run:
-            print("Dry run: 不执行配置同步。")
-        else:
-            try:
-                apply_sync(main_repo, target, sync_actions)
-            except WorktreeError as exc:
-                print_precheck_report([("config_sync_error", str(exc))])
-                return EXIT_PRECHECK
-            print("SYNCED managed configuration")
-
-        remove_worktree(
-            main_repo=main_repo,
-            target=target,
-            branch=branch,
-            force_remove=args.force or managed_dirty,
-            force_branch=args.force,
+        result = remove(
+            args.target_dir,
+            repo=args.repo,
             keep_branch=args.keep_branch,
+            force=args.force,
             dry_run=args.dry_run,
         )
-        print("Done")
-        return EXIT_OK
+    except RemoveError as exc:
+        # 删除已开始：先输出已完成的步骤，再报告失败
+        result, error = exc.result, exc
     except WorktreeError as exc:
         print(f"ERROR: {exc}", file=sys.stderr)
         return EXIT_ERROR
 
+    check = result.precheck
+    if check.cached:
+        print("Precheck cache: hit")
+    if check.plan is not None:
+        # 超大计划从临时文件读取，打印后即关闭
+        with check.plan:
+            try:
+                print_sync_plan(check.plan.actions, check.plan.has_baseline)
+            except WorktreeError as exc:
+                print(f"ERROR: {exc}", file=sys.stderr)
+                return EXIT_ERROR
+    if result.blocked:
+        print_precheck_report(check.failures)
+        return EXIT_PRECHECK
+    print_removal(result)
+    if error is not None:
+        print(f"ERROR: {error}", file=sys.stderr)
+        return EXIT_ERROR
+    print("Done")
+    return EXIT_OK
+
 
 if __name__ == "__main__":
     raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""In-process API for creating, planning, prechecking and removing worktrees.
+
+Functions raise WorktreeError for invalid arguments and git failures and otherwise
+return typed results; `create_worktree.py` and `remove_worktree.py` only render them.
+A blocked removal is a normal result (`RemoveResult.blocked`), not an exception.
+
+    from worktree_api import create, plan, precheck, remove
+
+    result = remove("../task", repo=".", dry_run=True)
+    if result.blocked:
+        for code, detail in result.precheck.failures:
+            ...
+"""
+
+from __future__ import annotations
+
+import dataclasses
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+from config_sync import SyncAction
+from worktree_common import WorktreeError, run_git
+
+
+# 即使 --force 也不能放行的预检代码
+UNFORCEABLE_CODES = ("main_worktree", "config_sync_conflict", "config_sync_error")
+# 预检最多在内存中保留的同步动作数；超出后写入临时文件，且不写入预检缓存
+PLAN_MEMORY_LIMIT = 10000
+
+
+@dataclass(frozen=True)
+class CreateResult:
+    repo: Path
+    target: Path
+    base_branch: str
+    new_branch: str
+    copy_messages: list[str]
+    baseline: Path | None
+    dry_run: bool
+
+    @property
+    def command(self) -> list[str]:
+        return ["git", "worktree", "add", "-b", self.new_branch, str(self.target), self.base_branch]
+
+
+@dataclass(frozen=True)
+class SyncPlan:
+    """`actions` is a list, or a SpooledSyncPlan for plans over PLAN_MEMORY_LIMIT actions.
+
+    Close the plan (or use it as a context manager) once it has been applied and printed;
+    remove() leaves it open so callers can still report it.
+    """
+
+    actions: Iterable[SyncAction]
+    has_baseline: bool
+
+    def close(self) -> None:
+        close = getattr(self.actions, "close", None)
+        if close is not None:
+            close()
+
+    def __enter__(self) -> SyncPlan:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @property
+    def conflicts(self) -> list[SyncAction]:
+        return [action for action in self.actions if action.action == "CONFLICT"]
+
+
+@dataclass(frozen=True)
+class Precheck:
+    """Outcome of the removal prechecks; `plan` is None when no sync plan could be built."""
+
+    main_repo: Path
+    target: Path
+    branch: str | None
+    plan: SyncPlan | None
+    failures: list[tuple[str, str]]
+    managed_dirty: bool
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+    @property
+    def forceable(self) -> bool:
+        """Whether rerunning with force=True could get past the failures."""
+        return bool(self.failures) and all(code not in UNFORCEABLE_CODES for code, _ in self.failures)
+
+
+@dataclass(frozen=True)
+class RemoveResult:
+    precheck: Precheck
+    commands: list[list[str]]
+    synced: bool
+    removed: bool
+    branch_deleted: bool
+    dry_run: bool
+
+    @property
+    def blocked(self) -> bool:
+        return not self.precheck.ok
+
+
+class RemoveError(WorktreeError):
+    """A git step failed after removal started; `result` records what was already done."""
+
+    def __init__(self, message: str, result: RemoveResult) -> None:
+        super().__init__(message)
+        self.result = result
+
+
+def enable_caches() -> None:
+    """Memoize repository discovery and file digests, as the resident service does."""
+    from config_sync import enable_digest_cache
+    from worktree_common import enable_discovery_cache
+
+    enable_discovery_cache()
+    enable_digest_cache()
+
+
+def create(
+    target: str | Path,
+    repo: str | Path = ".",
+    base_branch: str | None = None,
+    new_branch: str | None = None,
+    dry_run: bool = False,
+) -> CreateResult:
+    """Create a worktree on a new branch and copy local configuration into it."""
+    from create_worktree import (
+        copy_config_paths,
+        current_branch,
+        resolve_repo,
+        validate_base_ref,
+        validate_new_branch,
+        validate_target,
+    )
+
+    repo_path = resolve_repo(Path(repo).expanduser().resolve())
+    target_path = validate_target(Path(target))
+    base = base_branch or current_branch(repo_path)
+    branch = new_branch or target_path.name
+    validate_base_ref(repo_path, base)
+    validate_new_branch(repo_path, branch)
+
+    baseline = None
+    if not dry_run:
+        result = run_git(repo_path, ["worktree", "add", "-b", branch, str(target_path), base], check=False)
+        if result.returncode != 0:
+            detail = result.stderr.strip() or result.stdout.strip()
+            raise WorktreeError(detail or "git worktree add failed")
+    messages = copy_config_paths(repo_path, target_path, dry_run)
+    if not dry_run:
+        from config_sync import write_baseline
+
+        baseline = write_baseline(target_path)
+    return CreateResult(repo_path, target_path, base, branch, messages, baseline, dry_run)
+
+
+def plan(target: str | Path, repo: str | Path = ".") -> SyncPlan:
+    """Compute the configuration sync plan for removing target; changes nothing.
+
+    The returned actions are a list; use config_sync.iter_sync_plan to stream very large trees.
+    """
+    from config_sync import plan_sync
+    from remove_worktree import resolve_main_repo
+
+    main_repo = resolve_main_repo(Path(repo).expanduser().resolve())
+    actions, has_baseline = plan_sync(main_repo, Path(target).expanduser().resolve())
+    return SyncPlan(actions, has_baseline)
+
+
+def precheck(
+    target: str | Path,
+    repo: str | Path = ".",
+    keep_branch: bool = False,
+    force: bool = False,
+    use_cache: bool = True,
+) -> Precheck:
+    """Run the removal prechecks without changing anything.
+
+    With force=True only the checks that force cannot bypass are reported. use_cache
+    reuses the result of an earlier call while the worktree is unchanged (see precheck_cache).
+    """
+    from config_sync import SpooledSyncPlan, iter_sync_plan
+    from precheck_cache import PrecheckCache, PrecheckResult
+    from remove_worktree import (
+        find_target_entry,
+        main_worktree_path,
+        parse_worktree_list,
+        resolve_main_repo,
+        run_prechecks,
+        worktree_dirty_paths,
+    )
+
+    main_repo = resolve_main_repo(Path(repo).expanduser().resolve())
+    target_path = Path(target).expanduser().resolve()
+    entries = parse_worktree_list(main_repo)
+    entry = find_target_entry(entries, target_path)
+    if entry is None:
+        raise WorktreeError(f"目标不是该仓库已注册的 worktree：{target_path}")
+    branch = entry.get("branch")
+    if main_worktree_path(entries, main_repo) == target_path:
+        failures = [("main_worktree", "拒绝清理主 worktree，--force 也不放行")]
+        return Precheck(main_repo, target_path, branch, None, failures, False)
+
+    cache = PrecheckCache.open(main_repo, target_path, {"keep_branch": keep_branch, "force": force}) if use_cache else None
+    cached = cache.result if cache is not None else None
+    if cached is not None:
+        sync_plan = SyncPlan(cached.sync_actions, cached.has_baseline)
+        conflicts = sync_plan.conflicts
+        failures, managed_dirty = cached.failures, cached.managed_dirty
+    else:
+        actions: list[SyncAction] = []
+        spooled: SpooledSyncPlan | None = None
+        conflicts = []
+        try:
+            stream, has_baseline = iter_sync_plan(main_repo, target_path)
+            for action in stream:
+                if action.action == "CONFLICT" and len(conflicts) < 10:
+                    conflicts.append(action)
+                actions.append(action)
+                if len(actions) > PLAN_MEMORY_LIMIT:
+                    if spooled is None:
+                        spooled = SpooledSyncPlan()
+                    spooled.extend(actions)
+                    actions.clear()
+            if spooled is not None:
+                spooled.extend(actions)
+        except (WorktreeError, OSError) as exc:
+            if spooled is not None:
+                spooled.close()
+            return Precheck(main_repo, target_path, branch, None, [("config_sync_error", str(exc))], False)
+        sync_plan = SyncPlan(actions if spooled is None else spooled, has_baseline)
+        if force:
+            failures, managed_dirty = [], bool(worktree_dirty_paths(target_path)[0])
+        else:
+            failures, _, managed_dirty = run_prechecks(main_repo, target_path, entries, keep_branch)
+        if cache is not None and spooled is None:
+            cache.store(PrecheckResult(actions, has_baseline, failures, managed_dirty))
+
+    if conflicts:
+        # 配置冲突优先于其他预检报告，且不能用 force 绕过
+        detail = ", ".join(action.relative_path for action in conflicts[:10])
+        failures = [("config_sync_conflict", detail)]
+    return Precheck(main_repo, target_path, branch, sync_plan, failures, managed_dirty, cached is not None)
+
+
+def removal_commands(check: Precheck, force: bool, keep_branch: bool) -> list[list[str]]:
+    """The git commands remove() runs for a passing precheck."""
+    remove_command = ["worktree", "remove"]
+    if force or check.managed_dirty:
+        remove_command.append("--force")
+    remove_command.append(str(check.target))
+    commands = [remove_command]
+    if check.branch and not keep_branch:
+        commands.append(["branch", "-D" if force else "-d", check.branch])
+    return commands
+
+
+def remove(
+    target: str | Path,
+    repo: str | Path = ".",
+    keep_branch: bool = False,
+    force: bool = False,
+    dry_run: bool = False,
+) -> RemoveResult:
+    """Sync managed configuration back to the main repository, then remove the worktree and branch.
+
+    Dry runs reuse cached precheck results; real removals always recheck.
+    """
+    from config_sync import apply_sync
+
+    check = precheck(target, repo, keep_branch=keep_branch, force=force, use_cache=dry_run)
+    if not check.ok:
+        return RemoveResult(check, [], False, False, False, dry_run)
+    commands = removal_commands(check, force, keep_branch)
+    if dry_run:
+        return RemoveResult(check, commands, False, False, False, dry_run)
+
+    try:
+        apply_sync(check.main_repo, check.target, check.plan.actions)
+    except WorktreeError as exc:
+        check = dataclasses.replace(check, failures=[("config_sync_error", str(exc))])
+        return RemoveResult(check, [], False, False, False, dry_run)
+
+    result = RemoveResult(check, commands, True, False, False, dry_run)
+    for command in commands:
+        completed = run_git(check.main_repo, command, check=False)
+        if completed.returncode != 0:
+            detail = completed.stderr.strip() or completed.stdout.strip()
+            if command[0] == "worktree":
+                raise RemoveError(detail or "git worktree remove failed", result)
+            raise RemoveError(detail or f"git branch 删除失败：{check.branch}", result)
+        if command[0] == "worktree":
+            result = dataclasses.replace(result, removed=True)
+        else:
+            result = dataclasses.replace(result, branch_deleted=True)
+    return result
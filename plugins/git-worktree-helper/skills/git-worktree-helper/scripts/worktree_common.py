@@ -3,6 +3,7 @@
 
 from __future__ import annotations
 
+import os
 import subprocess
 from pathlib import Path
 
@@ -11,6 +12,10 @@ class WorktreeError(Exception):
     """Raised for expected user-facing failures."""
 
 
+# 仅常驻服务启用：按目录缓存 `git rev-parse` 的仓库发现结果
+_DISCOVERY_CACHE: dict[tuple[str, str], tuple[tuple[int, ...], str]] | None = None
+
+
 def run_git(repo: Path, args: list[str], check: bool = True) -> subprocess.CompletedProcess[str]:
     result = subprocess.run(
         ["git", *args],
@@ -24,3 +29,41 @@ def run_git(repo: Path, args: list[str], check: bool = True) -> subprocess.Compl
         detail = result.stderr.strip() or result.stdout.strip()
         raise WorktreeError(detail or f"git {' '.join(args)} failed")
     return result
+
+
+def enable_discovery_cache() -> None:
+    global _DISCOVERY_CACHE
+    if _DISCOVERY_CACHE is None:
+        _DISCOVERY_CACHE = {}
+
+
+def _directory_fingerprint(repo: Path) -> tuple[int, ...]:
+    """Identity of a directory and its `.git` entry; changes when a worktree is recreated."""
+    stat = repo.stat()
+    fingerprint = (stat.st_dev, stat.st_ino)
+    try:
+        marker = (repo / ".git").lstat()
+    except OSError:
+        return fingerprint
+    # linked worktree 的 `.git` 是文件，重建时会被重写；主仓库 `.git` 目录只比较 inode
+    marker_mtime = 0 if os.path.isdir(repo / ".git") else marker.st_mtime_ns
+    return (*fingerprint, marker.st_ino, marker_mtime)
+
+
+def rev_parse(repo: Path, option: str) -> str:
+    """Return `git rev-parse <option>` output, memoized while the discovery cache is enabled."""
+    if _DISCOVERY_CACHE is None:
+        return run_git(repo, ["rev-parse", option]).stdout.strip()
+
+    key = (str(repo), option)
+    try:
+        fingerprint = _directory_fingerprint(repo)
+    except OSError:
+        _DISCOVERY_CACHE.pop(key, None)
+        return run_git(repo, ["rev-parse", option]).stdout.strip()
+    cached = _DISCOVERY_CACHE.get(key)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+    value = run_git(repo, ["rev-parse", option]).stdout.strip()
+    _DISCOVERY_CACHE[key] = (fingerprint, value)
+    return value
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""Long-running worktree service that serves create/remove/plan/inventory over a Unix socket.
+
+Requests run one at a time: forwarded create/remove change the process-wide working
+directory and redirect stdout, so the service holds a single lock around every operation
+and concurrent clients queue behind it. Forwarded runs only proceed when the client's
+git-relevant environment matches the service's; otherwise the client runs in-process.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import traceback
+from pathlib import Path
+
+from worktree_common import WorktreeError
+
+
+SOCKET_ENV = "GIT_WORKTREE_HELPER_SOCKET"
+DISABLE_ENV = "GIT_WORKTREE_HELPER_NO_SERVICE"
+PROTOCOL_VERSION = 2
+# 影响 git 与脚本行为的环境变量；转发时与服务端比较，不同则由客户端在进程内执行
+ENVIRONMENT_NAMES = ("HOME", "PATH", "XDG_CONFIG_HOME")
+ENVIRONMENT_PREFIX = "GIT_"
+CONNECT_TIMEOUT = 0.2
+# create/remove 在服务端串行执行，可能排在其他请求之后
+RESPONSE_TIMEOUT = 600.0
+POLL_INTERVAL = 0.5
+
+
+def default_socket_path() -> Path:
+    configured = os.environ.get(SOCKET_ENV)
+    if configured:
+        return Path(configured).expanduser()
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "git-worktree-helper.sock"
+    # 共享临时目录下放在仅本用户可访问的子目录中，其他用户无法抢先占用路径
+    uid = os.getuid() if hasattr(os, "getuid") else os.getpid()
+    return Path(tempfile.gettempdir()) / f"git-worktree-helper-{uid}" / "service.sock"
+
+
+def relevant_environment() -> dict[str, str]:
+    """Environment variables that change what create/remove do (HOME, PATH, GIT_*, ...)."""
+    return {
+        name: value
+        for name, value in os.environ.items()
+        if (name in ENVIRONMENT_NAMES or name.startswith(ENVIRONMENT_PREFIX)) and name not in (SOCKET_ENV, DISABLE_ENV)
+    }
+
+
+def _owned_privately(path: Path) -> bool:
+    """The socket and its directory belong to the current user and the directory is 0700."""
+    if not hasattr(os, "getuid"):
+        return True
+    try:
+        socket_stat = path.lstat()
+        directory_stat = path.parent.stat()
+    except OSError:
+        return False
+    uid = os.getuid()
+    return socket_stat.st_uid == uid and directory_stat.st_uid == uid and directory_stat.st_mode & 0o077 == 0
+
+
+def _connect(path: Path) -> socket.socket | None:
+    if not hasattr(socket, "AF_UNIX") or not _owned_privately(path):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(CONNECT_TIMEOUT)
+    try:
+        client.connect(str(path))
+    except OSError:
+        client.close()
+        return None
+    client.settimeout(RESPONSE_TIMEOUT)
+    return client
+
+
+def request(payload: dict, path: Path | None = None) -> dict | None:
+    """Send one request to the service; return None when no service is listening.
+
+    Once connected, the request may already be running on the service, so later failures
+    raise WorktreeError instead of letting the caller retry in-process.
+    """
+    client = _connect(path or default_socket_path())
+    if client is None:
+        return None
+    try:
+        with client, client.makefile("rwb") as stream:
+            stream.write(json.dumps({"version": PROTOCOL_VERSION, **payload}, ensure_ascii=True).encode("utf-8") + b"\n")
+            stream.flush()
+            line = stream.readline()
+        response = json.loads(line) if line else None
+    except socket.timeout as exc:
+        raise WorktreeError(f"worktree 服务 {RESPONSE_TIMEOUT:.0f} 秒内未响应") from exc
+    except (OSError, ValueError) as exc:
+        raise WorktreeError(f"worktree 服务通信失败：{exc}") from exc
+    if not isinstance(response, dict) or ("exit_code" not in response and not response.get("fallback")):
+        raise WorktreeError("worktree 服务连接中断")
+    return response
+
+
+def dispatch_to_service(op: str, argv: list[str]) -> int | None:
+    """Forward a CLI invocation to the service; None means the caller should run in-process.
+
+    Falls back when no service is listening, or when the service refused the request
+    because its environment differs (nothing ran). A create/remove that reached the service
+    may have partly run, so later failures are reported instead of running it again in-process.
+    """
+    if os.environ.get(DISABLE_ENV):
+        return None
+    try:
+        response = request({"op": op, "argv": argv, "cwd": os.getcwd(), "env": relevant_environment()})
+    except WorktreeError as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return 1
+    if response is None or response.get("fallback"):
+        return None
+    sys.stdout.write(response.get("stdout", ""))
+    sys.stderr.write(response.get("stderr", ""))
+    if "error" in response:
+        print(f"ERROR: {response['error']}", file=sys.stderr)
+    return int(response["exit_code"])
+
+
+def _run_cli(entry_point, argv: list[str], cwd: str | None) -> dict:
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    previous_cwd = os.getcwd()
+    try:
+        if cwd:
+            os.chdir(cwd)
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                exit_code = entry_point(argv)
+            except SystemExit as exc:
+                exit_code = exc.code if isinstance(exc.code, int) else 1
+    finally:
+        os.chdir(previous_cwd)
+    return {"exit_code": exit_code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+def _resolve(value: str | None, cwd: str | None) -> Path:
+    return Path(cwd or os.getcwd(), value or ".").expanduser().resolve()
+
+
+def handle_request(payload: dict, stats: dict[str, int]) -> dict:
+    op = payload.get("op")
+    if op in ("create", "remove") and payload.get("env") != relevant_environment():
+        # 在服务端的环境下执行可能与客户端进程内执行不同，未执行任何操作，交还给客户端
+        stats["fallback"] = stats.get("fallback", 0) + 1
+        return {"fallback": True}
+    stats[op] = stats.get(op, 0) + 1
+    cwd = payload.get("cwd")
+    if op == "create":
+        from create_worktree import run_cli
+
+        return _run_cli(run_cli, list(payload.get("argv", [])), cwd)
+    if op == "remove":
+        from remove_worktree import run_cli
+
+        return _run_cli(run_cli, list(payload.get("argv", [])), cwd)
+    if op == "plan":
+        from worktree_api import plan
+
+        sync_plan = plan(_resolve(payload.get("target"), cwd), _resolve(payload.get("repo"), cwd))
+        return {
+            "exit_code": 0,
+            "has_baseline": sync_plan.has_baseline,
+            "actions": [
+                {"action": action.action, "relative_path": action.relative_path, "detail": action.detail}
+                for action in sync_plan.actions
+            ],
+        }
+    if op == "inventory":
+        from remove_worktree import parse_worktree_list, resolve_main_repo
+
+        main_repo = resolve_main_repo(_resolve(payload.get("repo"), cwd))
+        worktrees = [
+            {key: str(value) if isinstance(value, Path) else value for key, value in entry.items()}
+            for entry in parse_worktree_list(main_repo)
+        ]
+        return {"exit_code": 0, "main_repo": str(main_repo), "worktrees": worktrees}
+    if op == "status":
+        return {"exit_code": 0, "pid": os.getpid(), "requests": dict(stats)}
+    raise WorktreeError(f"未知操作：{op}")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            payload: dict = {}
+            try:
+                payload = json.loads(line)
+                if payload.get("version", PROTOCOL_VERSION) != PROTOCOL_VERSION:
+                    raise WorktreeError(f"不支持的协议版本：{payload.get('version')}")
+                if payload.get("op") == "shutdown":
+                    self.server.stopping = True
+                    response = {"exit_code": 0}
+                else:
+                    with self.server.lock:
+                        response = handle_request(payload, self.server.stats)
+            except WorktreeError as exc:
+                response = {"exit_code": 1, "error": str(exc)}
+            except Exception as exc:  # 服务必须在单个请求失败后继续运行
+                response = {"exit_code": 1, "error": f"{type(exc).__name__}: {exc}", "stderr": traceback.format_exc()}
+            self.wfile.write(json.dumps(response, ensure_ascii=True).encode("utf-8") + b"\n")
+            self.wfile.flush()
+            if self.server.stopping:
+                break
+
+
+class WorktreeService(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Accepts concurrent clients but runs one request at a time.
+
+    Handlers chdir and redirect stdout, both of which are process-wide.
+    """
+
+    daemon_threads = True
+    timeout = POLL_INTERVAL
+
+    def __init__(self, path: Path) -> None:
+        self.stats: dict[str, int] = {}
+        self.stopping = False
+        self.lock = threading.Lock()
+        super().__init__(str(path), _Handler)
+
+
+def serve(path: Path) -> int:
+    if _connect(path) is not None:
+        raise WorktreeError(f"worktree 服务已在运行：{path}")
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    directory_stat = path.parent.stat()
+    if hasattr(os, "getuid") and (directory_stat.st_uid != os.getuid() or directory_stat.st_mode & 0o077):
+        raise WorktreeError(f"socket 目录必须归当前用户所有且权限为 0700：{path.parent}")
+    with contextlib.suppress(FileNotFoundError):
+        path.unlink()
+
+    from worktree_api import enable_caches
+
+    enable_caches()
+    previous_umask = os.umask(0o177)
+    try:
+        server = WorktreeService(path)
+    finally:
+        os.umask(previous_umask)
+    print(f"Listening: {path}", flush=True)
+    try:
+        with server:
+            while not server.stopping:
+                server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            path.unlink()
+    return 0
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run the worktree service that create/remove scripts forward to when it is listening.",
+    )
+    parser.add_argument("--socket", help=f"Unix socket path. Defaults to ${SOCKET_ENV} or a per-user temp path.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    try:
+        return serve(Path(args.socket).expanduser() if args.socket else default_socket_path())
+    except WorktreeError as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
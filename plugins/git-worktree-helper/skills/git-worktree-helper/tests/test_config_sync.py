@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+SKILL_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = SKILL_ROOT / "scripts"
+
+sys.path.insert(0, str(SCRIPTS))
+
+import config_sync  # noqa: E402
+import worktree_api  # noqa: E402
+from config_sync import Entry, SyncAction  # noqa: E402
+from worktree_common import WorktreeError  # noqa: E402
+
+
+def sorted_snapshot(root: Path) -> list[tuple[str, Entry]]:
+    """The eager walk plan_sync used before streaming: rglob everything, then sort."""
+    snapshot: dict[str, Entry] = {}
+    for managed_path in config_sync.MANAGED_PATHS:
+        source = root / managed_path
+        entry = config_sync.describe_path(source)
+        if entry is None:
+            continue
+        if entry.kind == "other" and source.is_dir():
+            snapshot[managed_path] = Entry("dir", "")
+            for child in source.rglob("*"):
+                child_entry = config_sync.describe_path(child)
+                if child_entry.kind == "other" and child.is_dir():
+                    child_entry = Entry("dir", "")
+                snapshot[child.relative_to(root).as_posix()] = child_entry
+        else:
+            snapshot[managed_path] = entry
+    return sorted(snapshot.items())
+
+
+class StreamingPlanTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.temporary_directory.name).resolve()
+        self.repo = self.root / "repo"
+        self.worktree = self.root / "task"
+        self.repo.mkdir()
+        self.write(self.repo, "AGENTS.md", "base agents\n")
+        self.git("init", "-q")
+        self.git("config", "user.email", "test@example.com")
+        self.git("config", "user.name", "Test User")
+        self.git("add", "AGENTS.md")
+        self.git("commit", "-qm", "initial")
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+
+    def git(self, *args: str) -> None:
+        subprocess.run(["git", *args], cwd=self.repo, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+
+    def write(self, root: Path, relative_path: str, content: str) -> None:
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+
+    def test_walk_matches_sorted_path_order(self) -> None:
+        # "a" < "a-b" < "a.txt" < "a/x"：目录自身与其子项之间夹着同级条目
+        for relative_path in ("a/x", "a/y/z", "a-b", "a.txt", "b", "a0/q"):
+            self.write(self.repo, f".claude/{relative_path}", relative_path)
+        (self.repo / ".codex").mkdir()
+        (self.repo / ".claude" / "link").symlink_to("a")
+
+        streamed = list(config_sync.iter_managed_paths(self.repo))
+
+        self.assertEqual(sorted_snapshot(self.repo), streamed)
+        self.assertIn((".claude/link", Entry("symlink", "a")), streamed)
+        self.assertNotIn(".claude/link/x", dict(streamed))
+
+    def test_streamed_plan_matches_materialized_plan(self) -> None:
+        self.write(self.repo, ".claude/shared.txt", "base\n")
+        self.write(self.repo, ".claude/main-only.txt", "base\n")
+        self.git("worktree", "add", "-q", "-b", "task", str(self.worktree))
+        self.write(self.worktree, ".claude/shared.txt", "base\n")
+        self.write(self.worktree, ".claude/main-only.txt", "base\n")
+        config_sync.write_baseline(self.worktree)
+
+        self.write(self.worktree, ".claude/new/file.txt", "new\n")
+        self.write(self.worktree, ".claude/shared.txt", "worktree\n")
+        self.write(self.repo, ".claude/main-only.txt", "main\n")
+        self.write(self.repo, "AGENTS.md", "main agents\n")
+        self.write(self.worktree, "AGENTS.md", "worktree agents\n")
+        (self.worktree / ".claude" / "main-only.txt").unlink()
+
+        stream, has_baseline = config_sync.iter_sync_plan(self.repo, self.worktree)
+        actions = list(stream)
+
+        self.assertTrue(has_baseline)
+        self.assertEqual((actions, True), config_sync.plan_sync(self.repo, self.worktree))
+        self.assertEqual(
+            {
+                SyncAction("CONFLICT", "AGENTS.md", "both sides changed"),
+                SyncAction("IGNORE_DELETE", ".claude/main-only.txt"),
+                SyncAction("COPY", ".claude/new/file.txt"),
+                SyncAction("UPDATE", ".claude/shared.txt"),
+            },
+            {action for action in actions if action.action != "SKIP"},
+        )
+        paths = [action.relative_path for action in actions]
+        self.assertEqual(sorted(paths), paths)
+
+    def test_small_baselines_stay_readable_by_older_helpers(self) -> None:
+        self.git("worktree", "add", "-q", "-b", "task", str(self.worktree))
+        destination = config_sync.write_baseline(self.worktree)
+        payload = json.loads(destination.read_text(encoding="utf-8"))
+        self.assertEqual({"version": 1, "paths": {"AGENTS.md": {"digest": mock.ANY, "kind": "file"}}}, payload)
+
+        with mock.patch.object(config_sync, "BASELINE_V1_LIMIT", 0):
+            config_sync.write_baseline(self.worktree)
+        lines = destination.read_text(encoding="utf-8").splitlines()
+        self.assertEqual({"version": 2}, json.loads(lines[0]))
+        self.assertEqual({"digest": mock.ANY, "kind": "file", "path": "AGENTS.md"}, json.loads(lines[1]))
+        self.assertEqual(["AGENTS.md"], list(config_sync.load_baseline(self.worktree)))
+
+    def test_baseline_reader_validates_and_closes(self) -> None:
+        self.git("worktree", "add", "-q", "-b", "task", str(self.worktree))
+        destination = config_sync.write_baseline(self.worktree)
+
+        legacy = {"version": 1, "paths": {"b": {"kind": "file", "digest": "2"}, "a": {"kind": "file", "digest": "1"}}}
+        destination.write_text(json.dumps(legacy, indent=2), encoding="utf-8")
+        with config_sync.open_baseline(self.worktree) as entries:
+            self.assertEqual([("a", Entry("file", "1")), ("b", Entry("file", "2"))], list(entries))
+
+        destination.write_text('{"version": 2}\n{"path": "b", "kind": "file", "digest": ""}\n{"path": "a", "kind": "file", "digest": ""}\n', encoding="utf-8")
+        with config_sync.open_baseline(self.worktree) as entries:
+            with self.assertRaisesRegex(WorktreeError, "out of order"):
+                list(entries)
+
+        destination.write_text('{"version": 2}\n{"path": "a", "kind": "file", "digest": ""}\n{"path": "b", "kind": "file", "digest": ""}\n', encoding="utf-8")
+        with config_sync.open_baseline(self.worktree) as entries:
+            self.assertEqual(("a", Entry("file", "")), next(entries))
+        # 提前退出上下文后文件已关闭
+        with self.assertRaisesRegex(WorktreeError, "closed file"):
+            next(entries)
+
+        destination.write_text('{"version": 3}\n', encoding="utf-8")
+        with self.assertRaisesRegex(WorktreeError, "unsupported version"):
+            with config_sync.open_baseline(self.worktree):
+                pass
+
+    def test_cli_closes_the_spooled_plan_after_printing(self) -> None:
+        import contextlib
+        import io
+
+        import remove_worktree
+
+        for index in range(5):
+            self.write(self.repo, f".claude/file-{index}.txt", "base\n")
+        self.git("worktree", "add", "-q", "-b", "task", str(self.worktree))
+        for index in range(5):
+            self.write(self.worktree, f".claude/file-{index}.txt", "base\n")
+        config_sync.write_baseline(self.worktree)
+        close = config_sync.SpooledSyncPlan.close
+
+        with mock.patch.object(worktree_api, "PLAN_MEMORY_LIMIT", 2), mock.patch.object(
+            config_sync.SpooledSyncPlan, "close", autospec=True, side_effect=close
+        ) as closed, contextlib.redirect_stdout(io.StringIO()) as output:
+            exit_code = remove_worktree.run_cli([str(self.worktree), "--repo", str(self.repo), "--dry-run"])
+
+        self.assertEqual(0, exit_code)
+        self.assertIn(".claude/file-4.txt", output.getvalue())
+        self.assertEqual(1, closed.call_count)
+        self.assertTrue(closed.call_args.args[0]._spool.closed)
+
+    def test_plan_over_memory_limit_is_spooled_as_checked(self) -> None:
+        for index in range(5):
+            self.write(self.repo, f".claude/file-{index}.txt", "base\n")
+        self.git("worktree", "add", "-q", "-b", "task", str(self.worktree))
+        for index in range(5):
+            self.write(self.worktree, f".claude/file-{index}.txt", "base\n")
+        config_sync.write_baseline(self.worktree)
+        self.write(self.worktree, ".claude/file-3.txt", "changed\n")
+
+        with mock.patch.object(worktree_api, "PLAN_MEMORY_LIMIT", 2):
+            check = worktree_api.precheck(self.worktree, repo=self.repo, force=True, use_cache=False)
+            self.assertIsInstance(check.plan.actions, config_sync.SpooledSyncPlan)
+            planned = config_sync.plan_sync(self.repo, self.worktree)[0]
+            self.assertEqual(planned, list(check.plan.actions))
+            # 预检之后出现的冲突不会混入已检查的计划
+            self.write(self.repo, ".claude/file-3.txt", "main\n")
+            self.write(self.worktree, ".claude/late.txt", "late\n")
+            self.assertEqual(planned, list(check.plan.actions))
+            self.assertEqual([], check.plan.conflicts)
+
+            self.write(self.repo, ".claude/file-3.txt", "base\n")
+            result = worktree_api.remove(self.worktree, repo=self.repo, force=True)
+            with result.precheck.plan:
+                pass
+            self.assertTrue(result.precheck.plan.actions._spool.closed)
+            check.plan.close()
+
+        self.assertTrue(result.removed)
+        self.assertEqual("changed\n", (self.repo / ".claude" / "file-3.txt").read_text(encoding="utf-8"))
+
+if __name__ == "__main__":
+    unittest.main()
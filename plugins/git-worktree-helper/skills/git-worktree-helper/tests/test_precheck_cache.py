@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+
+SKILL_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = SKILL_ROOT / "scripts"
+CREATE_SCRIPT = SCRIPTS / "create_worktree.py"
+REMOVE_SCRIPT = SCRIPTS / "remove_worktree.py"
+BASELINE_FILE = "git-worktree-helper-baseline.json"
+CACHE_HIT = "Precheck cache: hit"
+
+
+class PrecheckCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.temporary_directory.name)
+        self.repo = self.root / "repo"
+        self.worktree = self.root / "task"
+        self.repo.mkdir()
+        (self.repo / "AGENTS.md").write_text("base agents\n", encoding="utf-8")
+        (self.repo / ".gitignore").write_text("build/\n", encoding="utf-8")
+        self.env = {**os.environ, "GIT_WORKTREE_HELPER_NO_SERVICE": "1"}
+        self.env.pop("GIT_WORKTREE_HELPER_NO_PRECHECK_CACHE", None)
+
+        self.git("init", "-q")
+        self.git("config", "user.email", "test@example.com")
+        self.git("config", "user.name", "Test User")
+        self.git("add", "AGENTS.md", ".gitignore")
+        self.git("commit", "-qm", "initial")
+        result = self.run_script(CREATE_SCRIPT, str(self.worktree), "--repo", str(self.repo), "--new-branch", "task")
+        self.assertEqual(0, result.returncode, result.stderr)
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+
+    def git(self, *args: str, cwd: Path | None = None) -> subprocess.CompletedProcess[str]:
+        return subprocess.run(
+            ["git", *args],
+            cwd=cwd or self.repo,
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True,
+        )
+
+    def run_script(self, script: Path, *args: str, env: dict | None = None) -> subprocess.CompletedProcess[str]:
+        return subprocess.run(
+            ["python3", str(script), *args],
+            cwd=self.repo,
+            env=env or self.env,
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+
+    def dry_run(self, *args: str, env: dict | None = None) -> subprocess.CompletedProcess[str]:
+        return self.run_script(REMOVE_SCRIPT, str(self.worktree), "--repo", str(self.repo), "--dry-run", *args, env=env)
+
+    def assert_cached_again(self) -> subprocess.CompletedProcess[str]:
+        """Run a dry run twice and return the second run, which must reuse the first one's result."""
+        first = self.dry_run()
+        cached = self.dry_run()
+        self.assertIn(CACHE_HIT, cached.stdout)
+        self.assertEqual(first.returncode, cached.returncode)
+        self.assertEqual(first.stdout.replace(f"{CACHE_HIT}\n", ""), cached.stdout.replace(f"{CACHE_HIT}\n", ""))
+        return cached
+
+    def test_unchanged_worktree_reuses_result(self) -> None:
+        (self.worktree / "AGENTS.md").write_text("worktree agents\n", encoding="utf-8")
+
+        self.assertNotIn(CACHE_HIT, self.dry_run().stdout)
+        cached = self.assert_cached_again()
+
+        self.assertEqual(0, cached.returncode, cached.stdout + cached.stderr)
+        self.assertIn("UPDATE AGENTS.md", cached.stdout)
+
+    def test_blocked_result_is_cached_until_the_worktree_changes(self) -> None:
+        scratch = self.worktree / "scratch.txt"
+        scratch.write_text("do not lose\n", encoding="utf-8")
+
+        cached = self.assert_cached_again()
+        self.assertEqual(2, cached.returncode)
+        self.assertIn("dirty_worktree", cached.stdout)
+
+        scratch.unlink()
+        result = self.dry_run()
+        self.assertNotIn(CACHE_HIT, result.stdout)
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+
+    def test_main_head_and_branch_tip_invalidate(self) -> None:
+        self.assert_cached_again()
+        (self.worktree / "feature.txt").write_text("feature\n", encoding="utf-8")
+        self.git("add", "feature.txt", cwd=self.worktree)
+        self.git("commit", "-qm", "feature", cwd=self.worktree)
+
+        result = self.dry_run()
+        self.assertNotIn(CACHE_HIT, result.stdout)
+        self.assertIn("branch_unmerged", result.stdout)
+
+        self.git("merge", "-q", "task")
+        result = self.dry_run()
+        self.assertNotIn(CACHE_HIT, result.stdout)
+        self.assertEqual(0, result.returncode, result.stdout + result.stderr)
+
+    def test_managed_files_and_baseline_invalidate(self) -> None:
+        self.assert_cached_again()
+        (self.repo / "AGENTS.md").write_text("main agents\n", encoding="utf-8")
+        (self.worktree / "AGENTS.md").write_text("worktree agents\n", encoding="utf-8")
+
+        result = self.dry_run()
+        self.assertNotIn(CACHE_HIT, result.stdout)
+        self.assertIn("config_sync_conflict", result.stdout)
+
+        self.assert_cached_again()
+        git_dir = Path(self.git("rev-parse", "--git-dir", cwd=self.worktree).stdout.strip())
+        (git_dir / BASELINE_FILE).write_text('{"version": 1, "paths": {}}\n', encoding="utf-8")
+        result = self.dry_run()
+        self.assertNotIn(CACHE_HIT, result.stdout)
+        self.assertIn("both sides added different content", result.stdout)
+
+    def test_ignored_paths_do_not_invalidate(self) -> None:
+        self.assert_cached_again()
+        (self.worktree / "build").mkdir()
+        result = self.dry_run()
+        self.assertNotIn(CACHE_HIT, result.stdout)
+
+        self.assert_cached_again()
+        (self.worktree / "build" / "output.o").write_text("object\n", encoding="utf-8")
+        self.assertIn(CACHE_HIT, self.dry_run().stdout)
+
+    def test_options_and_disable_switch_bypass_cached_result(self) -> None:
+        self.assert_cached_again()
+
+        self.assertNotIn(CACHE_HIT, self.dry_run("--keep-branch").stdout)
+        disabled = self.dry_run(env={**self.env, "GIT_WORKTREE_HELPER_NO_PRECHECK_CACHE": "1"})
+        self.assertNotIn(CACHE_HIT, disabled.stdout)
+        self.assertIn(CACHE_HIT, self.dry_run().stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+SKILL_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = SKILL_ROOT / "scripts"
+
+sys.path.insert(0, str(SCRIPTS))
+
+import worktree_api  # noqa: E402
+from config_sync import SyncAction  # noqa: E402
+from worktree_common import WorktreeError  # noqa: E402
+
+
+class WorktreeApiTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.temporary_directory.name).resolve()
+        self.repo = self.root / "repo"
+        self.worktree = self.root / "task"
+        self.repo.mkdir()
+        (self.repo / "AGENTS.md").write_text("base agents\n", encoding="utf-8")
+
+        self.git("init", "-q")
+        self.git("config", "user.email", "test@example.com")
+        self.git("config", "user.name", "Test User")
+        self.git("add", "AGENTS.md")
+        self.git("commit", "-qm", "initial")
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+
+    def git(self, *args: str, cwd: Path | None = None) -> subprocess.CompletedProcess[str]:
+        return subprocess.run(
+            ["git", *args],
+            cwd=cwd or self.repo,
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True,
+        )
+
+    def create(self) -> worktree_api.CreateResult:
+        return worktree_api.create(self.worktree, repo=self.repo, new_branch="task")
+
+    def test_create_returns_what_was_done(self) -> None:
+        planned = worktree_api.create(self.worktree, repo=self.repo, dry_run=True)
+        self.assertFalse(self.worktree.exists())
+        self.assertEqual(("task", None), (planned.new_branch, planned.baseline))
+        self.assertIn("WOULD copy AGENTS.md", planned.copy_messages)
+
+        created = self.create()
+
+        self.assertTrue(self.worktree.exists())
+        self.assertEqual(self.repo, created.repo)
+        self.assertEqual(["git", "worktree", "add", "-b", "task", str(self.worktree), created.base_branch], created.command)
+        self.assertTrue(created.baseline.exists())
+        with self.assertRaisesRegex(WorktreeError, "目标目录已存在"):
+            self.create()
+
+    def test_plan_and_precheck_report_typed_results(self) -> None:
+        self.create()
+        (self.worktree / "AGENTS.md").write_text("worktree agents\n", encoding="utf-8")
+        (self.worktree / "scratch.txt").write_text("do not lose\n", encoding="utf-8")
+
+        sync_plan = worktree_api.plan(self.worktree, repo=self.repo)
+        check = worktree_api.precheck(self.worktree, repo=self.repo)
+
+        self.assertTrue(sync_plan.has_baseline)
+        self.assertEqual([SyncAction("UPDATE", "AGENTS.md")], sync_plan.actions)
+        self.assertEqual(sync_plan, check.plan)
+        self.assertEqual(["dirty_worktree"], [code for code, _ in check.failures])
+        self.assertTrue(check.forceable)
+        self.assertTrue(worktree_api.precheck(self.worktree, repo=self.repo, force=True).ok)
+
+    def test_unforceable_failures(self) -> None:
+        self.create()
+        main = worktree_api.precheck(self.repo, repo=self.repo)
+        self.assertEqual(("main_worktree", None), (main.failures[0][0], main.plan))
+        self.assertFalse(main.forceable)
+
+        (self.repo / "AGENTS.md").write_text("main agents\n", encoding="utf-8")
+        (self.worktree / "AGENTS.md").write_text("worktree agents\n", encoding="utf-8")
+        conflict = worktree_api.precheck(self.worktree, repo=self.repo, force=True)
+        self.assertEqual([("config_sync_conflict", "AGENTS.md")], conflict.failures)
+        self.assertFalse(conflict.forceable)
+
+        with self.assertRaisesRegex(WorktreeError, "不是该仓库已注册的 worktree"):
+            worktree_api.precheck(self.root, repo=self.repo)
+
+    def test_remove_syncs_then_removes(self) -> None:
+        self.create()
+        (self.worktree / "AGENTS.md").write_text("worktree agents\n", encoding="utf-8")
+
+        dry = worktree_api.remove(self.worktree, repo=self.repo, dry_run=True)
+        self.assertEqual((False, False, False), (dry.synced, dry.removed, dry.branch_deleted))
+        self.assertEqual(
+            [["worktree", "remove", "--force", str(self.worktree)], ["branch", "-d", "task"]],
+            dry.commands,
+        )
+        self.assertTrue(self.worktree.exists())
+
+        result = worktree_api.remove(self.worktree, repo=self.repo)
+
+        self.assertFalse(result.blocked)
+        self.assertEqual((True, True, True), (result.synced, result.removed, result.branch_deleted))
+        self.assertFalse(self.worktree.exists())
+        self.assertEqual("worktree agents\n", (self.repo / "AGENTS.md").read_text(encoding="utf-8"))
+
+    def test_blocked_removal_changes_nothing(self) -> None:
+        self.create()
+        (self.worktree / "scratch.txt").write_text("do not lose\n", encoding="utf-8")
+
+        result = worktree_api.remove(self.worktree, repo=self.repo)
+
+        self.assertTrue(result.blocked)
+        self.assertEqual([], result.commands)
+        self.assertTrue(self.worktree.exists())
+
+    def test_failed_git_step_carries_partial_result(self) -> None:
+        self.create()
+        self.git("worktree", "lock", str(self.worktree))
+
+        with self.assertRaises(worktree_api.RemoveError) as caught:
+            worktree_api.remove(self.worktree, repo=self.repo)
+
+        self.assertTrue(caught.exception.result.synced)
+        self.assertFalse(caught.exception.result.removed)
+        self.assertTrue(self.worktree.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
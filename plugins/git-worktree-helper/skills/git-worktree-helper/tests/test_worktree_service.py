@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+SKILL_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = SKILL_ROOT / "scripts"
+CREATE_SCRIPT = SCRIPTS / "create_worktree.py"
+REMOVE_SCRIPT = SCRIPTS / "remove_worktree.py"
+SERVICE_SCRIPT = SCRIPTS / "worktree_service.py"
+
+sys.path.insert(0, str(SCRIPTS))
+
+import worktree_service  # noqa: E402
+from worktree_common import WorktreeError  # noqa: E402
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "requires Unix domain sockets")
+class WorktreeServiceTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.temporary_directory.name)
+        self.repo = self.root / "repo"
+        self.worktree = self.root / "task"
+        self.socket_path = self.root / "service.sock"
+        self.repo.mkdir()
+        (self.repo / "AGENTS.md").write_text("base agents\n", encoding="utf-8")
+        for args in (
+            ("init", "-q"),
+            ("config", "user.email", "test@example.com"),
+            ("config", "user.name", "Test User"),
+            ("add", "AGENTS.md"),
+            ("commit", "-qm", "initial"),
+        ):
+            subprocess.run(["git", *args], cwd=self.repo, check=True, stdout=subprocess.PIPE)
+
+        self.env = {**os.environ, "GIT_WORKTREE_HELPER_SOCKET": str(self.socket_path)}
+        self.env.pop("GIT_WORKTREE_HELPER_NO_SERVICE", None)
+        self.service = subprocess.Popen(
+            ["python3", str(SERVICE_SCRIPT)],
+            env=self.env,
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        self.assertIn("Listening", self.service.stdout.readline())
+
+    def tearDown(self) -> None:
+        if self.service.poll() is None:
+            self.service.kill()
+        self.service.wait()
+        self.service.stdout.close()
+        self.service.stderr.close()
+        self.temporary_directory.cleanup()
+
+    def request(self, payload: dict) -> dict:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(str(self.socket_path))
+            with client.makefile("rwb") as stream:
+                stream.write(json.dumps(payload).encode("utf-8") + b"\n")
+                stream.flush()
+                return json.loads(stream.readline())
+
+    def run_script(self, script: Path, *args: str) -> subprocess.CompletedProcess[str]:
+        return subprocess.run(
+            ["python3", str(script), *args],
+            cwd=self.repo,
+            env=self.env,
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+
+    def test_scripts_forward_to_running_service(self) -> None:
+        created = self.run_script(CREATE_SCRIPT, "../task", "--new-branch", "task")
+        self.assertEqual(0, created.returncode, created.stderr)
+        self.assertIn("BASELINE", created.stdout)
+        self.assertTrue(self.worktree.exists())
+
+        inventory = self.request({"op": "inventory", "repo": str(self.repo)})
+        self.assertIn(str(self.worktree.resolve()), [entry["path"] for entry in inventory["worktrees"]])
+
+        (self.worktree / "AGENTS.md").write_text("worktree agents\n", encoding="utf-8")
+        plan = self.request({"op": "plan", "repo": str(self.repo), "target": str(self.worktree)})
+        self.assertTrue(plan["has_baseline"])
+        self.assertIn({"action": "UPDATE", "relative_path": "AGENTS.md", "detail": ""}, plan["actions"])
+
+        removed = self.run_script(REMOVE_SCRIPT, str(self.worktree))
+        self.assertEqual(0, removed.returncode, removed.stdout + removed.stderr)
+        self.assertFalse(self.worktree.exists())
+        self.assertEqual("worktree agents\n", (self.repo / "AGENTS.md").read_text(encoding="utf-8"))
+
+        status = self.request({"op": "status"})
+        self.assertEqual(1, status["requests"]["create"])
+        self.assertEqual(1, status["requests"]["remove"])
+
+    def test_scripts_with_a_different_environment_run_in_process(self) -> None:
+        self.env["GIT_CONFIG_GLOBAL"] = str(self.root / "client.gitconfig")
+        (self.root / "client.gitconfig").write_text("[user]\n\tname = Client\n", encoding="utf-8")
+
+        created = self.run_script(CREATE_SCRIPT, "../task", "--new-branch", "task")
+
+        self.assertEqual(0, created.returncode, created.stderr)
+        self.assertTrue(self.worktree.exists())
+        status = self.request({"op": "status"})
+        self.assertEqual({"fallback": 1, "status": 1}, status["requests"])
+
+    def test_unknown_operation_keeps_service_alive(self) -> None:
+        response = self.request({"op": "explode"})
+
+        self.assertEqual(1, response["exit_code"])
+        self.assertIn("explode", response["error"])
+        self.assertEqual(0, self.request({"op": "status"})["exit_code"])
+
+    def test_scripts_fall_back_when_service_stops(self) -> None:
+        self.assertEqual(0, self.request({"op": "shutdown"})["exit_code"])
+        self.service.wait(timeout=5)
+        self.assertFalse(self.socket_path.exists())
+
+        created = self.run_script(CREATE_SCRIPT, str(self.worktree), "--new-branch", "task")
+
+        self.assertEqual(0, created.returncode, created.stderr)
+        self.assertTrue(self.worktree.exists())
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX") and hasattr(os, "getuid"), "requires Unix domain sockets")
+class ServiceSocketTrustTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+        self.root = Path(self.temporary_directory.name)
+
+    def listen(self, path: Path) -> socket.socket:
+        """A service that accepts one request and hangs up without answering."""
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(path))
+        server.listen(1)
+        self.addCleanup(server.close)
+
+        def hang_up() -> None:
+            connection, _ = server.accept()
+            with connection, connection.makefile("rb") as stream:
+                stream.readline()
+
+        thread = threading.Thread(target=hang_up, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        return server
+
+    def test_socket_in_shared_directory_is_not_trusted(self) -> None:
+        shared = self.root / "shared"
+        shared.mkdir()
+        shared.chmod(0o777)
+        path = shared / "service.sock"
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(path))
+        server.listen(1)
+        self.addCleanup(server.close)
+
+        self.assertIsNone(worktree_service.request({"op": "status"}, path))
+        with self.assertRaisesRegex(WorktreeError, "0700"):
+            worktree_service.serve(path)
+
+    def test_lost_response_does_not_fall_back_to_in_process(self) -> None:
+        path = self.root / "service.sock"
+        self.listen(path)
+
+        with mock.patch.dict(os.environ, {"GIT_WORKTREE_HELPER_SOCKET": str(path)}), \
+                mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            os.environ.pop("GIT_WORKTREE_HELPER_NO_SERVICE", None)
+            self.assertEqual(1, worktree_service.dispatch_to_service("create", ["../task"]))
+        self.assertIn("连接中断", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
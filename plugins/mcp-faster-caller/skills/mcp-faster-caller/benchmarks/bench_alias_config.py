@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+别名表加载耗时基准：内置字典 vs 外部配置（冷编译 / 热缓存）
+
+用法: python3 bench_alias_config.py [--aliases 200] [--rounds 200] [--cli-runs 20]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+import alias_config  # noqa: E402
+import call_mcp  # noqa: E402
+
+
+def time_load(rounds: int, reset_cache: bool = False) -> float:
+    """返回单次加载的中位耗时（微秒）"""
+    samples = []
+    for _ in range(rounds):
+        if reset_cache:
+            for cached in Path(alias_config.cache_dir()).glob("aliases-*"):
+                cached.unlink()
+        call_mcp._ALIAS_TABLE = None
+        start = time.perf_counter()
+        call_mcp.get_alias_trie()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def time_cli(runs: int, env: dict) -> float:
+    """返回一次完整 CLI 解析的中位墙钟耗时（毫秒）"""
+    samples = []
+    command = [sys.executable, str(SCRIPTS / "call_mcp.py"), "gh list-repos owner=username"]
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Alias table load benchmark.")
+    parser.add_argument("--aliases", type=int, default=200, help="外部配置中的别名数量")
+    parser.add_argument("--rounds", type=int, default=200, help="进程内加载次数")
+    parser.add_argument("--cli-runs", type=int, default=20, help="CLI 启动次数，0 表示跳过")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as root:
+        env = dict(os.environ, XDG_CONFIG_HOME=os.path.join(root, "config"), XDG_CACHE_HOME=os.path.join(root, "cache"))
+        env.pop(alias_config.CONFIG_ENV, None)
+        os.environ.clear()
+        os.environ.update(env)
+        os.chdir(root)
+
+        builtin = time_load(args.rounds)
+        cli_builtin = time_cli(args.cli_runs, env) if args.cli_runs else 0.0
+
+        config = Path(alias_config.user_config_dir()) / "aliases.json"
+        config.parent.mkdir(parents=True)
+        aliases = {f"site alias {index}": f"internal-server-{index % 20}" for index in range(args.aliases)}
+        config.write_text(json.dumps({"aliases": aliases}), encoding="utf-8")
+
+        cold = time_load(args.rounds, reset_cache=True)
+        warm = time_load(args.rounds)
+        cli_warm = time_cli(args.cli_runs, env) if args.cli_runs else 0.0
+
+    print(f"builtin MCP_MAP ({len(call_mcp.MCP_MAP)} aliases), no config : {builtin:>9.1f} us")
+    print(f"external config (+{args.aliases} aliases), cold compile : {cold:>9.1f} us")
+    print(f"external config (+{args.aliases} aliases), warm cache   : {warm:>9.1f} us")
+    if args.cli_runs:
+        print(f"CLI parse, no config                        : {cli_builtin:>9.2f} ms")
+        print(f"CLI parse, warm config cache                : {cli_warm:>9.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+模糊别名索引基准：构建 / 缓存加载耗时，以及拼错别名的查询延迟与命中率
+
+别名表由英文音节词与常用汉字组合生成（1-2 词），查询为随机删除、替换、插入或
+交换一个字符后的别名。对照组为旧版失败路径：对全部别名排序后取前 8 个。
+
+用法: python3 bench_alias_index.py [--aliases 10000] [--queries 2000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import alias_index  # noqa: E402
+from call_mcp import MCP_MAP  # noqa: E402
+
+SYLLABLES = [consonant + vowel for consonant in "bcdfghklmnprstvz" for vowel in "aeiou"] + ["ing", "er", "on", "ux"]
+HANZI = "搜索读取网页数据库代码仓库文档图像浏览器分析解析查询上传下载日志监控部署构建测试消息邮件日历翻译"
+
+
+def synthetic_aliases(count: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    table = dict(MCP_MAP)
+    while len(table) < count:
+        if rng.random() < 0.3:
+            alias = "".join(rng.choice(HANZI) for _ in range(rng.randint(2, 4)))
+        else:
+            words = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))) for _ in range(rng.randint(1, 2))]
+            alias = " ".join(words)
+        table[alias] = f"server-{len(table) % 50}"
+    return table
+
+
+def mistype(alias: str, rng: random.Random) -> str:
+    position = rng.randrange(len(alias))
+    operation = rng.choice(["delete", "replace", "insert", "swap"])
+    if operation == "delete" and len(alias) > 2:
+        return alias[:position] + alias[position + 1:]
+    if operation == "swap" and position + 1 < len(alias):
+        return alias[:position] + alias[position + 1] + alias[position] + alias[position + 2:]
+    pool = HANZI if not alias.isascii() else "abcdefghijklmnopqrstuvwxyz"
+    if operation == "insert":
+        return alias[:position] + rng.choice(pool) + alias[position:]
+    return alias[:position] + rng.choice(pool) + alias[position + 1:]
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Fuzzy alias index benchmark.")
+    parser.add_argument("--aliases", type=int, default=10000, help="别名表大小")
+    parser.add_argument("--queries", type=int, default=2000, help="拼错别名的查询次数")
+    args = parser.parse_args(argv)
+
+    table = synthetic_aliases(args.aliases)
+    rng = random.Random(11)
+    targets = rng.sample(list(table), min(args.queries, len(table)))
+    known = {alias_index.normalize(alias) for alias in table}
+    # 拼错后恰好是另一个已有别名的查询会被前缀树直接匹配，不计入
+    queries = [(target, mistype(target, rng)) for target in targets]
+    queries = [(target, typo) for target, typo in queries if typo.split() and alias_index.normalize(typo) not in known]
+
+    start = time.perf_counter()
+    index = alias_index.AliasIndex.build(table)
+    build_ms = (time.perf_counter() - start) * 1000
+    with tempfile.TemporaryDirectory() as root:
+        os.environ["XDG_CACHE_HOME"] = root
+        alias_index.load_alias_index(table)
+        start = time.perf_counter()
+        alias_index.load_alias_index(table)
+        load_ms = (time.perf_counter() - start) * 1000
+
+    samples = []
+    top1 = top5 = corrected = wrong = 0
+    for target, typo in queries:
+        tokens = typo.split() + ["command"]
+        start = time.perf_counter()
+        suggestions = index.lookup(tokens, 2)
+        correction = alias_index.choose_correction(suggestions)
+        samples.append(time.perf_counter() - start)
+        names = [name for name, _, _, _ in suggestions]
+        top1 += bool(names) and names[0] == target
+        top5 += target in names
+        if correction is not None:
+            corrected += 1
+            wrong += table[correction[0]] != table[target]
+
+    start = time.perf_counter()
+    for _ in range(20):
+        sorted(table)[:8]
+    legacy_us = (time.perf_counter() - start) / 20 * 1e6
+
+    samples.sort()
+    count = len(samples)
+    print(f"aliases={len(table)} queries={count} build={build_ms:.1f}ms cached_load={load_ms:.1f}ms")
+    print(f"    lookup       : p50 {samples[count // 2] * 1e6:>7.1f} us  p99 {samples[int(count * 0.99)] * 1e6:>7.1f} us  "
+          f"mean {statistics.mean(samples) * 1e6:.1f} us")
+    print(f"    legacy sort  : {legacy_us:>7.1f} us per failure (sorted keys, first 8)")
+    print(f"    top-1 {top1 / count:.1%}  top-5 {top5 / count:.1%}  "
+          f"auto-corrected {corrected / count:.1%} (wrong server {wrong})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
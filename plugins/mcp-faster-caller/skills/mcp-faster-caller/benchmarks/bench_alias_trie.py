@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+别名查找吞吐基准：前缀树最长匹配 vs 旧版首词字典查找
+
+用法: python3 bench_alias_trie.py [--aliases 10000] [--lookups 200000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from call_mcp import MCP_MAP, build_alias_trie, match_alias  # noqa: E402
+
+
+def synthetic_aliases(count: int, seed: int = 7) -> dict:
+    """生成包含 1-3 词别名的大别名表，并合并真实别名"""
+    rng = random.Random(seed)
+    words = [f"w{index}" for index in range(max(count // 4, 16))]
+    table = dict(MCP_MAP)
+    while len(table) < count:
+        alias = " ".join(rng.choice(words) for _ in range(rng.randint(1, 3)))
+        table[alias] = f"server-{len(table) % 50}"
+    return table
+
+
+def legacy_lookup(text: str, table: dict):
+    parts = text.split(maxsplit=2)
+    return table.get(parts[0].lower())
+
+
+def measure(label: str, func, instructions: list) -> None:
+    start = time.perf_counter()
+    for instruction in instructions:
+        func(instruction)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<20} {len(instructions) / elapsed:>12,.0f} lookups/s  ({elapsed * 1e6 / len(instructions):.2f} us/op)")
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Alias lookup throughput benchmark.")
+    parser.add_argument("--aliases", type=int, default=10000, help="别名表大小")
+    parser.add_argument("--lookups", type=int, default=200000, help="查找次数")
+    args = parser.parse_args(argv)
+
+    table = synthetic_aliases(args.aliases)
+    start = time.perf_counter()
+    trie = build_alias_trie(table)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(11)
+    keys = list(table)
+    instructions = [
+        f"{rng.choice(keys)} some-command key=value other=\"quoted value\""
+        for _ in range(args.lookups)
+    ]
+
+    print(f"aliases={len(table)} lookups={len(instructions)} trie_build={build_ms:.1f}ms")
+    measure("legacy dict", lambda text: legacy_lookup(text, table), instructions)
+    measure("trie longest-match", lambda text: match_alias(text, trie), instructions)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+参数解析吞吐基准：单遍引号感知分词 vs 旧版 split() 解析
+
+用法: python3 bench_arguments.py [--size 1000000] [--pairs 2000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from call_mcp import parse_arguments  # noqa: E402
+
+
+def legacy_parse_arguments(args_str: str):
+    """v2.2 的命名参数解析（不支持带空白的引用值）"""
+    args_str = args_str.strip()
+    result = {}
+    for pair in args_str.split():
+        if '=' in pair:
+            key, value = pair.split('=', 1)
+            key = key.strip()
+            value = value.strip()
+            if len(value) >= 2 and (
+                (value.startswith('"') and value.endswith('"')) or
+                (value.startswith("'") and value.endswith("'"))
+            ):
+                value = value[1:-1]
+            result[key] = value
+    return result or args_str
+
+
+def measure(label: str, func, text: str, min_seconds: float = 0.3) -> None:
+    rounds = 0
+    start = time.perf_counter()
+    while True:
+        func(text)
+        rounds += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            break
+    per_call = elapsed / rounds
+    print(f"    {label:<10} {per_call * 1e3:>10.3f} ms/call  {len(text) / per_call / 1e6:>8.1f} MB/s")
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Argument parsing throughput benchmark.")
+    parser.add_argument("--size", type=int, default=1_000_000, help="长参数值的字符数")
+    parser.add_argument("--pairs", type=int, default=2000, help="key=value 对数量")
+    args = parser.parse_args(argv)
+
+    sentence = "SELECT id, name FROM users WHERE note = 'x' "
+    cases = {
+        "quoted long value": f'query="{(sentence * (args.size // len(sentence) + 1))[:args.size]}" limit=10',
+        "bare long value": f"data={'x' * args.size} limit=10",
+        "many pairs": " ".join(f"key{index}=value{index}" for index in range(args.pairs)),
+        "mixed quoted pairs": " ".join(f'k{index}="v {index} \\"q\\""' for index in range(args.pairs)),
+    }
+    for name, text in cases.items():
+        print(f"{name} ({len(text):,} chars)")
+        measure("legacy", legacy_parse_arguments, text)
+        measure("tokenizer", parse_arguments, text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
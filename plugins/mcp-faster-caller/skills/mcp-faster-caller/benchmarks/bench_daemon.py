@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+常驻进程负载生成器：并发发送语料中的指令，报告延迟分位数与吞吐
+
+- socket 负载：N 个线程各自建立连接发送请求（不含客户端进程启动），测常驻进程本身
+- 进程对比：逐次启动 call_mcp_fast.py（转发）与 call_mcp.py（本进程解析）的墙钟时间
+
+语料为 instructions_corpus.txt；常驻进程在临时目录中启动，不读取本机配置与缓存。
+
+用法: python3 bench_daemon.py [--requests 2000] [--concurrency 1,4,16] [--processes 30]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BENCHMARKS = Path(__file__).resolve().parent
+SCRIPTS = BENCHMARKS.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+from call_mcp_fast import encode_request, send  # noqa: E402
+
+CORPUS = BENCHMARKS / "instructions_corpus.txt"
+
+
+def percentiles(samples: list) -> str:
+    samples = sorted(samples)
+    count = len(samples)
+    picks = [("p50", samples[count // 2]), ("p90", samples[int(count * 0.9)]),
+             ("p99", samples[min(count - 1, int(count * 0.99))]), ("max", samples[-1])]
+    return "  ".join(f"{name} {value * 1e3:>7.2f} ms" for name, value in picks)
+
+
+def socket_load(path: str, payloads: list, requests: int, concurrency: int) -> tuple:
+    """concurrency 个线程共发送 requests 个请求，返回 (每个请求的延迟, 总耗时)"""
+    latencies = []
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker() -> None:
+        local = []
+        for number in counter:
+            start = time.perf_counter()
+            response = send(payloads[number % len(payloads)], path)
+            local.append(time.perf_counter() - start)
+            if not response or response.startswith(b"fallback"):
+                raise RuntimeError(f"常驻进程未处理请求: {response!r}")
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - start
+
+
+def process_latencies(script: Path, instructions: list, count: int, env: dict, cwd: str) -> list:
+    samples = []
+    for number in range(count):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, str(script), *instructions[number % len(instructions)].split()],
+            env=env, cwd=cwd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, check=True,
+        )
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Load generator for the resident call_mcp process.")
+    parser.add_argument("--requests", type=int, default=2000, help="每个并发度发送的请求数")
+    parser.add_argument("--concurrency", default="1,4,16", help="逗号分隔的并发度")
+    parser.add_argument("--processes", type=int, default=30, help="进程对比中每种方式的启动次数")
+    args = parser.parse_args(argv)
+
+    instructions = [line for line in CORPUS.read_text(encoding="utf-8").splitlines() if line and "@" not in line]
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "daemon.sock")
+        env = dict(os.environ, XDG_CONFIG_HOME=root, XDG_CACHE_HOME=root, MCP_FAST_CALLER_SOCKET=path)
+        env.pop("MCP_FAST_CALLER_CONFIG", None)
+        daemon = subprocess.Popen(
+            [sys.executable, str(SCRIPTS / "call_mcp_daemon.py")],
+            env=env, cwd=root, stdout=subprocess.PIPE, text=True,
+        )
+        try:
+            daemon.stdout.readline()
+            payloads = [
+                encode_request({"version": "1", "op": "call", "output": "json", "cwd": root, "config": "",
+                                "instruction": instruction})
+                for instruction in instructions
+            ]
+            print(f"instructions={len(instructions)} requests={args.requests}")
+            for concurrency in (int(value) for value in args.concurrency.split(",")):
+                latencies, elapsed = socket_load(path, payloads, args.requests, concurrency)
+                print(f"    socket c={concurrency:<3}: {percentiles(latencies)}  "
+                      f"{args.requests / elapsed:>8.0f} req/s")
+
+            forwarded = process_latencies(SCRIPTS / "call_mcp_fast.py", instructions, args.processes, env, root)
+            direct = process_latencies(SCRIPTS / "call_mcp.py", instructions, args.processes, env, root)
+            print(f"    call_mcp_fast.py: {percentiles(forwarded)}")
+            print(f"    call_mcp.py     : {percentiles(direct)}")
+        finally:
+            send(encode_request({"version": "1", "op": "shutdown"}), path)
+            daemon.wait(timeout=5)
+            daemon.stdout.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+执行模式基准：每次调用冷启动 server vs 常驻会话池复用（本地替身 server）
+
+--startup-delay 模拟真实 server（如 npx 启动的 Node 进程）的冷启动耗时。
+
+用法: python3 bench_execute.py [--calls 50] [--startup-delay 0.0]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+import call_mcp  # noqa: E402
+from mcp_client import SessionPool  # noqa: E402
+
+
+def time_calls(calls: int, configs: dict, reuse: bool) -> list:
+    parsed = call_mcp.parse_mcp_call("search echo query=benchmark limit=5")
+    pool = SessionPool(configs)
+    samples = []
+    try:
+        for _ in range(calls):
+            start = time.perf_counter()
+            call_mcp.execute_call(parsed, pool)
+            samples.append(time.perf_counter() - start)
+            if not reuse:
+                pool.close()
+    finally:
+        pool.close()
+    return samples
+
+
+def report(label: str, samples: list) -> None:
+    print(f"{label:<28} median {statistics.median(samples) * 1e3:>8.2f} ms  "
+          f"total {sum(samples) * 1e3:>9.1f} ms ({len(samples)} calls)")
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Execute mode benchmark against the stand-in MCP server.")
+    parser.add_argument("--calls", type=int, default=50, help="调用次数")
+    parser.add_argument("--startup-delay", type=float, default=0.0, help="替身 server 的模拟冷启动耗时（秒）")
+    args = parser.parse_args(argv)
+
+    # 只比较会话复用，不让结果缓存命中
+    os.environ["MCP_FAST_CALLER_NO_CACHE"] = "1"
+    # 替身 server 的工具 schema 不写入本机缓存
+    cache_home = tempfile.TemporaryDirectory()
+    os.environ["XDG_CACHE_HOME"] = cache_home.name
+    configs = {"web-search-prime": {
+        "command": sys.executable,
+        "args": [str(SCRIPTS / "stub_mcp_server.py"), "--startup-delay", str(args.startup_delay)],
+    }}
+    report("cold start per call", time_calls(args.calls, configs, reuse=False))
+    report("warm session pool", time_calls(args.calls, configs, reuse=True))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
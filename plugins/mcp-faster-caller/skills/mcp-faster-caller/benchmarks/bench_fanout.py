@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+扇出基准：逐条执行 vs asyncio 并发扇出（本地替身 server，每次调用固定耗时）
+
+用法: python3 bench_fanout.py [--instructions 24] [--latency 0.05] [--per-server 4]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+import call_mcp  # noqa: E402
+from fanout import fan_out  # noqa: E402
+from mcp_client import SessionPool  # noqa: E402
+
+ALIASES = ["search", "API", "read web"]
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Fan-out benchmark against the stand-in MCP server.")
+    parser.add_argument("--instructions", type=int, default=24, help="指令条数（轮流分配给 3 个 server）")
+    parser.add_argument("--latency", type=float, default=0.05, help="每次调用的模拟耗时（秒）")
+    parser.add_argument("--per-server", type=int, default=4, help="每个 server 的并发上限")
+    args = parser.parse_args(argv)
+
+    os.environ["MCP_FAST_CALLER_NO_CACHE"] = "1"
+    # 替身 server 的工具 schema 不写入本机缓存
+    cache_home = tempfile.TemporaryDirectory()
+    os.environ["XDG_CACHE_HOME"] = cache_home.name
+    stub = {"command": sys.executable, "args": [str(SCRIPTS / "stub_mcp_server.py")]}
+    pool = SessionPool({server: stub for server in ("web-search-prime", "context7", "web-reader")})
+    instructions = [
+        f"{ALIASES[index % len(ALIASES)]} sleep seconds={args.latency} n={index}"
+        for index in range(args.instructions)
+    ]
+
+    def execute(parsed: dict, timeout: float) -> dict:
+        return call_mcp.execute_call(parsed, pool, timeout=timeout)
+
+    async def run_fan_out() -> int:
+        stream = fan_out(instructions, call_mcp.parse_mcp_call, execute, (call_mcp.MCPParserError,), args.per_server)
+        return len([item async for item in stream])
+
+    try:
+        # 预热：先把每个 server 的会话都启动好，只比较调用阶段
+        asyncio.run(run_fan_out())
+        start = time.perf_counter()
+        for instruction in instructions:
+            call_mcp.execute_call(call_mcp.parse_mcp_call(instruction), pool)
+        sequential = time.perf_counter() - start
+        start = time.perf_counter()
+        asyncio.run(run_fan_out())
+        concurrent = time.perf_counter() - start
+    finally:
+        pool.close()
+
+    print(f"{args.instructions} instructions x {args.latency * 1e3:.0f} ms, 3 servers, per-server limit {args.per_server}")
+    print(f"    sequential : {sequential * 1e3:>8.1f} ms")
+    print(f"    fan-out    : {concurrent * 1e3:>8.1f} ms ({sequential / concurrent:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
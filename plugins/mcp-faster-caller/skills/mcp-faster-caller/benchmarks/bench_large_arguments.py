@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+大参数引用的内存基准：@file:路径（mmap）、@- 重定向文件（mmap）、@- 管道（按块读取）
+
+每种方式在独立进程中解析并输出一次，报告峰值 RSS 相对小指令基线的增量与负载大小之比，
+以及墙钟耗时。输出写入 /dev/null，包含分块转义写出的开销。
+
+用法: python3 bench_large_arguments.py [--sizes 1,8,32]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+CALL_SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "call_mcp.py"
+
+
+def run(instruction: str, stdin_path: str = None, pipe_path: str = None) -> tuple:
+    """返回 (峰值 RSS 字节, 墙钟秒)"""
+    stdin = open(stdin_path, "rb") if stdin_path else subprocess.DEVNULL
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(CALL_SCRIPT), instruction],
+        stdin=subprocess.PIPE if pipe_path else stdin,
+        stdout=subprocess.DEVNULL,
+    )
+    if pipe_path:
+        with open(pipe_path, "rb") as source:
+            while True:
+                chunk = source.read(1 << 20)
+                if not chunk:
+                    break
+                process.stdin.write(chunk)
+        process.stdin.close()
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if stdin_path:
+        stdin.close()
+    if process.returncode != 0:
+        raise SystemExit(f"call_mcp.py 退出码 {process.returncode}: {instruction}")
+    # Linux 上 ru_maxrss 单位为 KiB，macOS 上为字节
+    return usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024), elapsed
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Memory benchmark for @file / @- argument references.")
+    parser.add_argument("--sizes", default="1,8,32", help="负载大小（MiB），逗号分隔")
+    args = parser.parse_args(argv)
+
+    baseline, _ = run("db query sql=SELECT")
+    print(f"baseline peak RSS (inline instruction): {baseline / 2**20:.1f} MiB")
+    statement = "INSERT INTO events (id, payload) VALUES (42, '{\"note\": \"多字节\\n\"}');\n"
+    with tempfile.TemporaryDirectory() as root:
+        for size_mib in (int(size) for size in args.sizes.split(",")):
+            path = os.path.join(root, f"payload-{size_mib}.sql")
+            size = size_mib * 2**20
+            with open(path, "w", encoding="utf-8") as target:
+                target.write((statement * (size // len(statement.encode("utf-8")) + 1))[:size])
+            actual = os.path.getsize(path)
+            print(f"payload {actual / 2**20:.1f} MiB")
+            cases = [
+                ("sql=@file:", run(f"db query sql=@file:{path}")),
+                ("sql=@- < file", run("db query sql=@-", stdin_path=path)),
+                ("sql=@- pipe", run("db query sql=@-", pipe_path=path)),
+            ]
+            for label, (peak, elapsed) in cases:
+                extra = max(peak - baseline, 0)
+                print(f"    {label:<16} +{extra / 2**20:>7.1f} MiB ({extra / actual:>4.2f}x payload)  {elapsed * 1e3:>8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
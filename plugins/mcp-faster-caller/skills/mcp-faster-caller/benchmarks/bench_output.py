@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+输出格式基准：各输出模式在真实指令语料上的字节数与序列化耗时
+
+语料为 instructions_corpus.txt（中英文指令各半）；对照组为旧版的
+json.dumps(indent=2, ensure_ascii=False)。
+
+用法: python3 bench_output.py [--repeat 200]
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCHMARKS = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARKS.parent / "scripts"))
+
+import call_mcp  # noqa: E402
+from output_format import parse_fields  # noqa: E402
+
+CORPUS = BENCHMARKS / "instructions_corpus.txt"
+MODES = [
+    ("pretty", None),
+    ("json", None),
+    ("json", "server,command,arguments"),
+    ("msgpack", None),
+    ("msgpack", "server,command,arguments"),
+]
+
+
+def load_results() -> list:
+    # 不受本机别名配置与工具 schema 缓存影响
+    with tempfile.TemporaryDirectory() as root:
+        os.environ["XDG_CONFIG_HOME"] = root
+        os.environ["XDG_CACHE_HOME"] = root
+        os.environ.pop("MCP_FAST_CALLER_CONFIG", None)
+        lines = CORPUS.read_text(encoding="utf-8").splitlines()
+        return [call_mcp.parse_mcp_call(line) for line in lines if line.strip()]
+
+
+def measure(results: list, repeat: int, write) -> tuple:
+    """返回 (总字节数, 单个结果的平均序列化耗时 us)"""
+    size = 0
+    for result in results:
+        size += write(result)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for result in results:
+            write(result)
+    elapsed = time.perf_counter() - start
+    return size, elapsed / (repeat * len(results)) * 1e6
+
+
+def mode_writer(output: str, fields):
+    def write(result: dict) -> int:
+        if output == "msgpack":
+            out = io.BytesIO()
+            call_mcp.write_result(result, out, output, fields)
+            return len(out.getvalue())
+        out = io.StringIO()
+        call_mcp.write_result(result, out, output, fields)
+        return len(out.getvalue().encode("utf-8"))
+    return write
+
+
+def legacy_write(result: dict) -> int:
+    return len((json.dumps(result, indent=2, ensure_ascii=False) + "\n").encode("utf-8"))
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Output format size and serialization benchmark.")
+    parser.add_argument("--repeat", type=int, default=200, help="每种模式重复序列化整个语料的次数")
+    args = parser.parse_args(argv)
+
+    results = load_results()
+    baseline, legacy_us = measure(results, args.repeat, legacy_write)
+    print(f"{len(results)} instructions from {CORPUS.name}")
+    print(f"    {'legacy json.dumps indent=2':<42} {baseline:>7} B  100.0%  {legacy_us:>6.1f} us/result")
+    for output, spec in MODES:
+        fields = parse_fields(spec) if spec else None
+        size, micros = measure(results, args.repeat, mode_writer(output, fields))
+        label = f"--output {output}" + (f" --fields {spec}" if spec else "")
+        print(f"    {label:<42} {size:>7} B  {size / baseline:>6.1%}  {micros:>6.1f} us/result")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+解析回归基准：按指令类别测本进程解析吞吐、CLI 墙钟延迟与峰值内存，并与基线比较
+
+语料为 regression_corpus.json（中英文混合）：plain 普通参数、json JSON 参数、key_value 命名参数、
+unknown_alias 拼错 / 未知别名、max_length 补齐到 MAX_INSTRUCTION_LENGTH 的最长指令。
+
+不同机器的绝对速度不同，比较前做归一化：
+- 吞吐乘以校准负载（固定的纯 Python 字符串处理）的耗时，得到与机器速度基本无关的值
+- CLI 延迟以同一环境下 python3 -c pass 的墙钟耗时为单位；两者在同一轮中交替运行，
+  机器负载的波动同时作用于分子与分母
+- 内存（tracemalloc 峰值、CLI 进程峰值 RSS）直接比较
+
+任一指标比基线差超过阈值（默认 25%）时退出码为 1。
+
+用法:
+    python3 bench_regression.py                   # 与 regression_baseline.json 比较
+    python3 bench_regression.py --update          # 重新生成基线
+    python3 bench_regression.py --threshold 0.1 --runs 30
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCHMARKS = Path(__file__).resolve().parent
+SCRIPTS = BENCHMARKS.parent / "scripts"
+CALL_SCRIPT = SCRIPTS / "call_mcp.py"
+CORPUS_FILE = BENCHMARKS / "regression_corpus.json"
+BASELINE_FILE = BENCHMARKS / "regression_baseline.json"
+sys.path.insert(0, str(SCRIPTS))
+
+DEFAULT_THRESHOLD = 0.25
+# CLI 延迟与内存用的指令
+CLI_INSTRUCTION = "搜索 webSearchPrime search_query=\"杭州 天气\" count=3"
+# 指标名前缀 -> (越大越好?, 归一化方式)
+DIRECTIONS = {
+    "parses_per_sec": (True, "calibration"),
+    "cli_ms": (False, "interpreter"),
+    "parse_peak_kib": (False, None),
+    "cli_peak_rss_kib": (False, None),
+}
+
+
+def load_corpus() -> dict:
+    """读取语料，把 max_length 类别的前缀补齐到长度上限"""
+    import call_mcp
+
+    corpus = json.loads(CORPUS_FILE.read_text(encoding="utf-8"))
+    limit = call_mcp.MAX_INSTRUCTION_LENGTH
+    filler = "分布式 tracing latency 指标 "
+    # 以非空白字符结尾，去掉首尾空白后仍恰好是上限长度
+    corpus["max_length"] = [
+        (prefix + filler * (limit // len(filler) + 1))[:limit - 1] + "x" for prefix in corpus["max_length"]
+    ]
+    return corpus
+
+
+def calibrate(repeat: int = 5) -> float:
+    """固定的纯 Python 负载耗时（秒，取最小值），用于抵消机器速度差异"""
+    words = ("alias command key=value 中文 参数 " * 40).split()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(200):
+            table = {}
+            for word in words:
+                key, _, value = word.partition("=")
+                table[key.lower()] = value.strip()
+            " ".join(words).split(maxsplit=3)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def parse_all(instructions: list) -> None:
+    import call_mcp
+
+    for instruction in instructions:
+        try:
+            call_mcp.parse_mcp_call(instruction)
+        except call_mcp.MCPParserError:
+            pass
+
+
+def parses_per_sec(instructions: list, min_time: float, repeat: int) -> float:
+    """最快一轮的吞吐；每轮至少运行 min_time 秒"""
+    parse_all(instructions)
+    best = 0.0
+    for _ in range(repeat):
+        count = 0
+        start = time.perf_counter()
+        while True:
+            parse_all(instructions)
+            count += len(instructions)
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = max(best, count / elapsed)
+    return best
+
+
+def parse_peak_kib(instructions: list) -> float:
+    """解析整个语料一遍时 tracemalloc 记录的峰值分配"""
+    parse_all(instructions)
+    tracemalloc.start()
+    try:
+        parse_all(instructions)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def wall_ms(commands: list, runs: int, env: dict, cwd: str) -> list:
+    """交替运行各命令，每个命令返回 (墙钟中位数毫秒, 子进程峰值 RSS KiB)"""
+    samples = [[] for _ in commands]
+    peaks = [0 for _ in commands]
+    for _ in range(runs):
+        for index, command in enumerate(commands):
+            start = time.perf_counter()
+            process = subprocess.Popen([sys.executable, *command], env=env, cwd=cwd, stdout=subprocess.DEVNULL)
+            _, status, usage = os.wait4(process.pid, 0)
+            samples[index].append(time.perf_counter() - start)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            if process.returncode:
+                raise RuntimeError(f"{command} 退出码 {process.returncode}")
+            peaks[index] = max(peaks[index], usage.ru_maxrss)
+    return [(statistics.median(times) * 1000, peak) for times, peak in zip(samples, peaks)]
+
+
+def measure(runs: int = 20, min_time: float = 0.2, repeat: int = 5) -> dict:
+    """运行全部测量，返回扁平的 {指标名: 值}"""
+    with tempfile.TemporaryDirectory() as root:
+        env = dict(os.environ, XDG_CONFIG_HOME=root, XDG_CACHE_HOME=root)
+        for name in ("MCP_FAST_CALLER_CONFIG", "MCP_FAST_CALLER_DEBUG", "MCP_FAST_CALLER_METRICS"):
+            env.pop(name, None)
+        # 本进程也使用隔离的配置与缓存目录
+        previous = {name: os.environ.get(name) for name in ("XDG_CONFIG_HOME", "XDG_CACHE_HOME")}
+        os.environ.update(XDG_CONFIG_HOME=root, XDG_CACHE_HOME=root)
+        try:
+            corpus = load_corpus()
+            results = {"calibration_s": calibrate()}
+            for category, instructions in corpus.items():
+                results[f"parses_per_sec/{category}"] = parses_per_sec(instructions, min_time, repeat)
+            results["parse_peak_kib/all"] = parse_peak_kib([item for items in corpus.values() for item in items])
+
+            (interpreter_ms, _), (cli_ms, rss) = wall_ms([["-c", "pass"], [str(CALL_SCRIPT), CLI_INSTRUCTION]], runs, env, root)
+            results["interpreter_ms"] = interpreter_ms
+            results["cli_ms/parse"] = cli_ms
+            results["cli_peak_rss_kib/parse"] = rss
+        finally:
+            for name, value in previous.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+    return results
+
+
+def normalized(results: dict, name: str) -> float:
+    _, scale = DIRECTIONS[name.partition("/")[0]]
+    if scale == "calibration":
+        return results[name] * results["calibration_s"]
+    if scale == "interpreter":
+        return results[name] / results["interpreter_ms"]
+    return results[name]
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """返回超出阈值的回归描述；基线中没有的指标不比较"""
+    regressions = []
+    for name in sorted(current):
+        if name.partition("/")[0] not in DIRECTIONS or name not in baseline:
+            continue
+        higher_is_better, _ = DIRECTIONS[name.partition("/")[0]]
+        before, after = normalized(baseline, name), normalized(current, name)
+        change = (after - before) / before if before else 0.0
+        if (-change if higher_is_better else change) > threshold:
+            regressions.append(f"{name}: {current[name]:.4g} vs 基线 {baseline[name]:.4g}（归一化后变化 {change:+.1%}）")
+    return regressions
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Regression benchmark for parse_mcp_call against a stored baseline.")
+    parser.add_argument("--baseline", default=str(BASELINE_FILE), help="基线 JSON 路径")
+    parser.add_argument("--update", action="store_true", help="把本次结果写为基线")
+    parser.add_argument("--threshold", type=float, help=f"允许的最大退化比例（默认取基线中的值或 {DEFAULT_THRESHOLD}）")
+    parser.add_argument("--runs", type=int, default=20, help="CLI 延迟的运行次数")
+    parser.add_argument("--min-time", type=float, default=0.2, help="吞吐测量每轮的最短时间（秒）")
+    args = parser.parse_args(argv)
+
+    results = measure(args.runs, args.min_time)
+    for name, value in results.items():
+        print(f"    {name:<28} {value:>12.4g}")
+
+    path = Path(args.baseline)
+    if args.update:
+        threshold = args.threshold if args.threshold is not None else DEFAULT_THRESHOLD
+        payload = {"threshold": threshold, "python": sys.version.split()[0], "results": results}
+        path.write_text(json.dumps(payload, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"基线已写入 {path}")
+        return 0
+
+    baseline = json.loads(path.read_text(encoding="utf-8"))
+    threshold = args.threshold if args.threshold is not None else baseline.get("threshold", DEFAULT_THRESHOLD)
+    regressions = compare(baseline["results"], results, threshold)
+    for regression in regressions:
+        print(f"回归: {regression}", file=sys.stderr)
+    print(f"{len(regressions)} 项超出 {threshold:.0%} 阈值（基线 {path.name}）")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
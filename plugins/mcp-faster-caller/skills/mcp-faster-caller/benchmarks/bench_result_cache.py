@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+结果缓存基准：缓存命中 vs 常驻会话调用（本地替身 server）
+
+用法: python3 bench_result_cache.py [--calls 2000] [--entries 5000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+import call_mcp  # noqa: E402
+import result_cache  # noqa: E402
+from mcp_client import SessionPool  # noqa: E402
+
+
+def time_calls(calls: int, parsed: dict, pool: SessionPool, cache) -> float:
+    """返回单次 execute_call 的中位耗时（微秒）"""
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call_mcp.execute_call(parsed, pool, cache)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Result cache benchmark.")
+    parser.add_argument("--calls", type=int, default=2000, help="每种方式的调用次数")
+    parser.add_argument("--entries", type=int, default=5000, help="预先写入的缓存项数量")
+    args = parser.parse_args(argv)
+
+    parsed = call_mcp.parse_mcp_call("search echo search_query=MCP count=10")
+    server = {"command": sys.executable, "args": [str(SCRIPTS / "stub_mcp_server.py")]}
+    pool = SessionPool({"web-search-prime": server})
+    with tempfile.TemporaryDirectory() as root:
+        # 替身 server 的工具 schema 不写入本机缓存
+        os.environ["XDG_CACHE_HOME"] = root
+        settings = {"ttl": dict(result_cache.DEFAULT_TTLS), "max_bytes": 1 << 30, "disabled_aliases": set()}
+        cache = result_cache.ResultCache(os.path.join(root, "results.sqlite3"), settings)
+        filler = {"content": [{"type": "text", "text": "x" * 512}]}
+        for index in range(args.entries):
+            cache.put("search", "web-search-prime", "echo", {"search_query": str(index)}, filler)
+        try:
+            os.environ[result_cache.DISABLE_ENV] = "1"
+            warm = time_calls(args.calls, parsed, pool, None)
+            del os.environ[result_cache.DISABLE_ENV]
+            call_mcp.execute_call(parsed, pool, cache)
+            hit = time_calls(args.calls, parsed, pool, cache)
+        finally:
+            cache.close()
+            pool.close()
+        size = os.path.getsize(os.path.join(root, "results.sqlite3"))
+
+    print(f"warm session call (no cache)      : {warm:>9.1f} us")
+    print(f"cache hit ({args.entries} entries, {size / 2**20:.1f} MiB db): {hit:>9.1f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
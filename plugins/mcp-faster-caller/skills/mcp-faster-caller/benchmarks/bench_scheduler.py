@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+调度基准：固定并发 vs AIMD 自适应并发，对容量有限、过载时变慢并报错的替身 server 扇出
+
+两种方式的并发上限都从 --max-concurrency 开始；固定并发把 min_concurrency 设为同一值，上限不会下调。
+输出总耗时、成功数、过载错误数、成功调用的 p50 / p99 耗时与调度统计。
+
+用法: python3 bench_scheduler.py [--instructions 60] [--capacity 3] [--max-concurrency 12] [--latency 0.05]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+import call_mcp  # noqa: E402
+from fanout import fan_out  # noqa: E402
+from mcp_client import SessionPool  # noqa: E402
+from scheduler import Scheduler  # noqa: E402
+
+SERVER = "web-search-prime"
+
+
+def run(pool: SessionPool, instructions: list, plan: Scheduler) -> tuple:
+    """返回 (总耗时, 成功调用耗时列表, 错误数)"""
+    latencies = []
+
+    def execute(parsed: dict, timeout: float) -> dict:
+        start = time.perf_counter()
+        result = call_mcp.execute_call(parsed, pool, timeout=timeout)
+        latencies.append(time.perf_counter() - start)
+        return result
+
+    async def consume() -> int:
+        stream = fan_out(
+            instructions, call_mcp.parse_mcp_call, execute, (call_mcp.MCPParserError,),
+            scheduler=plan, congestion=(call_mcp.MCPExecutionError,),
+        )
+        return sum(1 for item in [item async for item in stream] if "error" in item)
+
+    start = time.perf_counter()
+    errors = asyncio.run(consume())
+    return time.perf_counter() - start, latencies, errors
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Fixed vs adaptive per-server concurrency against an overloaded stand-in server.")
+    parser.add_argument("--instructions", type=int, default=60, help="指令条数")
+    parser.add_argument("--capacity", type=int, default=3, help="替身 server 的并发容量")
+    parser.add_argument("--max-concurrency", type=int, default=12, help="并发上限的初始值与最大值")
+    parser.add_argument("--latency", type=float, default=0.05, help="容量内每次调用的耗时（秒）")
+    args = parser.parse_args(argv)
+
+    os.environ["MCP_FAST_CALLER_NO_CACHE"] = "1"
+    # 替身 server 的工具 schema 不写入本机缓存
+    cache_home = tempfile.TemporaryDirectory()
+    os.environ["XDG_CACHE_HOME"] = cache_home.name
+    load_dir = tempfile.TemporaryDirectory()
+    stub = {
+        "command": sys.executable,
+        "args": [str(SCRIPTS / "stub_mcp_server.py"), "--capacity", str(args.capacity), "--load-dir", load_dir.name],
+    }
+    pool = SessionPool({SERVER: stub})
+    instructions = [f"search work seconds={args.latency} n={index}" for index in range(args.instructions)]
+    modes = {
+        "fixed": {"min_concurrency": args.max_concurrency},
+        "adaptive": {},
+    }
+
+    print(f"{args.instructions} calls x {args.latency * 1e3:.0f} ms, capacity {args.capacity}, "
+          f"max concurrency {args.max_concurrency}")
+    try:
+        # 预热：先启动足够的会话，只比较调用阶段
+        warm = [f"search echo n={index}" for index in range(args.max_concurrency)]
+        run(pool, warm, Scheduler(max_concurrency=args.max_concurrency))
+        for mode, entry in modes.items():
+            plan = Scheduler({SERVER: {"max_concurrency": args.max_concurrency, **entry}})
+            elapsed, latencies, errors = run(pool, instructions, plan)
+            stats = plan.stats()[SERVER]
+            ok = sorted(latencies)
+            p99 = ok[min(len(ok) - 1, int(len(ok) * 0.99))] if ok else 0.0
+            print(f"    {mode:<9}: {elapsed * 1e3:>8.1f} ms, ok {args.instructions - errors:>3}, errors {errors:>3}, "
+                  f"call p50 {statistics.median(ok or [0]) * 1e3:>6.1f} ms, p99 {p99 * 1e3:>6.1f} ms, "
+                  f"final limit {stats['limit']:.2f}, max queue depth {stats['max_queue_depth']}")
+    finally:
+        pool.close()
+        load_dir.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
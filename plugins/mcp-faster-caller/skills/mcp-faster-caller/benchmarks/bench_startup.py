@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+冷启动基准：一次成功解析额外导入了哪些模块、导入耗时与 CLI 墙钟耗时
+
+导入统计基于 python -X importtime，扣除空解释器本身的导入；
+预算见 startup_budget.json：tests/test_call_mcp.py 中的回归测试判定禁止模块与额外模块数，
+导入耗时在共享机器上波动较大，只作参考。
+
+用法: python3 bench_startup.py [--runs 20]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCHMARKS = Path(__file__).resolve().parent
+CALL_SCRIPT = BENCHMARKS.parent / "scripts" / "call_mcp.py"
+BUDGET_FILE = BENCHMARKS / "startup_budget.json"
+FAST_FLAGS = ["-I", "-S"]
+
+
+def load_budget() -> dict:
+    return json.loads(BUDGET_FILE.read_text(encoding="utf-8"))
+
+
+def isolated_env(root: str) -> dict:
+    """不受本机别名配置和缓存影响的环境"""
+    env = dict(os.environ, XDG_CONFIG_HOME=os.path.join(root, "config"), XDG_CACHE_HOME=os.path.join(root, "cache"))
+    for name in ("MCP_FAST_CALLER_CONFIG", "MCP_FAST_CALLER_DEBUG"):
+        env.pop(name, None)
+    return env
+
+
+def _import_times(command: list, env: dict, cwd: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *command],
+        env=env,
+        cwd=cwd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(self_us)
+    return times
+
+
+def measure_imports(instruction: str, flags: list = FAST_FLAGS) -> dict:
+    """返回解析一条指令相对空解释器额外导入的模块及其自身导入耗时（微秒）"""
+    with tempfile.TemporaryDirectory() as root:
+        env = isolated_env(root)
+        baseline = _import_times([*flags, "-c", "pass"], env, root)
+        # 预热一次，避免把首次生成 .pyc 的编译时间计入
+        _import_times([*flags, str(CALL_SCRIPT), instruction], env, root)
+        full = _import_times([*flags, str(CALL_SCRIPT), instruction], env, root)
+    return {name: self_us for name, self_us in full.items() if name not in baseline}
+
+
+def measure_wall(command: list, runs: int, env: dict, cwd: str) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *command], env=env, cwd=cwd, stdout=subprocess.DEVNULL, check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for call_mcp.py.")
+    parser.add_argument("--runs", type=int, default=20, help="每种启动方式的运行次数")
+    args = parser.parse_args(argv)
+
+    budget = load_budget()
+    instruction = budget["instruction"]
+    extra = measure_imports(instruction)
+    total_ms = sum(extra.values()) / 1000
+    print(f"instruction: {instruction}")
+    print(f"extra modules ({len(extra)}, budget {budget['max_extra_modules']}): "
+          f"{total_ms:.2f} ms self import time (advisory budget {budget['max_import_ms']} ms)")
+    for name, self_us in sorted(extra.items(), key=lambda item: -item[1]):
+        print(f"    {self_us:>6} us  {name}")
+
+    with tempfile.TemporaryDirectory() as root:
+        env = isolated_env(root)
+        rows = [
+            ("python3 -c pass", ["-c", "pass"]),
+            ("python3 -I -S -c pass", [*FAST_FLAGS, "-c", "pass"]),
+            ("python3 call_mcp.py", [str(CALL_SCRIPT), instruction]),
+            ("python3 -I -S call_mcp.py", [*FAST_FLAGS, str(CALL_SCRIPT), instruction]),
+        ]
+        for label, command in rows:
+            print(f"{label:<28} {measure_wall(command, args.runs, env, root):>8.2f} ms (median of {args.runs})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
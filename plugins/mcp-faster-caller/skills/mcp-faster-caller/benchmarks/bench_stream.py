@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+大结果输出基准：--execute 缓冲输出 vs --stream 分块帧输出
+
+替身 server 的 document 工具返回指定大小的文本。每种方式在独立进程中调用一次，
+报告首字节时间（从启动进程到 stdout 读到第一个字节）、总耗时与 call_mcp.py 进程自身的峰值 RSS。
+wait4 的 ru_maxrss 包含已回收的 server 进程，这里改为读取时轮询 /proc/<pid>/status 的 VmHWM（仅 Linux）。
+输出由本进程按块读取后丢弃。
+
+用法: python3 bench_stream.py [--sizes 1,8,32]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+CALL_SCRIPT = SCRIPTS / "call_mcp.py"
+
+
+def high_water_mark(pid: int) -> int:
+    """进程至今的峰值 RSS 字节；进程已退出时返回 0"""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def run(args: list, env: dict) -> tuple:
+    """返回 (首字节秒, 墙钟秒, 峰值 RSS 字节, 输出字节数)"""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(CALL_SCRIPT), *args],
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+    )
+    first_byte = None
+    total = 0
+    peak = 0
+    while True:
+        chunk = process.stdout.read1(1 << 16)
+        if not chunk:
+            break
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        total += len(chunk)
+        peak = max(peak, high_water_mark(process.pid))
+    peak = max(peak, high_water_mark(process.pid))
+    process.stdout.close()
+    process.wait()
+    elapsed = time.perf_counter() - start
+    if process.returncode != 0:
+        raise SystemExit(f"call_mcp.py 退出码 {process.returncode}: {args}")
+    return first_byte or elapsed, elapsed, peak, total
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Buffered --execute vs chunked --stream output for large results.")
+    parser.add_argument("--sizes", default="1,8,32", help="结果大小（MiB），逗号分隔")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as root:
+        config = os.path.join(root, "servers.json")
+        with open(config, "w", encoding="utf-8") as target:
+            stub = {"command": sys.executable, "args": [str(SCRIPTS / "stub_mcp_server.py")]}
+            json.dump({"mcpServers": {"pdf-reader": stub}}, target)
+        env = dict(
+            os.environ,
+            MCP_FAST_CALLER_CONFIG=config,
+            MCP_FAST_CALLER_NO_CACHE="1",
+            XDG_CACHE_HOME=os.path.join(root, "cache"),
+            XDG_CONFIG_HOME=os.path.join(root, "config"),
+        )
+
+        _, _, baseline, _ = run(["--execute", "pdf document size=1"], env)
+        print(f"baseline peak RSS (1-byte result): {baseline / 2**20:.1f} MiB")
+        for size_mib in (int(size) for size in args.sizes.split(",")):
+            instruction = f"pdf document size={size_mib * 2**20}"
+            print(f"result {size_mib} MiB")
+            cases = [
+                ("--execute", run(["--execute", instruction], env)),
+                ("--stream", run(["--stream", instruction], env)),
+                ("--stream 1 MiB cap", run(["--stream", "--max-bytes", str(2**20), instruction], env)),
+            ]
+            for label, (first_byte, elapsed, peak, total) in cases:
+                extra = max(peak - baseline, 0)
+                print(f"    {label:<18} first byte {first_byte * 1e3:>8.1f} ms, total {elapsed * 1e3:>8.1f} ms, "
+                      f"peak +{extra / 2**20:>6.1f} MiB, output {total / 2**20:>6.1f} MiB")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+外部别名配置加载与编译缓存
+
+合并顺序（后者覆盖前者）：内置 MCP_MAP < 用户配置 < 项目配置 < MCP_FAST_CALLER_CONFIG。
+存在外部配置时，合并后的别名表与前缀树以 marshal 缓存，
+缓存键为各配置文件和 call_mcp.py 的 (路径, mtime, 大小)，任一变化即重新编译。
+"""
+
+from __future__ import annotations
+
+import marshal
+import os
+
+# 存在外部配置时本模块位于解析热路径上：json/zlib/typing 按需导入
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Callable, Iterator
+
+    AliasTable = tuple[dict[str, str], dict[str, Any]]
+    Fingerprint = tuple[tuple[str, int, int], ...]
+
+CONFIG_ENV = "MCP_FAST_CALLER_CONFIG"
+CONFIG_DIR_NAME = "mcp-faster-caller"
+PROJECT_CONFIG_NAME = ".mcp-faster-caller"
+CONFIG_SUFFIXES = (".json", ".toml")
+CACHE_FORMAT = 1
+# 执行模式的 server 启动配置与别名写在同一文件中，格式与 .mcp.json 一致
+SERVERS_KEY = "mcpServers"
+# 同一文件中其他模块读取的表（result_cache / fanout / scheduler）；只声明这些表的文件没有别名
+SECTION_KEYS = (SERVERS_KEY, "cache", "concurrency", "scheduler")
+
+
+class AliasConfigError(Exception):
+    """别名配置错误"""
+    pass
+
+
+def user_config_dir() -> str:
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, CONFIG_DIR_NAME)
+
+
+def cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, CONFIG_DIR_NAME)
+
+
+def candidate_paths() -> list[str]:
+    """按优先级从低到高列出可能的配置文件路径"""
+    paths = [os.path.join(user_config_dir(), "aliases" + suffix) for suffix in CONFIG_SUFFIXES]
+    paths.extend(os.path.join(os.getcwd(), PROJECT_CONFIG_NAME + suffix) for suffix in CONFIG_SUFFIXES)
+    explicit = os.environ.get(CONFIG_ENV)
+    if explicit:
+        paths.extend(os.path.abspath(os.path.expanduser(path)) for path in explicit.split(os.pathsep) if path)
+    return paths
+
+
+def _stat_fingerprint(paths: list[str]) -> Fingerprint:
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(fingerprint)
+
+
+def config_fingerprint(paths: list[str] | None = None) -> Fingerprint:
+    """当前存在的配置文件及其 mtime / 大小；常驻进程据此判断配置是否变化"""
+    return _stat_fingerprint(candidate_paths() if paths is None else paths)
+
+
+def load_config_file(path: str) -> dict[str, Any]:
+    """读取一个 JSON/TOML 配置文件，返回顶层表"""
+    try:
+        if path.endswith(".toml"):
+            try:
+                import tomllib
+            except ImportError:  # Python < 3.11
+                try:
+                    import tomli as tomllib
+                except ImportError:
+                    raise AliasConfigError(f"读取 TOML 配置需要 Python 3.11+ 或 tomli: {path}")
+            with open(path, "rb") as source:
+                payload = tomllib.load(source)
+        else:
+            import json
+
+            with open(path, encoding="utf-8") as source:
+                payload = json.load(source)
+    except AliasConfigError:
+        raise
+    except (OSError, ValueError) as e:
+        raise AliasConfigError(f"无法读取别名配置 {path}: {e}")
+    if not isinstance(payload, dict):
+        raise AliasConfigError(f"配置文件 {path} 顶层必须是表")
+    return payload
+
+
+def iter_config_tables(key: str, paths: list[str] | None = None) -> Iterator[tuple[str, dict[str, Any]]]:
+    """按优先级从低到高产出各配置文件中名为 key 的表：(路径, 表)"""
+    for path in candidate_paths() if paths is None else paths:
+        if not os.path.isfile(path):
+            continue
+        table = load_config_file(path).get(key)
+        if table is None:
+            continue
+        if not isinstance(table, dict):
+            raise AliasConfigError(f"配置文件 {path} 中的 {key} 必须是表")
+        yield path, table
+
+
+def _read_config(path: str) -> dict[str, str | None]:
+    payload = load_config_file(path)
+    aliases = payload.get("aliases", {} if any(key in payload for key in SECTION_KEYS) else None)
+    if not isinstance(aliases, dict):
+        raise AliasConfigError(f"别名配置 {path} 缺少 aliases 表")
+    for alias, server in aliases.items():
+        if not alias.split() or not (server is None or isinstance(server, str)):
+            raise AliasConfigError(f"别名配置 {path} 中的 '{alias}' 无效")
+    return aliases
+
+
+def compile_alias_table(
+    builtin: dict[str, str],
+    sources: Fingerprint,
+    build_trie: Callable[[dict[str, str]], dict[str, Any]],
+) -> AliasTable:
+    """按层合并别名；值为 null 或空字符串表示删除下层同名别名"""
+    merged = dict(builtin)
+    for path, _, _ in sources:
+        for alias, server in _read_config(path).items():
+            if not server:
+                merged.pop(alias, None)
+            else:
+                merged[alias] = server
+    return merged, build_trie(merged)
+
+
+def _cache_path(sources: Fingerprint) -> str:
+    import zlib
+
+    key = "\0".join(path for path, _, _ in sources).encode("utf-8")
+    return os.path.join(cache_dir(), f"aliases-{zlib.crc32(key):08x}.marshal")
+
+
+def _read_cache(path: str, fingerprint: Fingerprint) -> AliasTable | None:
+    try:
+        # marshal.load(file) 逐段读取，整体读入后再解码快一个数量级
+        with open(path, "rb") as source:
+            cached = marshal.loads(source.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(cached, tuple) or len(cached) != 4:
+        return None
+    cache_format, cached_fingerprint, merged, trie = cached
+    if cache_format != CACHE_FORMAT or cached_fingerprint != fingerprint:
+        return None
+    return merged, trie
+
+
+def _write_cache(path: str, fingerprint: Fingerprint, table: AliasTable) -> None:
+    temporary = f"{path}.tmp-{os.getpid()}"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temporary, "wb") as target:
+            target.write(marshal.dumps((CACHE_FORMAT, fingerprint, table[0], table[1])))
+        os.replace(temporary, path)
+    except OSError:
+        # 缓存只是加速手段，目录不可写时直接使用内存结果
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+
+
+def load_alias_table(
+    builtin: dict[str, str],
+    builtin_path: str,
+    build_trie: Callable[[dict[str, str]], dict[str, Any]],
+) -> AliasTable | None:
+    """
+    加载合并后的别名表与前缀树
+
+    没有任何外部配置文件时返回 None，由调用方直接使用内置映射。
+    """
+    sources = _stat_fingerprint(candidate_paths())
+    if not sources:
+        return None
+
+    fingerprint = _stat_fingerprint([builtin_path]) + sources
+    path = _cache_path(sources)
+    table = _read_cache(path, fingerprint)
+    if table is None:
+        table = compile_alias_table(builtin, sources, build_trie)
+        _write_cache(path, fingerprint, table)
+    return table
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+模糊别名索引：别名拼错时给出排序后的建议，置信度足够高时自动纠正
+
+- 别名统一 casefold、空白折叠后，按字符二元组（含首尾标记）建倒排索引；
+  中文别名通常只有 2-4 个字，二元组比三元组更能保留相似度信号
+- 查询时按共享二元组数取少量候选，再用编辑距离（含相邻换位）精排，
+  相似度 = 1 - 距离 / 较长者长度
+- 只在解析失败时构建；别名数不少于 CACHE_MIN_ALIASES 时，索引以 marshal 缓存到
+  ~/.cache/mcp-faster-caller/，缓存键为别名表内容的摘要
+"""
+
+from __future__ import annotations
+
+import os
+
+from alias_config import cache_dir
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any
+
+    # (别名, server, 相似度, 别名占用的词元数)
+    Suggestion = tuple[str, str, float, int]
+
+AUTOCORRECT_ENV = "MCP_FAST_CALLER_AUTOCORRECT"
+DEFAULT_THRESHOLD = 0.8
+INDEX_FORMAT = 1
+CACHE_MIN_ALIASES = 512
+# 精排的候选数；候选按共享二元组数取前若干个
+RERANK_CANDIDATES = 24
+# 一次查询最多累计的倒排项数（至少处理两个最罕见的二元组）
+COUNT_BUDGET = 2048
+_START = "\x02"
+_END = "\x03"
+
+
+def autocorrect_threshold() -> float:
+    """自动纠正所需的最低相似度；设为 1 或以上关闭自动纠正"""
+    configured = os.environ.get(AUTOCORRECT_ENV)
+    if not configured:
+        return DEFAULT_THRESHOLD
+    try:
+        return float(configured)
+    except ValueError:
+        return DEFAULT_THRESHOLD
+
+
+def normalize(alias: str) -> str:
+    return " ".join(alias.casefold().split())
+
+
+def bigrams(text: str) -> set[str]:
+    padded = f"{_START}{text}{_END}"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+def pattern_masks(pattern: str) -> dict[str, int]:
+    """每个字符在 pattern 中出现位置的位掩码"""
+    masks: dict[str, int] = {}
+    for position, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | (1 << position)
+    return masks
+
+
+def osa_distance(masks: dict[str, int], length: int, text: str) -> int:
+    """
+    含相邻换位的编辑距离（OSA），按 Hyyrö 2003 的位并行算法逐字符处理 text
+
+    masks / length 来自 pattern_masks(pattern) 与 len(pattern)；每个字符只做常数次整数位运算，
+    同一 pattern 与多个候选比较时只需构建一次位掩码。
+    """
+    if not length:
+        return len(text)
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    vp, vn, d0, previous = full, 0, 0, 0
+    distance = length
+    for char in text:
+        pm = masks.get(char, 0)
+        transposed = ((~d0 & pm) << 1) & previous
+        d0 = ((((pm & vp) + vp) ^ vp) | pm | vn | transposed) & full
+        hp = (vn | ~(d0 | vp)) & full
+        hn = d0 & vp
+        if hp & last:
+            distance += 1
+        elif hn & last:
+            distance -= 1
+        hp = ((hp << 1) | 1) & full
+        hn = (hn << 1) & full
+        vp = (hn | ~(d0 | hp)) & full
+        vn = hp & d0
+        previous = pm
+    return distance
+
+
+def edit_distance(a: str, b: str) -> int:
+    return osa_distance(pattern_masks(a), len(a), b)
+
+
+class AliasIndex:
+    """别名二元组倒排索引"""
+
+    def __init__(
+        self,
+        aliases: list[str],
+        normalized: list[str],
+        servers: list[str],
+        postings: dict[str, tuple[int, ...]],
+    ) -> None:
+        self.aliases = aliases
+        self.normalized = normalized
+        self.servers = servers
+        self.postings = postings
+
+    @classmethod
+    def build(cls, mcp_map: dict[str, str]) -> AliasIndex:
+        # casefold 后相同的别名在前缀树中本就是同一个，保留后出现的
+        unique: dict[str, tuple[str, str]] = {}
+        for alias, server in mcp_map.items():
+            key = normalize(alias)
+            if key:
+                unique[key] = (alias, server)
+        aliases = [alias for alias, _ in unique.values()]
+        servers = [server for _, server in unique.values()]
+        grouped: dict[str, list[int]] = {}
+        for position, key in enumerate(unique):
+            for gram in bigrams(key):
+                grouped.setdefault(gram, []).append(position)
+        postings = {gram: tuple(ids) for gram, ids in grouped.items()}
+        return cls(aliases, list(unique), servers, postings)
+
+    def suggest(self, query: str, limit: int = 5) -> list[tuple[str, str, float]]:
+        """返回与 query 最相近的别名：[(别名, server, 相似度)]，按相似度降序"""
+        query = normalize(query)
+        if not query:
+            return []
+        postings = sorted(
+            (self.postings[gram] for gram in bigrams(query) if gram in self.postings),
+            key=len,
+        )
+        # 从最少见的二元组开始计数；拼错只影响少数二元组，其余罕见二元组足以定位目标，
+        # 计数总量超出预算后跳过更常见的二元组
+        budget = COUNT_BUDGET
+        for index, ids in enumerate(postings):
+            budget -= len(ids)
+            if budget < 0 and index >= 2:
+                del postings[index:]
+                break
+        if not postings:
+            return []
+
+        from collections import Counter
+        from itertools import chain
+
+        # Counter 在 C 层计数，比逐个累加快一个数量级
+        counts = Counter(chain.from_iterable(postings))
+        candidates = [position for position, _ in counts.most_common(RERANK_CANDIDATES)]
+        masks = pattern_masks(query)
+        ranked = []
+        for position in candidates:
+            alias = self.normalized[position]
+            longest = max(len(alias), len(query))
+            distance = osa_distance(masks, len(query), alias)
+            # 相似度低于 0.5 的建议没有参考价值
+            if distance * 2 <= longest:
+                ranked.append((1 - distance / longest, -counts[position], position))
+        ranked.sort(key=lambda item: (-item[0], item[1], self.aliases[item[2]]))
+        return [(self.aliases[position], self.servers[position], score) for score, _, position in ranked[:limit]]
+
+    def lookup(self, tokens: list[str], max_tokens: int, limit: int = 5) -> list[Suggestion]:
+        """
+        按指令开头的 1..max_tokens 个词元查找相近别名（至少留一个词元作为命令）
+
+        Returns:
+            [(别名, server, 相似度, 别名占用的词元数)]；相似度相同时词元多者优先
+        """
+        merged: dict[str, Suggestion] = {}
+        for count in range(1, min(max_tokens, len(tokens) - 1) + 1):
+            for alias, server, score in self.suggest(" ".join(tokens[:count]), limit):
+                known = merged.get(alias)
+                if known is None or (score, count) > (known[2], known[3]):
+                    merged[alias] = (alias, server, score, count)
+        return sorted(merged.values(), key=lambda item: (-item[2], -item[3], item[0]))[:limit]
+
+    def to_marshal(self) -> tuple[Any, ...]:
+        return (self.aliases, self.normalized, self.servers, self.postings)
+
+
+def choose_correction(suggestions: list[Suggestion], threshold: float | None = None) -> Suggestion | None:
+    """最相近的建议达到阈值且不与指向其他 server 的同分建议冲突时，返回它作为自动纠正结果"""
+    threshold = autocorrect_threshold() if threshold is None else threshold
+    if not suggestions or suggestions[0][2] < threshold:
+        return None
+    best = suggestions[0]
+    for other in suggestions[1:]:
+        if other[2] == best[2] and other[1] != best[1]:
+            return None
+    return best
+
+
+def _index_cache_path(digest: str) -> str:
+    return os.path.join(cache_dir(), f"alias-index-{digest}.marshal")
+
+
+def load_alias_index(mcp_map: dict[str, str]) -> AliasIndex:
+    """构建别名索引；大别名表读写 marshal 缓存，避免每个进程都重建"""
+    if len(mcp_map) < CACHE_MIN_ALIASES:
+        return AliasIndex.build(mcp_map)
+
+    import hashlib
+    import marshal
+
+    # marshal 输出受引用计数影响，不能作为摘要输入
+    content = "\0".join(f"{alias}\1{server}" for alias, server in mcp_map.items())
+    digest = hashlib.blake2b(content.encode("utf-8", "surrogatepass"), digest_size=8).hexdigest()
+    path = _index_cache_path(digest)
+    try:
+        with open(path, "rb") as source:
+            cached = marshal.loads(source.read())
+        if isinstance(cached, tuple) and len(cached) == 2 and cached[0] == INDEX_FORMAT:
+            return AliasIndex(*cached[1])
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    index = AliasIndex.build(mcp_map)
+    temporary = f"{path}.tmp-{os.getpid()}"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temporary, "wb") as target:
+            target.write(marshal.dumps((INDEX_FORMAT, index.to_marshal())))
+        os.replace(temporary, path)
+    except OSError:
+        # 缓存只是加速手段，目录不可写时直接使用内存结果
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+    return index
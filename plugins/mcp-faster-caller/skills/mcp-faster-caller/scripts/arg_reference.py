@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+大参数引用：@file:路径 与 @- （标准输入）
+
+指令本身仍受长度限制，大 SQL 脚本或 JSON 负载通过引用传入：
+- 整段参数为 @file:path 时，文件内容作为参数；内容是 JSON 对象时解析为对象
+- 命名参数值为 @file:path 时，文件内容作为该参数的值（原样保留，不做分词）
+- @- 表示从标准输入读取；文件不存在或无法读取时报错，不会退回字面量
+- 其他 @ 开头的值原样传递，如 context7 的 @scope/package、GitHub 的 @user；
+  @@ 开头表示去掉一个 @ 的字面量，用于传递字面的 @- 或 @file:...
+
+普通文件通过 mmap 映射后一次解码为 str，管道按块读取；
+大小上限由 MCP_FAST_CALLER_MAX_ARG_BYTES 配置（字节）。
+"""
+
+from __future__ import annotations
+
+import os
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, BinaryIO
+
+MAX_BYTES_ENV = "MCP_FAST_CALLER_MAX_ARG_BYTES"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+STDIN_REFERENCE = "@-"
+FILE_PREFIX = "@file:"
+READ_CHUNK = 1024 * 1024
+# 判断内容是否为 JSON 对象时只检查开头，避免对大字符串整体 lstrip 复制
+JSON_PROBE = 4096
+
+
+class ArgumentReferenceError(Exception):
+    """参数引用错误"""
+    pass
+
+
+def max_reference_bytes() -> int:
+    """读取引用内容的大小上限"""
+    configured = os.environ.get(MAX_BYTES_ENV)
+    if not configured:
+        return DEFAULT_MAX_BYTES
+    try:
+        limit = int(configured)
+    except ValueError:
+        limit = -1
+    if limit <= 0:
+        raise ArgumentReferenceError(f"{MAX_BYTES_ENV} 必须是正整数（字节）: {configured}")
+    return limit
+
+
+def is_reference(value: str) -> bool:
+    """值是否需要处理：@-、@file:path 引用或 @@ 转义；其他 @ 开头的值原样保留"""
+    return value == STDIN_REFERENCE or value.startswith(FILE_PREFIX) or value.startswith("@@")
+
+
+def unescape(value: str) -> str:
+    """@@ 开头表示去掉一个 @ 的字面量"""
+    return value[1:]
+
+
+def _too_large(label: str, limit: int) -> ArgumentReferenceError:
+    return ArgumentReferenceError(f"参数引用 {label} 超过大小上限 {limit} 字节（可通过 {MAX_BYTES_ENV} 调整）")
+
+
+def _decode(data: Any, label: str) -> str:
+    try:
+        return str(data, "utf-8")
+    except UnicodeDecodeError as e:
+        raise ArgumentReferenceError(f"参数引用 {label} 不是有效的 UTF-8: {e}")
+
+
+def _read_mapped(fileno: int, size: int, label: str) -> str:
+    if size == 0:
+        # 空文件无法映射
+        return ""
+    import mmap
+
+    # 直接从映射解码，不先复制出一份 bytes
+    with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mapped:
+        return _decode(mapped, label)
+
+
+def _read_streaming(source: BinaryIO, limit: int, label: str) -> str:
+    buffer = bytearray()
+    while True:
+        chunk = source.read(READ_CHUNK)
+        if not chunk:
+            break
+        buffer += chunk
+        if len(buffer) > limit:
+            raise _too_large(label, limit)
+    text = _decode(buffer, label)
+    del buffer
+    return text
+
+
+def read_source(source: BinaryIO, label: str, limit: int | None = None) -> str:
+    """读取二进制流的全部内容：从头读取的普通文件走 mmap，其他（管道、内存流）按块读取"""
+    limit = max_reference_bytes() if limit is None else limit
+    try:
+        fileno = source.fileno()
+        info = os.fstat(fileno)
+        regular = info.st_mode & 0o170000 == 0o100000 and source.tell() == 0
+    except (AttributeError, OSError, ValueError):
+        regular = False
+    if not regular:
+        return _read_streaming(source, limit, label)
+    if info.st_size > limit:
+        raise _too_large(label, limit)
+    return _read_mapped(fileno, info.st_size, label)
+
+
+def read_stdin(stdin: BinaryIO | None, limit: int | None = None) -> str:
+    """读取 @- 引用的标准输入"""
+    if stdin is None:
+        raise ArgumentReferenceError("当前模式不支持 @-（标准输入已用于读取指令）")
+    return read_source(stdin, STDIN_REFERENCE, limit)
+
+
+def read_file(target: str, limit: int | None = None) -> str:
+    """读取 @file: 之后的文件路径（支持 ~）"""
+    if not target:
+        raise ArgumentReferenceError(f"{FILE_PREFIX} 之后缺少文件路径")
+    path = os.path.expanduser(target)
+    try:
+        with open(path, "rb") as source:
+            return read_source(source, target, limit)
+    except FileNotFoundError:
+        raise ArgumentReferenceError(f"参数文件不存在: {target}")
+    except IsADirectoryError:
+        raise ArgumentReferenceError(f"参数引用不是文件: {target}")
+    except OSError as e:
+        raise ArgumentReferenceError(f"无法读取参数文件 {target}: {e}")
+
+
+class _StdinOnce:
+    """一条指令中 @- 只能出现一次：第二次读取时标准输入已耗尽"""
+
+    def __init__(self, stdin: BinaryIO | None) -> None:
+        self.stdin = stdin
+        self.used = False
+
+    def take(self) -> BinaryIO | None:
+        if self.used and self.stdin is not None:
+            raise ArgumentReferenceError("一条指令中只能使用一次 @-")
+        self.used = True
+        return self.stdin
+
+
+def _resolve_value(value: str, stdin: _StdinOnce, limit: int) -> str:
+    if value.startswith("@@"):
+        return unescape(value)
+    if value == STDIN_REFERENCE:
+        return read_stdin(stdin.take(), limit)
+    return read_file(value[len(FILE_PREFIX):], limit)
+
+
+def resolve_whole(value: str, stdin: BinaryIO | None = None) -> str | dict[str, Any]:
+    """整段参数为引用：内容是 JSON 对象时解析为对象，否则原样作为字符串"""
+    if value.startswith("@@"):
+        return unescape(value)
+    content = _resolve_value(value, _StdinOnce(stdin), max_reference_bytes())
+    if content[:JSON_PROBE].lstrip().startswith("{"):
+        import json
+
+        try:
+            parsed = json.loads(content)
+        except json.JSONDecodeError:
+            return content
+        if isinstance(parsed, dict):
+            return parsed
+    return content
+
+
+def resolve_named(named: dict[str, str], stdin: BinaryIO | None = None) -> dict[str, str]:
+    """就地替换值为引用的命名参数"""
+    limit = max_reference_bytes()
+    stdin_once = _StdinOnce(stdin)
+    for key, value in named.items():
+        if is_reference(value):
+            named[key] = _resolve_value(value, stdin_once, limit)
+    return named
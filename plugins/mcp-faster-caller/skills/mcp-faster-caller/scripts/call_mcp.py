@@ -4,26 +4,71 @@
 MCP 统一调用解析器
 把用户简短指令转成结构化 MCP 调用
 
-版本: 2.2 - 高性能优化，移除配置文件支持，双语别名映射
+版本: 2.3 - 外部别名配置文件（JSON/TOML，分层合并并缓存编译结果），双语别名映射
 """
 
-import json
-import logging
+from __future__ import annotations
+
 import os
 import sys
-from typing import Dict, Any, Union
 
-# 轻量级日志配置
-logger = logging.getLogger(__name__)
+# 冷启动预算：解析热路径只依赖 os/sys；json、logging、typing 按需导入
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any
+
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if _SCRIPT_DIR not in sys.path:
+    # python3 -I 不会把脚本目录加入 sys.path，同目录模块需要显式加入
+    sys.path.insert(0, _SCRIPT_DIR)
+if __name__ == "__main__":
+    # 作为脚本运行时也注册为 call_mcp：按需导入的 execution 与本模块共享同一份状态和异常类
+    sys.modules.setdefault("call_mcp", sys.modules[__name__])
+
+_logger = None
+
+
+def get_logger():
+    """按需导入 logging；设置 MCP_FAST_CALLER_DEBUG 时启用 INFO 级别输出"""
+    global _logger
+    if _logger is None:
+        import logging
+
+        _logger = logging.getLogger(__name__)
+        if os.getenv('MCP_FAST_CALLER_DEBUG'):
+            logging.basicConfig(
+                level=logging.INFO,
+                format='%(levelname)s: %(message)s',
+                force=True  # 确保配置生效
+            )
+    return _logger
+
+
 if os.getenv('MCP_FAST_CALLER_DEBUG'):
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(levelname)s: %(message)s',
-        force=True  # 确保配置生效
-    )
+    get_logger()
+
+# 设置 MCP_FAST_CALLER_METRICS 时记录分阶段耗时与按 server 的计数（见 metrics），未设置时为 None
+_METRICS = None
+
+
+def enable_metrics():
+    """启用本进程的指标收集，退出时合并到累计存储"""
+    global _METRICS
+    if _METRICS is None:
+        import atexit
+
+        from metrics import Metrics, flush
+
+        _METRICS = Metrics()
+        atexit.register(flush, _METRICS)
+    return _METRICS
+
+
+if os.getenv('MCP_FAST_CALLER_METRICS'):
+    enable_metrics()
 
 # MCP别名映射（双语支持）
-MCP_MAP: Dict[str, str] = {
+MCP_MAP: dict[str, str] = {
     # GitHub & 代码仓库
     "gh": "github",
     "github": "github",
@@ -87,9 +132,105 @@ MCP_MAP: Dict[str, str] = {
 }
 
 
-def get_mcp_map() -> Dict[str, str]:
-    """获取MCP映射表"""
-    return MCP_MAP
+# 别名前缀树的保留键：词元非空且不含空白，不会与之冲突
+_TERMINAL = ""
+_DEPTH = " "
+
+
+# 首次使用时加载：(合并后的别名表, 别名前缀树)
+_ALIAS_TABLE: tuple[dict[str, str], dict[str, Any]] | None = None
+
+
+def _alias_config_present() -> bool:
+    """是否存在外部配置文件（路径同 alias_config.candidate_paths）；都不存在时无需导入 alias_config"""
+    if os.environ.get("MCP_FAST_CALLER_CONFIG"):
+        return True
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    names = (os.path.join(base, "mcp-faster-caller", "aliases"), os.path.join(os.getcwd(), ".mcp-faster-caller"))
+    return any(os.path.isfile(name + suffix) for name in names for suffix in (".json", ".toml"))
+
+
+def _load_alias_table() -> tuple[dict[str, str], dict[str, Any]]:
+    """合并外部别名配置（若存在）并编译前缀树，进程内只加载一次"""
+    global _ALIAS_TABLE
+    if _ALIAS_TABLE is None and not _alias_config_present():
+        _ALIAS_TABLE = (MCP_MAP, build_alias_trie(MCP_MAP))
+    if _ALIAS_TABLE is None:
+        from alias_config import AliasConfigError, load_alias_table
+
+        try:
+            table = load_alias_table(MCP_MAP, os.path.abspath(__file__), build_alias_trie)
+        except AliasConfigError as e:
+            raise MCPParserError(str(e))
+        _ALIAS_TABLE = table or (MCP_MAP, build_alias_trie(MCP_MAP))
+    return _ALIAS_TABLE
+
+
+def get_mcp_map() -> dict[str, str]:
+    """获取MCP映射表（内置映射与外部配置合并后的结果）"""
+    return _load_alias_table()[0]
+
+
+def build_alias_trie(mcp_map: dict[str, str]) -> dict[str, Any]:
+    """按空白分词构建别名前缀树，词元统一 casefold"""
+    trie: dict[str, Any] = {_DEPTH: 0}
+    for alias, server in mcp_map.items():
+        tokens = alias.casefold().split()
+        if not tokens:
+            continue
+        node = trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[_TERMINAL] = (alias, server)
+        trie[_DEPTH] = max(trie[_DEPTH], len(tokens))
+    return trie
+
+
+def get_alias_trie() -> dict[str, Any]:
+    """获取别名前缀树"""
+    return _load_alias_table()[1]
+
+
+# 首次遇到未知别名时构建的模糊别名索引
+_ALIAS_INDEX = None
+
+
+def get_alias_index():
+    """获取模糊别名索引（见 alias_index），只在别名匹配失败时使用"""
+    global _ALIAS_INDEX
+    if _ALIAS_INDEX is None or _ALIAS_INDEX[0] is not _load_alias_table():
+        from alias_index import load_alias_index
+
+        _ALIAS_INDEX = (_load_alias_table(), load_alias_index(get_mcp_map()))
+    return _ALIAS_INDEX[1]
+
+
+def match_alias(text: str, trie: dict[str, Any] | None = None) -> tuple[str, str, int] | None:
+    """
+    最长匹配指令开头的别名
+
+    优先选择后面仍跟有命令词元的最长别名，例如 "web page goto" 匹配 "web page"，
+    而 "web page" 只匹配 "web"（"page" 作为命令）。只切分到别名最大深度的下一个词元。
+
+    Returns:
+        (别名, server, 别名占用的词元数)，无匹配时返回 None
+    """
+    node = trie if trie is not None else get_alias_trie()
+    best = None
+    pending = None
+    for count, token in enumerate(text.split(None, node[_DEPTH]), 1):
+        if pending is not None:
+            # 上一个匹配之后还有词元，可作为命令
+            best, pending = pending, None
+        node = node.get(token.casefold())
+        if node is None:
+            break
+        terminal = node.get(_TERMINAL)
+        if terminal is not None:
+            pending = (terminal[0], terminal[1], count)
+    if best is not None:
+        return best
+    return pending
 
 
 class MCPParserError(Exception):
@@ -97,6 +238,147 @@ class MCPParserError(Exception):
     pass
 
 
+class MCPExecutionError(MCPParserError):
+    """执行模式下 server 启动或调用失败"""
+    pass
+
+
+# 与 json.dumps(ensure_ascii=False) 一致的字符串转义表
+_JSON_ESCAPES = {code: f'\\u{code:04x}' for code in range(0x20)}
+_JSON_ESCAPES.update({
+    ord('"'): '\\"',
+    ord('\\'): '\\\\',
+    ord('\n'): '\\n',
+    ord('\r'): '\\r',
+    ord('\t'): '\\t',
+    ord('\b'): '\\b',
+    ord('\f'): '\\f',
+})
+
+# 超过 _JSON_LARGE 的字符串交给标准库 json 转义；write_json 攒够 _JSON_CHUNK 个字符再写出一次
+_JSON_LARGE = 1 << 16
+_JSON_CHUNK = 1 << 20
+
+
+class _UnsupportedJSON(Exception):
+    """轻量序列化不处理的值（大字符串、浮点数、非字符串键等），交给标准库 json"""
+    pass
+
+
+def _encode_json(obj: Any, indent: int | None, level: int) -> str:
+    if isinstance(obj, str):
+        if len(obj) > _JSON_LARGE:
+            raise _UnsupportedJSON
+        return '"' + obj.translate(_JSON_ESCAPES) + '"'
+    if obj is None:
+        return 'null'
+    if obj is True:
+        return 'true'
+    if obj is False:
+        return 'false'
+    if type(obj) is int:
+        return int.__repr__(obj)
+    if isinstance(obj, dict):
+        if not obj:
+            return '{}'
+        if not all(isinstance(key, str) for key in obj):
+            raise _UnsupportedJSON
+        items = [
+            _encode_json(key, None, 0) + (':' if indent is None else ': ') + _encode_json(value, indent, level + 1)
+            for key, value in obj.items()
+        ]
+        opening, closing = '{', '}'
+    elif isinstance(obj, (list, tuple)):
+        if not obj:
+            return '[]'
+        items = [_encode_json(value, indent, level + 1) for value in obj]
+        opening, closing = '[', ']'
+    else:
+        raise _UnsupportedJSON
+
+    if indent is None:
+        return opening + ','.join(items) + closing
+    inner = '\n' + ' ' * (indent * (level + 1))
+    return opening + inner + (',' + inner).join(items) + '\n' + ' ' * (indent * level) + closing
+
+
+def _json_encoder(indent: int | None) -> Any:
+    import json
+
+    separators = (',', ':') if indent is None else None
+    return json.JSONEncoder(ensure_ascii=False, indent=indent, separators=separators)
+
+
+def write_json(obj: Any, out: Any, indent: int | None = None) -> None:
+    """
+    把解析结果写入文本流，输出与 to_json 一致
+
+    常规结果一次写出；包含大参数（如 @文件 引用的内容）时改用 JSONEncoder.iterencode
+    逐段编码，攒够一块再写出，不再拼接出完整的输出字符串。
+    """
+    try:
+        out.write(_encode_json(obj, indent, 0))
+        return
+    except _UnsupportedJSON:
+        pass
+    pending: list[str] = []
+    size = 0
+    for chunk in _json_encoder(indent).iterencode(obj):
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= _JSON_CHUNK:
+            out.write(''.join(pending))
+            pending.clear()
+            size = 0
+    if pending:
+        out.write(''.join(pending))
+
+
+def to_json(obj: Any, indent: int | None = None) -> str:
+    """
+    序列化解析结果，输出与 json.dumps(obj, ensure_ascii=False, indent=indent) 一致
+
+    indent 为 None 时等价于 separators=(',', ':') 的紧凑输出。只处理解析结果中常见的
+    dict/list/str/int/bool/None，使常规调用无需导入 json（及其依赖的 re）；其他值回退到标准库 json。
+    """
+    try:
+        return _encode_json(obj, indent, 0)
+    except _UnsupportedJSON:
+        return _json_encoder(indent).encode(obj)
+
+
+def write_result(result: dict[str, Any], out: Any, output: str = "json", fields: tuple[str, ...] | None = None) -> None:
+    """
+    按输出模式写出一个结果
+
+    output 为 "pretty"（缩进 JSON）、"json"（单行 JSON）或 "msgpack"（MessagePack，写入 out 的二进制缓冲区）；
+    fields 非空时只保留这些字段（见 output_format.select_fields）。
+    """
+    metrics = _METRICS
+    start = metrics.clock() if metrics is not None else 0.0
+    if fields:
+        from output_format import select_fields
+
+        result = select_fields(result, fields)
+    if output == "msgpack":
+        from output_format import pack
+
+        out.flush()
+        binary = getattr(out, "buffer", out)
+        binary.write(pack(result))
+        binary.flush()
+    else:
+        write_json(result, out, indent=2 if output == "pretty" else None)
+        out.write("\n")
+        out.flush()
+    if metrics is not None:
+        metrics.lap("serialize", start)
+
+
+# 内联指令的长度上限
+MAX_INSTRUCTION_LENGTH = 1000
+
+
 def validate_input(text: str) -> str:
     """清理和验证输入"""
     if not isinstance(text, str):
@@ -106,21 +388,139 @@ def validate_input(text: str) -> str:
     if not text:
         raise MCPParserError("指令为空")
 
-    # 检查长度限制
-    if len(text) > 1000:
-        raise MCPParserError("指令过长（最大1000字符）")
+    # 检查长度限制（大参数通过 @file: / @- 引用传入，不计入指令长度）
+    if len(text) > MAX_INSTRUCTION_LENGTH:
+        raise MCPParserError(
+            f"指令过长（最大{MAX_INSTRUCTION_LENGTH}字符），大参数请使用 @file:路径 或 @- 引用"
+        )
 
     return text
 
 
-def parse_arguments(args_str: str) -> Union[str, Dict[str, Any]]:
-    """智能参数解析，支持普通字符串、JSON和命名参数格式"""
+# 命名参数与位置参数混用时，位置参数放在该键下
+POSITIONAL_KEY = "_args"
+
+
+def _scan_quoted(text: str, pos: int, quote: str) -> tuple[str, int] | None:
+    """
+    读取 text[pos] 处引号开始的引用值，返回 (内容, 闭合引号之后的位置)
+
+    引号内仅 \\<引号> 与 \\\\ 为转义，其他反斜杠按原样保留（兼容 Windows 路径和正则）。
+    未闭合时返回 None。
+    """
+    chunks = []
+    start = pos + 1
+    while True:
+        end = text.find(quote, start)
+        if end < 0:
+            return None
+        backslash = text.find('\\', start, end)
+        if backslash < 0:
+            chunks.append(text[start:end])
+            return ''.join(chunks), end + 1
+        chunks.append(text[start:backslash])
+        escaped = text[backslash + 1:backslash + 2]
+        if escaped == quote or escaped == '\\':
+            chunks.append(escaped)
+            start = backslash + 2
+        else:
+            chunks.append('\\')
+            start = backslash + 1
+
+
+def _word_end(text: str, pos: int) -> int:
+    """返回 pos 起第一个空白字符的位置；按递增窗口切分，避免逐字符扫描"""
+    length = len(text)
+    size = 64
+    while True:
+        window = text[pos:pos + size]
+        parts = window.split(None, 1)
+        if not parts or not window[0:1].strip():
+            return pos
+        if len(parts) == 2 or pos + size >= length:
+            return pos + len(parts[0])
+        size *= 4
+
+
+def tokenize_arguments(args_str: str) -> tuple[dict[str, str], list[str]]:
+    """
+    单遍扫描参数字符串，返回 (命名参数, 位置参数)
+
+    - 词元以空白分隔；key=value 中第一个 '=' 之前为键
+    - 词元开头或 '=' 之后的引号开始引用值，引用值可包含空白与转义引号
+    - 引用值之后紧跟的字符并入同一个值；未闭合的引号按普通字符处理
+    """
+    named: dict[str, str] = {}
+    positional: list[str] = []
+    if '"' not in args_str and "'" not in args_str:
+        # 无引号时分词规则等价于按空白切分，直接使用 C 实现的 split
+        for token in args_str.split():
+            key, separator, value = token.partition('=')
+            if separator and key:
+                named[key] = value
+            else:
+                positional.append(token)
+        return named, positional
+
+    length = len(args_str)
+    pos = 0
+    while pos < length:
+        if args_str[pos].isspace():
+            pos += 1
+            continue
+
+        char = args_str[pos]
+        scanned = _scan_quoted(args_str, pos, char) if char == '"' or char == "'" else None
+        if scanned is not None:
+            # 引用开头的词元是位置参数，引用之后紧跟的字符并入同一个值
+            tail_end = _word_end(args_str, scanned[1])
+            positional.append(scanned[0] + args_str[scanned[1]:tail_end])
+            pos = tail_end
+            continue
+
+        word_end = _word_end(args_str, pos)
+        key, separator, value = args_str[pos:word_end].partition('=')
+        if not (separator and key):
+            positional.append(args_str[pos:word_end])
+            pos = word_end
+            continue
+
+        value_start = pos + len(key) + 1
+        quote = args_str[value_start:value_start + 1]
+        scanned = _scan_quoted(args_str, value_start, quote) if quote == '"' or quote == "'" else None
+        if scanned is not None:
+            word_end = _word_end(args_str, scanned[1])
+            value = scanned[0] + args_str[scanned[1]:word_end]
+        named[key] = value
+        pos = word_end
+    return named, positional
+
+
+def parse_arguments(args_str: str, stdin: Any = None) -> str | dict[str, Any]:
+    """
+    智能参数解析，支持普通字符串、JSON和命名参数格式
+
+    含命名参数时返回字典；同时出现的位置参数按顺序放在 POSITIONAL_KEY 下。
+    不含命名参数时原样返回字符串。
+    整段参数或命名参数值为 @file:path / @- 时读取引用内容（见 arg_reference），
+    stdin 为 @- 读取的二进制流，为 None 时不支持 @-。
+    """
     args_str = args_str.strip()
     if not args_str:
         return ""
 
+    if args_str[0] == '@' and len(args_str.split(None, 1)) == 1:
+        import arg_reference
+
+        try:
+            return arg_reference.resolve_whole(args_str, stdin) if arg_reference.is_reference(args_str) else args_str
+        except arg_reference.ArgumentReferenceError as e:
+            raise MCPParserError(str(e))
+
     # 快速检查JSON格式
     if args_str.startswith('{') and args_str.endswith('}'):
+        import json
+
         try:
             return json.loads(args_str)
         except json.JSONDecodeError:
@@ -128,27 +528,27 @@ def parse_arguments(args_str: str) -> Union[str, Dict[str, Any]]:
 
     # 快速检查命名参数格式
     if '=' in args_str:
-        # 简单的key=value解析
-        result = {}
-        for pair in args_str.split():
-            if '=' in pair:
-                key, value = pair.split('=', 1)
-                key = key.strip()
-                value = value.strip()
-                # 移除引号
-                if len(value) >= 2 and (
-                    (value.startswith('"') and value.endswith('"')) or
-                    (value.startswith("'") and value.endswith("'"))
-                ):
-                    value = value[1:-1]
-                result[key] = value
-        if result:
-            return result
+        metrics = _METRICS
+        start = metrics.clock() if metrics is not None else 0.0
+        named, positional = tokenize_arguments(args_str)
+        if metrics is not None:
+            metrics.lap("tokenize", start)
+        if '@' in args_str:
+            import arg_reference
+
+            try:
+                arg_reference.resolve_named(named, stdin)
+            except arg_reference.ArgumentReferenceError as e:
+                raise MCPParserError(str(e))
+        if named:
+            if positional:
+                named[POSITIONAL_KEY] = positional
+            return named
 
     return args_str
 
 
-def parse_mcp_call(text: str) -> Dict[str, Any]:
+def parse_mcp_call(text: str, stdin: Any = None) -> dict[str, Any]:
     """
     增强版 MCP 调用指令解析
 
@@ -156,9 +556,12 @@ def parse_mcp_call(text: str) -> Dict[str, Any]:
     - 传统格式: alias command args
     - JSON参数: alias command {"key": "value"}
     - 命名参数: alias command key1=value1 key2=value2
+    - 大参数引用: alias command @file:query.sql / alias command sql=@-
+    - 调用管道: alias command args | alias command key=$.path（见 parse_pipeline）
 
     Args:
         text: 用户输入的指令字符串
+        stdin: @- 引用读取的二进制流；为 None 时不支持 @-
 
     Returns:
         包含解析结果的字典
@@ -166,12 +569,57 @@ def parse_mcp_call(text: str) -> Dict[str, Any]:
     Raises:
         MCPParserError: 解析失败时抛出
     """
+    if isinstance(text, str) and "|" in text:
+        from pipeline import split_stages
+
+        text = validate_input(text)
+        stages = split_stages(text, is_pipeline_stage)
+        if stages:
+            return parse_pipeline(text, stages, stdin)
+    return _parse_call(text, stdin)
+
+
+def is_pipeline_stage(text: str) -> bool:
+    """| 后的文本是否构成管道的一段：已知别名之后至少还有命令词元（"| web" 只是普通参数文本）"""
+    matched = match_alias(text)
+    if matched is None:
+        return False
+    count = matched[2]
+    return len(text.split(None, count)) > count
+
+
+def parse_pipeline(text: str, stages: list[str], stdin: Any = None) -> dict[str, Any]:
+    """
+    解析调用管道的各段（见 pipeline）
+
+    顶层的 server / command / arguments 等字段描述最后一段，"stages" 为各段的解析结果。
+    后续段的 $ 引用在执行时替换，替换后再按工具 schema 校验。
+    """
+    parsed = []
+    for index, stage in enumerate(stages):
+        try:
+            parsed.append(_parse_call(stage, stdin))
+        except MCPParserError as e:
+            raise MCPParserError(f"管道第 {index + 1} 段: {e}")
+    return {**parsed[-1], "original": text, "stages": parsed}
+
+
+def _parse_call(text: str, stdin: Any = None) -> dict[str, Any]:
+    """解析单个调用（parse_mcp_call 的主体）；工具 schema 只在执行时校验（见 _prepare_call）"""
+    metrics = _METRICS
+    server, phase = None, "validate"
     try:
+        start = metrics.clock() if metrics is not None else 0.0
         text = validate_input(text)
+        if metrics is not None:
+            start = metrics.lap("validate", start)
+        phase = "alias_resolve"
 
-        # 快速分割指令
-        parts = text.split(maxsplit=2)
-        if len(parts) < 2:
+        # 前缀树最长匹配别名（支持多词别名，大小写不敏感）
+        matched = match_alias(text)
+        alias_tokens = matched[2] if matched else 1
+        parts = text.split(maxsplit=alias_tokens + 1)
+        if len(parts) <= alias_tokens:
             raise MCPParserError(
                 "格式错误: alias command [arguments]\n"
                 "支持格式:\n"
@@ -181,28 +629,40 @@ def parse_mcp_call(text: str) -> Dict[str, Any]:
                 "示例: gh list-repos owner=username"
             )
 
-        alias = parts[0].lower()
-        command = parts[1].strip()
-        args_str = parts[2].strip() if len(parts) > 2 else ""
+        corrected_from = None
+        if not matched:
+            # 别名拼错：按模糊索引纠正，置信度不足时给出排序后的建议
+            from alias_index import choose_correction
 
-        # 快速验证别名
-        mcp_map = get_mcp_map()
-        server = mcp_map.get(alias)
-        if not server:
-            available_aliases = sorted(mcp_map.keys())
-            raise MCPParserError(
-                f"未知别名 '{alias}'\n"
-                f"可用别名: {', '.join(available_aliases[:8])}{'...' if len(available_aliases) > 8 else ''}"
-            )
+            depth = get_alias_trie()[_DEPTH]
+            suggestions = get_alias_index().lookup(text.split(None, depth), depth)
+            correction = choose_correction(suggestions)
+            if correction is None:
+                alias = parts[0].lower()
+                if suggestions:
+                    hint = "是否要使用: " + ", ".join(f"{name} ({server})" for name, server, _, _ in suggestions)
+                else:
+                    hint = "没有相近的别名，运行 --help 查看可用别名"
+                raise MCPParserError(f"未知别名 '{alias}'\n{hint}")
+            matched = correction[0], correction[1], correction[3]
+            alias_tokens = matched[2]
+            corrected_from = " ".join(text.split(None, alias_tokens)[:alias_tokens])
+            parts = text.split(maxsplit=alias_tokens + 1)
 
-        # 验证命令
-        if not command:
-            raise MCPParserError("命令不能为空")
+        alias, server, _ = matched
+        command = parts[alias_tokens]
+        args_str = parts[alias_tokens + 1].strip() if len(parts) > alias_tokens + 1 else ""
+        if metrics is not None:
+            start = metrics.lap("alias_resolve", start)
 
         # 解析参数
-        parsed_args = parse_arguments(args_str)
+        phase = "argument_parse"
+        parsed_args = parse_arguments(args_str, stdin)
+        if metrics is not None:
+            metrics.lap("argument_parse", start)
+            metrics.count("calls_total", server, alias)
 
-        return {
+        result = {
             "server": server,
             "command": command,
             "arguments": parsed_args,
@@ -210,13 +670,78 @@ def parse_mcp_call(text: str) -> Dict[str, Any]:
             "alias": alias,
             "format": "json" if isinstance(parsed_args, dict) else "string"
         }
+        if corrected_from is not None:
+            result["corrected_from"] = corrected_from
+        return result
 
     except MCPParserError:
+        if metrics is not None:
+            metrics.count("errors_total", server or "unknown", phase)
         raise
     except Exception as e:
+        if metrics is not None:
+            metrics.count("errors_total", server or "unknown", phase)
         raise MCPParserError(f"解析失败: {str(e)}")
 
 
+# 执行模式的实现在 execution 中，只在执行时导入；以下为保留在本模块的入口
+
+
+def execute_call(
+    result: dict[str, Any],
+    pool: Any = None,
+    cache: Any = None,
+    timeout: float | None = None,
+    coalescer: Any = None,
+) -> dict[str, Any]:
+    """把解析结果作为 tools/call 发送给对应的 MCP server（见 execution.execute_call）"""
+    from execution import execute_call
+
+    return execute_call(result, pool, cache, timeout, coalescer)
+
+
+def reload_configs() -> None:
+    """配置文件变化后重新加载别名表、缓存配置与 server 配置（常驻进程使用）"""
+    global _ALIAS_TABLE
+    _ALIAS_TABLE = None
+    execution = sys.modules.get("execution")
+    if execution is not None:
+        execution.reload_configs()
+
+
+def execution_stats() -> dict[str, Any]:
+    """本进程执行模式的统计（见 execution.execution_stats）；尚未执行过时为空"""
+    execution = sys.modules.get("execution")
+    return execution.execution_stats() if execution is not None else {}
+
+
+def export_metrics(export_format: str) -> str:
+    """导出累计指标，包括本进程尚未写入存储的部分（见 metrics）"""
+    from metrics import MetricsError, export, load_stored
+
+    metrics = load_stored()
+    if _METRICS is not None:
+        metrics.merge(_METRICS.to_state())
+    try:
+        return export(metrics, export_format)
+    except MetricsError as e:
+        raise MCPParserError(str(e))
+
+
+def run_fanout(
+    stream=None,
+    out=None,
+    deadline: float | None = None,
+    per_server: int | None = None,
+    output: str = "json",
+    fields: tuple[str, ...] | None = None,
+) -> int:
+    """扇出模式：读取全部指令后并发执行，按完成顺序逐行输出（见 execution.run_fanout）"""
+    from execution import run_fanout
+
+    return run_fanout(stream, out, deadline, per_server, output, fields)
+
+
 def show_help() -> None:
     """显示增强版帮助信息"""
     mcp_map = get_mcp_map()
@@ -233,10 +758,24 @@ def show_help() -> None:
         "PDF读取": ["pdf", "pdf-reader", "pdf reader"]
     }
 
-    print("MCP Fast Caller v2.2 - 高性能 MCP 调用解析器")
+    print("MCP Fast Caller v2.3 - 高性能 MCP 调用解析器")
     print()
     print("🚀 用法:")
     print('    python3 call_mcp.py "alias command [arguments]"')
+    print('    python3 call_mcp.py --batch < instructions.txt   # 每行一条指令，逐行输出 JSON')
+    print('    python3 call_mcp.py "db query sql=@-" < big.sql    # 大参数从文件 / 标准输入读取')
+    print('    python3 call_mcp.py --execute "search query AI"   # 直接调用 MCP server 并输出结果')
+    print('    python3 call_mcp.py --execute --no-cache "..."     # 跳过只读 server 的结果缓存')
+    print('    python3 call_mcp.py --execute "search q x | read web fetch url=$.results[0].url"  # 调用管道')
+    print('    python3 call_mcp.py --stream [--max-bytes N] "pdf read path=big.pdf"')
+    print('                                                     # 执行并以逐行 JSON 分块帧边读边输出大结果')
+    print('    python3 call_mcp.py --fanout [--deadline 秒] [--per-server N] < instructions.txt')
+    print('                                                     # 并发执行多条指令，按完成顺序输出')
+    print('    python3 call_mcp.py --stats --fanout < ...          # 退出时在 stderr 输出合并、缓存与排队统计')
+    print('    python3 call_mcp.py --refresh-tools [server ...]    # 刷新工具 schema 缓存，用于本地校验命令与参数')
+    print('    python3 call_mcp.py --metrics prometheus|json       # 导出累计的分阶段耗时与按 server 的计数')
+    print('    python3 call_mcp.py --output json --fields server,command,arguments "..."')
+    print('                                                     # 单行 JSON 并只保留所需字段（--output msgpack 输出二进制）')
     print()
     print("📝 支持的参数格式:")
     print("    普通参数: alias command arg1 arg2")
@@ -253,6 +792,9 @@ def show_help() -> None:
     print('     # 命名参数')
     print('     python3 call_mcp.py "browser screenshot width=1920 height=1080"')
     print()
+    print('     # 大参数引用（@file:path 读取文件，@- 读取标准输入，其他 @ 开头的值原样传递）')
+    print('     python3 call_mcp.py "db query @file:migration.sql"')
+    print()
     print(f"📋 可用别名 ({len(mcp_map)} 个):")
 
     for category, aliases in categories.items():
@@ -273,41 +815,234 @@ def show_help() -> None:
     print()
     print("⚙️  配置:")
     print("    MCP_FAST_CALLER_DEBUG=1  启用调试模式")
+    print("    MCP_FAST_CALLER_MAX_ARG_BYTES=N  @ 引用内容的大小上限（默认 64 MiB）")
+    print("    MCP_FAST_CALLER_TIMEOUT=秒       执行模式单次调用超时（默认 60）")
+    print("    执行模式的 server 启动命令: .mcp.json 或别名配置文件中的 mcpServers 表")
+    print("    MCP_FAST_CALLER_NO_CACHE=1       关闭执行模式的结果缓存（TTL 等见配置文件的 cache 表）")
+    print("    MCP_FAST_CALLER_AUTOCORRECT=N    自动纠正拼错别名的最低相似度（默认 0.8，1 为关闭）")
+    print("    MCP_FAST_CALLER_SCHEMA_TTL=秒    工具 schema 缓存的有效期（默认 86400）")
+    print("    MCP_FAST_CALLER_METRICS=1        记录分阶段耗时与按 server 的计数（--metrics 导出）")
+    print("    MCP_FAST_CALLER_SOCKET=path      常驻进程 call_mcp_daemon.py 的 socket 路径")
+    print("    MCP_FAST_CALLER_NO_DAEMON=1      call_mcp_fast.py 不转发给常驻进程")
+    print("    别名配置文件（JSON/TOML，后者覆盖前者）:")
+    print("      ~/.config/mcp-faster-caller/aliases.{json,toml}  用户级")
+    print("      ./.mcp-faster-caller.{json,toml}                 项目级")
+    print("      MCP_FAST_CALLER_CONFIG=path[:path]               显式指定")
     print()
     print("📖 更多信息: references/mcp_aliases.md")
 
 
+def _decode_line(line: str) -> str:
+    """以双引号开头的输入行按 JSON 字符串解码，用于传递包含换行的指令"""
+    if line.lstrip().startswith('"'):
+        import json
+
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError:
+            pass  # 按普通文本解析
+    return line
+
+
+def run_batch(
+    stream=None,
+    out=None,
+    execute: bool = False,
+    output: str = "json",
+    fields: tuple[str, ...] | None = None,
+) -> int:
+    """
+    批量模式：逐行读取指令，每行输出一个紧凑 JSON 结果（NDJSON）；output 为 "msgpack" 时逐个输出 MessagePack 对象
+
+    单行解析失败时输出 {"error": ..., "line": 行号} 并继续处理后续行。
+    以双引号开头的行按 JSON 字符串解码，用于传递包含换行的指令。
+    标准输入用于读取指令，因此不支持 @- 引用，@file: 引用照常可用。
+    execute 为 True 时逐行调用 MCP server，同一 server 的会话在各行之间复用。
+    """
+    stream = stream if stream is not None else sys.stdin
+    out = out if out is not None else sys.stdout
+    for line_number, line in enumerate(stream, 1):
+        try:
+            result = parse_mcp_call(_decode_line(line))
+            if execute:
+                result = execute_call(result)
+        except MCPParserError as e:
+            result = {"error": str(e), "line": line_number}
+        write_result(result, out, output, fields)
+    return 0
+
+
+# 前置选项 -> 是否需要取值
+_CLI_OPTIONS = {
+    '--batch': False,
+    '--execute': False,
+    '--stream': False,
+    '--no-cache': False,
+    '--fanout': False,
+    '--stats': False,
+    '--refresh-tools': False,
+    '--deadline': True,
+    '--per-server': True,
+    '--output': True,
+    '--fields': True,
+    '--metrics': True,
+    '--max-bytes': True,
+}
+
+
+def _positive_option(options: dict[str, str | None], name: str, convert: Any) -> Any:
+    if name not in options:
+        return None
+    try:
+        value = convert(options[name])
+    except ValueError:
+        value = 0
+    if value <= 0:
+        raise MCPParserError(f"{name} 必须是正数: {options[name]}")
+    return value
+
+
+def run_instruction(
+    instruction: str,
+    out: Any,
+    execute: bool = False,
+    output: str = "pretty",
+    fields: tuple[str, ...] | None = None,
+    stdin: Any = None,
+) -> int:
+    """
+    解析（并可选执行）一条指令，按输出模式把结果或错误写入 out
+
+    Returns:
+        退出码：成功为 0；解析 / 执行失败，或 server 返回 isError 的结果为 1
+    """
+    try:
+        result = parse_mcp_call(instruction, stdin)
+        if execute:
+            result = execute_call(result)
+    except MCPParserError as e:
+        write_result({"error": str(e)}, out, output)
+        return 1
+    write_result(result, out, output, fields)
+    if execute and isinstance(result["result"], dict) and result["result"].get("isError"):
+        return 1
+    return 0
+
+
+def _output_options(options: dict[str, str | None], streaming: bool) -> tuple[str, tuple[str, ...] | None]:
+    """解析 --output / --fields；批量与扇出模式逐条输出，默认单行 JSON"""
+    from output_format import OUTPUT_MODES, OutputFormatError, parse_fields
+
+    output = options.get('--output') or ("json" if streaming else "pretty")
+    if output not in OUTPUT_MODES:
+        raise MCPParserError(f"--output 必须是 {' / '.join(OUTPUT_MODES)} 之一: {output}")
+    if streaming and output == "pretty":
+        raise MCPParserError("批量 / 扇出模式逐条输出结果，不支持 --output pretty")
+    try:
+        fields = parse_fields(options['--fields']) if '--fields' in options else None
+    except OutputFormatError as e:
+        raise MCPParserError(str(e))
+    return output, fields
+
+
 def main():
     """主函数"""
+    # 出错时也按请求的输出模式写出错误；选项本身无效时使用默认模式
+    output, fields = "pretty", None
     try:
         # 检查帮助请求
         if len(sys.argv) > 1 and sys.argv[1] in ['--help', '-h', 'help']:
             show_help()
             return
 
-        # 获取输入
-        if len(sys.argv) > 1:
-            instruction = " ".join(sys.argv[1:])
+        # 前置选项：--execute 调用 MCP server，--stream 流式执行，--batch 批量模式，--fanout 并发扇出，--no-cache 跳过结果缓存
+        argv = sys.argv[1:]
+        options: dict[str, str | None] = {}
+        while argv and argv[0] in _CLI_OPTIONS:
+            name = argv.pop(0)
+            if _CLI_OPTIONS[name] and not argv:
+                raise MCPParserError(f"{name} 需要一个值")
+            options[name] = argv.pop(0) if _CLI_OPTIONS[name] else None
+        execute = '--execute' in options
+        stream = '--stream' in options
+        streaming = '--fanout' in options or '--batch' in options
+        max_bytes = None
+        if stream:
+            # 流式输出总是逐行 JSON 分块帧
+            output = "json"
+            if streaming:
+                raise MCPParserError("--stream 只用于单条指令，不能与 --batch / --fanout 同时使用")
+            if options.get('--output', 'json') != 'json':
+                raise MCPParserError("--stream 以逐行 JSON 分块帧输出，只支持 --output json")
+            max_bytes = _positive_option(options, '--max-bytes', int)
+        elif '--max-bytes' in options:
+            raise MCPParserError("--max-bytes 只用于 --stream")
+        if '--output' in options or '--fields' in options:
+            output, fields = _output_options(options, streaming or stream)
+        elif streaming:
+            output = "json"
+        if '--no-cache' in options:
+            os.environ['MCP_FAST_CALLER_NO_CACHE'] = '1'
+        if '--stats' in options:
+            import atexit
+
+            # 退出时把合并与缓存统计写到 stderr，不干扰 stdout 上的结果
+            atexit.register(lambda: sys.stderr.write(to_json({"stats": execution_stats()}) + "\n"))
+
+        # 导出累计的分阶段耗时与按 server 的计数
+        if '--metrics' in options:
+            sys.stdout.write(export_metrics(options['--metrics']))
+            return
+
+        # 刷新工具 schema 缓存，其余参数为 server 名
+        if '--refresh-tools' in options:
+            from execution import refresh_tool_schemas
+
+            sys.exit(refresh_tool_schemas(argv))
+
+        # 扇出模式（总是执行）
+        if '--fanout' in options:
+            sys.exit(run_fanout(
+                deadline=_positive_option(options, '--deadline', float),
+                per_server=_positive_option(options, '--per-server', int),
+                output=output,
+                fields=fields,
+            ))
+
+        # 批量模式
+        if '--batch' in options:
+            sys.exit(run_batch(execute=execute, output=output, fields=fields))
+
+        # 获取输入；指令来自命令行时标准输入可供 @- 引用
+        if argv:
+            instruction = " ".join(argv)
+            stdin = sys.stdin.buffer if sys.stdin is not None else None
         else:
             instruction = sys.stdin.read().strip()
+            stdin = None
 
-        # 解析指令
-        result = parse_mcp_call(instruction)
+        if stream:
+            from execution import run_stream
 
-        # 输出结果
-        print(json.dumps(result, ensure_ascii=False, indent=2))
+            code = run_stream(instruction, sys.stdout, max_bytes, fields, stdin)
+        else:
+            code = run_instruction(instruction, sys.stdout, execute, output, fields, stdin)
+        if code:
+            sys.exit(code)
 
     except MCPParserError as e:
-        error_result = {"error": str(e)}
-        print(json.dumps(error_result, ensure_ascii=False, indent=2))
+        write_result({"error": str(e)}, sys.stdout, output)
         sys.exit(1)
     except KeyboardInterrupt:
-        logger.info("用户中断")
+        get_logger().info("用户中断")
         sys.exit(130)
+    except BrokenPipeError:
+        # 下游提前关闭管道（如 head），静默退出
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(0)
     except Exception as e:
-        error_result = {"error": f"意外错误: {str(e)}"}
-        print(json.dumps(error_result, ensure_ascii=False, indent=2))
-        logger.error(f"意外错误: {e}", exc_info=True)
+        write_result({"error": f"意外错误: {str(e)}"}, sys.stdout, output)
+        get_logger().error(f"意外错误: {e}", exc_info=True)
         sys.exit(1)
 
 
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+call_mcp.py 的常驻进程：在 Unix socket 上处理 call_mcp_fast.py 转发的指令
+
+常驻进程只加载一次解析器、别名表与别名索引，执行模式下的会话池、结果缓存与在途合并器
+也在请求之间共享，客户端每次调用省去解释器启动与模块导入。
+
+协议（每个连接一个请求）：
+    请求  以 NUL 分隔的 key=value，客户端写完后关闭写端
+    应答  b"<退出码>\\n" + 与 call_mcp.py 相同的输出字节；无法处理时为 b"fallback"
+
+请求的工作目录或相关环境变量（MCP_FAST_CALLER_*、XDG_*，见 call_mcp_fast.relevant_environment）
+与常驻进程不同、协议版本不符时应答 fallback，由客户端在本进程内解析。
+别名配置、.mcp.json 等配置文件变化后，别名表、缓存配置与 server 配置在下一个请求前重新加载。
+
+用法:
+    python3 call_mcp_daemon.py [--socket PATH]     # 在前台运行，Ctrl-C 退出
+    python3 call_mcp_daemon.py --status            # 输出常驻进程的统计
+    python3 call_mcp_daemon.py --metrics json      # 导出指标（需以 MCP_FAST_CALLER_METRICS=1 启动）
+    python3 call_mcp_daemon.py --stop              # 停止常驻进程
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import socketserver
+import sys
+import threading
+import time
+import traceback
+
+import call_mcp
+from alias_config import config_fingerprint
+from call_mcp_fast import FALLBACK, PROTOCOL, encode_request, private_directory, relevant_environment, send, socket_path
+from mcp_client import server_config_paths
+
+POLL_INTERVAL = 0.5
+# 单个请求的上限；指令来自命令行参数，远小于此
+MAX_REQUEST = 1 << 20
+
+
+class DaemonError(Exception):
+    """常驻进程无法启动或请求无效"""
+    pass
+
+
+def decode_request(data: bytes) -> dict[str, str]:
+    """解析以 NUL 分隔的 key=value 请求"""
+    fields = {}
+    for item in data.split(b"\0"):
+        key, separator, value = item.partition(b"=")
+        if not separator:
+            raise DaemonError(f"无效的请求字段: {item[:40]!r}")
+        fields[key.decode("utf-8", "surrogateescape")] = value.decode("utf-8", "surrogateescape")
+    return fields
+
+
+def render_call(fields: dict[str, str]) -> bytes:
+    """按 call_mcp.py 的语义处理一条指令，返回应答"""
+    buffer = io.BytesIO()
+    out = io.TextIOWrapper(buffer, encoding="utf-8", write_through=True)
+    options = {f"--{name}": fields[name] for name in ("output", "fields") if name in fields}
+    # 与 call_mcp.main() 相同：选项本身无效时按默认模式写出错误
+    output = "pretty"
+    try:
+        output, selected = call_mcp._output_options(options, streaming=False)
+        code = call_mcp.run_instruction(fields.get("instruction", ""), out, fields.get("execute") == "1", output, selected)
+    except call_mcp.MCPParserError as e:
+        call_mcp.write_result({"error": str(e)}, out, output)
+        code = 1
+    out.flush()
+    return str(code).encode() + b"\n" + buffer.getvalue()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        data = self.rfile.read(MAX_REQUEST)
+        try:
+            response = self.server.respond(decode_request(data))
+        except Exception as exc:  # 常驻进程必须在单个请求失败后继续运行
+            self.server.count("errors")
+            error = {"error": f"意外错误: {type(exc).__name__}: {exc}", "traceback": traceback.format_exc()}
+            response = b"1\n" + call_mcp.to_json(error).encode("utf-8") + b"\n"
+        with contextlib.suppress(OSError):
+            self.wfile.write(response)
+
+
+class CallDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """并发处理请求；解析与执行路径上的共享状态（会话池、缓存、合并器）自带锁"""
+
+    daemon_threads = True
+    timeout = POLL_INTERVAL
+    # 客户端连接超时很短，积压队列过小时并发调用会直接回退
+    request_queue_size = 128
+
+    def __init__(self, path: str) -> None:
+        self.cwd = os.getcwd()
+        self.environment = relevant_environment()
+        self.started = time.time()
+        self.stats: dict[str, int] = {}
+        self.stopping = False
+        self.lock = threading.Lock()
+        self.fingerprint = config_fingerprint(server_config_paths())
+        super().__init__(path, _Handler)
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def refresh_configs(self) -> None:
+        """别名配置或 .mcp.json 变化后重新加载别名表、缓存配置与 server 配置"""
+        fingerprint = config_fingerprint(server_config_paths())
+        with self.lock:
+            if fingerprint == self.fingerprint:
+                return
+            self.fingerprint = fingerprint
+            call_mcp.reload_configs()
+
+    def respond(self, fields: dict[str, str]) -> bytes:
+        op = fields.get("op")
+        if fields.get("version") != PROTOCOL.decode():
+            self.count("fallback")
+            return FALLBACK
+        if op == "status":
+            self.count("status")
+            status = {
+                "pid": os.getpid(),
+                "socket": self.server_address,
+                "cwd": self.cwd,
+                "uptime": round(time.time() - self.started, 3),
+                "requests": dict(self.stats),
+                **call_mcp.execution_stats(),
+            }
+            return b"0\n" + call_mcp.to_json(status).encode("utf-8") + b"\n"
+        if op == "metrics":
+            self.count("metrics")
+            try:
+                return b"0\n" + call_mcp.export_metrics(fields.get("format", "prometheus")).encode("utf-8")
+            except call_mcp.MCPParserError as e:
+                return b"1\n" + call_mcp.to_json({"error": str(e)}).encode("utf-8") + b"\n"
+        if op == "shutdown":
+            self.stopping = True
+            return b"0\n"
+        if op != "call":
+            raise DaemonError(f"未知操作: {op}")
+        environment = {key[4:]: value for key, value in fields.items() if key.startswith("env.")}
+        if fields.get("cwd") != self.cwd or environment != self.environment:
+            self.count("fallback")
+            return FALLBACK
+        self.count("call")
+        self.refresh_configs()
+        return render_call(fields)
+
+
+def serve(path: str) -> int:
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if hasattr(os, "getuid") and not private_directory(directory):
+        raise DaemonError(f"socket 目录必须归当前用户所有且权限为 0700: {directory}")
+    try:
+        running = send(encode_request({"version": PROTOCOL.decode(), "op": "status"}), path) is not None
+    except OSError:
+        running = True
+    if running:
+        raise DaemonError(f"常驻进程已在运行: {path}")
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+
+    # 预热：加载别名表与别名索引，首个请求不再承担
+    call_mcp._load_alias_table()
+    previous_umask = os.umask(0o177)
+    try:
+        server = CallDaemon(path)
+    finally:
+        os.umask(previous_umask)
+    print(f"Listening: {path}", flush=True)
+    try:
+        with server:
+            while not server.stopping:
+                server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+    return 0
+
+
+def control(op: str, path: str, **fields: str) -> int:
+    """向常驻进程发送 status / metrics / shutdown 请求"""
+    try:
+        response = send(encode_request({"version": PROTOCOL.decode(), "op": op, **fields}), path)
+    except OSError as e:
+        print(f"与常驻进程通信失败: {e}", file=sys.stderr)
+        return 1
+    if response is None:
+        print(f"没有运行中的常驻进程: {path}", file=sys.stderr)
+        return 1
+    status, _, output = response.partition(b"\n")
+    sys.stdout.buffer.write(output)
+    return int(status) if status.isdigit() else 1
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run the resident call_mcp process that call_mcp_fast.py forwards instructions to.",
+    )
+    parser.add_argument("--socket", help="Unix socket 路径，默认取 MCP_FAST_CALLER_SOCKET 或按用户的运行时目录")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--status", action="store_true", help="输出运行中常驻进程的统计")
+    group.add_argument("--metrics", metavar="FORMAT", help="导出累计指标及常驻进程尚未写入的部分（prometheus / json）")
+    group.add_argument("--stop", action="store_true", help="停止运行中的常驻进程")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    path = os.path.expanduser(args.socket) if args.socket else socket_path()
+    if args.metrics:
+        return control("metrics", path, format=args.metrics)
+    if args.status or args.stop:
+        return control("status" if args.status else "shutdown", path)
+    try:
+        return serve(path)
+    except DaemonError as exc:
+        print(f"错误: {exc}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+call_mcp.py 的轻量客户端：常驻进程（call_mcp_daemon.py）在运行时把指令转发给它，否则在本进程内解析
+
+用法与 call_mcp.py 相同。只转发单条命令行指令及 --execute / --output / --fields 选项；
+批量、扇出等模式、含 @ 引用的指令（文件路径与标准输入属于客户端）以及常驻进程不可用时，
+都回退为直接调用 call_mcp.main()。
+
+本模块只导入 os、sys 与 C 实现的 _socket，转发路径不加载解析器。
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+SOCKET_ENV = "MCP_FAST_CALLER_SOCKET"
+DISABLE_ENV = "MCP_FAST_CALLER_NO_DAEMON"
+PROTOCOL = b"2"
+CONNECT_TIMEOUT = 0.2
+# 请求发出后等待应答的上限；执行模式的单次调用超时默认 60 秒
+RESPONSE_TIMEOUT = 600.0
+# 影响解析与执行的环境变量随请求转发，常驻进程的取值不同时回退；
+# 指标由常驻进程自身的设置决定，socket 与开关只对客户端有意义
+ENV_PREFIX = "MCP_FAST_CALLER_"
+DAEMON_ONLY_ENV = (SOCKET_ENV, DISABLE_ENV, "MCP_FAST_CALLER_METRICS")
+EXTRA_ENV = ("HOME", "XDG_CONFIG_HOME", "XDG_CACHE_HOME")
+# 可以转发的前置选项 -> 是否需要取值
+FORWARDED_OPTIONS = {"--execute": False, "--output": True, "--fields": True}
+# 常驻进程无法按客户端的环境处理请求时的应答，客户端据此回退
+FALLBACK = b"fallback"
+
+
+def socket_path() -> str:
+    configured = os.environ.get(SOCKET_ENV)
+    if configured:
+        return os.path.expanduser(configured)
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, f"mcp-faster-caller-{uid}.sock")
+    # 共享临时目录下放在仅本用户可访问的子目录中，其他用户无法抢先占用路径
+    base = os.environ.get("TMPDIR") or "/tmp"
+    return os.path.join(base, f"mcp-faster-caller-{uid}", "daemon.sock")
+
+
+def private_directory(path: str) -> bool:
+    """目录归当前用户所有且权限为 0700"""
+    try:
+        info = os.stat(path)
+    except OSError:
+        return False
+    return info.st_uid == os.getuid() and info.st_mode & 0o077 == 0
+
+
+def trusted_socket(path: str) -> bool:
+    """socket 与所在目录都归当前用户所有、目录不对其他用户开放时才连接"""
+    if not hasattr(os, "getuid"):
+        return True
+    try:
+        owner = os.lstat(path).st_uid
+    except OSError:
+        return False
+    return owner == os.getuid() and private_directory(os.path.dirname(path) or ".")
+
+
+def relevant_environment() -> dict[str, str]:
+    """需要与常驻进程一致的环境变量"""
+    return {
+        name: value
+        for name, value in os.environ.items()
+        if (name.startswith(ENV_PREFIX) and name not in DAEMON_ONLY_ENV) or name in EXTRA_ENV
+    }
+
+
+def encode_request(fields: dict[str, str]) -> bytes:
+    """请求为以 NUL 分隔的 key=value；命令行参数、路径与环境变量都不可能包含 NUL"""
+    return b"\0".join(f"{key}={value}".encode("utf-8", "surrogateescape") for key, value in fields.items())
+
+
+def build_request(argv: list[str]) -> dict[str, str] | None:
+    """把命令行转换为请求字段；无法转发时返回 None"""
+    if not argv:
+        return None
+    fields = {"version": PROTOCOL.decode(), "op": "call"}
+    position = 0
+    while position < len(argv) and argv[position].startswith("--"):
+        name = argv[position]
+        if name not in FORWARDED_OPTIONS:
+            return None
+        if FORWARDED_OPTIONS[name]:
+            if position + 1 >= len(argv):
+                return None
+            fields[name[2:]] = argv[position + 1]
+            position += 2
+        else:
+            fields[name[2:]] = "1"
+            position += 1
+    instruction = " ".join(argv[position:])
+    if not instruction.strip() or "@" in instruction or argv[0] in ("-h", "help"):
+        # 没有指令时从标准输入读取，交给本进程处理
+        return None
+    # 别名配置、server 配置与缓存取决于工作目录和环境变量，由常驻进程核对
+    fields["cwd"] = os.getcwd()
+    for name, value in relevant_environment().items():
+        fields[f"env.{name}"] = value
+    fields["instruction"] = instruction
+    return fields
+
+
+def send(payload: bytes, path: str | None = None) -> bytes | None:
+    """
+    发送一个请求并读取完整应答
+
+    没有可信的常驻进程（无法连接）时返回 None；请求发出后通信失败或超时时抛出 OSError，
+    此时常驻进程可能已经处理了请求。
+    """
+    import _socket
+
+    path = path or socket_path()
+    if not trusted_socket(path):
+        return None
+    client = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        client.settimeout(CONNECT_TIMEOUT)
+        try:
+            client.connect(path)
+        except OSError:
+            return None
+        client.settimeout(RESPONSE_TIMEOUT)
+        client.sendall(payload)
+        client.shutdown(_socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = client.recv(1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        client.close()
+    if not chunks:
+        raise ConnectionError("常驻进程未返回应答")
+    return b"".join(chunks)
+
+
+def forward(argv: list[str]) -> int | None:
+    """转发给常驻进程并写出结果，返回退出码；需要回退时返回 None"""
+    if os.environ.get(DISABLE_ENV):
+        return None
+    fields = build_request(argv)
+    if fields is None:
+        return None
+    try:
+        response = send(encode_request(fields))
+    except OSError as e:
+        if fields.get("execute") != "1":
+            # 只解析的请求没有副作用，在本进程内重做
+            return None
+        sys.stderr.write(f"错误: 与常驻进程的通信中断，调用可能已经执行，未在本进程内重试: {e}\n")
+        return 1
+    if response is None:
+        return None
+    status, _, output = response.partition(b"\n")
+    if status == FALLBACK or not status.isdigit():
+        return None
+    sys.stdout.buffer.write(output)
+    sys.stdout.buffer.flush()
+    return int(status)
+
+
+def main() -> None:
+    code = forward(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    import call_mcp
+
+    call_mcp.main()
+
+
+if __name__ == "__main__":
+    main()
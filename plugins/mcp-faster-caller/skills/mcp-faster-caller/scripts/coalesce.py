@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+在途请求合并：相同调用正在执行时，后到的调用等待并共享同一结果
+
+合并发生在同一进程的所有线程之间（扇出模式的并发指令、常驻进程的多个客户端）。
+只对幂等调用启用，判断规则与结果缓存一致（见 result_cache.cacheable）。
+"""
+
+from __future__ import annotations
+
+import threading
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Callable, Hashable
+
+
+class CoalesceTimeout(Exception):
+    """等待相同调用的结果超时"""
+    pass
+
+
+class _InFlight:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class Coalescer:
+    """按键合并在途调用，并统计合并次数"""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.in_flight: dict[Hashable, _InFlight] = {}
+        self.requests = 0
+        self.executed = 0
+        self.coalesced = 0
+
+    def run(self, key: Hashable, function: Callable[[], Any], timeout: float | None = None) -> tuple[Any, bool]:
+        """
+        执行 function，或等待键相同的在途调用完成
+
+        Returns:
+            (结果, 是否复用了其他调用的结果)；在途调用抛出的异常同样传给所有等待者
+
+        Raises:
+            CoalesceTimeout: timeout 秒内在途调用未完成
+        """
+        with self.lock:
+            self.requests += 1
+            call = self.in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self.in_flight[key] = _InFlight()
+                self.executed += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise CoalesceTimeout("等待相同调用的结果超时")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> dict[str, int]:
+        with self.lock:
+            return {"requests": self.requests, "executed": self.executed, "coalesced": self.coalesced}
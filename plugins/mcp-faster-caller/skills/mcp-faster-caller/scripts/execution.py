@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+执行模式：把解析结果发送给 MCP server（--execute / --stream / --fanout / --refresh-tools）
+
+从 call_mcp 中拆出，只在需要执行时导入。call_mcp.py 作为脚本运行时每次都要重新编译，
+不会使用字节码缓存；执行模式的代码放在这里，只解析的冷启动无需编译它们。
+call_mcp 保留同名的入口（execute_call、run_fanout 等），按需转到本模块。
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+import call_mcp
+from call_mcp import (
+    POSITIONAL_KEY,
+    MCPExecutionError,
+    MCPParserError,
+    _decode_line,
+    parse_mcp_call,
+    to_json,
+    write_result,
+)
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any
+
+
+# 执行模式的常驻会话池，首次执行时创建，进程退出时关闭
+_SESSION_POOL = None
+
+
+def get_session_pool():
+    """获取进程内共享的 MCP 会话池"""
+    global _SESSION_POOL
+    if _SESSION_POOL is None:
+        import atexit
+
+        from mcp_client import SessionPool
+
+        _SESSION_POOL = SessionPool()
+        atexit.register(_SESSION_POOL.close)
+    return _SESSION_POOL
+
+
+# 执行模式的缓存配置、结果缓存与在途请求合并器，首次执行时创建
+_CACHE_SETTINGS = None
+_RESULT_CACHE = None
+_COALESCER = None
+# 最近一次扇出的按 server 调度器（见 scheduler），用于 --stats
+_SCHEDULER = None
+
+
+def get_cache_settings() -> dict[str, Any]:
+    """缓存配置（TTL、别名开关）；即使关闭了结果缓存，也用于判断调用是否幂等"""
+    global _CACHE_SETTINGS
+    if _CACHE_SETTINGS is None:
+        from result_cache import ResultCacheError, load_cache_settings
+
+        try:
+            _CACHE_SETTINGS = load_cache_settings()
+        except ResultCacheError as e:
+            raise MCPExecutionError(str(e))
+    return _CACHE_SETTINGS
+
+
+def get_result_cache():
+    """获取进程内共享的结果缓存；设置 MCP_FAST_CALLER_NO_CACHE 时返回 None"""
+    global _RESULT_CACHE
+    if os.getenv('MCP_FAST_CALLER_NO_CACHE'):
+        return None
+    if _RESULT_CACHE is None:
+        import atexit
+
+        from result_cache import ResultCache
+
+        _RESULT_CACHE = ResultCache(settings=get_cache_settings())
+        atexit.register(_RESULT_CACHE.close)
+    return _RESULT_CACHE
+
+
+def get_coalescer():
+    """获取进程内共享的在途请求合并器"""
+    global _COALESCER
+    if _COALESCER is None:
+        from coalesce import Coalescer
+
+        _COALESCER = Coalescer()
+    return _COALESCER
+
+
+def reload_configs() -> None:
+    """配置文件变化后重新加载缓存配置与 server 配置（见 call_mcp.reload_configs）"""
+    global _CACHE_SETTINGS
+    _CACHE_SETTINGS = None
+    if _RESULT_CACHE is not None:
+        try:
+            _RESULT_CACHE.settings = get_cache_settings()
+        except MCPExecutionError:
+            # 配置无效：下次执行时由 get_cache_settings 报告
+            pass
+    if _SESSION_POOL is not None:
+        _SESSION_POOL.reload_configs()
+
+
+def execution_stats() -> dict[str, Any]:
+    """本进程执行模式的统计：在途合并次数、结果缓存命中与扇出的按 server 排队情况"""
+    stats: dict[str, Any] = {}
+    if _COALESCER is not None:
+        stats["coalesce"] = _COALESCER.stats()
+    if _RESULT_CACHE is not None:
+        stats["cache"] = {"hits": _RESULT_CACHE.hits, "misses": _RESULT_CACHE.misses}
+    if _SCHEDULER is not None:
+        stats["scheduler"] = _SCHEDULER.stats()
+    return stats
+
+
+def check_tool_schema(server: str, command: str, arguments: str | dict[str, Any], schema: Any) -> dict[str, Any]:
+    """按工具 schema 校验命令与参数，返回转换类型后的参数（见 tool_schema）"""
+    from tool_schema import ToolSchemaError, validate_call
+
+    try:
+        return validate_call(server, command, arguments, schema)
+    except ToolSchemaError as e:
+        raise MCPParserError(str(e))
+
+
+def fetch_tool_schema(server: str, pool: Any = None, timeout: float | None = None) -> Any:
+    """通过 tools/list 获取 server 的工具列表并写入 schema 缓存，返回编译后的索引"""
+    from mcp_client import MCPClientError
+    from tool_schema import save_schema
+
+    pool = pool if pool is not None else get_session_pool()
+    try:
+        return save_schema(server, pool.list_tools(server, timeout))
+    except MCPClientError as e:
+        raise MCPExecutionError(str(e))
+
+
+def tool_arguments(server: str, command: str, arguments: str | dict[str, Any]) -> dict[str, Any]:
+    """
+    MCP 工具参数必须是对象
+
+    没有工具 schema 时无法确定位置参数对应的参数名，只发送命名参数或 JSON 对象，
+    位置参数（字符串参数或 POSITIONAL_KEY 下的值）直接拒绝。
+
+    Raises:
+        MCPParserError: 没有工具 schema 时传入了位置参数
+    """
+    if not arguments:
+        return {}
+    if isinstance(arguments, dict) and POSITIONAL_KEY not in arguments:
+        return arguments
+    raise MCPParserError(
+        f"server '{server}' 未提供工具 schema，无法确定 '{command}' 的位置参数对应的参数名，"
+        "请改用 key=value 或 JSON 参数"
+    )
+
+
+def execute_call(
+    result: dict[str, Any],
+    pool: Any = None,
+    cache: Any = None,
+    timeout: float | None = None,
+    coalescer: Any = None,
+) -> dict[str, Any]:
+    """
+    把解析结果作为 tools/call 发送给对应的 MCP server
+
+    工具 schema 缓存缺失或过期时先通过 tools/list 刷新，再在本地校验命令与参数（见 tool_schema）。
+    可缓存的调用（见 result_cache）先查结果缓存，命中时不启动也不访问 server；
+    未命中时，与正在执行的相同调用合并（见 coalesce），只向 server 发送一次。
+    cache / coalescer 为 None 时使用进程内共享实例；timeout 为 None 时使用 MCP_FAST_CALLER_TIMEOUT。
+
+    Returns:
+        解析结果附加 "result"（server 返回的 CallToolResult）、"cached"（是否来自缓存）
+        与 "coalesced"（是否复用了同时进行的相同调用的结果）
+
+    Raises:
+        MCPParserError: 命令或参数不符合工具 schema
+        MCPExecutionError: server 未配置、启动失败、超时或返回 JSON-RPC 错误
+    """
+    if "stages" in result:
+        return execute_pipeline(result, pool, cache, timeout, coalescer)
+    metrics = call_mcp._METRICS
+    if metrics is None:
+        return _execute_call(result, pool, cache, timeout, coalescer)
+    start = metrics.clock()
+    try:
+        return _execute_call(result, pool, cache, timeout, coalescer)
+    except MCPParserError:
+        metrics.count("errors_total", result["server"], "execute")
+        raise
+    finally:
+        elapsed = metrics.clock() - start
+        metrics.observe("phase_seconds", "execute", elapsed)
+        metrics.observe("server_seconds", result["server"], elapsed)
+
+
+def execute_pipeline(
+    result: dict[str, Any],
+    pool: Any = None,
+    cache: Any = None,
+    timeout: float | None = None,
+    coalescer: Any = None,
+) -> dict[str, Any]:
+    """
+    依次执行管道的各段，前一段的结果值在进程内替换后一段参数中的引用（见 pipeline）
+
+    某一段返回 isError 时停止，该段的结果作为整体结果。timeout 分别作用于每一段。
+
+    Returns:
+        顶层字段描述最后执行的一段；"stages" 为各段的 server、command、替换后的参数、
+        是否命中缓存 / 合并以及耗时（毫秒），不含中间结果
+    """
+    import time
+
+    from pipeline import PipelineError, stage_value, substitute
+
+    summaries = []
+    value = None
+    for index, stage in enumerate(result["stages"]):
+        if index:
+            try:
+                stage = substitute(stage, value)
+            except PipelineError as e:
+                raise MCPExecutionError(f"管道第 {index + 1} 段: {e}")
+        start = time.perf_counter()
+        try:
+            executed = execute_call(stage, pool, cache, timeout, coalescer)
+        except MCPParserError as e:
+            raise type(e)(f"管道第 {index + 1} 段: {e}")
+        summaries.append({
+            "server": executed["server"],
+            "command": executed["command"],
+            "arguments": executed["arguments"],
+            "cached": executed["cached"],
+            "coalesced": executed["coalesced"],
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+        })
+        response = executed["result"]
+        if isinstance(response, dict) and response.get("isError"):
+            break
+        value = stage_value(response)
+    return {**executed, "original": result["original"], "stages": summaries}
+
+
+def _prepare_call(result: dict[str, Any], pool: Any, timeout: float | None) -> tuple[dict[str, Any], dict[str, Any]]:
+    """按工具 schema 校验并转换参数，返回 (更新参数后的解析结果, tools/call 的参数对象)"""
+    server, command = result["server"], result["command"]
+    metrics = call_mcp._METRICS
+    start = metrics.clock() if metrics is not None else 0.0
+    import tool_schema
+
+    schema = tool_schema.load_schema(server)
+    if schema is None:
+        try:
+            schema = fetch_tool_schema(server, pool, timeout)
+        except MCPExecutionError:
+            # 不支持 tools/list 的 server 不做本地校验，错误留给 tools/call 报告
+            schema = None
+    if schema is not None:
+        result = {**result, "arguments": check_tool_schema(server, command, result["arguments"], schema)}
+    if metrics is not None:
+        metrics.lap("schema_check", start)
+    return result, tool_arguments(server, command, result["arguments"])
+
+
+def _execute_call(
+    result: dict[str, Any],
+    pool: Any,
+    cache: Any,
+    timeout: float | None,
+    coalescer: Any,
+) -> dict[str, Any]:
+    server, command, alias = result["server"], result["command"], result["alias"]
+    pool = pool if pool is not None else get_session_pool()
+    result, arguments = _prepare_call(result, pool, timeout)
+    cache = cache if cache is not None else get_result_cache()
+    if cache is not None:
+        cached = cache.get(alias, server, command, arguments)
+        if cached is not None:
+            return {**result, "result": cached, "cached": True, "coalesced": False}
+
+    from coalesce import CoalesceTimeout
+    from mcp_client import MCPClientError
+    from result_cache import cache_key, cacheable
+
+    def call() -> Any:
+        response = pool.call(server, command, arguments, timeout)
+        if cache is not None:
+            cache.put(alias, server, command, arguments, response)
+        return response
+
+    try:
+        if cacheable(cache.settings if cache is not None else get_cache_settings(), alias, server):
+            coalescer = coalescer if coalescer is not None else get_coalescer()
+            response, coalesced = coalescer.run(cache_key(server, command, arguments), call, timeout)
+        else:
+            # 可能有副作用的调用不合并：同时发出的两次写入都要执行
+            response, coalesced = call(), False
+    except (MCPClientError, CoalesceTimeout) as e:
+        raise MCPExecutionError(str(e))
+    return {**result, "result": response, "cached": False, "coalesced": coalesced}
+
+
+def stream_call(
+    result: dict[str, Any],
+    out: Any,
+    max_bytes: int | None = None,
+    fields: tuple[str, ...] | None = None,
+    pool: Any = None,
+    timeout: float | None = None,
+) -> int:
+    """
+    执行一条调用，以逐行 JSON 的分块帧把结果边读边写入 out（帧格式见 result_stream）
+
+    先写出附加 "stream": true 的解析结果，再逐块写出 result 的 JSON 文本，最后写出结束帧；
+    max_bytes 限制输出的 result 字节数，超出部分丢弃并在结束帧标记 truncated。
+    结果不经过结果缓存与在途合并：两者都需要完整的结果。
+
+    Returns:
+        退出码：成功为 0；调用失败（错误帧）或 server 返回 isError 为 1
+
+    Raises:
+        MCPParserError: 调用管道，或命令与参数不符合工具 schema
+    """
+    if "stages" in result:
+        raise MCPParserError("--stream 不支持调用管道，请去掉 --stream 或拆成单条调用")
+    from mcp_client import MCPClientError
+    from result_stream import FrameWriter
+
+    pool = pool if pool is not None else get_session_pool()
+    server = result["server"]
+    metrics = call_mcp._METRICS
+    start = metrics.clock() if metrics is not None else 0.0
+    try:
+        result, arguments = _prepare_call(result, pool, timeout)
+        write_result({**result, "stream": True}, out, "json", fields)
+        frames = FrameWriter(out, max_bytes)
+        try:
+            size, is_error = pool.call_stream(server, result["command"], arguments, frames, timeout)
+        except MCPClientError as e:
+            if metrics is not None:
+                metrics.count("errors_total", server, "execute")
+            frames.error(str(e))
+            return 1
+        frames.finish(size, is_error)
+        return 1 if is_error else 0
+    finally:
+        if metrics is not None:
+            elapsed = metrics.clock() - start
+            metrics.observe("phase_seconds", "execute", elapsed)
+            metrics.observe("server_seconds", server, elapsed)
+
+
+def run_fanout(
+    stream=None,
+    out=None,
+    deadline: float | None = None,
+    per_server: int | None = None,
+    output: str = "json",
+    fields: tuple[str, ...] | None = None,
+) -> int:
+    """
+    扇出模式：读取全部指令后并发执行，按完成顺序逐行输出 {"index": 序号, ...}（NDJSON）
+
+    输入格式同批量模式；序号从 0 开始，对应输入行。输出模式与字段选择同批量模式。
+    per_server 为 None 时各 server 的并发上限取配置文件（见 scheduler），再没有时取 DEFAULT_PER_SERVER。
+    """
+    import asyncio
+
+    from fanout import DEFAULT_PER_SERVER, FanoutError, fan_out, load_concurrency_limits
+    from scheduler import Scheduler, SchedulerError, load_scheduler_settings
+
+    global _SCHEDULER
+    stream = stream if stream is not None else sys.stdin
+    out = out if out is not None else sys.stdout
+    instructions = [_decode_line(line) for line in stream]
+    try:
+        limits = load_concurrency_limits()
+        settings = load_scheduler_settings()
+    except (FanoutError, SchedulerError) as e:
+        raise MCPParserError(str(e))
+    if per_server is not None:
+        # 命令行给出的 --per-server 优先于配置文件中的 concurrency 表与 max_concurrency
+        limits = {}
+        settings = {
+            server: {name: value for name, value in entry.items() if name != "max_concurrency"}
+            for server, entry in settings.items()
+        }
+    metrics = call_mcp._METRICS
+    _SCHEDULER = Scheduler(
+        settings,
+        max_concurrency=per_server or DEFAULT_PER_SERVER,
+        limits=limits,
+        observe=None if metrics is None else lambda server, seconds: metrics.observe("queue_seconds", server, seconds),
+    )
+
+    def execute(result: dict[str, Any], timeout: float | None) -> dict[str, Any]:
+        return execute_call(result, timeout=timeout)
+
+    async def consume() -> None:
+        async for item in fan_out(
+            instructions,
+            parse_mcp_call,
+            execute,
+            (MCPParserError,),
+            deadline=deadline,
+            scheduler=_SCHEDULER,
+            congestion=(MCPExecutionError,),
+        ):
+            write_result(item, out, output, fields)
+
+    asyncio.run(consume())
+    return 0
+
+
+def refresh_tool_schemas(servers: list[str] | None = None, out=None, pool: Any = None) -> int:
+    """
+    重新获取各 server 的工具列表并写入 schema 缓存，每个 server 输出一行 JSON
+
+    servers 为空时刷新所有已配置启动命令的 server。
+    Returns:
+        退出码：全部成功为 0，否则为 1
+    """
+    out = out if out is not None else sys.stdout
+    pool = pool if pool is not None else get_session_pool()
+    if not servers:
+        servers = sorted(pool.configs())
+    status = 0
+    for server in servers:
+        try:
+            schema = fetch_tool_schema(server, pool)
+            line = {"server": server, "tools": sorted(schema)}
+        except MCPExecutionError as e:
+            line = {"server": server, "error": str(e)}
+            status = 1
+        out.write(to_json(line) + "\n")
+    out.flush()
+    return status
+
+
+def run_stream(
+    instruction: str,
+    out: Any,
+    max_bytes: int | None = None,
+    fields: tuple[str, ...] | None = None,
+    stdin: Any = None,
+) -> int:
+    """解析一条指令并流式执行（见 stream_call），解析或校验失败时写出 {"error": ...}"""
+    try:
+        return stream_call(parse_mcp_call(instruction, stdin), out, max_bytes, fields)
+    except MCPParserError as e:
+        write_result({"error": str(e)}, out, "json")
+        return 1
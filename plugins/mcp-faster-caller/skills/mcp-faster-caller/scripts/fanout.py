@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+并发扇出：一次执行多条相互独立的指令，按完成顺序产出结果
+
+- 每条结果带输入序号 index（从 0 开始），解析失败的指令立即产出错误
+- 同一 server 的调用经 scheduler 排队：并发上限默认 DEFAULT_PER_SERVER，
+  可在配置文件的 concurrency 表中按 server 设置，如 {"concurrency": {"mysql": 1}}；
+  上限随延迟与错误自适应，并可按 server 限速（见 scheduler）
+- 所有调用共享一个总时限，到期后未完成的指令产出超时错误，进行中的调用以剩余时间为超时
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from alias_config import AliasConfigError, iter_config_tables
+from scheduler import Scheduler
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, AsyncIterator, Callable
+
+CONCURRENCY_KEY = "concurrency"
+DEFAULT_PER_SERVER = 4
+# 执行线程数上限；实际并发还受各 server 的限制约束
+MAX_WORKERS = 64
+
+
+class FanoutError(Exception):
+    """扇出配置错误"""
+    pass
+
+
+def load_concurrency_limits() -> dict[str, int]:
+    """合并各配置文件中的 concurrency 表：server -> 最大并发调用数"""
+    limits: dict[str, int] = {}
+    try:
+        for path, table in iter_config_tables(CONCURRENCY_KEY):
+            for server, limit in table.items():
+                if isinstance(limit, bool) or not isinstance(limit, int) or limit < 1:
+                    raise FanoutError(f"配置文件 {path} 中 server '{server}' 的并发数必须是正整数")
+                limits[server] = limit
+    except AliasConfigError as e:
+        raise FanoutError(str(e))
+    return limits
+
+
+async def fan_out(
+    instructions: list[str],
+    parse: Callable[[str], dict[str, Any]],
+    execute: Callable[[dict[str, Any], float | None], dict[str, Any]],
+    errors: tuple[type[BaseException], ...],
+    per_server: int = DEFAULT_PER_SERVER,
+    limits: dict[str, int] | None = None,
+    deadline: float | None = None,
+    scheduler: Scheduler | None = None,
+    congestion: tuple[type[BaseException], ...] = (),
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    并发执行指令，按完成顺序产出 {"index": 序号, ...结果} 或 {"index": 序号, "error": ...}
+
+    Args:
+        parse: 解析一条指令（如 parse_mcp_call）
+        execute: 在工作线程中执行解析结果，第二个参数为剩余时间（秒，无总时限时为 None）；
+            结果中 "cached" 或 "coalesced" 为真时不计入 server 的延迟观测
+        errors: 作为单条指令错误输出、不中断其他指令的异常类型
+        per_server: 未在 limits 中列出的 server 的并发上限
+        deadline: 总时限（秒）
+        scheduler: 按 server 排队与限速；未传入时按 per_server 与 limits 新建
+        congestion: 视为 server 过载、使其并发上限减半的异常类型（如执行错误与超时）
+    """
+    loop = asyncio.get_running_loop()
+    end = None if deadline is None else time.monotonic() + deadline
+    if scheduler is None:
+        scheduler = Scheduler(max_concurrency=per_server, limits=limits)
+
+    def remaining() -> float | None:
+        return None if end is None else max(end - time.monotonic(), 0.001)
+
+    async def run(index: int, instruction: str, executor: ThreadPoolExecutor) -> dict[str, Any]:
+        try:
+            parsed = parse(instruction)
+            queue = scheduler.queue(parsed["server"])
+            start = await queue.acquire()
+            try:
+                result = await loop.run_in_executor(executor, execute, parsed, remaining())
+            except congestion:
+                queue.release(start, failed=True)
+                raise
+            except BaseException:
+                # 本地错误（如参数校验）与取消不反映 server 负载，只归还名额
+                queue.discard()
+                raise
+            if result.get("cached") or result.get("coalesced"):
+                # 结果来自缓存或其他调用，耗时不反映 server 延迟
+                queue.discard()
+            else:
+                queue.release(start, failed=False)
+        except errors as e:
+            return {"index": index, "error": str(e)}
+        return {"index": index, **result}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(len(instructions), MAX_WORKERS))) as executor:
+        tasks = {
+            asyncio.ensure_future(run(index, instruction, executor)): index
+            for index, instruction in enumerate(instructions)
+        }
+        pending = set(tasks)
+        while pending:
+            timeout = None if end is None else max(end - time.monotonic(), 0)
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=tasks.__getitem__):
+                yield task.result()
+            if not done:
+                # 总时限已到：排队中的指令直接取消，进行中的调用会在各自的剩余时间内超时返回
+                for task in sorted(pending, key=tasks.__getitem__):
+                    task.cancel()
+                    yield {"index": tasks[task], "error": f"超过总时限 {deadline} 秒，未完成"}
+                break
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+执行模式：通过 stdio JSON-RPC 调用 MCP server，并在进程内保持会话常驻
+
+server 启动配置取自 mcpServers 表（格式与 .mcp.json 一致），合并顺序（后者覆盖前者）：
+当前目录的 .mcp.json < 用户配置 < 项目配置 < MCP_FAST_CALLER_CONFIG（路径同别名配置）。
+同一进程内（如批量模式）对同一 server 的重复调用复用已完成 initialize 握手的会话。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import selectors
+import subprocess
+import threading
+import time
+
+from alias_config import SERVERS_KEY, AliasConfigError, candidate_paths, iter_config_tables
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Callable
+
+TIMEOUT_ENV = "MCP_FAST_CALLER_TIMEOUT"
+DEFAULT_TIMEOUT = 60.0
+PROTOCOL_VERSION = "2024-11-05"
+PROJECT_MCP_FILE = ".mcp.json"
+CLIENT_INFO = {"name": "mcp-faster-caller", "version": "2.3"}
+# 关闭会话时等待 server 自行退出的时间
+CLOSE_GRACE = 1.0
+READ_SIZE = 1 << 16
+
+
+class MCPClientError(Exception):
+    """MCP server 启动或通信错误"""
+    pass
+
+
+def server_config_paths() -> list[str]:
+    """按优先级从低到高列出可能声明 mcpServers 的文件"""
+    return [os.path.join(os.getcwd(), PROJECT_MCP_FILE), *candidate_paths()]
+
+
+def load_server_configs() -> dict[str, dict[str, Any]]:
+    """合并各配置文件中的 mcpServers 表"""
+    servers: dict[str, dict[str, Any]] = {}
+    try:
+        for _, table in iter_config_tables(SERVERS_KEY, server_config_paths()):
+            servers.update(table)
+    except AliasConfigError as e:
+        raise MCPClientError(str(e))
+    return servers
+
+
+def call_timeout() -> float:
+    configured = os.environ.get(TIMEOUT_ENV)
+    if not configured:
+        return DEFAULT_TIMEOUT
+    try:
+        timeout = float(configured)
+    except ValueError:
+        timeout = 0.0
+    if timeout <= 0:
+        raise MCPClientError(f"{TIMEOUT_ENV} 必须是正数（秒）: {configured}")
+    return timeout
+
+
+def launch_command(server: str, config: Any) -> tuple[list[str], dict[str, str] | None, str | None]:
+    """校验 server 配置，返回 (命令行, 环境变量, 工作目录)"""
+    if not isinstance(config, dict):
+        raise MCPClientError(f"server '{server}' 的配置必须是表")
+    transport = config.get("type", "stdio")
+    if transport != "stdio" or "url" in config:
+        raise MCPClientError(f"server '{server}' 使用 {transport} 传输，执行模式仅支持 stdio")
+    command = config.get("command")
+    arguments = config.get("args", [])
+    if not isinstance(command, str) or not command:
+        raise MCPClientError(f"server '{server}' 缺少 command")
+    if not isinstance(arguments, list) or not all(isinstance(item, str) for item in arguments):
+        raise MCPClientError(f"server '{server}' 的 args 必须是字符串列表")
+    env = None
+    if config.get("env"):
+        env = dict(os.environ)
+        env.update({str(key): str(value) for key, value in config["env"].items()})
+    return [command, *arguments], env, config.get("cwd")
+
+
+class StdioSession:
+    """一个已初始化的 MCP server 进程；同一会话上的请求串行执行"""
+
+    def __init__(self, server: str, config: Any, timeout: float) -> None:
+        command, env, cwd = launch_command(server, config)
+        self.server = server
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.broken = False
+        self._buffer = bytearray()
+        self._next_id = 0
+        try:
+            self.process = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                # server 日志默认丢弃，调试模式下透传到 stderr
+                stderr=None if os.getenv("MCP_FAST_CALLER_DEBUG") else subprocess.DEVNULL,
+                env=env,
+                cwd=cwd,
+            )
+        except OSError as e:
+            raise MCPClientError(f"无法启动 server '{server}': {e}")
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.process.stdout, selectors.EVENT_READ)
+        try:
+            initialized = self.request("initialize", {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": CLIENT_INFO,
+            }, timeout)
+            self.notify("notifications/initialized")
+        except MCPClientError:
+            self.close()
+            raise
+        self.server_info = initialized.get("serverInfo", {}) if isinstance(initialized, dict) else {}
+
+    def alive(self) -> bool:
+        return not self.broken and self.process.poll() is None
+
+    def _send(self, message: dict[str, Any]) -> None:
+        data = json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        try:
+            self.process.stdin.write(data)
+            self.process.stdin.flush()
+        except (BrokenPipeError, ValueError):
+            self.broken = True
+            raise MCPClientError(f"server '{self.server}' 已退出（退出码 {self.process.poll()}）")
+
+    def _read_message(self, deadline: float) -> dict[str, Any]:
+        while True:
+            newline = self._buffer.find(b"\n")
+            if newline >= 0:
+                line = bytes(self._buffer[:newline])
+                del self._buffer[:newline + 1]
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    # 按 MCP stdio 规范 stdout 只能输出消息，非 JSON 行视为 server 的噪声输出
+                    continue
+                if isinstance(message, dict):
+                    return message
+                continue
+            self._buffer += self._read_chunk(deadline)
+
+    def _read_chunk(self, deadline: float) -> bytes:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not self._selector.select(remaining):
+            self.broken = True
+            raise MCPClientError(f"server '{self.server}' 响应超时")
+        chunk = os.read(self.process.stdout.fileno(), READ_SIZE)
+        if not chunk:
+            self.broken = True
+            raise MCPClientError(f"server '{self.server}' 已退出（退出码 {self.process.wait()}）")
+        return chunk
+
+    def notify(self, method: str, params: dict[str, Any] | None = None) -> None:
+        message: dict[str, Any] = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        self._send(message)
+
+    def request(self, method: str, params: dict[str, Any], timeout: float) -> Any:
+        self._next_id += 1
+        request_id = self._next_id
+        self._send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+        deadline = time.monotonic() + timeout
+        while True:
+            message = self._read_message(deadline)
+            if "method" in message:
+                if "id" in message:
+                    self._answer_server_request(message)
+                continue  # server 通知（日志、进度等）
+            if message.get("id") != request_id:
+                continue  # 之前超时请求的迟到响应
+            if "error" in message:
+                self._raise_error(message)
+            return message.get("result")
+
+    def _raise_error(self, message: dict[str, Any]) -> None:
+        error = message["error"] if isinstance(message["error"], dict) else {}
+        raise MCPClientError(f"server '{self.server}' 返回错误: {error.get('message', message['error'])}")
+
+    def _answer_server_request(self, message: dict[str, Any]) -> None:
+        if message["method"] == "ping":
+            self._send({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+        else:
+            self._send({
+                "jsonrpc": "2.0",
+                "id": message["id"],
+                "error": {"code": -32601, "message": f"Method not supported: {message['method']}"},
+            })
+
+    def call_tool(self, tool: str, arguments: dict[str, Any], timeout: float) -> Any:
+        with self.lock:
+            self.calls += 1
+            return self.request("tools/call", {"name": tool, "arguments": arguments}, timeout)
+
+    def call_tool_stream(
+        self,
+        tool: str,
+        arguments: dict[str, Any],
+        timeout: float,
+        on_result: Callable[[bytes], None],
+    ) -> tuple[int, bool]:
+        """
+        tools/call，响应中 result 的 JSON 文本边读边交给 on_result，不解码完整结果（见 result_stream）
+
+        on_result 阻塞（下游背压）的时间不计入超时。
+        Returns:
+            (result 的字节数, 是否为 isError 结果)
+        """
+        from result_stream import ResponseScanner, ResultStreamError
+
+        deadline = 0.0
+
+        def forward(data: bytes) -> None:
+            nonlocal deadline
+            start = time.monotonic()
+            on_result(data)
+            deadline += time.monotonic() - start
+
+        scanner = ResponseScanner(forward)
+        with self.lock:
+            self.calls += 1
+            self._next_id += 1
+            request_id = self._next_id
+            self._send({"jsonrpc": "2.0", "id": request_id, "method": "tools/call", "params": {"name": tool, "arguments": arguments}})
+            deadline = time.monotonic() + timeout
+            try:
+                while True:
+                    data = bytes(self._buffer) if self._buffer else self._read_chunk(deadline)
+                    self._buffer.clear()
+                    end = scanner.feed(data)
+                    if end is None:
+                        continue
+                    self._buffer += data[end:]
+                    message = scanner.message()
+                    if message is not None and "method" in message:
+                        if "id" in message:
+                            self._answer_server_request(message)
+                    elif message is not None and message.get("id") == request_id:
+                        if "error" in message:
+                            self._raise_error(message)
+                        return scanner.result_bytes, scanner.is_error
+                    elif scanner.has_result:
+                        # 会话超时后即被丢弃，不会收到迟到的响应；result 已经转发出去，无法撤回
+                        raise ResultStreamError(f"响应 id 不匹配: {message.get('id') if message else None}")
+                    scanner.reset()
+            except MCPClientError:
+                raise
+            except ResultStreamError as e:
+                self.broken = True
+                raise MCPClientError(f"server '{self.server}' {e}")
+            except BaseException:
+                # on_result 出错（如下游关闭管道）时响应只读了一部分，会话不能再用
+                self.broken = True
+                raise
+
+    def list_tools(self, timeout: float) -> list[dict[str, Any]]:
+        """tools/list，按 nextCursor 取完所有分页"""
+        tools: list[dict[str, Any]] = []
+        params: dict[str, Any] = {}
+        with self.lock:
+            while True:
+                page = self.request("tools/list", params, timeout)
+                if not isinstance(page, dict) or not isinstance(page.get("tools"), list):
+                    raise MCPClientError(f"server '{self.server}' 的 tools/list 响应无效")
+                tools.extend(page["tools"])
+                if not page.get("nextCursor"):
+                    return tools
+                params = {"cursor": page["nextCursor"]}
+
+    def close(self) -> None:
+        self._selector.close()
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(CLOSE_GRACE)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process.stdout.close()
+
+
+class SessionPool:
+    """
+    按 server 名保持常驻会话
+
+    每个会话同一时间只处理一个请求；并发调用同一 server 时按需启动更多会话，
+    调用结束后放回空闲列表复用。会话退出或超时后丢弃，下次调用时重新启动。
+    """
+
+    def __init__(self, configs: dict[str, Any] | None = None, timeout: float | None = None) -> None:
+        self._configs = configs
+        self.timeout = timeout
+        self.sessions: dict[str, list[StdioSession]] = {}
+        self._idle: dict[str, list[StdioSession]] = {}
+        self.started = 0
+        self.lock = threading.Lock()
+
+    def configs(self) -> dict[str, Any]:
+        if self._configs is None:
+            self._configs = load_server_configs()
+        return self._configs
+
+    def _forget(self, server: str, session: StdioSession) -> None:
+        sessions = self.sessions.get(server, [])
+        if session in sessions:
+            sessions.remove(session)
+
+    def acquire(self, server: str, timeout: float | None = None) -> StdioSession:
+        """取出一个空闲会话，没有时启动新会话（启动过程不阻塞其他 server）"""
+        dead = []
+        with self.lock:
+            idle = self._idle.get(server, [])
+            session = None
+            while idle:
+                candidate = idle.pop()
+                if candidate.alive():
+                    session = candidate
+                    break
+                self._forget(server, candidate)
+                dead.append(candidate)
+            config = self.configs().get(server) if session is None else None
+        for candidate in dead:
+            candidate.close()
+        if session is not None:
+            return session
+        if config is None:
+            raise MCPClientError(
+                f"未配置 server '{server}'，请在 .mcp.json 或别名配置文件的 {SERVERS_KEY} 中添加启动命令"
+            )
+        session = StdioSession(server, config, timeout or self.timeout or call_timeout())
+        with self.lock:
+            self.sessions.setdefault(server, []).append(session)
+            self.started += 1
+        return session
+
+    def release(self, server: str, session: StdioSession) -> None:
+        with self.lock:
+            # reload_configs 已移出的会话按旧配置启动，不再复用
+            keep = session.alive() and session in self.sessions.get(server, ())
+            if keep:
+                self._idle.setdefault(server, []).append(session)
+            else:
+                self._forget(server, session)
+        if not keep:
+            session.close()
+
+    def reload_configs(self) -> None:
+        """重新读取 server 配置；配置变化的 server 的会话不再复用，下次调用按新配置启动"""
+        try:
+            configs = load_server_configs()
+        except MCPClientError:
+            # 配置文件无效：下次调用时重新读取并报告错误
+            configs = None
+        with self.lock:
+            previous = self._configs or {}
+            self._configs = configs
+            changed = [
+                server for server in self.sessions
+                if configs is None or previous.get(server) != configs.get(server)
+            ]
+            idle = []
+            for server in changed:
+                # 正在使用的会话在 release 时关闭
+                self.sessions.pop(server)
+                idle.extend(self._idle.pop(server, []))
+        for session in idle:
+            session.close()
+
+    def call(self, server: str, tool: str, arguments: dict[str, Any], timeout: float | None = None) -> Any:
+        """调用工具；timeout 为 None 时使用池的默认超时"""
+        session = self.acquire(server, timeout)
+        try:
+            return session.call_tool(tool, arguments, timeout or self.timeout or call_timeout())
+        finally:
+            self.release(server, session)
+
+    def call_stream(
+        self,
+        server: str,
+        tool: str,
+        arguments: dict[str, Any],
+        on_result: Callable[[bytes], None],
+        timeout: float | None = None,
+    ) -> tuple[int, bool]:
+        """流式调用工具，result 的 JSON 文本逐块交给 on_result（见 StdioSession.call_tool_stream）"""
+        session = self.acquire(server, timeout)
+        try:
+            return session.call_tool_stream(tool, arguments, timeout or self.timeout or call_timeout(), on_result)
+        finally:
+            self.release(server, session)
+
+    def list_tools(self, server: str, timeout: float | None = None) -> list[dict[str, Any]]:
+        """获取 server 的全部工具定义（tools/list）"""
+        session = self.acquire(server, timeout)
+        try:
+            return session.list_tools(timeout or self.timeout or call_timeout())
+        finally:
+            self.release(server, session)
+
+    def close(self) -> None:
+        with self.lock:
+            sessions = [session for group in self.sessions.values() for session in group]
+            self.sessions.clear()
+            self._idle.clear()
+        for session in sessions:
+            session.close()
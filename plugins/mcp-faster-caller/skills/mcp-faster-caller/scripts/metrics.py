@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+解析与执行的分阶段耗时和按 server 的计数
+
+设置 MCP_FAST_CALLER_METRICS=1 时启用（call_mcp 导入时检查），未启用时热路径不导入本模块。
+记录的指标：
+- phase_seconds{phase}：各阶段耗时直方图，阶段见 PHASES；argument_parse 包含其中的 tokenize
+- server_seconds{server}：执行模式按 server 的调用耗时直方图（含缓存命中与合并等待）
+- queue_seconds{server}：扇出模式按 server 的排队耗时直方图（并发上限与限速造成的等待，见 scheduler）
+- calls_total{server,alias}：解析成功的调用次数
+- errors_total{server,phase}：按 server 与出错阶段的错误次数；别名无法识别时 server 为 "unknown"
+
+每个进程退出时把本进程的指标合并到缓存目录下的 metrics.marshal（文件锁保护并发合并），
+可随时用 call_mcp.py --metrics prometheus|json 导出累计值。
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+import threading
+import time
+
+from alias_config import cache_dir
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any
+
+METRICS_ENV = "MCP_FAST_CALLER_METRICS"
+STORE_NAME = "metrics.marshal"
+STORE_FORMAT = 1
+EXPORT_FORMATS = ("prometheus", "json")
+PREFIX = "mcp_fast_caller_"
+PHASES = ("validate", "alias_resolve", "argument_parse", "tokenize", "schema_check", "serialize", "execute")
+# 直方图桶上界（秒）：解析各阶段在微秒级，执行在毫秒到秒级
+BUCKETS = (
+    1e-05, 2.5e-05, 5e-05, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+# 指标名 -> (类型, 标签名, 说明)
+SERIES = {
+    "phase_seconds": ("histogram", ("phase",), "Time spent in each call_mcp phase."),
+    "server_seconds": ("histogram", ("server",), "Execute-mode call latency per MCP server."),
+    "queue_seconds": ("histogram", ("server",), "Fan-out time spent queued per MCP server."),
+    "calls_total": ("counter", ("server", "alias"), "Parsed calls per server and alias."),
+    "errors_total": ("counter", ("server", "phase"), "Failed calls per server and phase."),
+}
+
+
+class MetricsError(Exception):
+    """指标导出参数无效"""
+    pass
+
+
+class Metrics:
+    """
+    进程内的指标；可被多个线程（扇出执行、常驻进程）同时更新
+
+    histograms 的键为 (指标名, 标签值)，值为各桶计数（最后一个为超出最大桶的计数）加上耗时总和；
+    counters 的键为 (指标名, *标签值)。
+    """
+
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self) -> None:
+        self.histograms: dict[tuple[str, str], list[float]] = {}
+        self.counters: dict[tuple[str, ...], int] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, name: str, label: str, seconds: float) -> None:
+        position = bisect.bisect_left(BUCKETS, seconds)
+        with self.lock:
+            histogram = self.histograms.get((name, label))
+            if histogram is None:
+                histogram = self.histograms[(name, label)] = [0] * (len(BUCKETS) + 1) + [0.0]
+            histogram[position] += 1
+            histogram[-1] += seconds
+
+    def lap(self, phase: str, start: float) -> float:
+        """记录从 start 到现在的阶段耗时，返回现在的时钟值作为下一阶段的起点"""
+        now = time.perf_counter()
+        self.observe("phase_seconds", phase, now - start)
+        return now
+
+    def count(self, name: str, *labels: str) -> None:
+        key = (name, *labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+    def merge(self, state: dict[str, Any]) -> None:
+        """累加另一份指标（to_state() 的结果）"""
+        with self.lock:
+            for key, values in state["histograms"].items():
+                histogram = self.histograms.get(key)
+                if histogram is None or len(histogram) != len(values):
+                    self.histograms[key] = list(values)
+                else:
+                    for position, value in enumerate(values):
+                        histogram[position] += value
+            for key, value in state["counters"].items():
+                self.counters[key] = self.counters.get(key, 0) + value
+
+    def to_state(self) -> dict[str, Any]:
+        with self.lock:
+            return {
+                "format": STORE_FORMAT,
+                "buckets": BUCKETS,
+                "histograms": {key: list(values) for key, values in self.histograms.items()},
+                "counters": dict(self.counters),
+            }
+
+    def reset(self) -> dict[str, Any]:
+        """取出当前指标并清零"""
+        state = self.to_state()
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+        return state
+
+
+def _quantile(counts: list[float], total: float, quantile: float) -> float | None:
+    """按桶上界估计分位数；落在最大桶之外时返回 None"""
+    rank = quantile * total
+    seen = 0
+    for position, count in enumerate(counts[:len(BUCKETS)]):
+        seen += count
+        if seen >= rank:
+            return BUCKETS[position]
+    return None
+
+
+def to_json(metrics: Metrics) -> dict[str, Any]:
+    """按指标名与标签组织的 JSON 结构；直方图给出累计桶计数与估计的 p50 / p90 / p99"""
+    state = metrics.to_state()
+    exported: dict[str, Any] = {name: {} for name in SERIES}
+    for (name, label), values in sorted(state["histograms"].items()):
+        counts, total = values[:-1], sum(values[:-1])
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(BUCKETS, counts):
+            cumulative += count
+            buckets[repr(bound)] = cumulative
+        buckets["+Inf"] = total
+        exported[name][label] = {
+            "count": total,
+            "sum": values[-1],
+            "p50": _quantile(counts, total, 0.5),
+            "p90": _quantile(counts, total, 0.9),
+            "p99": _quantile(counts, total, 0.99),
+            "buckets": buckets,
+        }
+    for (name, *labels), value in sorted(state["counters"].items()):
+        exported[name].setdefault(labels[0], {})[labels[1]] = value
+    return exported
+
+
+def _label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def to_prometheus(metrics: Metrics) -> str:
+    """Prometheus 文本格式（可直接交给 node_exporter 的 textfile collector）"""
+    state = metrics.to_state()
+    lines = []
+    for name, (kind, label_names, description) in SERIES.items():
+        lines.append(f"# HELP {PREFIX}{name} {description}")
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+        if kind == "histogram":
+            for (series, label), values in sorted(state["histograms"].items()):
+                if series != name:
+                    continue
+                labels = f'{label_names[0]}="{_label_value(label)}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS, values):
+                    cumulative += count
+                    lines.append(f'{PREFIX}{name}_bucket{{{labels},le="{bound!r}"}} {cumulative}')
+                cumulative += values[len(BUCKETS)]
+                lines.append(f'{PREFIX}{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+                lines.append(f"{PREFIX}{name}_sum{{{labels}}} {values[-1]!r}")
+                lines.append(f"{PREFIX}{name}_count{{{labels}}} {cumulative}")
+        else:
+            for (series, *label_values), value in sorted(state["counters"].items()):
+                if series != name:
+                    continue
+                labels = ",".join(f'{key}="{_label_value(label)}"' for key, label in zip(label_names, label_values))
+                lines.append(f"{PREFIX}{name}{{{labels}}} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def export(metrics: Metrics, export_format: str) -> str:
+    if export_format == "prometheus":
+        return to_prometheus(metrics)
+    if export_format == "json":
+        import json
+
+        return json.dumps(to_json(metrics), ensure_ascii=False, indent=2) + "\n"
+    raise MetricsError(f"--metrics 必须是 {' / '.join(EXPORT_FORMATS)} 之一: {export_format}")
+
+
+def store_path() -> str:
+    return os.path.join(cache_dir(), STORE_NAME)
+
+
+def _read_store(path: str) -> dict[str, Any] | None:
+    import marshal
+
+    try:
+        with open(path, "rb") as source:
+            state = marshal.loads(source.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    # 桶边界改变后旧的累计值无法合并，直接丢弃
+    if not isinstance(state, dict) or state.get("format") != STORE_FORMAT or state.get("buckets") != BUCKETS:
+        return None
+    return state
+
+
+def load_stored(path: str | None = None) -> Metrics:
+    """读取累计的指标"""
+    metrics = Metrics()
+    state = _read_store(path or store_path())
+    if state is not None:
+        metrics.merge(state)
+    return metrics
+
+
+def flush(metrics: Metrics, path: str | None = None) -> None:
+    """把本进程的指标合并进累计存储并清零；存储不可写时丢弃"""
+    import fcntl
+    import marshal
+
+    pending = metrics.reset()
+    if not pending["histograms"] and not pending["counters"]:
+        return
+    path = path or store_path()
+    temporary = f"{path}.tmp-{os.getpid()}"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.lock", "wb") as lock:
+            # 多个进程同时退出时逐个合并，避免丢失更新
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            merged = Metrics()
+            stored = _read_store(path)
+            if stored is not None:
+                merged.merge(stored)
+            merged.merge(pending)
+            with open(temporary, "wb") as target:
+                target.write(marshal.dumps(merged.to_state()))
+            os.replace(temporary, path)
+    except OSError:
+        pass
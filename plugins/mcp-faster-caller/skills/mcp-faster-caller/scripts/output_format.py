@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+紧凑输出：字段选择与 MessagePack 编码
+
+- 字段选择只保留调用方需要的键（如去掉回显的 original / alias / format），
+  error / index / line 等定位信息总是保留
+- MessagePack 编码遵循规范的子集（nil、bool、int、float64、str、bin、array、map），
+  可被任何 MessagePack 库解码；多个对象直接拼接即为流，不需要额外分隔
+"""
+
+from __future__ import annotations
+
+import struct
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any
+
+OUTPUT_MODES = ("pretty", "json", "msgpack")
+# 解析 / 执行结果中可选择的字段
+RESULT_FIELDS = (
+    "server", "command", "arguments", "original", "alias", "format",
+    "corrected_from", "result", "cached", "coalesced", "stages",
+)
+# 错误、序号与流式标记总是输出，否则批量 / 扇出 / 流式模式的调用方无法对应或解读结果
+STRUCTURAL_FIELDS = ("error", "index", "line", "stream")
+
+_DOUBLE = struct.Struct(">Bd")
+# str8/16/32 与 bin8/16/32 的长度字段字节数
+_LENGTH_SIZES = {0xd9: 1, 0xda: 2, 0xdb: 4, 0xc4: 1, 0xc5: 2, 0xc6: 4}
+
+
+class OutputFormatError(Exception):
+    """输出选项无效"""
+    pass
+
+
+def parse_fields(spec: str) -> tuple[str, ...]:
+    """解析逗号分隔的字段列表"""
+    fields = tuple(name.strip() for name in spec.split(",") if name.strip())
+    unknown = [name for name in fields if name not in RESULT_FIELDS and name not in STRUCTURAL_FIELDS]
+    if not fields or unknown:
+        invalid = ", ".join(unknown) if unknown else repr(spec)
+        raise OutputFormatError(f"无效的字段: {invalid}，可选: {', '.join(RESULT_FIELDS)}")
+    return fields
+
+
+def select_fields(result: dict[str, Any], fields: tuple[str, ...]) -> dict[str, Any]:
+    """按 fields 的顺序保留字段，并保留结果中已有的定位字段"""
+    selected = {name: result[name] for name in STRUCTURAL_FIELDS if name in result}
+    for name in fields:
+        if name in result:
+            selected[name] = result[name]
+    return selected
+
+
+def _pack_length(out: bytearray, length: int, fixed: int, fixed_limit: int, codes: tuple[int, int, int]) -> None:
+    if length < fixed_limit:
+        out.append(fixed | length)
+    elif codes[0] and length < 0x100:
+        out += bytes((codes[0], length))
+    elif length < 0x10000:
+        out.append(codes[1])
+        out += length.to_bytes(2, "big")
+    else:
+        out.append(codes[2])
+        out += length.to_bytes(4, "big")
+
+
+def _pack_into(out: bytearray, obj: Any) -> None:
+    if obj is None:
+        out.append(0xc0)
+    elif obj is True:
+        out.append(0xc3)
+    elif obj is False:
+        out.append(0xc2)
+    elif isinstance(obj, str):
+        data = obj.encode("utf-8", "surrogatepass")
+        _pack_length(out, len(data), 0xa0, 32, (0xd9, 0xda, 0xdb))
+        out += data
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -32 <= obj < 0:
+            out.append(obj & 0xff)
+        elif 0 <= obj < 1 << 64:
+            for code, size in ((0xcc, 1), (0xcd, 2), (0xce, 4), (0xcf, 8)):
+                if obj < 1 << (size * 8):
+                    out.append(code)
+                    out += obj.to_bytes(size, "big")
+                    break
+        elif -(1 << 63) <= obj < 0:
+            for code, size in ((0xd0, 1), (0xd1, 2), (0xd2, 4), (0xd3, 8)):
+                if obj >= -(1 << (size * 8 - 1)):
+                    out.append(code)
+                    out += obj.to_bytes(size, "big", signed=True)
+                    break
+        else:
+            # 超出 64 位的整数按十进制字符串输出
+            _pack_into(out, str(obj))
+    elif isinstance(obj, float):
+        out += _DOUBLE.pack(0xcb, obj)
+    elif isinstance(obj, dict):
+        _pack_length(out, len(obj), 0x80, 16, (0, 0xde, 0xdf))
+        for key, value in obj.items():
+            _pack_into(out, key if isinstance(key, str) else str(key))
+            _pack_into(out, value)
+    elif isinstance(obj, (list, tuple)):
+        _pack_length(out, len(obj), 0x90, 16, (0, 0xdc, 0xdd))
+        for item in obj:
+            _pack_into(out, item)
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        data = bytes(obj)
+        _pack_length(out, len(data), 0, 0, (0xc4, 0xc5, 0xc6))
+        out += data
+    else:
+        _pack_into(out, str(obj))
+
+
+def pack(obj: Any) -> bytes:
+    """把 JSON 兼容对象编码为 MessagePack"""
+    out = bytearray()
+    _pack_into(out, obj)
+    return bytes(out)
+
+
+def _unpack_at(data: bytes, pos: int) -> tuple[Any, int]:
+    code = data[pos]
+    pos += 1
+    if code < 0x80:
+        return code, pos
+    if code >= 0xe0:
+        return code - 0x100, pos
+    if 0xa0 <= code < 0xc0:
+        end = pos + (code & 0x1f)
+        return data[pos:end].decode("utf-8", "surrogatepass"), end
+    if 0x90 <= code < 0xa0:
+        return _unpack_array(data, pos, code & 0x0f)
+    if 0x80 <= code < 0x90:
+        return _unpack_map(data, pos, code & 0x0f)
+    if code == 0xc0:
+        return None, pos
+    if code == 0xc2:
+        return False, pos
+    if code == 0xc3:
+        return True, pos
+    if code == 0xcb:
+        return struct.unpack_from(">d", data, pos)[0], pos + 8
+    if code == 0xca:
+        return struct.unpack_from(">f", data, pos)[0], pos + 4
+    if 0xcc <= code <= 0xcf:
+        size = 1 << (code - 0xcc)
+        return int.from_bytes(data[pos:pos + size], "big"), pos + size
+    if 0xd0 <= code <= 0xd3:
+        size = 1 << (code - 0xd0)
+        return int.from_bytes(data[pos:pos + size], "big", signed=True), pos + size
+    if code in _LENGTH_SIZES:
+        size = _LENGTH_SIZES[code]
+        start = pos + size
+        end = start + int.from_bytes(data[pos:start], "big")
+        if code >= 0xd9:
+            return data[start:end].decode("utf-8", "surrogatepass"), end
+        return bytes(data[start:end]), end
+    if code in (0xdc, 0xdd):
+        size = 2 if code == 0xdc else 4
+        return _unpack_array(data, pos + size, int.from_bytes(data[pos:pos + size], "big"))
+    if code in (0xde, 0xdf):
+        size = 2 if code == 0xde else 4
+        return _unpack_map(data, pos + size, int.from_bytes(data[pos:pos + size], "big"))
+    raise ValueError(f"不支持的 MessagePack 类型 0x{code:02x}")
+
+
+def _unpack_array(data: bytes, pos: int, length: int) -> tuple[list[Any], int]:
+    items = []
+    for _ in range(length):
+        item, pos = _unpack_at(data, pos)
+        items.append(item)
+    return items, pos
+
+
+def _unpack_map(data: bytes, pos: int, length: int) -> tuple[dict[Any, Any], int]:
+    mapping = {}
+    for _ in range(length):
+        key, pos = _unpack_at(data, pos)
+        mapping[key], pos = _unpack_at(data, pos)
+    return mapping, pos
+
+
+def unpack_stream(data: bytes) -> list[Any]:
+    """解码拼接在一起的多个 MessagePack 对象（批量 / 扇出模式的输出）"""
+    objects = []
+    pos = 0
+    while pos < len(data):
+        obj, pos = _unpack_at(data, pos)
+        objects.append(obj)
+    return objects
+
+
+def unpack(data: bytes) -> Any:
+    """解码单个 MessagePack 对象"""
+    obj, end = _unpack_at(data, 0)
+    if end != len(data):
+        raise ValueError("MessagePack 数据末尾有多余字节")
+    return obj
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+调用管道：一条指令中用 | 连接多个调用，后一段的参数可以引用前一段的结果
+
+    search webSearchPrime search_query="MCP 协议" | read web webReader url=$.results[0].url
+
+- 只有两侧都是空白、不在引号或 JSON 花括号内、且后面紧跟"已知别名 命令"的 | 才分段，
+  其余 |（如 SQL 的 ||、查询文本中的竖线、"search AI | web" 中只跟别名的竖线）原样保留
+- 第二段起，引用以 $ 开头：$ 为前一段的结果值，$.key、$[0]、$["带 空格的键"] 逐级取值；
+  只替换整个参数值（命名参数的值、位置参数或整段参数），需要字面量 $ 开头的值时写 $$
+- 结果值取 server 返回的 structuredContent；没有时取文本内容，文本是 JSON 时先解码
+- 中间结果只在进程内传递，输出只包含最后一段的结果与各段的摘要（参数、耗时、是否命中缓存）
+"""
+
+from __future__ import annotations
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Callable
+
+REFERENCE = "$"
+ESCAPED_REFERENCE = "$$"
+POSITIONAL_KEY = "_args"
+
+
+class PipelineError(Exception):
+    """管道语法或引用错误"""
+    pass
+
+
+def split_stages(text: str, is_stage: Callable[[str], bool]) -> list[str] | None:
+    """
+    按管道符分段；is_stage 判断一段文本是否以已知别名和命令开头
+
+    不构成管道（没有可分段的 |）时返回 None。
+    """
+    cuts = []
+    quote = None
+    depth = 0
+    position = 0
+    length = len(text)
+    while position < length:
+        char = text[position]
+        if quote is not None:
+            if char == "\\" and quote == '"':
+                position += 1
+            elif char == quote:
+                quote = None
+        elif char in "\"'" and (position == 0 or text[position - 1].isspace() or text[position - 1] == "="):
+            # 只有位于词首或等号后的引号才开始引用，英文撇号不受影响
+            quote = char
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth = max(depth - 1, 0)
+        elif (
+            char == "|" and not depth and 0 < position < length - 1
+            and text[position - 1].isspace() and text[position + 1].isspace()
+        ):
+            cuts.append(position)
+        position += 1
+    if not cuts:
+        return None
+
+    stages = []
+    start = 0
+    for cut, end in zip(cuts, cuts[1:] + [length]):
+        if is_stage(text[cut + 1:end].strip()):
+            stages.append(text[start:cut].strip())
+            start = cut + 1
+    if not stages:
+        return None
+    stages.append(text[start:].strip())
+    return stages
+
+
+def _parse_path(reference: str) -> list[str | int]:
+    """把 $.a[0]["b c"] 解析为取值步骤"""
+    steps: list[str | int] = []
+    position = 1
+    length = len(reference)
+    while position < length:
+        char = reference[position]
+        if char == ".":
+            end = position + 1
+            while end < length and reference[end] not in ".[":
+                end += 1
+            if end == position + 1:
+                raise PipelineError(f"引用 {reference} 中 . 后缺少键名")
+            steps.append(reference[position + 1:end])
+            position = end
+        elif char == "[":
+            end = reference.find("]", position)
+            if end < 0:
+                raise PipelineError(f"引用 {reference} 缺少 ]")
+            inner = reference[position + 1:end].strip()
+            if len(inner) >= 2 and inner[0] == inner[-1] and inner[0] in "\"'":
+                steps.append(inner[1:-1])
+            else:
+                try:
+                    steps.append(int(inner))
+                except ValueError:
+                    raise PipelineError(f"引用 {reference} 中的下标必须是整数或带引号的键: [{inner}]")
+            position = end + 1
+        else:
+            raise PipelineError(f"无效的引用 {reference}：$ 后只能跟 .键名 或 [下标]")
+    return steps
+
+
+def resolve(reference: str, value: Any) -> Any:
+    """按引用路径从结果值中取值"""
+    current = value
+    for step in _parse_path(reference):
+        try:
+            if isinstance(step, int) and isinstance(current, list):
+                current = current[step]
+            elif isinstance(step, str) and isinstance(current, dict):
+                current = current[step]
+            else:
+                raise LookupError
+        except (LookupError, TypeError):
+            shown = f"[{step}]" if isinstance(step, int) else f".{step}"
+            raise PipelineError(f"引用 {reference} 无法解析：前一段的结果中没有 {shown}")
+    return current
+
+
+def _substitute_value(item: Any, value: Any) -> Any:
+    if not isinstance(item, str) or not item.startswith(REFERENCE):
+        return item
+    if item.startswith(ESCAPED_REFERENCE):
+        return item[1:]
+    return resolve(item, value)
+
+
+def substitute(stage: dict[str, Any], value: Any) -> dict[str, Any]:
+    """用前一段的结果值替换本段参数中的引用，返回新的解析结果"""
+    arguments = stage["arguments"]
+    if isinstance(arguments, dict):
+        # 只替换顶层的值与位置参数，JSON 参数内部嵌套的字符串原样保留
+        arguments = {
+            key: [_substitute_value(element, value) for element in item]
+            if key == POSITIONAL_KEY and isinstance(item, list) else _substitute_value(item, value)
+            for key, item in arguments.items()
+        }
+    else:
+        arguments = _substitute_value(arguments, value)
+        if not isinstance(arguments, (str, dict)):
+            arguments = "" if arguments is None else _text(arguments)
+    return {**stage, "arguments": arguments, "format": "json" if isinstance(arguments, dict) else "string"}
+
+
+def _text(value: Any) -> str:
+    import json
+
+    return json.dumps(value, ensure_ascii=False)
+
+
+def stage_value(response: Any) -> Any:
+    """后一段引用的结果值（见模块说明）"""
+    if not isinstance(response, dict):
+        return response
+    if "structuredContent" in response:
+        return response["structuredContent"]
+    content = response.get("content")
+    if not isinstance(content, list):
+        return response
+    texts = [item.get("text", "") for item in content if isinstance(item, dict) and item.get("type") == "text"]
+    if not texts:
+        return response
+    text = "\n".join(texts)
+    if text.lstrip()[:1] in ("{", "["):
+        import json
+
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+    return text
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+执行模式的结果缓存：只读 server 的重复调用直接返回缓存结果
+
+- 缓存键为规范化的 (server, command, arguments)，参数字典按键排序后取摘要
+- 每个 server 单独设置 TTL，0 表示不缓存；默认只缓存只读的搜索、网页读取、文档与 PDF server
+- 结果以 zlib 压缩的 JSON 存放在 SQLite 中，总大小超过上限时按最近使用时间淘汰（LRU）；
+  总大小由触发器维护在单行的 totals 表中，写入时不扫描结果表
+- 可按别名关闭缓存；isError 结果不缓存
+- 可缓存即视为幂等：在途请求合并（coalesce）使用同一判断
+
+配置写在别名配置文件的 cache 表中（合并顺序同别名配置）：
+    {"cache": {"ttl": {"web-search-prime": 600}, "max_bytes": 67108864, "disabled_aliases": ["search"]}}
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+from alias_config import AliasConfigError, cache_dir, iter_config_tables
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Callable
+
+CACHE_KEY = "cache"
+DISABLE_ENV = "MCP_FAST_CALLER_NO_CACHE"
+DATABASE_NAME = "results.sqlite3"
+# 只读 server 的默认 TTL（秒）；未列出的 server 可能有副作用，默认不缓存
+DEFAULT_TTLS = {
+    "web-search-prime": 10 * 60,
+    "web-reader": 60 * 60,
+    "context7": 24 * 60 * 60,
+    "pdf-reader": 24 * 60 * 60,
+}
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# 命中时最近使用时间的更新粒度：间隔内的重复命中不再写库，LRU 顺序精确到该粒度
+TOUCH_INTERVAL = 60.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key BLOB PRIMARY KEY,
+    server TEXT NOT NULL,
+    expires REAL NOT NULL,
+    last_used REAL NOT NULL,
+    size INTEGER NOT NULL,
+    value BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    size INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals (id, size)
+    SELECT 0, COALESCE(SUM(size), 0) FROM results WHERE NOT EXISTS (SELECT 1 FROM totals);
+CREATE TRIGGER IF NOT EXISTS results_insert AFTER INSERT ON results
+    BEGIN UPDATE totals SET size = size + NEW.size WHERE id = 0; END;
+CREATE TRIGGER IF NOT EXISTS results_update AFTER UPDATE OF size ON results
+    BEGIN UPDATE totals SET size = size + NEW.size - OLD.size WHERE id = 0; END;
+CREATE TRIGGER IF NOT EXISTS results_delete AFTER DELETE ON results
+    BEGIN UPDATE totals SET size = size - OLD.size WHERE id = 0; END;
+"""
+
+
+class ResultCacheError(Exception):
+    """结果缓存配置错误"""
+    pass
+
+
+def load_cache_settings() -> dict[str, Any]:
+    """合并各配置文件中的 cache 表，返回 {"ttl", "max_bytes", "disabled_aliases"}"""
+    ttls = dict(DEFAULT_TTLS)
+    max_bytes = DEFAULT_MAX_BYTES
+    disabled: set[str] = set()
+    try:
+        tables = list(iter_config_tables(CACHE_KEY))
+    except AliasConfigError as e:
+        raise ResultCacheError(str(e))
+    for path, table in tables:
+        for server, ttl in (table.get("ttl") or {}).items():
+            if isinstance(ttl, bool) or not isinstance(ttl, (int, float)) or ttl < 0:
+                raise ResultCacheError(f"配置文件 {path} 中 server '{server}' 的 TTL 必须是非负秒数")
+            ttls[server] = ttl
+        if "max_bytes" in table:
+            if isinstance(table["max_bytes"], bool) or not isinstance(table["max_bytes"], int) or table["max_bytes"] <= 0:
+                raise ResultCacheError(f"配置文件 {path} 中的 max_bytes 必须是正整数")
+            max_bytes = table["max_bytes"]
+        disabled.update(alias.casefold() for alias in table.get("disabled_aliases") or [])
+    return {"ttl": ttls, "max_bytes": max_bytes, "disabled_aliases": disabled}
+
+
+def cacheable(settings: dict[str, Any], alias: str, server: str) -> float:
+    """返回调用的 TTL；0 表示不可缓存（server 可能有副作用或别名关闭了缓存）"""
+    if alias.casefold() in settings["disabled_aliases"]:
+        return 0
+    return settings["ttl"].get(server, 0)
+
+
+def cache_key(server: str, command: str, arguments: Any) -> bytes:
+    """规范化调用并取摘要：参数字典键顺序不同的调用共享同一缓存项"""
+    import hashlib
+    import json
+
+    canonical = json.dumps([server, command, arguments], ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).digest()
+
+
+class ResultCache:
+    """SQLite 结果缓存；数据库在第一次遇到可缓存的调用时才打开"""
+
+    def __init__(
+        self,
+        path: str | None = None,
+        settings: dict[str, Any] | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = path or os.path.join(cache_dir(), DATABASE_NAME)
+        self.settings = settings if settings is not None else load_cache_settings()
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self._connection = None
+        self._unavailable = False
+
+    def ttl(self, alias: str, server: str) -> float:
+        return cacheable(self.settings, alias, server)
+
+    def _connect(self):
+        if self._connection is None and not self._unavailable:
+            import sqlite3
+
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                connection = sqlite3.connect(self.path, timeout=1.0, isolation_level=None, check_same_thread=False)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                connection.executescript(SCHEMA)
+            except (OSError, sqlite3.Error):
+                # 缓存只是加速手段：目录不可写或数据库损坏时直接调用 server
+                self._unavailable = True
+                return None
+            self._connection = connection
+        return self._connection
+
+    def get(self, alias: str, server: str, command: str, arguments: Any) -> Any:
+        """返回未过期的缓存结果，未命中或不可缓存时返回 None"""
+        if not self.ttl(alias, server):
+            return None
+        import sqlite3
+
+        key = cache_key(server, command, arguments)
+        now = self.clock()
+        with self.lock:
+            connection = self._connect()
+            if connection is None:
+                return None
+            try:
+                row = connection.execute("SELECT expires, last_used, value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[0] <= now:
+                    connection.execute("DELETE FROM results WHERE key = ?", (key,))
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                if now - row[1] >= TOUCH_INTERVAL:
+                    connection.execute("UPDATE results SET last_used = ? WHERE key = ?", (now, key))
+            except sqlite3.Error:
+                return None
+        import json
+        import zlib
+
+        self.hits += 1
+        return json.loads(zlib.decompress(row[2]))
+
+    def put(self, alias: str, server: str, command: str, arguments: Any, result: Any) -> bool:
+        """写入调用结果；不可缓存的调用与 isError 结果直接跳过"""
+        ttl = self.ttl(alias, server)
+        if not ttl or (isinstance(result, dict) and result.get("isError")):
+            return False
+        import json
+        import sqlite3
+        import zlib
+
+        value = zlib.compress(json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        if len(value) > self.settings["max_bytes"]:
+            return False
+        now = self.clock()
+        with self.lock:
+            connection = self._connect()
+            if connection is None:
+                return False
+            try:
+                # UPSERT 而不是 INSERT OR REPLACE：REPLACE 隐式删除旧行时不触发删除触发器，totals 会失准
+                connection.execute(
+                    "INSERT INTO results (key, server, expires, last_used, size, value) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET server = excluded.server, expires = excluded.expires, "
+                    "last_used = excluded.last_used, size = excluded.size, value = excluded.value",
+                    (cache_key(server, command, arguments), server, now + ttl, now, len(value), value),
+                )
+                self._evict(connection, now)
+            except sqlite3.Error:
+                return False
+        return True
+
+    def _evict(self, connection: Any, now: float) -> None:
+        """总大小超过上限时先删除过期项，仍超过时按最近使用时间从旧到新淘汰；未超过时只读一行 totals"""
+        if self._excess(connection) <= 0:
+            return
+        connection.execute("DELETE FROM results WHERE expires <= ?", (now,))
+        excess = self._excess(connection)
+        if excess <= 0:
+            return
+        victims = []
+        for key, size in connection.execute("SELECT key, size FROM results ORDER BY last_used"):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        connection.executemany("DELETE FROM results WHERE key = ?", victims)
+
+    def _excess(self, connection: Any) -> int:
+        return connection.execute("SELECT size FROM totals WHERE id = 0").fetchone()[0] - self.settings["max_bytes"]
+
+    def clear(self) -> None:
+        with self.lock:
+            connection = self._connect()
+            if connection is not None:
+                connection.execute("DELETE FROM results")
+
+    def close(self) -> None:
+        with self.lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+流式输出：把 tools/call 响应中的 result 原样逐块转发，不在内存中组装完整结果
+
+pdf-reader、web-reader 这类 server 可能返回数 MB 的结果。缓冲模式要读完整条 JSON-RPC 消息、
+解码为对象，再重新序列化输出，峰值内存是结果的数倍，首字节要等到整个结果到达之后。
+流式模式在读取 server 输出的同时扫描 JSON 结构：顶层 "result" 的值交给输出端，
+其余部分（jsonrpc、id、error 等，通常只有几十字节）留下来解码。
+
+输出为逐行 JSON 的分块帧（NDJSON）：
+
+    {"server": ..., "command": ..., "arguments": ..., "stream": true}   解析结果（字段选择同普通输出）
+    {"chunk": 0, "data": "..."}                                          result 的 JSON 文本片段
+    ...
+    {"end": true, "chunks": N, "bytes": B, "truncated": false}           结束帧
+
+把各帧的 data 依次拼接即为完整的 CallToolResult JSON 文本。设置上限时，超出部分不再输出，
+结束帧为 "truncated": true 并给出 "total_bytes"；调用失败时最后一帧为 {"error": ...}。
+
+背压：每帧写出后立即 flush，下游读得慢时写入阻塞，阻塞期间不再读取 server 输出，
+server 随之在管道写满后阻塞；内存只占一个读取块与一帧。阻塞的时间不计入调用超时。
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Callable
+
+# 字符串内容（含转义序列）一次匹配到结束引号、换行或块末尾；字符串外只关注结构字符
+_STRING_BODY = re.compile(rb'(?:[^"\\\n]+|\\.)*')
+_STRUCTURE_SPECIAL = re.compile(rb'["{}\[\],:\n]')
+_WHITESPACE = b" \t\r"
+
+
+class ResultStreamError(Exception):
+    """server 输出的消息无法按 JSON 结构扫描"""
+    pass
+
+
+class ResponseScanner:
+    """
+    逐块扫描一行 JSON-RPC 消息
+
+    顶层 "result" 的值原样交给 on_result（不解码）；其余字节保存在 envelope 中，
+    result 的值以 null 占位，消息结束后可直接解码。顺带识别 result 对象中的 "isError": true。
+    不以 { 开头的行视为 server 的噪声输出，整行跳过。
+    """
+
+    def __init__(self, on_result: Callable[[bytes], None]) -> None:
+        self.on_result = on_result
+        self.reset()
+
+    def reset(self) -> None:
+        self.envelope = bytearray()
+        self.result_bytes = 0
+        self.has_result = False
+        self.is_error = False
+        # 每层容器：[是否为对象, 是否期待键, 最近的键]
+        self._stack: list[list[Any]] = []
+        self._line_start = True
+        self._noise = False
+        self._in_string = False
+        self._escape = False
+        self._key: bytearray | None = None
+        self._forwarding = False
+        self._forwarded = bytearray()
+        self._scalar: bytearray | None = None
+
+    def message(self) -> dict[str, Any] | None:
+        """一行结束后解码 envelope；空行、噪声行或非对象返回 None"""
+        if not self.envelope:
+            return None
+        try:
+            message = json.loads(self.envelope)
+        except ValueError:
+            if self.has_result:
+                raise ResultStreamError("server 输出的消息不是有效的 JSON")
+            return None
+        return message if isinstance(message, dict) else None
+
+    def _emit(self, data: bytes) -> None:
+        if not data:
+            return
+        if self._scalar is not None:
+            self._scalar += data
+        if self._forwarding:
+            if not self.result_bytes:
+                # 冒号后的空白不属于 result 的值
+                data = data.lstrip(_WHITESPACE)
+                if not data:
+                    return
+            self.result_bytes += len(data)
+            self._forwarded += data
+        else:
+            self.envelope += data
+
+    def feed(self, data: bytes) -> int | None:
+        """
+        扫描一块数据；一行结束时返回该行之后的位置（剩余字节属于下一条消息），否则返回 None
+
+        本块中属于 result 的字节合并后调用一次 on_result。
+        """
+        try:
+            return self._scan(data)
+        finally:
+            if self._forwarded:
+                forwarded = bytes(self._forwarded)
+                self._forwarded.clear()
+                self.on_result(forwarded)
+
+    def _scan(self, data: bytes) -> int | None:
+        pos = 0
+        size = len(data)
+        while pos < size:
+            if self._line_start:
+                while pos < size and data[pos] in _WHITESPACE:
+                    pos += 1
+                if pos == size:
+                    return None
+                self._line_start = False
+                self._noise = data[pos] not in b"{\n"
+            if self._noise:
+                newline = data.find(b"\n", pos)
+                return None if newline < 0 else newline + 1
+            if self._escape:
+                # 上一块以反斜杠结尾：本块第一个字节属于该转义序列
+                self._escape = False
+                self._string_bytes(data[pos:pos + 1])
+                pos += 1
+                continue
+            if self._in_string:
+                end = _STRING_BODY.match(data, pos).end()
+                self._string_bytes(data[pos:end])
+                if end == size:
+                    return None
+                char = data[end]
+                if char == 0x5c:  # 块末尾的反斜杠
+                    self._string_bytes(b"\\")
+                    self._escape = True
+                elif char == 0x22:
+                    self._emit(b'"')
+                    self._in_string = False
+                    if self._key is not None:
+                        self._stack[-1][2] = bytes(self._key)
+                        self._key = None
+                else:
+                    raise ResultStreamError("server 输出的消息在字符串内换行")
+                pos = end + 1
+                continue
+            match = _STRUCTURE_SPECIAL.search(data, pos)
+            if match is None:
+                self._emit(data[pos:])
+                return None
+            end = match.start()
+            if data[end] == 0x0a:  # 换行总是结束一条消息（stdio 传输中消息不含换行）
+                self._emit(data[pos:end])
+                if self._stack:
+                    raise ResultStreamError("server 输出的消息在行内未结束")
+                return end + 1
+            self._structure(data, pos, end, data[end])
+            pos = end + 1
+        return None
+
+    def _string_bytes(self, data: bytes) -> None:
+        if self._key is not None:
+            self._key += data
+        self._emit(data)
+
+    def _structure(self, data: bytes, pos: int, end: int, char: int) -> None:
+        """处理字符串外的结构字符 data[end]；data[pos:end] 是它之前的普通字节"""
+        stack = self._stack
+        depth = len(stack)
+        self._emit(data[pos:end])
+        if char in b",}":
+            if depth == 2 and self._scalar is not None:
+                # result 对象中 isError 的值到此结束
+                self.is_error = bytes(self._scalar).strip() == b"true"
+                self._scalar = None
+            if depth == 1 and self._forwarding:
+                # 顶层 result 的值到此结束
+                self._forwarding = False
+        self._emit(data[end:end + 1])
+
+        if char == 0x22:  # 引号
+            self._in_string = True
+            if depth and stack[-1][0] and stack[-1][1] and (depth == 1 or (depth == 2 and self._forwarding)):
+                self._key = bytearray()
+        elif char in b"{[":
+            stack.append([char == 0x7b, char == 0x7b, None])
+        elif char in b"}]":
+            if not stack:
+                raise ResultStreamError("server 输出的消息括号不匹配")
+            stack.pop()
+        elif char == 0x3a and depth and stack[-1][0]:  # 冒号
+            stack[-1][1] = False
+            key = stack[-1][2]
+            if depth == 1 and key == b"result":
+                self.envelope += b"null"
+                self.has_result = True
+                self._forwarding = True
+            elif depth == 2 and self._forwarding and key == b"isError":
+                self._scalar = bytearray()
+        elif char == 0x2c and depth and stack[-1][0]:  # 逗号
+            stack[-1][1] = True
+
+
+class FrameWriter:
+    """
+    把 result 的 JSON 文本写成分块帧，每帧写出后 flush（背压见模块说明）
+
+    作为 ResponseScanner 的 on_result 使用。max_bytes 为 None 时不设上限；
+    超出上限的字节只计数不输出，server 的剩余输出照常读完，会话可以继续复用。
+    """
+
+    def __init__(self, out: Any, max_bytes: int | None = None) -> None:
+        self.out = out
+        self.max_bytes = max_bytes
+        self.chunks = 0
+        self.sent = 0
+        self.truncated = False
+        self._decoder = codecs.getincrementaldecoder("utf-8")("replace")
+
+    def _write(self, frame: dict[str, Any]) -> None:
+        self.out.write(json.dumps(frame, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.out.flush()
+
+    def __call__(self, data: bytes) -> None:
+        if self.max_bytes is not None and self.sent + len(data) > self.max_bytes:
+            data = data[:self.max_bytes - self.sent]
+            self.truncated = True
+        if not data:
+            return
+        self.sent += len(data)
+        # 块边界可能落在多字节字符中间，不完整的字节留到下一块
+        text = self._decoder.decode(data)
+        if text:
+            self._write({"chunk": self.chunks, "data": text})
+            self.chunks += 1
+
+    def finish(self, total_bytes: int, is_error: bool = False) -> None:
+        """写出结束帧；total_bytes 为 server 返回的 result 总字节数"""
+        if self.truncated:
+            # 截断处不完整的字符不输出
+            self.sent -= len(self._decoder.getstate()[0])
+        else:
+            tail = self._decoder.decode(b"", final=True)
+            if tail:
+                self._write({"chunk": self.chunks, "data": tail})
+                self.chunks += 1
+        frame: dict[str, Any] = {"end": True, "chunks": self.chunks, "bytes": self.sent, "truncated": self.truncated}
+        if self.truncated:
+            frame["total_bytes"] = total_bytes
+        if is_error:
+            frame["isError"] = True
+        self._write(frame)
+
+    def error(self, message: str) -> None:
+        """调用中途失败：写出错误帧，此前输出的分块不完整"""
+        self._write({"error": message})
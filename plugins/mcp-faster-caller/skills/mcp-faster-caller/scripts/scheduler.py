@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+扇出执行的按 server 调度：令牌桶限速 + AIMD 自适应并发 + 排队统计
+
+- 每个 server（MCP_MAP 中的 server 值）一个队列，先到先得
+- 令牌桶：rate 为每秒调用数，burst 为允许的突发数；未配置 rate 时不限速
+- 并发上限从 max_concurrency 开始，按观测结果自适应（AIMD）：
+  调用失败（执行错误、超时），或耗时超过 latency_tolerance × 基准延迟时乘性减半，
+  其余每次成功加 1/上限（约每轮加 1），范围为 [min_concurrency, max_concurrency]；
+  基准延迟为最近 BASELINE_WINDOW 次成功耗时的低分位数（不低于 MIN_BASELINE），攒够 MIN_SAMPLES 次后才按延迟判断，
+  个别极快的结果不会把基准锁死，server 整体变慢后也能重新适应
+- 来自结果缓存或合并了在途调用的结果不反映 server 负载，调用方应以 discard 归还名额
+- 统计：当前上限、进行中、排队深度（当前 / 最大）、排队总时长、限速等待次数、减半次数
+
+配置写在别名配置文件的 scheduler 表中（合并顺序同别名配置）；未设置 max_concurrency 时
+取 concurrency 表（见 fanout）中的值：
+    {"scheduler": {"mysql": {"rate": 5, "burst": 2, "max_concurrency": 2, "latency_tolerance": 3}}}
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import time
+
+from alias_config import AliasConfigError, iter_config_tables
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Callable
+
+SCHEDULER_KEY = "scheduler"
+DEFAULT_TOLERANCE = 2.5
+DECREASE_FACTOR = 0.5
+# 基准延迟：最近 BASELINE_WINDOW 次成功耗时的 BASELINE_PERCENTILE 分位数，至少 MIN_SAMPLES 次后才生效
+BASELINE_WINDOW = 20
+BASELINE_PERCENTILE = 0.2
+MIN_SAMPLES = 5
+# 基准延迟下限（秒）：比这更快的耗时多半是本地开销，不代表 server 的正常延迟
+MIN_BASELINE = 0.001
+# 配置项 -> (类型, 最小值, 是否允许等于最小值)
+SETTINGS = {
+    "rate": (float, 0, False),
+    "burst": (int, 1, True),
+    "max_concurrency": (int, 1, True),
+    "min_concurrency": (int, 1, True),
+    "latency_tolerance": (float, 1, False),
+}
+
+
+class SchedulerError(Exception):
+    """调度配置错误"""
+    pass
+
+
+def _check_setting(path: str, server: str, name: str, value: Any) -> float | int:
+    if name not in SETTINGS:
+        raise SchedulerError(f"配置文件 {path} 中 server '{server}' 的调度项未知: {name}，可选: {', '.join(SETTINGS)}")
+    kind, minimum, inclusive = SETTINGS[name]
+    valid = not isinstance(value, bool) and isinstance(value, (int, float) if kind is float else int)
+    if not valid or value < minimum or (value == minimum and not inclusive):
+        relation = "不小于" if inclusive else "大于"
+        noun = "数" if kind is float else "整数"
+        raise SchedulerError(f"配置文件 {path} 中 server '{server}' 的 {name} 必须是{relation} {minimum} 的{noun}")
+    return value
+
+
+def load_scheduler_settings() -> dict[str, dict[str, Any]]:
+    """合并各配置文件中的 scheduler 表：server -> 调度配置"""
+    settings: dict[str, dict[str, Any]] = {}
+    try:
+        for path, table in iter_config_tables(SCHEDULER_KEY):
+            for server, entry in table.items():
+                if not isinstance(entry, dict):
+                    raise SchedulerError(f"配置文件 {path} 中 server '{server}' 的调度配置必须是表")
+                for name, value in entry.items():
+                    settings.setdefault(server, {})[name] = _check_setting(path, server, name, value)
+    except AliasConfigError as e:
+        raise SchedulerError(str(e))
+    return settings
+
+
+class TokenBucket:
+    """令牌桶；reserve 取走一个令牌，返回需要等待的秒数（令牌不足时预支）"""
+
+    def __init__(self, rate: float, burst: int, now: float) -> None:
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def reserve(self, now: float) -> float:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class AIMDLimit:
+    """按延迟与错误调整的并发上限"""
+
+    def __init__(self, maximum: int, minimum: int = 1, tolerance: float = DEFAULT_TOLERANCE) -> None:
+        self.maximum = maximum
+        self.minimum = min(minimum, maximum)
+        self.tolerance = tolerance
+        self.limit = float(maximum)
+        self.baseline: float | None = None
+        self.samples: collections.deque[float] = collections.deque(maxlen=BASELINE_WINDOW)
+        self.last_decrease = float("-inf")
+        self.decreases = 0
+
+    @property
+    def allowed(self) -> int:
+        return max(self.minimum, int(self.limit))
+
+    def observe(self, latency: float, failed: bool, now: float) -> None:
+        congested = failed or (self.baseline is not None and latency > self.tolerance * self.baseline)
+        if not failed:
+            self.samples.append(latency)
+            if len(self.samples) >= MIN_SAMPLES:
+                ordered = sorted(self.samples)
+                self.baseline = max(MIN_BASELINE, ordered[int(len(ordered) * BASELINE_PERCENTILE)])
+        if not congested:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        elif now - self.last_decrease >= latency:
+            # 减半之前已发出的调用随后也会报告拥塞，一个延迟周期内只减一次
+            self.limit = max(self.minimum, self.limit * DECREASE_FACTOR)
+            self.last_decrease = now
+            self.decreases += 1
+
+
+class ServerQueue:
+    """一个 server 的排队、限速与并发控制；只在事件循环线程中使用"""
+
+    def __init__(
+        self,
+        server: str,
+        limit: AIMDLimit,
+        bucket: TokenBucket | None,
+        clock: Callable[[], float],
+        observe: Callable[[str, float], None] | None = None,
+    ) -> None:
+        self.server = server
+        self.limit = limit
+        self.bucket = bucket
+        self.clock = clock
+        self.observe = observe
+        self.waiters: collections.deque[asyncio.Future] = collections.deque()
+        self.in_flight = 0
+        self.requests = 0
+        self.queued = 0
+        self.max_queue_depth = 0
+        self.queue_seconds = 0.0
+        self.throttled = 0
+        self.errors = 0
+
+    def _wake(self) -> None:
+        while self.waiters and self.in_flight < self.limit.allowed:
+            waiter = self.waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def _give_back(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    async def acquire(self) -> float:
+        """等待并发名额与令牌，返回调用开始的时钟值"""
+        enqueued = self.clock()
+        self.requests += 1
+        if self.waiters or self.in_flight >= self.limit.allowed:
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters.append(waiter)
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, len(self.waiters))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # 名额已经交给本调用，归还给下一个排队者
+                    self._give_back()
+                else:
+                    try:
+                        self.waiters.remove(waiter)
+                    except ValueError:
+                        pass
+                raise
+        else:
+            self.in_flight += 1
+        try:
+            if self.bucket is not None:
+                delay = self.bucket.reserve(self.clock())
+                if delay > 0:
+                    self.throttled += 1
+                    await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self._give_back()
+            raise
+        start = self.clock()
+        waited = start - enqueued
+        self.queue_seconds += waited
+        if self.observe is not None:
+            self.observe(self.server, waited)
+        return start
+
+    def release(self, start: float, failed: bool) -> None:
+        now = self.clock()
+        if failed:
+            self.errors += 1
+        self.limit.observe(now - start, failed, now)
+        self._give_back()
+
+    def discard(self) -> None:
+        """归还名额但不计入观测（调用在本地失败、被取消，或结果来自缓存 / 在途合并）"""
+        self._give_back()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "limit": round(self.limit.limit, 3),
+            "in_flight": self.in_flight,
+            "queue_depth": len(self.waiters),
+            "max_queue_depth": self.max_queue_depth,
+            "requests": self.requests,
+            "queued": self.queued,
+            "queue_seconds": round(self.queue_seconds, 6),
+            "throttled": self.throttled,
+            "errors": self.errors,
+            "decreases": self.limit.decreases,
+        }
+
+
+class Scheduler:
+    """
+    按 server 创建队列
+
+    Args:
+        settings: server -> 调度配置（见 load_scheduler_settings）
+        max_concurrency: 未配置 max_concurrency 的 server 的并发上限
+        limits: server -> 并发上限（concurrency 表），优先于 max_concurrency 参数
+        observe: 每次调用开始时以 (server, 排队秒数) 调用，用于记录指标
+    """
+
+    def __init__(
+        self,
+        settings: dict[str, dict[str, Any]] | None = None,
+        max_concurrency: int = 4,
+        limits: dict[str, int] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        observe: Callable[[str, float], None] | None = None,
+    ) -> None:
+        self.settings = settings or {}
+        self.max_concurrency = max_concurrency
+        self.limits = limits or {}
+        self.clock = clock
+        self.observe = observe
+        self.queues: dict[str, ServerQueue] = {}
+
+    def queue(self, server: str) -> ServerQueue:
+        queue = self.queues.get(server)
+        if queue is None:
+            entry = self.settings.get(server, {})
+            limit = AIMDLimit(
+                entry.get("max_concurrency", self.limits.get(server, self.max_concurrency)),
+                entry.get("min_concurrency", 1),
+                entry.get("latency_tolerance", DEFAULT_TOLERANCE),
+            )
+            bucket = None
+            if "rate" in entry:
+                bucket = TokenBucket(entry["rate"], entry.get("burst", 1), self.clock())
+            queue = self.queues[server] = ServerQueue(server, limit, bucket, self.clock, self.observe)
+        return queue
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {server: queue.stats() for server, queue in sorted(self.queues.items())}
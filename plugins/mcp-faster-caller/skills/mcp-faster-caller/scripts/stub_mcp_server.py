@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+本地替身 MCP server（stdio 传输，逐行 JSON-RPC 2.0）
+
+用于测试和基准执行模式，不依赖任何真实服务。提供的工具：
+- echo: 原样返回参数，并附带进程号与本进程已处理的调用次数
+- sleep: 等待 seconds 秒后返回
+- fail: 返回 isError=true 的工具结果
+- crash: 立即退出进程（模拟 server 崩溃）
+- document: 返回 size 字节（默认 1 MiB）的文本，含引号、换行与中文，模拟 pdf-reader / web-reader 的大结果
+- work: 模拟容量有限的后端，等待 seconds 秒后返回；可注入延迟与失败：
+  --load-dir 指定的目录记录所有会话进程进行中的 work 调用，进行中的调用数超过 --capacity 时
+  耗时按超出倍数增长并返回 JSON-RPC 错误（过载）；--failure-rate 按比例随机返回错误
+
+用法: python3 stub_mcp_server.py [--name stub] [--startup-delay 0.0]
+                                 [--capacity 0] [--load-dir DIR] [--failure-rate 0.0] [--seed N]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+# 过载与注入失败的 JSON-RPC 错误码（实现自定义的 server 错误范围）
+OVERLOADED = -32000
+
+PROTOCOL_VERSION = "2024-11-05"
+
+TOOLS = [
+    {
+        "name": "echo",
+        "description": "Return the arguments unchanged.",
+        "inputSchema": {"type": "object", "additionalProperties": True},
+    },
+    {
+        "name": "sleep",
+        "description": "Sleep for the given number of seconds.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"seconds": {"type": "number"}},
+            "required": ["seconds"],
+        },
+    },
+    {
+        "name": "fail",
+        "description": "Return a tool error.",
+        "inputSchema": {"type": "object", "properties": {"message": {"type": "string"}}},
+    },
+    {
+        "name": "work",
+        "description": "Simulate a capacity-limited backend call.",
+        "inputSchema": {"type": "object", "properties": {"seconds": {"type": "number"}}},
+    },
+    {
+        "name": "document",
+        "description": "Return a large text document.",
+        "inputSchema": {"type": "object", "properties": {"size": {"type": "integer"}}},
+    },
+    {
+        "name": "crash",
+        "description": "Exit the server process immediately.",
+        "inputSchema": {"type": "object"},
+    },
+]
+
+
+class Overloaded(Exception):
+    pass
+
+
+def document(size: int) -> str:
+    """约 size 字节（UTF-8）的文本"""
+    line = '第 {:06d} 行: "quoted" text\tand more\n'
+    lines = []
+    total = 0
+    index = 0
+    while total < size:
+        text = line.format(index)
+        lines.append(text)
+        total += len(text.encode("utf-8"))
+        index += 1
+    return "".join(lines)
+
+
+class StubServer:
+    def __init__(
+        self,
+        name: str,
+        capacity: int = 0,
+        load_dir: str | None = None,
+        failure_rate: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        self.name = name
+        self.calls = 0
+        self.capacity = capacity
+        self.load_dir = load_dir
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+
+    def work(self, seconds: float) -> dict:
+        marker = None
+        in_flight = 1
+        if self.load_dir is not None:
+            marker = os.path.join(self.load_dir, f"{os.getpid()}-{self.calls}")
+            open(marker, "w").close()
+            in_flight = len(os.listdir(self.load_dir))
+        try:
+            if self.capacity and in_flight > self.capacity:
+                time.sleep(seconds * in_flight / self.capacity)
+                raise Overloaded(f"Server overloaded: {in_flight} calls in flight, capacity {self.capacity}")
+            time.sleep(seconds)
+            if self.random.random() < self.failure_rate:
+                raise Overloaded("Injected failure")
+        finally:
+            if marker is not None:
+                os.unlink(marker)
+        return {"content": [{"type": "text", "text": "done"}], "structuredContent": {"in_flight": in_flight}}
+
+    def call_tool(self, name: str, arguments: dict) -> dict:
+        self.calls += 1
+        if name == "echo":
+            payload = {"arguments": arguments, "pid": os.getpid(), "calls": self.calls}
+            return {
+                "content": [{"type": "text", "text": json.dumps(payload, ensure_ascii=False)}],
+                "structuredContent": payload,
+            }
+        if name == "sleep":
+            time.sleep(float(arguments.get("seconds", 0)))
+            return {"content": [{"type": "text", "text": "done"}]}
+        if name == "fail":
+            return {"content": [{"type": "text", "text": arguments.get("message", "failed")}], "isError": True}
+        if name == "work":
+            return self.work(float(arguments.get("seconds", 0)))
+        if name == "document":
+            return {"content": [{"type": "text", "text": document(int(arguments.get("size", 1 << 20)))}]}
+        if name == "crash":
+            os._exit(3)
+        raise LookupError(f"Unknown tool: {name}")
+
+    def handle(self, message: dict) -> dict | None:
+        method = message.get("method")
+        if "id" not in message:
+            # 通知（如 notifications/initialized）无需应答
+            return None
+        try:
+            if method == "initialize":
+                result = {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {"tools": {}},
+                    "serverInfo": {"name": self.name, "version": "1.0"},
+                }
+            elif method == "ping":
+                result = {}
+            elif method == "tools/list":
+                result = {"tools": TOOLS}
+            elif method == "tools/call":
+                params = message.get("params") or {}
+                result = self.call_tool(params.get("name"), params.get("arguments") or {})
+            else:
+                return {"jsonrpc": "2.0", "id": message["id"], "error": {"code": -32601, "message": f"Method not found: {method}"}}
+        except LookupError as e:
+            return {"jsonrpc": "2.0", "id": message["id"], "error": {"code": -32602, "message": str(e)}}
+        except Overloaded as e:
+            return {"jsonrpc": "2.0", "id": message["id"], "error": {"code": OVERLOADED, "message": str(e)}}
+        return {"jsonrpc": "2.0", "id": message["id"], "result": result}
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Local stand-in MCP server over stdio.")
+    parser.add_argument("--name", default="stub", help="serverInfo 中的名称")
+    parser.add_argument("--startup-delay", type=float, default=0.0, help="模拟冷启动耗时（秒）")
+    parser.add_argument("--capacity", type=int, default=0, help="work 的并发容量（需配合 --load-dir，0 为不限）")
+    parser.add_argument("--load-dir", help="记录各会话进程进行中的 work 调用的共享目录")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="work 随机返回错误的比例")
+    parser.add_argument("--seed", type=int, help="随机失败的种子")
+    args = parser.parse_args(argv)
+
+    time.sleep(args.startup_delay)
+    server = StubServer(args.name, args.capacity, args.load_dir, args.failure_rate, args.seed)
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+        try:
+            message = json.loads(line)
+        except ValueError:
+            response = {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}}
+        else:
+            response = server.handle(message)
+        if response is not None:
+            sys.stdout.write(json.dumps(response, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+工具 schema 缓存：在本地校验命令与参数，拼写错误无需一次 server 往返
+
+每个 server 的 tools/list 结果编译为紧凑索引，以 marshal 缓存到
+~/.cache/mcp-faster-caller/tools/<server>.marshal；超过 TTL（默认 1 天，
+MCP_FAST_CALLER_SCHEMA_TTL 秒）视为过期。存在未过期的缓存时：
+- 命令不在工具列表中：拒绝并给出最接近的命令
+- 字符串参数按 inputSchema 的类型转换（integer/number/boolean/array/object）
+- 位置参数依次填入未提供的必填参数，其次是其余参数；填不下的位置参数直接拒绝，不会以自造的键发给 server
+- 缺少必填参数、或向不接受额外参数的工具传入未知参数：拒绝
+"""
+
+from __future__ import annotations
+
+# 执行前的校验才会加载本模块，模块级仍只导入 os，其余按需导入
+
+import os
+
+from alias_config import cache_dir
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any
+
+    # 工具名 -> (参数名 -> 允许的类型, 必填参数, 参数声明顺序, 是否拒绝额外参数)
+    ToolIndex = dict[str, tuple[dict[str, tuple[str, ...]], tuple[str, ...], tuple[str, ...], bool]]
+
+TTL_ENV = "MCP_FAST_CALLER_SCHEMA_TTL"
+DEFAULT_TTL = 24 * 60 * 60
+SCHEMA_FORMAT = 1
+POSITIONAL_KEY = "_args"
+_TRUE = frozenset({"true", "1", "yes", "on"})
+_FALSE = frozenset({"false", "0", "no", "off"})
+
+# 进程内已加载的索引：缓存文件路径 -> (文件 mtime, 抓取时间, 索引)
+_LOADED: dict[str, tuple[int, float, ToolIndex]] = {}
+
+
+class ToolSchemaError(Exception):
+    """命令或参数不符合工具 schema"""
+    pass
+
+
+def schema_ttl() -> float:
+    configured = os.environ.get(TTL_ENV)
+    if not configured:
+        return DEFAULT_TTL
+    try:
+        return max(float(configured), 0.0)
+    except ValueError:
+        return DEFAULT_TTL
+
+
+def schema_path(server: str) -> str:
+    # server 名来自配置，替换路径分隔符避免写到缓存目录之外
+    safe = server.replace(os.sep, "_").replace("/", "_")
+    return os.path.join(cache_dir(), "tools", f"{safe}.marshal")
+
+
+def _types(spec: Any) -> tuple[str, ...]:
+    if not isinstance(spec, dict):
+        return ()
+    declared = spec.get("type")
+    if isinstance(declared, str):
+        return (declared,)
+    if isinstance(declared, list):
+        return tuple(item for item in declared if isinstance(item, str))
+    return ()
+
+
+def compile_tools(tools: list[dict[str, Any]]) -> ToolIndex:
+    """把 tools/list 的结果编译为只含校验所需信息的索引"""
+    index: ToolIndex = {}
+    for tool in tools:
+        if not isinstance(tool, dict) or not isinstance(tool.get("name"), str):
+            continue
+        schema = tool.get("inputSchema") if isinstance(tool.get("inputSchema"), dict) else {}
+        properties = schema.get("properties") if isinstance(schema.get("properties"), dict) else {}
+        required = tuple(name for name in schema.get("required") or () if isinstance(name, str))
+        index[tool["name"]] = (
+            {name: _types(spec) for name, spec in properties.items()},
+            required,
+            tuple(properties),
+            schema.get("additionalProperties") is False,
+        )
+    return index
+
+
+def save_schema(server: str, tools: list[dict[str, Any]], fetched: float | None = None) -> ToolIndex:
+    """编译并写入缓存，返回索引"""
+    import marshal
+    import time
+
+    index = compile_tools(tools)
+    fetched = time.time() if fetched is None else fetched
+    path = schema_path(server)
+    temporary = f"{path}.tmp-{os.getpid()}"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temporary, "wb") as target:
+            target.write(marshal.dumps((SCHEMA_FORMAT, server, fetched, index)))
+        os.replace(temporary, path)
+        _LOADED[path] = (os.stat(path).st_mtime_ns, fetched, index)
+    except OSError:
+        # 缓存目录不可写时仍在本进程内使用
+        _LOADED[path] = (0, fetched, index)
+    return index
+
+
+def load_schema(server: str, ttl: float | None = None, now: float | None = None) -> ToolIndex | None:
+    """返回未过期的工具索引；没有缓存或已过期时返回 None"""
+    path = schema_path(server)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = 0
+    loaded = _LOADED.get(path)
+    if loaded is None or loaded[0] != mtime:
+        # 缓存目录不可写时保存的索引 mtime 记为 0，文件缺失时仍然有效
+        if not mtime:
+            return None
+        import marshal
+
+        try:
+            with open(path, "rb") as source:
+                cached = marshal.loads(source.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if not isinstance(cached, tuple) or len(cached) != 4 or cached[0] != SCHEMA_FORMAT or cached[1] != server:
+            return None
+        loaded = _LOADED[path] = (mtime, cached[2], cached[3])
+    if now is None:
+        import time
+
+        now = time.time()
+    ttl = schema_ttl() if ttl is None else ttl
+    if now - loaded[1] > ttl:
+        return None
+    return loaded[2]
+
+
+def closest_names(name: str, candidates: Any, limit: int = 3) -> list[str]:
+    import difflib
+
+    return difflib.get_close_matches(name, list(candidates), n=limit, cutoff=0.5)
+
+
+def _is_decimal(text: str) -> bool:
+    """不带符号的 JSON 风格小数（可带指数），只含 ASCII 数字"""
+    mantissa, marker, exponent = text.lower().partition("e")
+    if exponent[:1] in ("+", "-"):
+        exponent = exponent[1:]
+    whole, _, fraction = mantissa.partition(".")
+    parts = [whole + fraction, exponent] if marker else [whole + fraction]
+    return all(part.isascii() and part.isdigit() for part in parts)
+
+
+def _coerce(name: str, value: Any, types: tuple[str, ...]) -> Any:
+    """按声明类型转换字符串参数；非字符串值（来自 JSON 参数）保持原样"""
+    if not isinstance(value, str) or not types or "string" in types:
+        return value
+    text = value.strip()
+    # 只接受 ASCII 十进制写法："²".isdigit() 为真但 int() 会失败，float() 还接受 nan/inf/1_000
+    digits = text[1:] if text[:1] in "+-" else text
+    integral = digits.isascii() and digits.isdigit()
+    for declared in types:
+        if declared == "integer":
+            if integral:
+                return int(text)
+        elif declared == "number":
+            if integral:
+                return int(text)
+            if not _is_decimal(digits):
+                continue
+            import math
+
+            number = float(text)
+            if math.isfinite(number):
+                return number
+        elif declared == "boolean":
+            if text.lower() in _TRUE:
+                return True
+            if text.lower() in _FALSE:
+                return False
+        elif declared in ("array", "object"):
+            opening = "[" if declared == "array" else "{"
+            if text.startswith(opening):
+                import json
+
+                try:
+                    return json.loads(text)
+                except ValueError:
+                    continue
+            if declared == "array":
+                return [item.strip() for item in text.split(",")] if text else []
+        elif declared == "null" and text.lower() == "null":
+            return None
+    raise ToolSchemaError(f"参数 {name} 应为 {'/'.join(types)}: {value!r}")
+
+
+def validate_call(server: str, command: str, arguments: str | dict[str, Any], index: ToolIndex) -> dict[str, Any]:
+    """
+    按工具索引校验命令并转换参数
+
+    Returns:
+        转换后的参数字典（字符串参数按位置参数处理）
+
+    Raises:
+        ToolSchemaError: 未知命令、类型不符、缺少必填参数或多余参数
+    """
+    tool = index.get(command)
+    if tool is None:
+        suggestions = closest_names(command, index)
+        hint = f"，是否要使用: {', '.join(suggestions)}" if suggestions else f"，可用命令: {', '.join(sorted(index)[:8])}"
+        raise ToolSchemaError(f"server '{server}' 没有命令 '{command}'{hint}")
+    properties, required, order, closed = tool
+
+    if isinstance(arguments, dict):
+        named = dict(arguments)
+        positional = named.pop(POSITIONAL_KEY, [])
+        if not isinstance(positional, list):
+            positional = [positional]
+    else:
+        named = {}
+        positional = [arguments] if arguments else []
+
+    if positional and properties:
+        # 位置参数先填未提供的必填参数，再按声明顺序填其余参数
+        slots = [name for name in required if name not in named]
+        slots += [name for name in order if name not in named and name not in slots]
+        for slot, value in zip(slots, positional):
+            named[slot] = value
+        positional = positional[len(slots):]
+
+    coerced: dict[str, Any] = {}
+    for name, value in named.items():
+        if name in properties:
+            coerced[name] = _coerce(name, value, properties[name])
+        elif closed:
+            suggestions = closest_names(name, properties, 1)
+            hint = f"，是否要使用: {suggestions[0]}" if suggestions else ""
+            raise ToolSchemaError(f"命令 '{command}' 不接受参数 '{name}'{hint}")
+        else:
+            coerced[name] = value
+    if positional:
+        if closed or properties:
+            raise ToolSchemaError(f"命令 '{command}' 的位置参数过多: {positional}")
+        raise ToolSchemaError(f"命令 '{command}' 未声明参数名，无法使用位置参数，请改用 key=value 或 JSON 参数")
+
+    missing = [name for name in required if name not in coerced]
+    if missing:
+        raise ToolSchemaError(f"命令 '{command}' 缺少必填参数: {', '.join(missing)}")
+    return coerced
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import os
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+SKILL_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = SKILL_ROOT / "scripts"
+
+sys.path.insert(0, str(SCRIPTS))
+
+import alias_index  # noqa: E402
+import call_mcp  # noqa: E402
+
+
+def reference_distance(a: str, b: str) -> int:
+    """逐格动态规划的 OSA 距离，用于核对位并行实现"""
+    rows = [[i + j if i * j == 0 else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            rows[i][j] = min(rows[i - 1][j] + 1, rows[i][j - 1] + 1, rows[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                rows[i][j] = min(rows[i][j], rows[i - 2][j - 2] + 1)
+    return rows[-1][-1]
+
+
+class AliasIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = alias_index.AliasIndex.build(call_mcp.MCP_MAP)
+
+    def test_bit_parallel_distance_matches_dynamic_programming(self) -> None:
+        rng = random.Random(5)
+        for _ in range(500):
+            a = "".join(rng.choice("abc搜索") for _ in range(rng.randint(0, 8)))
+            b = "".join(rng.choice("abc搜索") for _ in range(rng.randint(0, 8)))
+            self.assertEqual(reference_distance(a, b), alias_index.edit_distance(a, b), (a, b))
+
+    def test_suggestions_are_ranked_by_similarity(self) -> None:
+        suggestions = self.index.lookup(["databse", "query"], 2)
+
+        self.assertEqual(("database", "mysql", 0.875, 1), suggestions[0])
+        self.assertEqual(sorted(suggestions, key=lambda item: -item[2]), suggestions)
+
+    def test_chinese_and_multi_word_aliases_are_suggested(self) -> None:
+        self.assertEqual("搜索", self.index.lookup(["搜素", "q"], 2)[0][0])
+        self.assertEqual(("read web", "web-reader", 0.875, 2), self.index.lookup(["read", "wbe", "fetch"], 2)[0])
+
+    def test_correction_requires_threshold_and_unambiguous_server(self) -> None:
+        self.assertEqual("database", alias_index.choose_correction(self.index.lookup(["databse", "q"], 2), 0.8)[0])
+        self.assertIsNone(alias_index.choose_correction(self.index.lookup(["gg", "q"], 2), 0.8))
+        tied = [("ab", "one", 0.9, 1), ("ac", "two", 0.9, 1)]
+        self.assertIsNone(alias_index.choose_correction(tied, 0.8))
+        self.assertEqual("ab", alias_index.choose_correction([*tied[:1], ("ad", "one", 0.9, 1)], 0.8)[0])
+
+    def test_large_tables_reuse_cached_index(self) -> None:
+        table = {f"alias{number}": f"server-{number % 7}" for number in range(alias_index.CACHE_MIN_ALIASES)}
+        with tempfile.TemporaryDirectory() as root, mock.patch.dict(os.environ, {"XDG_CACHE_HOME": root}):
+            built = alias_index.load_alias_index(table)
+            with mock.patch.object(alias_index.AliasIndex, "build", side_effect=AssertionError("rebuilt")):
+                cached = alias_index.load_alias_index(table)
+
+        self.assertEqual(built.to_marshal(), cached.to_marshal())
+        self.assertEqual("alias42", cached.lookup(["alais42", "cmd"], 1)[0][0])
+
+
+class AliasCorrectionTest(unittest.TestCase):
+    def test_confident_typo_is_corrected(self) -> None:
+        result = call_mcp.parse_mcp_call("serch query AI")
+
+        self.assertEqual("web-search-prime", result["server"])
+        self.assertEqual("search", result["alias"])
+        self.assertEqual("serch", result["corrected_from"])
+        self.assertEqual("query", result["command"])
+
+    def test_unknown_alias_lists_ranked_suggestions(self) -> None:
+        with self.assertRaisesRegex(call_mcp.MCPParserError, r"未知别名 'raed'\n是否要使用: read web \(web-reader\)"):
+            call_mcp.parse_mcp_call("raed wbe fetch url=x")
+        with self.assertRaisesRegex(call_mcp.MCPParserError, "没有相近的别名"):
+            call_mcp.parse_mcp_call("nope list")
+
+    def test_threshold_can_disable_correction(self) -> None:
+        with mock.patch.dict(os.environ, {alias_index.AUTOCORRECT_ENV: "1"}):
+            with self.assertRaisesRegex(call_mcp.MCPParserError, r"是否要使用: search \(web-search-prime\)"):
+                call_mcp.parse_mcp_call("serch query AI")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,471 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+import warnings
+from pathlib import Path
+from unittest import mock
+
+
+SKILL_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = SKILL_ROOT / "scripts"
+BENCHMARKS = SKILL_ROOT / "benchmarks"
+CALL_SCRIPT = SCRIPTS / "call_mcp.py"
+
+sys.path.insert(0, str(SCRIPTS))
+sys.path.insert(0, str(BENCHMARKS))
+
+import bench_regression  # noqa: E402
+import bench_startup  # noqa: E402
+import call_mcp  # noqa: E402
+
+
+class AliasMatchTest(unittest.TestCase):
+    def test_multi_word_alias_matches(self) -> None:
+        result = call_mcp.parse_mcp_call("read web fetch url=https://example.com")
+
+        self.assertEqual("web-reader", result["server"])
+        self.assertEqual("read web", result["alias"])
+        self.assertEqual("fetch", result["command"])
+        self.assertEqual({"url": "https://example.com"}, result["arguments"])
+
+    def test_mixed_case_aliases_are_normalized(self) -> None:
+        self.assertEqual("context7", call_mcp.parse_mcp_call("api get-docs react")["server"])
+        self.assertEqual("API docs", call_mcp.parse_mcp_call("Api Docs get-docs react")["alias"])
+        self.assertEqual("github", call_mcp.parse_mcp_call("GH list-repos")["server"])
+
+    def test_longest_alias_wins_when_command_follows(self) -> None:
+        result = call_mcp.parse_mcp_call("pdf reader read_pdf  /tmp/a b.pdf")
+
+        self.assertEqual("pdf reader", result["alias"])
+        self.assertEqual("read_pdf", result["command"])
+        self.assertEqual("/tmp/a b.pdf", result["arguments"])
+
+    def test_falls_back_to_shorter_alias_to_keep_command(self) -> None:
+        result = call_mcp.parse_mcp_call("web page")
+
+        self.assertEqual("web", result["alias"])
+        self.assertEqual("page", result["command"])
+
+    def test_alias_without_command_is_format_error(self) -> None:
+        with self.assertRaisesRegex(call_mcp.MCPParserError, "格式错误"):
+            call_mcp.parse_mcp_call("gh")
+
+    def test_unknown_alias_is_reported(self) -> None:
+        with self.assertRaisesRegex(call_mcp.MCPParserError, "未知别名 'nope'"):
+            call_mcp.parse_mcp_call("nope list")
+
+    def test_custom_trie_matches_deep_aliases(self) -> None:
+        trie = call_mcp.build_alias_trie({"a b c": "deep", "a": "shallow"})
+
+        self.assertEqual(("a b c", "deep", 3), call_mcp.match_alias("A B C cmd", trie))
+        self.assertEqual(("a", "shallow", 1), call_mcp.match_alias("a b x", trie))
+        self.assertIsNone(call_mcp.match_alias("b c", trie))
+
+
+class AliasConfigTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.temporary_directory.name)
+        self.project = self.root / "project"
+        self.project.mkdir()
+        self.user_config = self.root / "config" / "mcp-faster-caller" / "aliases.json"
+        self.user_config.parent.mkdir(parents=True)
+        self.cache_dir = self.root / "cache" / "mcp-faster-caller"
+
+        environment = mock.patch.dict(os.environ, {
+            "XDG_CONFIG_HOME": str(self.root / "config"),
+            "XDG_CACHE_HOME": str(self.root / "cache"),
+        })
+        environment.start()
+        self.addCleanup(environment.stop)
+        os.environ.pop("MCP_FAST_CALLER_CONFIG", None)
+        previous_cwd = os.getcwd()
+        os.chdir(self.project)
+        self.addCleanup(os.chdir, previous_cwd)
+        self.addCleanup(setattr, call_mcp, "_ALIAS_TABLE", None)
+        call_mcp._ALIAS_TABLE = None
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+
+    def reload(self) -> None:
+        call_mcp._ALIAS_TABLE = None
+
+    def test_without_config_uses_builtin_map(self) -> None:
+        self.assertIs(call_mcp.MCP_MAP, call_mcp.get_mcp_map())
+        self.assertFalse(self.cache_dir.exists())
+
+    def test_presence_check_matches_candidate_paths(self) -> None:
+        import alias_config
+
+        self.assertFalse(call_mcp._alias_config_present())
+        for path in map(Path, alias_config.candidate_paths()):
+            with self.subTest(path=path.name):
+                path.write_text("{}", encoding="utf-8")
+                self.assertTrue(call_mcp._alias_config_present())
+                path.unlink()
+        self.assertFalse(call_mcp._alias_config_present())
+
+    def test_project_config_overrides_user_config(self) -> None:
+        self.user_config.write_text(json.dumps({"aliases": {"wiki": "confluence", "jira": "atlassian"}}), encoding="utf-8")
+        (self.project / ".mcp-faster-caller.toml").write_text(
+            '[aliases]\n"wiki" = "internal-wiki"\n"gh" = ""\n', encoding="utf-8"
+        )
+
+        self.assertEqual("internal-wiki", call_mcp.parse_mcp_call("Wiki search q=x")["server"])
+        self.assertEqual("atlassian", call_mcp.parse_mcp_call("jira issues")["server"])
+        with self.assertRaisesRegex(call_mcp.MCPParserError, "未知别名"):
+            call_mcp.parse_mcp_call("gh list-repos")
+
+    def test_compiled_table_is_cached_until_config_changes(self) -> None:
+        self.user_config.write_text(json.dumps({"aliases": {"wiki": "confluence"}}), encoding="utf-8")
+        call_mcp.get_alias_trie()
+        cache_files = list(self.cache_dir.glob("aliases-*.marshal"))
+        self.assertEqual(1, len(cache_files))
+
+        self.reload()
+        with mock.patch("alias_config.compile_alias_table") as compile_table:
+            self.assertEqual("confluence", call_mcp.parse_mcp_call("wiki search")["server"])
+        compile_table.assert_not_called()
+
+        self.user_config.write_text(json.dumps({"aliases": {"wiki": "wiki-server-v2"}}), encoding="utf-8")
+        os.utime(self.user_config, ns=(1, 1))
+        self.reload()
+        self.assertEqual("wiki-server-v2", call_mcp.parse_mcp_call("wiki search")["server"])
+
+    def test_section_only_configs_have_no_aliases(self) -> None:
+        config = self.project / ".mcp-faster-caller.json"
+        for section in (
+            {"cache": {"ttl": {"web-search-prime": 300}}},
+            {"concurrency": {"web-search-prime": 4}},
+            {"scheduler": {"web-search-prime": {"max_concurrency": 2}}},
+        ):
+            with self.subTest(section=next(iter(section))):
+                config.write_text(json.dumps(section), encoding="utf-8")
+                self.reload()
+                self.assertEqual("web-search-prime", call_mcp.parse_mcp_call("search web_search_prime q=x")["server"])
+
+        config.write_text(json.dumps({"alias": {"wiki": "confluence"}}), encoding="utf-8")
+        self.reload()
+        with self.assertRaisesRegex(call_mcp.MCPParserError, "缺少 aliases 表"):
+            call_mcp.parse_mcp_call("search web_search_prime")
+
+    def test_invalid_config_is_reported(self) -> None:
+        self.user_config.write_text("{not json", encoding="utf-8")
+
+        with self.assertRaisesRegex(call_mcp.MCPParserError, "无法读取别名配置"):
+            call_mcp.parse_mcp_call("gh list-repos")
+
+
+class ArgumentTokenizerTest(unittest.TestCase):
+    CORPUS = Path(__file__).resolve().parent / "arguments_corpus.json"
+    ALPHABET = ["a", "Z", "9", " ", "  ", "\t", "=", '"', "'", "\\", "-", "/", "中", "文", "\u3000", "{", "}"]
+
+    def test_corpus(self) -> None:
+        for case in json.loads(self.CORPUS.read_text(encoding="utf-8")):
+            with self.subTest(input=case["input"]):
+                self.assertEqual(case["expected"], call_mcp.parse_arguments(case["input"]))
+
+    def test_quoted_values_round_trip(self) -> None:
+        rng = random.Random(20260101)
+        for _ in range(500):
+            expected = {
+                f"k{index}": "".join(rng.choice(self.ALPHABET) for _ in range(rng.randint(0, 12)))
+                for index in range(rng.randint(1, 5))
+            }
+            rendered = " ".join(
+                f'{key}="' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+                for key, value in expected.items()
+            )
+            with self.subTest(rendered=rendered):
+                self.assertEqual(expected, call_mcp.parse_arguments(rendered))
+
+    def test_random_input_never_raises(self) -> None:
+        rng = random.Random(7)
+        for _ in range(2000):
+            text = "".join(rng.choice(self.ALPHABET) for _ in range(rng.randint(0, 40)))
+            named, positional = call_mcp.tokenize_arguments(text)
+            self.assertTrue(all(key and not key.isspace() for key in named))
+            self.assertTrue(all(isinstance(value, str) for value in positional))
+
+    def test_unquoted_tokens_follow_whitespace_split(self) -> None:
+        rng = random.Random(3)
+        alphabet = [char for char in self.ALPHABET if char not in {'"', "'"}]
+        for _ in range(500):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+            named, positional = call_mcp.tokenize_arguments(text)
+            tokens = text.split()
+            self.assertEqual(len(tokens), len(named) + len(positional) + self.duplicate_keys(tokens))
+
+    @staticmethod
+    def duplicate_keys(tokens: list[str]) -> int:
+        keys = [token.partition("=")[0] for token in tokens if "=" in token and not token.startswith("=")]
+        return len(keys) - len(set(keys))
+
+
+class ArgumentReferenceTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.temporary_directory.name)
+        self.sql = self.root / "query.sql"
+        self.sql.write_text('SELECT "a b" FROM t;\n-- 注释\n', encoding="utf-8")
+        environment = mock.patch.dict(os.environ)
+        environment.start()
+        self.addCleanup(environment.stop)
+        os.environ.pop("MCP_FAST_CALLER_MAX_ARG_BYTES", None)
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+
+    def test_named_value_reads_file_verbatim(self) -> None:
+        result = call_mcp.parse_mcp_call(f"db query sql=@file:{self.sql} limit=5")
+
+        self.assertEqual({"sql": self.sql.read_text(encoding="utf-8"), "limit": "5"}, result["arguments"])
+        self.assertEqual(f"db query sql=@file:{self.sql} limit=5", result["original"])
+
+    def test_whole_argument_json_file_becomes_object(self) -> None:
+        payload = self.root / "payload.json"
+        payload.write_text('  {"query": "test", "rows": [1, 2]}\n', encoding="utf-8")
+
+        result = call_mcp.parse_mcp_call(f"gh search-code @file:{payload}")
+
+        self.assertEqual({"query": "test", "rows": [1, 2]}, result["arguments"])
+        self.assertEqual("json", result["format"])
+
+    def test_whole_argument_text_file_is_not_tokenized(self) -> None:
+        result = call_mcp.parse_mcp_call(f"db query @file:{self.sql}")
+
+        self.assertEqual(self.sql.read_text(encoding="utf-8"), result["arguments"])
+        self.assertEqual("string", result["format"])
+
+    def test_stdin_reference_reads_stream(self) -> None:
+        result = call_mcp.parse_mcp_call("db query sql=@- tag=@@- note=@@file:x", io.BytesIO("SELECT 1\n".encode()))
+
+        self.assertEqual({"sql": "SELECT 1\n", "tag": "@-", "note": "@file:x"}, result["arguments"])
+
+    def test_stdin_reference_without_stream_is_rejected(self) -> None:
+        with self.assertRaisesRegex(call_mcp.MCPParserError, "@-"):
+            call_mcp.parse_mcp_call("db query sql=@-")
+        with self.assertRaisesRegex(call_mcp.MCPParserError, "只能使用一次"):
+            call_mcp.parse_mcp_call("db query a=@- b=@-", io.BytesIO(b"x"))
+
+    def test_other_at_values_are_literal_regardless_of_files(self) -> None:
+        previous_cwd = os.getcwd()
+        os.chdir(self.root)
+        self.addCleanup(os.chdir, previous_cwd)
+        (self.root / "octocat").write_text("file", encoding="utf-8")
+        (self.root / "migration.sql").mkdir()
+
+        result = call_mcp.parse_mcp_call("API docs resolve-library-id @tanstack/react-query")
+        self.assertEqual("@tanstack/react-query", result["arguments"])
+        self.assertEqual({"q": "@octocat"}, call_mcp.parse_mcp_call("gh search-users q=@octocat")["arguments"])
+        self.assertEqual("@migration.sql", call_mcp.parse_mcp_call("db query @migration.sql")["arguments"])
+
+    def test_missing_file_reference_is_an_error(self) -> None:
+        cases = [
+            ("db query sql=@file:migraton.sql", "参数文件不存在: migraton.sql"),
+            ("db query @file:missing.json", "参数文件不存在: missing.json"),
+            (f"db query sql=@file:{self.root}", "参数引用不是文件"),
+            ("db query sql=@file:", "缺少文件路径"),
+        ]
+        for text, message in cases:
+            with self.subTest(text=text):
+                with self.assertRaisesRegex(call_mcp.MCPParserError, message):
+                    call_mcp.parse_mcp_call(text)
+
+    def test_size_limit_applies_to_files_and_streams(self) -> None:
+        os.environ["MCP_FAST_CALLER_MAX_ARG_BYTES"] = "8"
+
+        with self.assertRaisesRegex(call_mcp.MCPParserError, "大小上限 8"):
+            call_mcp.parse_mcp_call(f"db query @file:{self.sql}")
+        with self.assertRaisesRegex(call_mcp.MCPParserError, "大小上限 8"):
+            call_mcp.parse_mcp_call("db query @-", io.BytesIO(b"x" * 9))
+
+    def test_inline_instruction_keeps_length_cap(self) -> None:
+        with self.assertRaisesRegex(call_mcp.MCPParserError, "@file:路径"):
+            call_mcp.parse_mcp_call("db query " + "x" * call_mcp.MAX_INSTRUCTION_LENGTH)
+
+    def test_cli_streams_large_stdin_reference(self) -> None:
+        statement = "INSERT INTO t VALUES ('多字节 \"x\"');\n"
+        payload = statement * (3 * call_mcp._JSON_CHUNK // len(statement))
+
+        result = subprocess.run(
+            ["python3", str(CALL_SCRIPT), "db query sql=@-"],
+            input=payload.encode("utf-8"),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+
+        self.assertEqual(0, result.returncode, result.stderr)
+        self.assertEqual(payload, json.loads(result.stdout)["arguments"]["sql"])
+
+
+class JsonOutputTest(unittest.TestCase):
+    CASES = [
+        {"server": "github", "arguments": {"owner": "用户"}, "format": "json"},
+        {"text": 'quote " back \\ slash\n\t\x01\x7f \u2028 emoji 🚀'},
+        {"nested": [1, True, False, None, [], {}, {"a": [-3, "x"]}]},
+        [],
+        "plain",
+        {"float": 1.5, "list": [0.1]},
+        {1: "non-string key"},
+    ]
+
+    def test_matches_standard_json_output(self) -> None:
+        for case in self.CASES:
+            with self.subTest(case=case):
+                self.assertEqual(json.dumps(case, ensure_ascii=False, indent=2), call_mcp.to_json(case, indent=2))
+                self.assertEqual(
+                    json.dumps(case, ensure_ascii=False, separators=(",", ":")),
+                    call_mcp.to_json(case),
+                )
+
+    def test_streaming_writer_matches_standard_json_output(self) -> None:
+        large = 'line "quoted" \\ 多字节\n\x01' * (1 << 13)
+        for case in [*self.CASES, {"arguments": {"sql": large, "n": [1.5, {2: "x"}]}}, large]:
+            for indent in (None, 2):
+                with self.subTest(case=str(case)[:40], indent=indent):
+                    out = io.StringIO()
+                    call_mcp.write_json(case, out, indent=indent)
+                    separators = (",", ":") if indent is None else None
+                    self.assertEqual(
+                        json.dumps(case, ensure_ascii=False, indent=indent, separators=separators),
+                        out.getvalue(),
+                    )
+
+
+class StartupBudgetTest(unittest.TestCase):
+    def test_successful_parse_stays_within_import_budget(self) -> None:
+        budget = bench_startup.load_budget()
+
+        extra = bench_startup.measure_imports(budget["instruction"])
+
+        self.assertFalse(set(budget["forbidden_modules"]) & set(extra), sorted(extra))
+        self.assertLessEqual(len(extra), budget["max_extra_modules"], sorted(extra))
+        # 导入耗时随机器负载波动，只提示不判定
+        import_ms = sum(extra.values()) / 1000
+        if import_ms > budget["max_import_ms"]:
+            warnings.warn(f"导入耗时 {import_ms:.2f} ms 超出参考预算 {budget['max_import_ms']} ms: {extra}")
+
+    def test_isolated_fast_entry_point_parses(self) -> None:
+        result = subprocess.run(
+            ["python3", "-I", "-S", str(CALL_SCRIPT), "API docs get-library-docs react"],
+            cwd=tempfile.gettempdir(),
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+
+        self.assertEqual(0, result.returncode, result.stderr)
+        self.assertEqual("context7", json.loads(result.stdout)["server"])
+
+
+class RegressionCorpusTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.corpus = bench_regression.load_corpus()
+
+    def test_categories_take_their_parse_paths(self) -> None:
+        expected_formats = {"plain": "string", "json": "json", "key_value": "json"}
+        for category, expected in expected_formats.items():
+            for instruction in self.corpus[category]:
+                with self.subTest(instruction=instruction):
+                    result = call_mcp.parse_mcp_call(instruction)
+                    self.assertEqual(expected, result["format"])
+                    self.assertNotIn("corrected_from", result)
+
+    def test_unknown_aliases_are_corrected_or_rejected(self) -> None:
+        for instruction in self.corpus["unknown_alias"]:
+            with self.subTest(instruction=instruction):
+                try:
+                    self.assertIn("corrected_from", call_mcp.parse_mcp_call(instruction))
+                except call_mcp.MCPParserError as e:
+                    self.assertIn("未知别名", str(e))
+
+    def test_max_length_instructions_sit_on_the_limit(self) -> None:
+        for instruction in self.corpus["max_length"]:
+            with self.subTest(instruction=instruction[:20]):
+                self.assertEqual(call_mcp.MAX_INSTRUCTION_LENGTH, len(instruction))
+                self.assertEqual(instruction, call_mcp.parse_mcp_call(instruction)["original"])
+                with self.assertRaisesRegex(call_mcp.MCPParserError, "指令过长"):
+                    call_mcp.validate_input(instruction + "x")
+
+
+class RegressionGateTest(unittest.TestCase):
+    BASELINE = {
+        "calibration_s": 0.01, "interpreter_ms": 10.0,
+        "parses_per_sec/plain": 100000.0, "cli_ms/parse": 20.0, "parse_peak_kib/all": 16.0,
+    }
+
+    def test_slower_machine_is_not_a_regression(self) -> None:
+        slower = {**self.BASELINE, "calibration_s": 0.02, "interpreter_ms": 20.0,
+                  "parses_per_sec/plain": 50000.0, "cli_ms/parse": 40.0}
+
+        self.assertEqual([], bench_regression.compare(self.BASELINE, slower, 0.25))
+
+    def test_regressions_beyond_threshold_are_reported(self) -> None:
+        current = {**self.BASELINE, "parses_per_sec/plain": 70000.0, "cli_ms/parse": 24.0, "parse_peak_kib/all": 32.0}
+
+        regressions = bench_regression.compare(self.BASELINE, current, 0.25)
+
+        self.assertEqual(["parse_peak_kib/all", "parses_per_sec/plain"], [item.split(":")[0] for item in regressions])
+
+    def test_stored_baseline_covers_every_measurement(self) -> None:
+        results = bench_regression.measure(runs=1, min_time=0.001, repeat=1)
+        baseline = json.loads(bench_regression.BASELINE_FILE.read_text(encoding="utf-8"))
+
+        self.assertEqual(sorted(results), sorted(baseline["results"]))
+
+
+class BatchModeTest(unittest.TestCase):
+    def run_batch(self, text: str) -> list[dict]:
+        out = io.StringIO()
+        self.assertEqual(0, call_mcp.run_batch(io.StringIO(text), out))
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_one_compact_result_per_line(self) -> None:
+        results = self.run_batch("gh list-repos owner=username\nsearch query AI\n")
+
+        self.assertEqual(["github", "web-search-prime"], [result["server"] for result in results])
+        self.assertEqual({"owner": "username"}, results[0]["arguments"])
+
+    def test_errors_are_reported_per_line(self) -> None:
+        results = self.run_batch("gh list-repos\n\nunknown-alias cmd\ndb query x\n")
+
+        self.assertEqual(4, len(results))
+        self.assertEqual(2, results[1]["line"])
+        self.assertIn("未知别名", results[2]["error"])
+        self.assertEqual("mysql", results[3]["server"])
+
+    def test_json_string_line_may_contain_newlines(self) -> None:
+        results = self.run_batch(json.dumps("db query SELECT 1\nFROM dual") + "\n")
+
+        self.assertEqual("SELECT 1\nFROM dual", results[0]["arguments"])
+
+    def test_cli_batch_flag_streams_stdin(self) -> None:
+        result = subprocess.run(
+            ["python3", str(CALL_SCRIPT), "--batch"],
+            input="gh list-repos\nbogus x\n",
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+
+        self.assertEqual(0, result.returncode, result.stderr)
+        lines = result.stdout.splitlines()
+        self.assertEqual(2, len(lines))
+        self.assertNotIn("\n  ", result.stdout)
+        self.assertIn("error", json.loads(lines[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import subprocess
+import sys
+import socket
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+SKILL_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = SKILL_ROOT / "scripts"
+CALL_SCRIPT = SCRIPTS / "call_mcp.py"
+CLIENT_SCRIPT = SCRIPTS / "call_mcp_fast.py"
+DAEMON_SCRIPT = SCRIPTS / "call_mcp_daemon.py"
+STUB = {"command": sys.executable, "args": [str(SCRIPTS / "stub_mcp_server.py")]}
+
+sys.path.insert(0, str(SCRIPTS))
+
+import call_mcp_daemon  # noqa: E402
+import call_mcp_fast  # noqa: E402
+
+
+class RequestEncodingTest(unittest.TestCase):
+    def test_forwardable_command_lines(self) -> None:
+        fields = call_mcp_fast.build_request(["--execute", "--output", "json", "gh", "list-repos", "owner=x"])
+
+        self.assertEqual("1", fields["execute"])
+        self.assertEqual("json", fields["output"])
+        self.assertEqual("gh list-repos owner=x", fields["instruction"])
+        self.assertEqual(fields, call_mcp_daemon.decode_request(call_mcp_fast.encode_request(fields)))
+
+    def test_relevant_environment_is_forwarded(self) -> None:
+        with mock.patch.dict(os.environ, {"MCP_FAST_CALLER_NO_CACHE": "1", "MCP_FAST_CALLER_SOCKET": "/x", "XDG_CACHE_HOME": "/c"}):
+            fields = call_mcp_fast.build_request(["gh", "x"])
+
+        self.assertEqual("1", fields["env.MCP_FAST_CALLER_NO_CACHE"])
+        self.assertEqual("/c", fields["env.XDG_CACHE_HOME"])
+        self.assertNotIn("env.MCP_FAST_CALLER_SOCKET", fields)
+
+    def test_client_side_inputs_are_not_forwarded(self) -> None:
+        for argv in ([], ["--batch"], ["--help"], ["help"], ["--output"], ["pdf", "read_pdf", "@report.pdf"]):
+            with self.subTest(argv=argv):
+                self.assertIsNone(call_mcp_fast.build_request(argv))
+
+
+@unittest.skipUnless(hasattr(os, "getuid"), "requires Unix domain sockets")
+class ClientSocketTest(unittest.TestCase):
+    def setUp(self) -> None:
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = Path(root.name)
+
+    def listen(self, path: Path) -> None:
+        """接受一个请求后不应答就断开的常驻进程"""
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(path))
+        server.listen(4)
+        self.addCleanup(server.close)
+
+        def hang_up() -> None:
+            for _ in range(2):
+                connection, _ = server.accept()
+                with connection:
+                    while connection.recv(1 << 16):
+                        pass
+
+        thread = threading.Thread(target=hang_up, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+
+    def test_socket_in_shared_directory_is_not_used(self) -> None:
+        shared = self.root / "shared"
+        shared.mkdir()
+        shared.chmod(0o777)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(shared / "daemon.sock"))
+        server.listen(1)
+        self.addCleanup(server.close)
+
+        self.assertFalse(call_mcp_fast.trusted_socket(str(shared / "daemon.sock")))
+        self.assertIsNone(call_mcp_fast.send(b"version=2", str(shared / "daemon.sock")))
+
+    def test_lost_response_is_not_executed_again(self) -> None:
+        path = self.root / "daemon.sock"
+        self.listen(path)
+
+        with mock.patch.dict(os.environ, {"MCP_FAST_CALLER_SOCKET": str(path)}), \
+                mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            os.environ.pop("MCP_FAST_CALLER_NO_DAEMON", None)
+            self.assertIsNone(call_mcp_fast.forward(["gh", "x"]))
+            self.assertEqual(1, call_mcp_fast.forward(["--execute", "search", "echo"]))
+        self.assertIn("未在本进程内重试", stderr.getvalue())
+
+
+class DaemonTest(unittest.TestCase):
+    def setUp(self) -> None:
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = Path(root.name)
+        config = self.root / "servers.json"
+        config.write_text(json.dumps({"mcpServers": {"web-search-prime": STUB}}), encoding="utf-8")
+        self.socket = str(self.root / "daemon.sock")
+        self.env = dict(
+            os.environ,
+            MCP_FAST_CALLER_CONFIG=str(config),
+            MCP_FAST_CALLER_SOCKET=self.socket,
+            MCP_FAST_CALLER_NO_CACHE="1",
+            XDG_CONFIG_HOME=str(self.root),
+            XDG_CACHE_HOME=str(self.root),
+        )
+        self.daemon = subprocess.Popen(
+            [sys.executable, str(DAEMON_SCRIPT)],
+            env=self.env,
+            cwd=self.root,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        self.addCleanup(self.stop)
+        self.assertIn("Listening", self.daemon.stdout.readline())
+
+    def stop(self) -> None:
+        if self.daemon.poll() is None:
+            self.daemon.kill()
+        self.daemon.wait()
+        self.daemon.stdout.close()
+        self.daemon.stderr.close()
+
+    def run_script(self, script: Path, *args: str, cwd: str | None = None, **env: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [sys.executable, str(script), *args],
+            env=dict(self.env, **env),
+            cwd=cwd or self.root,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+
+    def status(self) -> dict:
+        result = self.run_script(DAEMON_SCRIPT, "--status")
+        self.assertEqual(0, result.returncode, result.stderr)
+        return json.loads(result.stdout)
+
+    def test_forwarded_output_matches_in_process_parsing(self) -> None:
+        cases = [
+            ("gh", "list-repos", "owner=x"),
+            ("--output", "json", "--fields", "server,arguments", "搜索", "webSearchPrime", "杭州 天气"),
+            ("--output", "msgpack", "db", "query", "SELECT 1"),
+            ("nope", "list"),
+            ("--fields", "orignal", "gh", "x"),
+        ]
+        for args in cases:
+            with self.subTest(args=args):
+                forwarded = self.run_script(CLIENT_SCRIPT, *args)
+                direct = self.run_script(CALL_SCRIPT, *args)
+                self.assertEqual(direct.stdout, forwarded.stdout)
+                self.assertEqual(direct.returncode, forwarded.returncode)
+
+        self.assertEqual(len(cases), self.status()["requests"]["call"])
+
+    def test_execute_reuses_warm_sessions(self) -> None:
+        first = self.run_script(CLIENT_SCRIPT, "--execute", "--output", "json", "search", "echo", "n=1")
+        second = self.run_script(CLIENT_SCRIPT, "--execute", "--output", "json", "search", "echo", "n=2")
+        failed = self.run_script(CLIENT_SCRIPT, "--execute", "search", "fail")
+
+        results = [json.loads(item.stdout)["result"]["structuredContent"] for item in (first, second)]
+        self.assertEqual(results[0]["pid"], results[1]["pid"])
+        self.assertEqual([1, 2], [result["calls"] for result in results])
+        self.assertEqual(1, failed.returncode)
+        self.assertTrue(json.loads(failed.stdout)["result"]["isError"])
+
+    def test_other_working_directories_fall_back(self) -> None:
+        with tempfile.TemporaryDirectory() as other:
+            result = self.run_script(CLIENT_SCRIPT, "gh", "x", cwd=other)
+
+        self.assertEqual(0, result.returncode, result.stderr)
+        self.assertEqual("github", json.loads(result.stdout)["server"])
+        self.assertEqual(1, self.status()["requests"]["fallback"])
+
+    def test_client_environment_must_match(self) -> None:
+        result = self.run_script(CLIENT_SCRIPT, "gh", "x", MCP_FAST_CALLER_AUTOCORRECT="0")
+        cached = subprocess.run(
+            [sys.executable, str(CLIENT_SCRIPT), "gh", "x"],
+            env={key: value for key, value in self.env.items() if key != "MCP_FAST_CALLER_NO_CACHE"},
+            cwd=self.root,
+            stdout=subprocess.PIPE,
+            check=False,
+        )
+
+        self.assertEqual(0, result.returncode, result.stderr)
+        self.assertEqual(0, cached.returncode)
+        self.assertEqual(2, self.status()["requests"]["fallback"])
+
+    def test_server_configs_reload_when_mcp_json_changes(self) -> None:
+        missing = self.run_script(CLIENT_SCRIPT, "--execute", "--output", "json", "pdf", "echo")
+        self.assertEqual(1, missing.returncode)
+        self.assertIn("未配置 server 'pdf-reader'", json.loads(missing.stdout)["error"])
+
+        (self.root / ".mcp.json").write_text(json.dumps({"mcpServers": {"pdf-reader": STUB}}), encoding="utf-8")
+        loaded = self.run_script(CLIENT_SCRIPT, "--execute", "--output", "json", "pdf", "echo")
+
+        self.assertEqual(0, loaded.returncode, loaded.stdout)
+        self.assertEqual(1, json.loads(loaded.stdout)["result"]["structuredContent"]["calls"])
+        self.assertEqual(2, self.status()["requests"]["call"])
+
+    def test_client_runs_in_process_without_daemon(self) -> None:
+        result = self.run_script(CLIENT_SCRIPT, "gh", "x", MCP_FAST_CALLER_SOCKET=str(self.root / "missing.sock"))
+
+        self.assertEqual(0, result.returncode, result.stderr)
+        self.assertEqual("github", json.loads(result.stdout)["server"])
+        self.assertNotIn("call", self.status()["requests"])
+
+    def test_second_daemon_refuses_and_stop_removes_socket(self) -> None:
+        second = self.run_script(DAEMON_SCRIPT)
+        stopped = self.run_script(DAEMON_SCRIPT, "--stop")
+
+        self.assertEqual(1, second.returncode)
+        self.assertIn("已在运行", second.stderr.decode("utf-8"))
+        self.assertEqual(0, stopped.returncode)
+        self.assertEqual(0, self.daemon.wait(timeout=5))
+        self.assertFalse(os.path.exists(self.socket))
+
+
+if __name__ == "__main__":
+    unittest.main()
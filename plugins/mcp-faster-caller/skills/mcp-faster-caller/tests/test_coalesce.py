@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+SKILL_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = SKILL_ROOT / "scripts"
+CALL_SCRIPT = SCRIPTS / "call_mcp.py"
+STUB_SERVER = SCRIPTS / "stub_mcp_server.py"
+
+sys.path.insert(0, str(SCRIPTS))
+
+import call_mcp  # noqa: E402
+import coalesce  # noqa: E402
+import fanout  # noqa: E402
+import mcp_client  # noqa: E402
+
+STUB = {"command": sys.executable, "args": [str(STUB_SERVER)]}
+
+
+class CoalescerTest(unittest.TestCase):
+    def test_followers_share_leader_result(self) -> None:
+        coalescer = coalesce.Coalescer()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def slow() -> str:
+            calls.append(1)
+            release.wait(5)
+            return "value"
+
+        def worker() -> None:
+            results.append(coalescer.run("key", slow))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        while coalescer.stats()["requests"] < 4:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual([1], calls)
+        self.assertEqual([False, True, True, True], sorted(coalesced for _, coalesced in results))
+        self.assertEqual({"requests": 4, "executed": 1, "coalesced": 3}, coalescer.stats())
+        self.assertEqual({}, coalescer.in_flight)
+
+    def test_leader_error_reaches_followers_and_key_is_released(self) -> None:
+        coalescer = coalesce.Coalescer()
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def failing() -> None:
+            started.set()
+            release.wait(5)
+            raise ValueError("boom")
+
+        def worker() -> None:
+            try:
+                coalescer.run("key", failing)
+            except ValueError as e:
+                errors.append(str(e))
+
+        leader = threading.Thread(target=worker)
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=worker)
+        follower.start()
+        while coalescer.stats()["coalesced"] < 1:
+            threading.Event().wait(0.01)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(["boom", "boom"], errors)
+        self.assertEqual(("fresh", False), coalescer.run("key", lambda: "fresh"))
+
+    def test_follower_timeout(self) -> None:
+        coalescer = coalesce.Coalescer()
+        release = threading.Event()
+        leader = threading.Thread(target=coalescer.run, args=("key", lambda: release.wait(5)))
+        leader.start()
+        while not coalescer.in_flight:
+            threading.Event().wait(0.01)
+
+        with self.assertRaises(coalesce.CoalesceTimeout):
+            coalescer.run("key", lambda: None, timeout=0.05)
+        release.set()
+        leader.join(5)
+
+
+class ExecuteCoalesceTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pool = mcp_client.SessionPool({"web-search-prime": STUB, "mysql": STUB}, timeout=10)
+        self.addCleanup(self.pool.close)
+        cache_home = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_home.cleanup)
+        environment = mock.patch.dict(os.environ, {"MCP_FAST_CALLER_NO_CACHE": "1", "XDG_CACHE_HOME": cache_home.name})
+        environment.start()
+        self.addCleanup(environment.stop)
+
+    def run_fan_out(self, instructions: list[str], coalescer: coalesce.Coalescer) -> list[dict]:
+        def execute(parsed: dict, timeout: float | None) -> dict:
+            return call_mcp.execute_call(parsed, self.pool, timeout=timeout, coalescer=coalescer)
+
+        async def collect() -> list[dict]:
+            stream = fanout.fan_out(instructions, call_mcp.parse_mcp_call, execute, (call_mcp.MCPParserError,))
+            return [item async for item in stream]
+
+        return asyncio.run(collect())
+
+    def test_identical_idempotent_calls_in_one_fanout_run_once(self) -> None:
+        coalescer = coalesce.Coalescer()
+
+        results = self.run_fan_out(["search sleep seconds=0.3 q=x", "搜索 sleep q=x seconds=0.3"] * 2, coalescer)
+
+        self.assertEqual(1, sum(session.calls for session in self.pool.sessions["web-search-prime"]))
+        self.assertEqual([False, True, True, True], sorted(result["coalesced"] for result in results))
+        self.assertEqual({"requests": 4, "executed": 1, "coalesced": 3}, coalescer.stats())
+
+    def test_side_effecting_calls_are_not_coalesced(self) -> None:
+        coalescer = coalesce.Coalescer()
+
+        results = self.run_fan_out(["db sleep seconds=0.2 sql=x"] * 2, coalescer)
+
+        self.assertEqual([False, False], [result["coalesced"] for result in results])
+        self.assertEqual(2, sum(session.calls for session in self.pool.sessions["mysql"]))
+        self.assertEqual(0, coalescer.stats()["requests"])
+
+    def test_cli_stats_report_dedup_counts(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            config = Path(root) / "servers.json"
+            config.write_text(json.dumps({"mcpServers": {"web-search-prime": STUB}}), encoding="utf-8")
+            result = subprocess.run(
+                [sys.executable, str(CALL_SCRIPT), "--stats", "--no-cache", "--fanout"],
+                input="search sleep seconds=0.3\n" * 3,
+                env=dict(os.environ, MCP_FAST_CALLER_CONFIG=str(config), XDG_CONFIG_HOME=root, XDG_CACHE_HOME=root),
+                cwd=root,
+                text=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                check=False,
+            )
+
+        self.assertEqual(0, result.returncode, result.stderr)
+        self.assertEqual(3, len(result.stdout.splitlines()))
+        stats = json.loads(result.stderr.splitlines()[-1])["stats"]
+        self.assertEqual({"requests": 3, "executed": 1, "coalesced": 2}, stats["coalesce"])
+
+
+if __name__ == "__main__":
+    unittest.main()
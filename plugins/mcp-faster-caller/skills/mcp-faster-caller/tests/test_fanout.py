@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+SKILL_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = SKILL_ROOT / "scripts"
+CALL_SCRIPT = SCRIPTS / "call_mcp.py"
+STUB_SERVER = SCRIPTS / "stub_mcp_server.py"
+
+sys.path.insert(0, str(SCRIPTS))
+
+import call_mcp  # noqa: E402
+import execution  # noqa: E402
+import fanout  # noqa: E402
+import mcp_client  # noqa: E402
+
+STUB = {"command": sys.executable, "args": [str(STUB_SERVER)]}
+
+
+class FanOutTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pool = mcp_client.SessionPool({"web-search-prime": STUB, "context7": STUB}, timeout=10)
+        self.addCleanup(self.pool.close)
+        cache_home = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_home.cleanup)
+        environment = mock.patch.dict(os.environ, {"MCP_FAST_CALLER_NO_CACHE": "1", "XDG_CACHE_HOME": cache_home.name})
+        environment.start()
+        self.addCleanup(environment.stop)
+
+    def run_fan_out(self, instructions: list[str], **options: object) -> list[dict]:
+        def execute(parsed: dict, timeout: float | None) -> dict:
+            return call_mcp.execute_call(parsed, self.pool, timeout=timeout)
+
+        async def collect() -> list[dict]:
+            stream = fanout.fan_out(instructions, call_mcp.parse_mcp_call, execute, (call_mcp.MCPParserError,), **options)
+            return [item async for item in stream]
+
+        return asyncio.run(collect())
+
+    def test_results_arrive_in_completion_order_with_input_index(self) -> None:
+        results = self.run_fan_out([
+            "search sleep seconds=0.4",
+            "API sleep seconds=0.1",
+            "nope cmd",
+            "search echo q=1",
+        ])
+
+        self.assertEqual([2, 3, 1, 0], [result["index"] for result in results])
+        self.assertIn("未知别名", results[0]["error"])
+        self.assertEqual("context7", results[2]["server"])
+
+    def test_per_server_limit_serializes_calls(self) -> None:
+        instructions = ["search sleep seconds=0.3 n=1", "search sleep seconds=0.3 n=2"]
+
+        start = time.monotonic()
+        self.run_fan_out(instructions, per_server=1)
+        serialized = time.monotonic() - start
+        start = time.monotonic()
+        self.run_fan_out(instructions, limits={"web-search-prime": 2})
+        parallel = time.monotonic() - start
+
+        self.assertGreaterEqual(serialized, 0.6)
+        self.assertLess(parallel, 0.55)
+        self.assertEqual(2, len(self.pool.sessions["web-search-prime"]))
+
+    def test_deadline_reports_unfinished_instructions(self) -> None:
+        start = time.monotonic()
+        results = self.run_fan_out(["search sleep seconds=5", "API echo q=1"], deadline=0.5)
+
+        self.assertLess(time.monotonic() - start, 3)
+        self.assertEqual(1, results[0]["index"])
+        self.assertEqual({"index": 0, "error": "超过总时限 0.5 秒，未完成"}, results[1])
+
+    def test_concurrency_limits_merge_config_layers(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            config = Path(root) / "aliases.json"
+            config.write_text(json.dumps({"concurrency": {"mysql": 1}}), encoding="utf-8")
+            with mock.patch.dict(os.environ, {"MCP_FAST_CALLER_CONFIG": str(config), "XDG_CONFIG_HOME": root}):
+                self.assertEqual({"mysql": 1}, fanout.load_concurrency_limits())
+                config.write_text(json.dumps({"concurrency": {"mysql": 0}}), encoding="utf-8")
+                with self.assertRaisesRegex(fanout.FanoutError, "正整数"):
+                    fanout.load_concurrency_limits()
+
+    def test_per_server_flag_overrides_config_limits(self) -> None:
+        self.addCleanup(setattr, execution, "_SCHEDULER", None)
+        with tempfile.TemporaryDirectory() as root:
+            config = Path(root) / "aliases.json"
+            config.write_text(json.dumps({
+                "concurrency": {"mysql": 1},
+                "scheduler": {"db": {"max_concurrency": 3, "rate": 5}},
+            }), encoding="utf-8")
+            with mock.patch.dict(os.environ, {"MCP_FAST_CALLER_CONFIG": str(config), "XDG_CONFIG_HOME": root}):
+                for per_server, expected in ((None, (1, 3, 4)), (2, (2, 2, 2))):
+                    call_mcp.run_fanout(io.StringIO(""), io.StringIO(), per_server=per_server)
+                    plan = execution._SCHEDULER
+                    with self.subTest(per_server=per_server):
+                        self.assertEqual(expected, tuple(plan.queue(server).limit.allowed for server in ("mysql", "db", "gh")))
+                        self.assertIsNotNone(plan.queue("db").bucket)
+
+    def test_cli_fanout_streams_tagged_results(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            config = Path(root) / "servers.json"
+            config.write_text(json.dumps({"mcpServers": {"web-search-prime": STUB}}), encoding="utf-8")
+            result = subprocess.run(
+                [sys.executable, str(CALL_SCRIPT), "--fanout", "--deadline", "10", "--per-server", "2"],
+                input="search echo q=1\nsearch echo q=2\ngh list-repos\n",
+                env=dict(os.environ, MCP_FAST_CALLER_CONFIG=str(config), XDG_CONFIG_HOME=root, XDG_CACHE_HOME=root),
+                cwd=root,
+                text=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                check=False,
+            )
+
+        self.assertEqual(0, result.returncode, result.stderr)
+        results = {item["index"]: item for item in map(json.loads, result.stdout.splitlines())}
+        self.assertEqual({0, 1, 2}, set(results))
+        self.assertEqual({"q": "2"}, results[1]["result"]["structuredContent"]["arguments"])
+        self.assertIn("未配置 server 'github'", results[2]["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
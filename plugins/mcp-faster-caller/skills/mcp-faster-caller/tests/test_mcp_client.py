@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+SKILL_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = SKILL_ROOT / "scripts"
+CALL_SCRIPT = SCRIPTS / "call_mcp.py"
+STUB_SERVER = SCRIPTS / "stub_mcp_server.py"
+
+sys.path.insert(0, str(SCRIPTS))
+
+import call_mcp  # noqa: E402
+import execution  # noqa: E402
+import mcp_client  # noqa: E402
+
+
+def stub_config(*extra: str) -> dict:
+    return {"command": sys.executable, "args": [str(STUB_SERVER), *extra]}
+
+
+class SessionPoolTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pool = mcp_client.SessionPool({"stub": stub_config()}, timeout=10)
+        self.addCleanup(self.pool.close)
+
+    def echo(self, **arguments: str) -> dict:
+        return self.pool.call("stub", "echo", arguments)["structuredContent"]
+
+    def test_repeated_calls_reuse_initialized_session(self) -> None:
+        first = self.echo(q="a")
+        second = self.echo(q="b")
+
+        self.assertEqual(first["pid"], second["pid"])
+        self.assertEqual([1, 2], [first["calls"], second["calls"]])
+        self.assertEqual({"q": "b"}, second["arguments"])
+        self.assertEqual(1, self.pool.started)
+        self.assertEqual("stub", self.pool.sessions["stub"][0].server_info["name"])
+
+    def test_crashed_server_is_restarted_on_next_call(self) -> None:
+        first = self.echo()
+
+        with self.assertRaisesRegex(mcp_client.MCPClientError, "已退出"):
+            self.pool.call("stub", "crash", {})
+
+        self.assertNotEqual(first["pid"], self.echo()["pid"])
+        self.assertEqual(2, self.pool.started)
+
+    def test_timeout_discards_session(self) -> None:
+        self.pool.timeout = 0.2
+
+        with self.assertRaisesRegex(mcp_client.MCPClientError, "超时"):
+            self.pool.call("stub", "sleep", {"seconds": 5})
+
+        self.assertEqual([], self.pool.sessions["stub"])
+
+    def test_tool_errors_keep_session(self) -> None:
+        with self.assertRaisesRegex(mcp_client.MCPClientError, "Unknown tool"):
+            self.pool.call("stub", "missing", {})
+
+        self.assertTrue(self.pool.call("stub", "fail", {"message": "boom"})["isError"])
+        self.assertEqual(1, self.pool.started)
+
+    def test_reload_retires_sessions_of_changed_servers(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            config = Path(root) / "servers.json"
+            config.write_text(json.dumps({"mcpServers": {"stub": stub_config(), "other": stub_config()}}), encoding="utf-8")
+            with mock.patch.dict(os.environ, {"MCP_FAST_CALLER_CONFIG": str(config)}):
+                pool = mcp_client.SessionPool(timeout=10)
+                self.addCleanup(pool.close)
+                first = pool.call("stub", "echo", {})["structuredContent"]["pid"]
+                other = pool.call("other", "echo", {})["structuredContent"]["pid"]
+
+                config.write_text(json.dumps({"mcpServers": {"stub": stub_config("--capacity", "2"), "other": stub_config()}}), encoding="utf-8")
+                pool.reload_configs()
+
+                self.assertNotEqual(first, pool.call("stub", "echo", {})["structuredContent"]["pid"])
+                self.assertEqual(other, pool.call("other", "echo", {})["structuredContent"]["pid"])
+                self.assertEqual(3, pool.started)
+
+    def test_unconfigured_and_remote_servers_are_rejected(self) -> None:
+        pool = mcp_client.SessionPool({"remote": {"type": "http", "url": "https://example.com/mcp"}})
+
+        with self.assertRaisesRegex(mcp_client.MCPClientError, "未配置 server 'other'"):
+            pool.call("other", "echo", {})
+        with self.assertRaisesRegex(mcp_client.MCPClientError, "仅支持 stdio"):
+            pool.call("remote", "echo", {})
+
+
+class ExecuteModeTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+        root = Path(self.temporary_directory.name)
+        self.config = root / "servers.json"
+        self.config.write_text(json.dumps({"mcpServers": {"web-search-prime": stub_config()}}), encoding="utf-8")
+        self.env = dict(
+            os.environ,
+            MCP_FAST_CALLER_CONFIG=str(self.config),
+            XDG_CONFIG_HOME=str(root / "config"),
+            XDG_CACHE_HOME=str(root / "cache"),
+        )
+        self.cwd = str(root)
+
+    def test_positional_arguments_without_parameter_names_are_rejected(self) -> None:
+        pool = mcp_client.SessionPool({"web-search-prime": stub_config()})
+        self.addCleanup(pool.close)
+
+        with mock.patch.dict(os.environ, {"MCP_FAST_CALLER_NO_CACHE": "1", "XDG_CACHE_HOME": self.env["XDG_CACHE_HOME"]}):
+            with self.assertRaisesRegex(call_mcp.MCPParserError, "请改用 key=value 或 JSON 参数"):
+                call_mcp.execute_call(call_mcp.parse_mcp_call("search echo latest AI news"), pool)
+
+    def test_arguments_without_schema_send_only_named_values(self) -> None:
+        self.assertEqual({"q": "x"}, execution.tool_arguments("s", "c", {"q": "x"}))
+        self.assertEqual({}, execution.tool_arguments("s", "c", ""))
+        for arguments in ("latest AI news", {"q": "x", "_args": ["y"]}):
+            with self.assertRaisesRegex(call_mcp.MCPParserError, "server 's' 未提供工具 schema"):
+                execution.tool_arguments("s", "c", arguments)
+
+    def test_servers_only_config_file_is_accepted(self) -> None:
+        with mock.patch.dict(os.environ, self.env), mock.patch.object(call_mcp, "_ALIAS_TABLE", None):
+            self.assertEqual("web-search-prime", call_mcp.get_mcp_map()["search"])
+            self.assertIn("web-search-prime", mcp_client.load_server_configs())
+
+    def test_cli_batch_execute_reuses_server_process(self) -> None:
+        result = subprocess.run(
+            [sys.executable, str(CALL_SCRIPT), "--batch", "--execute"],
+            input="search echo q=1\nsearch echo q=2\ngh list-repos\n",
+            env=self.env,
+            cwd=self.cwd,
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+
+        self.assertEqual(0, result.returncode, result.stderr)
+        first, second, missing = [json.loads(line) for line in result.stdout.splitlines()]
+        self.assertEqual(first["result"]["structuredContent"]["pid"], second["result"]["structuredContent"]["pid"])
+        self.assertEqual(2, second["result"]["structuredContent"]["calls"])
+        self.assertIn("未配置 server 'github'", missing["error"])
+
+    def test_cli_tool_error_sets_exit_status(self) -> None:
+        result = subprocess.run(
+            [sys.executable, str(CALL_SCRIPT), "--execute", "search fail message=boom"],
+            env=self.env,
+            cwd=self.cwd,
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+
+        self.assertEqual(1, result.returncode, result.stderr)
+        self.assertTrue(json.loads(result.stdout)["result"]["isError"])
+
+
+if __name__ == "__main__":
+    unittest.main()
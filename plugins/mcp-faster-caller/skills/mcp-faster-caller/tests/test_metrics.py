@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+SKILL_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = SKILL_ROOT / "scripts"
+CALL_SCRIPT = SCRIPTS / "call_mcp.py"
+
+sys.path.insert(0, str(SCRIPTS))
+
+import call_mcp  # noqa: E402
+import mcp_client  # noqa: E402
+import metrics  # noqa: E402
+
+STUB = {"command": sys.executable, "args": [str(SCRIPTS / "stub_mcp_server.py")]}
+
+
+class MetricsTest(unittest.TestCase):
+    def test_histograms_use_cumulative_prometheus_buckets(self) -> None:
+        collected = metrics.Metrics()
+        for seconds in (0.00002, 0.0003, 20.0):
+            collected.observe("phase_seconds", "validate", seconds)
+        collected.count("calls_total", 'we"b', "gh")
+
+        lines = metrics.to_prometheus(collected).splitlines()
+
+        self.assertIn('mcp_fast_caller_phase_seconds_bucket{phase="validate",le="2.5e-05"} 1', lines)
+        self.assertIn('mcp_fast_caller_phase_seconds_bucket{phase="validate",le="0.0005"} 2', lines)
+        self.assertIn('mcp_fast_caller_phase_seconds_bucket{phase="validate",le="10.0"} 2', lines)
+        self.assertIn('mcp_fast_caller_phase_seconds_bucket{phase="validate",le="+Inf"} 3', lines)
+        self.assertIn('mcp_fast_caller_phase_seconds_count{phase="validate"} 3', lines)
+        self.assertIn('mcp_fast_caller_calls_total{server="we\\"b",alias="gh"} 1', lines)
+        self.assertIn("# TYPE mcp_fast_caller_errors_total counter", lines)
+
+    def test_json_export_estimates_quantiles(self) -> None:
+        collected = metrics.Metrics()
+        for _ in range(99):
+            collected.observe("server_seconds", "github", 0.003)
+        collected.observe("server_seconds", "github", 0.2)
+
+        exported = metrics.to_json(collected)["server_seconds"]["github"]
+
+        self.assertEqual((100, 0.005, 0.005, 0.005), (exported["count"], exported["p50"], exported["p90"], exported["p99"]))
+        self.assertEqual(100, exported["buckets"]["0.25"])
+        with self.assertRaisesRegex(metrics.MetricsError, "prometheus / json"):
+            metrics.export(collected, "csv")
+
+    def test_flush_accumulates_across_processes(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "metrics.marshal")
+            for _ in range(2):
+                collected = metrics.Metrics()
+                collected.count("errors_total", "mysql", "execute")
+                collected.observe("phase_seconds", "serialize", 0.0001)
+                metrics.flush(collected, path)
+                self.assertEqual({}, collected.counters)
+
+            stored = metrics.load_stored(path)
+
+        self.assertEqual({("errors_total", "mysql", "execute"): 2}, stored.counters)
+        self.assertEqual(2, sum(stored.histograms[("phase_seconds", "serialize")][:-1]))
+
+
+class InstrumentationTest(unittest.TestCase):
+    def setUp(self) -> None:
+        cache_home = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_home.cleanup)
+        environment = mock.patch.dict(os.environ, {"MCP_FAST_CALLER_NO_CACHE": "1", "XDG_CACHE_HOME": cache_home.name})
+        environment.start()
+        self.addCleanup(environment.stop)
+        self.metrics = metrics.Metrics()
+        patch = mock.patch.object(call_mcp, "_METRICS", self.metrics)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def phase_counts(self) -> dict[str, int]:
+        return {
+            label: sum(values[:-1])
+            for (name, label), values in self.metrics.histograms.items()
+            if name == "phase_seconds"
+        }
+
+    def test_parse_and_serialize_phases_are_timed(self) -> None:
+        result = call_mcp.parse_mcp_call("gh list-repos owner=x")
+        call_mcp.write_result(result, io.StringIO())
+        with self.assertRaises(call_mcp.MCPParserError):
+            call_mcp.parse_mcp_call("nope list")
+
+        self.assertEqual(
+            {"validate": 2, "alias_resolve": 1, "tokenize": 1, "argument_parse": 1, "serialize": 1},
+            self.phase_counts(),
+        )
+        self.assertEqual(
+            {("calls_total", "github", "gh"): 1, ("errors_total", "unknown", "alias_resolve"): 1},
+            self.metrics.counters,
+        )
+
+    def test_execute_latency_and_errors_per_server(self) -> None:
+        pool = mcp_client.SessionPool({"web-search-prime": STUB})
+        self.addCleanup(pool.close)
+
+        call_mcp.execute_call(call_mcp.parse_mcp_call("search echo q=1"), pool)
+        with self.assertRaises(call_mcp.MCPExecutionError):
+            call_mcp.execute_call(call_mcp.parse_mcp_call("gh list-repos"), pool)
+
+        self.assertEqual(2, self.phase_counts()["execute"])
+        self.assertEqual(1, sum(self.metrics.histograms[("server_seconds", "web-search-prime")][:-1]))
+        self.assertEqual(1, self.metrics.counters[("errors_total", "github", "execute")])
+
+
+class MetricsCliTest(unittest.TestCase):
+    def test_metrics_accumulate_and_export(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            env = dict(os.environ, MCP_FAST_CALLER_METRICS="1", XDG_CONFIG_HOME=root, XDG_CACHE_HOME=root)
+
+            def run(*args: str) -> subprocess.CompletedProcess:
+                return subprocess.run(
+                    [sys.executable, str(CALL_SCRIPT), *args],
+                    env=env, cwd=root, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, text=True, check=False,
+                )
+
+            run("db query x")
+            run("database describe_table table=t")
+            exported = json.loads(run("--metrics", "json").stdout)
+            prometheus = run("--metrics", "prometheus").stdout
+            invalid = run("--metrics", "csv")
+
+        self.assertEqual({"db": 1, "database": 1}, exported["calls_total"]["mysql"])
+        self.assertEqual(2, exported["phase_seconds"]["serialize"]["count"])
+        self.assertIn('mcp_fast_caller_phase_seconds_count{phase="validate"} 2', prometheus)
+        self.assertEqual(1, invalid.returncode)
+        self.assertIn("prometheus / json", json.loads(invalid.stdout)["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+SKILL_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = SKILL_ROOT / "scripts"
+CALL_SCRIPT = SCRIPTS / "call_mcp.py"
+
+sys.path.insert(0, str(SCRIPTS))
+
+import call_mcp  # noqa: E402
+import output_format  # noqa: E402
+
+
+def run_cli(*args: str, stdin: bytes = b"") -> subprocess.CompletedProcess:
+    with tempfile.TemporaryDirectory() as root:
+        return subprocess.run(
+            [sys.executable, str(CALL_SCRIPT), *args],
+            input=stdin,
+            env=dict(os.environ, XDG_CONFIG_HOME=root, XDG_CACHE_HOME=root),
+            cwd=root,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+
+
+class MessagePackTest(unittest.TestCase):
+    def test_values_round_trip_across_size_boundaries(self) -> None:
+        values = [
+            None, True, False, 0, 127, 128, 255, 256, 65535, 65536, 2 ** 32, 2 ** 64 - 1,
+            -1, -32, -33, -128, -129, -32769, -(2 ** 63), 1.5, -0.0,
+            "", "a" * 31, "b" * 32, "c" * 255, "d" * 256, "e" * 65536, "搜索 MCP 协议",
+            list(range(15)), list(range(16)), list(range(70000)),
+            {str(key): key for key in range(15)}, {str(key): key for key in range(16)},
+            b"\x00\xff", {"nested": [{"deep": ["值", None, 3.25]}]},
+        ]
+        for value in values:
+            with self.subTest(value=repr(value)[:40]):
+                self.assertEqual(value, output_format.unpack(output_format.pack(value)))
+
+    def test_encoding_follows_the_specification(self) -> None:
+        self.assertEqual(b"\x81\xa1a\x01", output_format.pack({"a": 1}))
+        self.assertEqual(b"\xff", output_format.pack(-1))
+        self.assertEqual(b"\xcc\x80", output_format.pack(128))
+        self.assertEqual(b"\xd0\xdf", output_format.pack(-33))
+        self.assertEqual(b"\xcb\x3f\xf8" + bytes(6), output_format.pack(1.5))
+        self.assertEqual(b"\x92\xc3\xc0", output_format.pack((True, None)))
+        self.assertEqual(b"\xd9\x20" + b"x" * 32, output_format.pack("x" * 32))
+        self.assertEqual("18446744073709551616", output_format.unpack(output_format.pack(2 ** 64)))
+
+    def test_stream_of_objects_needs_no_framing(self) -> None:
+        objects = [{"index": 1, "error": "x"}, {"index": 0, "server": "github"}]
+        data = b"".join(output_format.pack(item) for item in objects)
+
+        self.assertEqual(objects, output_format.unpack_stream(data))
+        with self.assertRaises(ValueError):
+            output_format.unpack(data)
+
+
+class FieldSelectionTest(unittest.TestCase):
+    def test_selected_fields_keep_locating_information(self) -> None:
+        result = call_mcp.parse_mcp_call("gh list-repos owner=x")
+
+        self.assertEqual(
+            {"command": "list-repos", "server": "github"},
+            output_format.select_fields(result, ("command", "server")),
+        )
+        self.assertEqual(
+            {"error": "bad", "line": 3},
+            output_format.select_fields({"error": "bad", "line": 3}, ("server",)),
+        )
+
+    def test_unknown_fields_are_rejected(self) -> None:
+        self.assertEqual(("server", "arguments"), output_format.parse_fields(" server, arguments "))
+        with self.assertRaisesRegex(output_format.OutputFormatError, "无效的字段: orignal"):
+            output_format.parse_fields("server,orignal")
+
+    def test_json_modes_match_standard_library(self) -> None:
+        result = call_mcp.parse_mcp_call('搜索 webSearchPrime search_query="杭州 天气" count=3')
+        for output, indent, separators in (("json", None, (",", ":")), ("pretty", 2, None)):
+            out = io.StringIO()
+            call_mcp.write_result(result, out, output)
+            expected = json.dumps(result, ensure_ascii=False, indent=indent, separators=separators)
+            self.assertEqual(expected + "\n", out.getvalue())
+
+
+class OutputCliTest(unittest.TestCase):
+    def test_single_instruction_as_selected_msgpack(self) -> None:
+        result = run_cli("--output", "msgpack", "--fields", "server,arguments", "gh list-repos owner=x")
+
+        self.assertEqual(0, result.returncode, result.stderr)
+        self.assertEqual(
+            {"server": "github", "arguments": {"owner": "x"}},
+            output_format.unpack(result.stdout),
+        )
+
+    def test_minified_json_drops_echoed_fields(self) -> None:
+        result = run_cli("--output", "json", "--fields", "server,command,arguments", "db query x")
+
+        self.assertEqual(b'{"server":"mysql","command":"query","arguments":"x"}\n', result.stdout)
+
+    def test_batch_stream_and_errors_use_requested_format(self) -> None:
+        batch = run_cli("--batch", "--output", "msgpack", "--fields", "command", stdin=b"gh a\nnope x\n")
+        failed = run_cli("--output", "msgpack", "nope x")
+        rejected = run_cli("--batch", "--output", "pretty")
+
+        self.assertEqual(
+            [{"command": "a"}, {"error": "未知别名 'nope'\n没有相近的别名，运行 --help 查看可用别名", "line": 2}],
+            output_format.unpack_stream(batch.stdout),
+        )
+        self.assertEqual(1, failed.returncode)
+        self.assertIn("未知别名", output_format.unpack(failed.stdout)["error"])
+        self.assertIn("不支持 --output pretty", json.loads(rejected.stdout)["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+SKILL_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = SKILL_ROOT / "scripts"
+CALL_SCRIPT = SCRIPTS / "call_mcp.py"
+
+sys.path.insert(0, str(SCRIPTS))
+
+import call_mcp  # noqa: E402
+import mcp_client  # noqa: E402
+import pipeline  # noqa: E402
+
+STUB = {"command": sys.executable, "args": [str(SCRIPTS / "stub_mcp_server.py")]}
+
+
+is_stage = call_mcp.is_pipeline_stage
+
+
+class SplitStagesTest(unittest.TestCase):
+    def test_only_pipes_before_known_aliases_split(self) -> None:
+        self.assertEqual(
+            ['search q x="a | b"', "read web fetch url=$.u"],
+            pipeline.split_stages('search q x="a | b" | read web fetch url=$.u', is_stage),
+        )
+        self.assertEqual(
+            ["db query SELECT 1 | grep x", "gh list"],
+            pipeline.split_stages("db query SELECT 1 | grep x | gh list", is_stage),
+        )
+        self.assertIsNone(pipeline.split_stages("db query SELECT a || b | wc -l", is_stage))
+        self.assertIsNone(pipeline.split_stages('gh q {"a": "x | gh b"}', is_stage))
+        self.assertIsNone(pipeline.split_stages("search q don't | stop", is_stage))
+        self.assertIsNone(pipeline.split_stages("search AI | web", is_stage))
+
+    def test_references_resolve_paths(self) -> None:
+        value = {"results": [{"url": "https://a", "meta": {"tag name": [1, 2]}}]}
+
+        self.assertEqual("https://a", pipeline.resolve("$.results[0].url", value))
+        self.assertEqual(2, pipeline.resolve('$.results[-1].meta["tag name"][1]', value))
+        self.assertEqual(value, pipeline.resolve("$", value))
+        with self.assertRaisesRegex(pipeline.PipelineError, r"没有 \[3\]"):
+            pipeline.resolve("$.results[3]", value)
+        with self.assertRaisesRegex(pipeline.PipelineError, "下标必须是整数"):
+            pipeline.resolve("$.results[x]", value)
+
+    def test_substitution_keeps_types_and_escapes(self) -> None:
+        stage = {"arguments": {"n": "$.n", "price": "$$5", "_args": ["$.name", "x"], "nested": {"k": "$.n"}}}
+
+        substituted = pipeline.substitute(stage, {"n": 3, "name": "值"})
+
+        self.assertEqual(
+            {"n": 3, "price": "$5", "_args": ["值", "x"], "nested": {"k": "$.n"}},
+            substituted["arguments"],
+        )
+        self.assertEqual({"q": 1}, pipeline.substitute({"arguments": "$"}, {"q": 1})["arguments"])
+        self.assertEqual("json", pipeline.substitute({"arguments": "$"}, {"q": 1})["format"])
+
+    def test_stage_value_prefers_structured_content(self) -> None:
+        text = {"content": [{"type": "text", "text": '{"results": [1]}'}]}
+
+        self.assertEqual({"a": 1}, pipeline.stage_value({"structuredContent": {"a": 1}, **text}))
+        self.assertEqual({"results": [1]}, pipeline.stage_value(text))
+        self.assertEqual("plain", pipeline.stage_value({"content": [{"type": "text", "text": "plain"}]}))
+
+
+class PipelineParseTest(unittest.TestCase):
+    def test_top_level_fields_describe_last_stage(self) -> None:
+        result = call_mcp.parse_mcp_call("搜索 webSearchPrime 杭州 | read web webReader url=$.results[0].url")
+
+        self.assertEqual(("web-reader", "webReader"), (result["server"], result["command"]))
+        self.assertEqual(["web-search-prime", "web-reader"], [stage["server"] for stage in result["stages"]])
+        self.assertEqual({"url": "$.results[0].url"}, result["arguments"])
+
+    def test_stage_errors_name_the_stage(self) -> None:
+        with self.assertRaisesRegex(call_mcp.MCPParserError, "管道第 2 段: 参数文件不存在"):
+            call_mcp.parse_mcp_call("gh list | gh list q=@file:/nonexistent/query.sql")
+
+    def test_pipe_before_a_bare_alias_is_plain_argument_text(self) -> None:
+        result = call_mcp.parse_mcp_call("search AI | web")
+
+        self.assertNotIn("stages", result)
+        self.assertEqual(("web-search-prime", "AI"), (result["server"], result["command"]))
+        self.assertEqual("| web", result["arguments"])
+
+
+class PipelineExecuteTest(unittest.TestCase):
+    def setUp(self) -> None:
+        cache_home = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_home.cleanup)
+        environment = mock.patch.dict(os.environ, {"MCP_FAST_CALLER_NO_CACHE": "1", "XDG_CACHE_HOME": cache_home.name})
+        environment.start()
+        self.addCleanup(environment.stop)
+        self.pool = mcp_client.SessionPool({"web-search-prime": STUB, "context7": STUB})
+        self.addCleanup(self.pool.close)
+
+    def run_pipeline(self, instruction: str) -> dict:
+        return call_mcp.execute_call(call_mcp.parse_mcp_call(instruction), self.pool)
+
+    def test_results_flow_between_stages_in_memory(self) -> None:
+        result = self.run_pipeline('search echo {"n": 3, "q": "MCP"} | API echo count=$.arguments.n topic=$.arguments.q')
+
+        self.assertEqual({"count": 3, "topic": "MCP"}, result["result"]["structuredContent"]["arguments"])
+        self.assertEqual(["web-search-prime", "context7"], [stage["server"] for stage in result["stages"]])
+        self.assertTrue(all(stage["elapsed_ms"] >= 0 for stage in result["stages"]))
+        self.assertNotIn("result", result["stages"][0])
+
+    def test_failed_stage_stops_the_pipeline(self) -> None:
+        result = self.run_pipeline("search fail message=boom | API echo x=$.a")
+
+        self.assertTrue(result["result"]["isError"])
+        self.assertEqual(["web-search-prime"], [stage["server"] for stage in result["stages"]])
+
+    def test_unresolvable_reference_is_an_execution_error(self) -> None:
+        with self.assertRaisesRegex(call_mcp.MCPExecutionError, r"管道第 2 段: 引用 \$.nope 无法解析"):
+            self.run_pipeline("search echo q=1 | API echo x=$.nope")
+
+    def test_cli_prints_only_final_result(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            config = Path(root) / "servers.json"
+            config.write_text(json.dumps({"mcpServers": {"web-search-prime": STUB, "context7": STUB}}), encoding="utf-8")
+            result = subprocess.run(
+                [sys.executable, str(CALL_SCRIPT), "--execute", "--output", "json",
+                 "search echo q=first | API echo previous=$.arguments.q"],
+                env=dict(os.environ, MCP_FAST_CALLER_CONFIG=str(config), XDG_CONFIG_HOME=root, XDG_CACHE_HOME=root),
+                cwd=root, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False,
+            )
+
+        self.assertEqual(0, result.returncode, result.stderr)
+        output = json.loads(result.stdout)
+        self.assertEqual({"previous": "first"}, output["result"]["structuredContent"]["arguments"])
+        self.assertEqual(2, len(output["stages"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+import zlib
+from pathlib import Path
+from unittest import mock
+
+
+SKILL_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = SKILL_ROOT / "scripts"
+STUB_SERVER = SCRIPTS / "stub_mcp_server.py"
+
+sys.path.insert(0, str(SCRIPTS))
+
+import call_mcp  # noqa: E402
+import mcp_client  # noqa: E402
+import result_cache  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+        self.root = Path(self.temporary_directory.name)
+        self.clock = FakeClock()
+        self.cache = self.make_cache()
+
+    def make_cache(self, **settings: object) -> result_cache.ResultCache:
+        merged = {
+            "ttl": {"web-search-prime": 600, "mysql": 0},
+            "max_bytes": 1 << 20,
+            "disabled_aliases": set(),
+        }
+        merged.update(settings)
+        cache = result_cache.ResultCache(str(self.root / "results.sqlite3"), merged, self.clock)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_hit_ignores_argument_order(self) -> None:
+        self.assertTrue(self.cache.put("search", "web-search-prime", "q", {"a": "1", "b": "2"}, {"content": []}))
+
+        self.assertEqual({"content": []}, self.cache.get("search", "web-search-prime", "q", {"b": "2", "a": "1"}))
+        self.assertIsNone(self.cache.get("search", "web-search-prime", "q", {"a": "1"}))
+        self.assertEqual((1, 1), (self.cache.hits, self.cache.misses))
+
+    def test_entries_expire_after_server_ttl(self) -> None:
+        self.cache.put("search", "web-search-prime", "q", {}, {"n": 1})
+        self.clock.now += 601
+
+        self.assertIsNone(self.cache.get("search", "web-search-prime", "q", {}))
+
+    def test_uncacheable_servers_aliases_and_errors_are_skipped(self) -> None:
+        cache = self.make_cache(disabled_aliases={"搜索"})
+
+        self.assertFalse(cache.put("db", "mysql", "query", {}, {"rows": []}))
+        self.assertFalse(cache.put("github", "github", "list", {}, {"repos": []}))
+        self.assertFalse(cache.put("搜索", "web-search-prime", "q", {}, {"n": 1}))
+        self.assertFalse(cache.put("search", "web-search-prime", "q", {}, {"isError": True}))
+        self.assertFalse((self.root / "results.sqlite3").exists())
+
+    def test_least_recently_used_entries_are_evicted(self) -> None:
+        payload = {"text": os.urandom(300).hex()}
+        entry_size = len(zlib.compress(json.dumps(payload).encode()))
+        cache = self.make_cache(max_bytes=entry_size * 2 + entry_size // 2)
+        for index in range(2):
+            self.clock.now += 1
+            cache.put("search", "web-search-prime", "q", {"i": index}, payload)
+        self.clock.now += result_cache.TOUCH_INTERVAL
+        cache.get("search", "web-search-prime", "q", {"i": 0})
+        self.clock.now += 1
+        cache.put("search", "web-search-prime", "q", {"i": 2}, payload)
+
+        present = [cache.get("search", "web-search-prime", "q", {"i": index}) is not None for index in range(3)]
+        self.assertEqual([True, False, True], present)
+
+    def test_running_total_tracks_writes_replacements_and_deletes(self) -> None:
+        def totals() -> tuple[int, int]:
+            connection = self.cache._connect()
+            running = connection.execute("SELECT size FROM totals").fetchone()[0]
+            return running, connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+        self.cache.put("search", "web-search-prime", "q", {"i": 0}, {"text": "short"})
+        self.cache.put("search", "web-search-prime", "q", {"i": 1}, {"text": "x" * 500})
+        self.cache.put("search", "web-search-prime", "q", {"i": 0}, {"text": os.urandom(200).hex()})
+        running, actual = totals()
+        self.assertEqual(actual, running)
+        self.assertGreater(running, 0)
+
+        self.clock.now += 601
+        self.assertIsNone(self.cache.get("search", "web-search-prime", "q", {"i": 1}))
+        self.assertEqual(*totals())
+        self.cache.clear()
+        self.assertEqual((0, 0), totals())
+
+    def test_unusable_database_falls_back_to_no_cache(self) -> None:
+        (self.root / "results.sqlite3").write_bytes(b"not a database" * 100)
+
+        self.assertFalse(self.cache.put("search", "web-search-prime", "q", {}, {"n": 1}))
+        self.assertIsNone(self.cache.get("search", "web-search-prime", "q", {}))
+
+    def test_settings_merge_config_layers(self) -> None:
+        config = self.root / "aliases.json"
+        config.write_text(json.dumps({"cache": {
+            "ttl": {"web-reader": 0, "internal-wiki": 30},
+            "disabled_aliases": ["Read Web"],
+        }}), encoding="utf-8")
+
+        with mock.patch.dict(os.environ, {
+            "MCP_FAST_CALLER_CONFIG": str(config),
+            "XDG_CONFIG_HOME": str(self.root / "config"),
+        }):
+            settings = result_cache.load_cache_settings()
+
+        self.assertEqual(0, settings["ttl"]["web-reader"])
+        self.assertEqual(30, settings["ttl"]["internal-wiki"])
+        self.assertEqual(result_cache.DEFAULT_TTLS["context7"], settings["ttl"]["context7"])
+        self.assertEqual({"read web"}, settings["disabled_aliases"])
+
+
+class ExecuteCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+        settings = {"ttl": dict(result_cache.DEFAULT_TTLS), "max_bytes": 1 << 20, "disabled_aliases": {"web search"}}
+        self.cache = result_cache.ResultCache(os.path.join(self.temporary_directory.name, "r.sqlite3"), settings)
+        self.addCleanup(self.cache.close)
+        stub = {"command": sys.executable, "args": [str(STUB_SERVER)]}
+        self.pool = mcp_client.SessionPool({"web-search-prime": stub, "mysql": stub})
+        self.addCleanup(self.pool.close)
+        environment = mock.patch.dict(os.environ, {"XDG_CACHE_HOME": self.temporary_directory.name})
+        environment.start()
+        self.addCleanup(environment.stop)
+
+    def execute(self, instruction: str) -> dict:
+        return call_mcp.execute_call(call_mcp.parse_mcp_call(instruction), self.pool, self.cache)
+
+    def test_repeated_read_only_call_does_not_reach_server(self) -> None:
+        first = self.execute("search echo query=mcp")
+        second = self.execute("SEARCH echo query=mcp")
+
+        self.assertEqual((False, True), (first["cached"], second["cached"]))
+        self.assertEqual(first["result"], second["result"])
+        self.assertEqual(1, self.pool.sessions["web-search-prime"][0].calls)
+
+    def test_side_effecting_server_is_always_called(self) -> None:
+        self.execute("db echo sql=x")
+        second = self.execute("db echo sql=x")
+
+        self.assertFalse(second["cached"])
+        self.assertEqual(2, second["result"]["structuredContent"]["calls"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+
+SKILL_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = SKILL_ROOT / "scripts"
+CALL_SCRIPT = SCRIPTS / "call_mcp.py"
+STUB_SERVER = SCRIPTS / "stub_mcp_server.py"
+
+sys.path.insert(0, str(SCRIPTS))
+
+import mcp_client  # noqa: E402
+from result_stream import FrameWriter, ResponseScanner, ResultStreamError  # noqa: E402
+
+
+MESSAGES = [
+    {"jsonrpc": "2.0", "method": "notifications/progress", "params": {"result": {"isError": True}}},
+    {"jsonrpc": "2.0", "id": 3, "result": {"content": [{"type": "text", "text": 'a"b\\\nc 中文 \u0001 }]{,:'}], "isError": True}},
+    {"result": {"isError": False, "content": []}, "jsonrpc": "2.0", "id": 4},
+    {"jsonrpc": "2.0", "id": 5, "error": {"code": -1, "message": "x"}},
+    {"jsonrpc": "2.0", "id": 6, "result": None},
+]
+
+
+def scan(chunks: list[bytes]) -> list[tuple[dict, bytes, bool]]:
+    """把按任意边界切开的 server 输出交给扫描器，返回每条消息的 (envelope, result 字节, isError)"""
+    forwarded = bytearray()
+    scanner = ResponseScanner(forwarded.extend)
+    messages = []
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        while pending:
+            end = scanner.feed(pending)
+            if end is None:
+                break
+            message = scanner.message()
+            if message is not None:
+                messages.append((message, bytes(forwarded), scanner.is_error))
+            forwarded.clear()
+            scanner.reset()
+            pending = pending[end:]
+        else:
+            continue
+        pending = b""
+    return messages
+
+
+class ResponseScannerTest(unittest.TestCase):
+    def test_result_is_forwarded_verbatim_at_any_chunk_boundary(self) -> None:
+        raw = b"server starting {not json\n\n" + b"".join(
+            json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n" for message in MESSAGES
+        )
+        expected = [
+            (
+                {**message, "result": None} if "result" in message else message,
+                json.dumps(message["result"], ensure_ascii=False).encode("utf-8") if "result" in message else b"",
+                bool(message.get("result") and message["result"].get("isError")),
+            )
+            for message in MESSAGES
+        ]
+        generator = random.Random(7)
+        for cuts in [[], list(range(1, len(raw)))] + [
+            sorted(generator.sample(range(1, len(raw)), generator.randint(1, 40))) for _ in range(200)
+        ]:
+            chunks = [raw[start:end] for start, end in zip([0, *cuts], [*cuts, len(raw)])]
+            self.assertEqual(expected, scan(chunks))
+
+    def test_malformed_lines_are_rejected(self) -> None:
+        scanner = ResponseScanner(lambda data: None)
+        with self.assertRaises(ResultStreamError):
+            scanner.feed(b'{"id": 1, "result": {"text": "a\n')
+        scanner.reset()
+        with self.assertRaises(ResultStreamError):
+            scanner.feed(b'{"id": 1, "result": [}\n')
+
+
+class FrameWriterTest(unittest.TestCase):
+    def frames(self, chunks: list[bytes], max_bytes: int | None = None) -> list[dict]:
+        out = io.StringIO()
+        writer = FrameWriter(out, max_bytes)
+        for chunk in chunks:
+            writer(chunk)
+        writer.finish(sum(map(len, chunks)))
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_split_characters_are_joined(self) -> None:
+        data = '{"text": "中文"}'.encode("utf-8")
+        frames = self.frames([data[:11], data[11:13], data[13:]])
+
+        self.assertEqual('{"text": "中文"}', "".join(frame["data"] for frame in frames[:-1]))
+        self.assertEqual(["中", '文"}'], [frame["data"] for frame in frames[1:-1]])
+        self.assertEqual({"end": True, "chunks": 3, "bytes": len(data), "truncated": False}, frames[-1])
+
+    def test_cap_drops_the_rest_and_marks_truncation(self) -> None:
+        data = '"中文"'.encode("utf-8")
+        frames = self.frames([data[:3], data[3:]], max_bytes=5)
+
+        self.assertEqual([{"chunk": 0, "data": '"'}, {"chunk": 1, "data": "中"}], frames[:-1])
+        self.assertEqual({"end": True, "chunks": 2, "bytes": 4, "truncated": True, "total_bytes": len(data)}, frames[-1])
+
+
+class StreamCallTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pool = mcp_client.SessionPool({"stub": {"command": sys.executable, "args": [str(STUB_SERVER)]}}, timeout=10)
+        self.addCleanup(self.pool.close)
+
+    def test_truncated_stream_keeps_session_usable(self) -> None:
+        out = io.StringIO()
+        writer = FrameWriter(out, max_bytes=100)
+        size, is_error = self.pool.call_stream("stub", "document", {"size": 500000}, writer)
+        writer.finish(size)
+
+        self.assertFalse(is_error)
+        self.assertGreater(size, 500000)
+        self.assertEqual(100, writer.sent)
+        self.assertEqual(2, self.pool.call("stub", "echo", {})["structuredContent"]["calls"])
+        self.assertEqual(1, self.pool.started)
+
+    def test_slow_consumer_time_is_not_counted_against_timeout(self) -> None:
+        chunks = []
+
+        def slow(data: bytes) -> None:
+            chunks.append(data)
+            time.sleep(0.2)
+
+        size, _ = self.pool.call_stream("stub", "document", {"size": 400000}, slow, timeout=1)
+
+        self.assertGreater(len(chunks), 5)
+        self.assertEqual(size, sum(map(len, chunks)))
+
+    def test_server_error_and_consumer_failure(self) -> None:
+        with self.assertRaisesRegex(mcp_client.MCPClientError, "Unknown tool"):
+            self.pool.call_stream("stub", "missing", {}, lambda data: None)
+        self.assertTrue(self.pool.sessions["stub"][0].alive())
+
+        def closed(data: bytes) -> None:
+            raise BrokenPipeError
+
+        with self.assertRaises(BrokenPipeError):
+            self.pool.call_stream("stub", "document", {"size": 400000}, closed)
+        self.assertEqual([], self.pool.sessions["stub"])
+
+
+class StreamCliTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+        root = Path(self.temporary_directory.name)
+        config = root / "servers.json"
+        servers = {"pdf-reader": {"command": sys.executable, "args": [str(STUB_SERVER)]}}
+        config.write_text(json.dumps({"mcpServers": servers}), encoding="utf-8")
+        self.env = dict(
+            os.environ,
+            MCP_FAST_CALLER_CONFIG=str(config),
+            XDG_CONFIG_HOME=str(root / "config"),
+            XDG_CACHE_HOME=str(root / "cache"),
+            MCP_FAST_CALLER_NO_CACHE="1",
+        )
+        self.cwd = str(root)
+
+    def run_cli(self, *args: str) -> subprocess.CompletedProcess[str]:
+        return subprocess.run(
+            [sys.executable, str(CALL_SCRIPT), *args],
+            env=self.env,
+            cwd=self.cwd,
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+
+    def test_chunks_reassemble_to_the_buffered_result(self) -> None:
+        streamed = self.run_cli("--stream", "--fields", "server,command", "pdf document size=300000")
+        buffered = self.run_cli("--execute", "pdf document size=300000")
+
+        self.assertEqual(0, streamed.returncode, streamed.stderr)
+        header, *chunks, end = map(json.loads, streamed.stdout.splitlines())
+        self.assertEqual({"server": "pdf-reader", "command": "document", "stream": True}, header)
+        self.assertEqual(list(range(len(chunks))), [chunk["chunk"] for chunk in chunks])
+        self.assertEqual(json.loads(buffered.stdout)["result"], json.loads("".join(chunk["data"] for chunk in chunks)))
+        self.assertEqual({"end": True, "chunks": len(chunks), "bytes": end["bytes"], "truncated": False}, end)
+
+    def test_cap_and_tool_error_exit_status(self) -> None:
+        capped = self.run_cli("--stream", "--max-bytes", "1000", "pdf document size=300000")
+        failed = self.run_cli("--stream", "pdf fail message=boom")
+
+        self.assertEqual(0, capped.returncode, capped.stderr)
+        end = json.loads(capped.stdout.splitlines()[-1])
+        self.assertEqual((True, 1000), (end["truncated"], end["bytes"]))
+        self.assertGreater(end["total_bytes"], 300000)
+        self.assertEqual(1, failed.returncode)
+        self.assertTrue(json.loads(failed.stdout.splitlines()[-1])["isError"])
+
+    def test_invalid_combinations_are_rejected(self) -> None:
+        for args, message in [
+            (("--stream", "--batch"), "--stream 只用于单条指令"),
+            (("--stream", "--output", "msgpack", "pdf document"), "只支持 --output json"),
+            (("--max-bytes", "10", "pdf document"), "--max-bytes 只用于 --stream"),
+            (("--stream", "--max-bytes", "0", "pdf document"), "--max-bytes 必须是正数"),
+            (("--stream", "pdf document | pdf echo x=$"), "--stream 不支持调用管道"),
+        ]:
+            with self.subTest(args=args):
+                result = self.run_cli(*args)
+                self.assertEqual(1, result.returncode)
+                self.assertIn(message, json.loads(result.stdout)["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+SKILL_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = SKILL_ROOT / "scripts"
+STUB_SERVER = SCRIPTS / "stub_mcp_server.py"
+
+sys.path.insert(0, str(SCRIPTS))
+
+import call_mcp  # noqa: E402
+import fanout  # noqa: E402
+import mcp_client  # noqa: E402
+import scheduler  # noqa: E402
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_burst_then_waits_at_rate(self) -> None:
+        bucket = scheduler.TokenBucket(rate=2, burst=2, now=0.0)
+
+        self.assertEqual([0.0, 0.0, 0.5, 1.0], [bucket.reserve(0.0) for _ in range(4)])
+        # 两秒后补回 4 个令牌，扣除预支的 2 个
+        self.assertEqual(0.0, bucket.reserve(2.0))
+        self.assertEqual(0.0, bucket.reserve(2.0))
+        self.assertEqual(0.5, bucket.reserve(2.0))
+
+
+class AIMDLimitTest(unittest.TestCase):
+    def test_errors_halve_once_per_latency_window(self) -> None:
+        limit = scheduler.AIMDLimit(8)
+
+        limit.observe(0.1, failed=True, now=10.0)
+        limit.observe(0.1, failed=True, now=10.05)
+        self.assertEqual(4, limit.allowed)
+        limit.observe(0.1, failed=True, now=10.2)
+        self.assertEqual(2, limit.allowed)
+        self.assertEqual(2, limit.decreases)
+
+    def test_slow_calls_count_as_congestion_and_successes_recover(self) -> None:
+        limit = scheduler.AIMDLimit(4, tolerance=2.0)
+
+        for step in range(scheduler.MIN_SAMPLES):
+            limit.observe(0.1 + step * 0.01, failed=False, now=1.0 + step * 0.2)
+        self.assertEqual(4, limit.allowed)
+        limit.observe(0.5, failed=False, now=2.5)
+        self.assertEqual(2, limit.allowed)
+
+        now = 3.0
+        while limit.allowed < 4:
+            now += 0.1
+            limit.observe(0.1, failed=False, now=now)
+        self.assertEqual(4.0, limit.limit)
+
+    def test_one_instant_result_does_not_pin_the_baseline(self) -> None:
+        limit = scheduler.AIMDLimit(8)
+
+        limit.observe(20e-6, failed=False, now=0.0)
+        for step in range(40):
+            limit.observe(0.1, failed=False, now=0.1 * (step + 1))
+
+        self.assertEqual((8, 0), (limit.allowed, limit.decreases))
+        self.assertAlmostEqual(0.1, limit.baseline)
+
+    def test_limit_stays_within_bounds(self) -> None:
+        limit = scheduler.AIMDLimit(3, minimum=2)
+
+        for step in range(5):
+            limit.observe(1.0, failed=True, now=step * 10.0)
+        self.assertEqual(2, limit.allowed)
+        for step in range(50):
+            limit.observe(0.01, failed=False, now=100.0 + step)
+        self.assertEqual(3, limit.allowed)
+
+
+class ServerQueueTest(unittest.TestCase):
+    def test_queue_bounds_concurrency_and_records_depth(self) -> None:
+        plan = scheduler.Scheduler(max_concurrency=2)
+        running = []
+        peak = []
+
+        async def call(index: int) -> None:
+            queue = plan.queue("mysql")
+            start = await queue.acquire()
+            running.append(index)
+            peak.append(len(running))
+            await asyncio.sleep(0.02)
+            running.remove(index)
+            queue.release(start, failed=False)
+
+        async def main() -> None:
+            await asyncio.gather(*(call(index) for index in range(5)))
+
+        asyncio.run(main())
+        stats = plan.stats()["mysql"]
+
+        self.assertEqual(2, max(peak))
+        self.assertEqual((5, 3, 3, 0), (stats["requests"], stats["queued"], stats["max_queue_depth"], stats["in_flight"]))
+        self.assertGreater(stats["queue_seconds"], 0)
+
+    def test_cancelled_waiter_gives_up_its_place(self) -> None:
+        plan = scheduler.Scheduler(max_concurrency=1)
+
+        async def main() -> dict:
+            queue = plan.queue("mysql")
+            start = await queue.acquire()
+            waiter = asyncio.ensure_future(queue.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            queue.release(start, failed=False)
+            await asyncio.wait_for(queue.acquire(), 1)
+            return queue.stats()
+
+        stats = asyncio.run(main())
+
+        self.assertEqual((1, 0), (stats["in_flight"], stats["queue_depth"]))
+
+    def test_rate_limit_spaces_calls(self) -> None:
+        plan = scheduler.Scheduler({"mysql": {"rate": 20, "burst": 1}})
+        observed = []
+        plan.observe = lambda server, seconds: observed.append((server, seconds))
+
+        async def call() -> None:
+            queue = plan.queue("mysql")
+            queue.release(await queue.acquire(), failed=False)
+
+        async def main() -> None:
+            await asyncio.gather(*(call() for _ in range(5)))
+
+        start = time.monotonic()
+        asyncio.run(main())
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+        self.assertEqual(4, plan.stats()["mysql"]["throttled"])
+        self.assertEqual(5, len(observed))
+
+    def test_settings_are_validated(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            config = Path(root) / "aliases.json"
+            config.write_text(json.dumps({"scheduler": {"mysql": {"rate": 2.5, "burst": 3}}}), encoding="utf-8")
+            with mock.patch.dict(os.environ, {"MCP_FAST_CALLER_CONFIG": str(config), "XDG_CONFIG_HOME": root}):
+                self.assertEqual({"mysql": {"rate": 2.5, "burst": 3}}, scheduler.load_scheduler_settings())
+                for entry, message in (
+                    ({"rate": 0}, "rate 必须是大于 0 的数"),
+                    ({"burst": 1.5}, "burst 必须是不小于 1 的整数"),
+                    ({"latency_tolerance": 1}, "latency_tolerance 必须是大于 1 的数"),
+                    ({"limit": 2}, "调度项未知: limit"),
+                ):
+                    config.write_text(json.dumps({"scheduler": {"mysql": entry}}), encoding="utf-8")
+                    with self.assertRaisesRegex(scheduler.SchedulerError, message):
+                        scheduler.load_scheduler_settings()
+
+    def test_concurrency_table_sets_the_ceiling(self) -> None:
+        plan = scheduler.Scheduler({"db": {"max_concurrency": 3}}, max_concurrency=4, limits={"mysql": 1, "db": 2})
+
+        self.assertEqual((1, 3, 4), tuple(plan.queue(server).limit.allowed for server in ("mysql", "db", "gh")))
+
+
+class CachedResultTest(unittest.TestCase):
+    def test_cache_hits_mixed_with_slow_calls_keep_the_limit(self) -> None:
+        plan = scheduler.Scheduler(max_concurrency=4)
+
+        def execute(parsed: dict, timeout: float | None) -> dict:
+            if parsed["cached"]:
+                return {"cached": True}
+            time.sleep(0.05)
+            return {"cached": False}
+
+        async def collect() -> list[dict]:
+            stream = fanout.fan_out(
+                [str(index) for index in range(24)],
+                lambda text: {"server": "mysql", "cached": int(text) % 3 != 0},
+                execute,
+                (),
+                scheduler=plan,
+            )
+            return [item async for item in stream]
+
+        results = asyncio.run(collect())
+        stats = plan.stats()["mysql"]
+
+        self.assertEqual(24, len(results))
+        self.assertEqual((4.0, 0, 0), (stats["limit"], stats["decreases"], stats["in_flight"]))
+        self.assertEqual(8, len(plan.queue("mysql").limit.samples))
+
+
+class OverloadedServerTest(unittest.TestCase):
+    """替身 server 的容量为 2，超出时变慢并返回过载错误"""
+
+    def setUp(self) -> None:
+        load_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(load_dir.cleanup)
+        stub = {"command": sys.executable, "args": [str(STUB_SERVER), "--capacity", "2", "--load-dir", load_dir.name]}
+        self.pool = mcp_client.SessionPool({"web-search-prime": stub}, timeout=10)
+        self.addCleanup(self.pool.close)
+        cache_home = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_home.cleanup)
+        environment = mock.patch.dict(os.environ, {"MCP_FAST_CALLER_NO_CACHE": "1", "XDG_CACHE_HOME": cache_home.name})
+        environment.start()
+        self.addCleanup(environment.stop)
+
+    def test_concurrency_backs_off_under_overload(self) -> None:
+        plan = scheduler.Scheduler(max_concurrency=6)
+        # 先建好会话，让第一轮调用同时到达 server
+        asyncio.run(self.run_calls(["search echo n=%d" % index for index in range(6)], plan))
+        plan.queues.clear()
+
+        results = asyncio.run(self.run_calls(["search work seconds=0.1 n=%d" % index for index in range(12)], plan))
+        stats = plan.stats()["web-search-prime"]
+
+        errors = [result["error"] for result in results if "error" in result]
+        self.assertTrue(errors)
+        self.assertTrue(all("Server overloaded" in error for error in errors))
+        self.assertGreaterEqual(stats["decreases"], 1)
+        self.assertLess(stats["limit"], 6)
+        self.assertEqual(len(errors), stats["errors"])
+
+    async def run_calls(self, instructions: list[str], plan: scheduler.Scheduler) -> list[dict]:
+        def execute(parsed: dict, timeout: float | None) -> dict:
+            return call_mcp.execute_call(parsed, self.pool, timeout=timeout)
+
+        stream = fanout.fan_out(
+            instructions, call_mcp.parse_mcp_call, execute, (call_mcp.MCPParserError,),
+            scheduler=plan, congestion=(call_mcp.MCPExecutionError,),
+        )
+        return [item async for item in stream]
+
+
+if __name__ == "__main__":
+    unittest.main()
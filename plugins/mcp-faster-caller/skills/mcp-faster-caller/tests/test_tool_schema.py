@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+SKILL_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = SKILL_ROOT / "scripts"
+CALL_SCRIPT = SCRIPTS / "call_mcp.py"
+STUB_SERVER = SCRIPTS / "stub_mcp_server.py"
+
+sys.path.insert(0, str(SCRIPTS))
+
+import call_mcp  # noqa: E402
+import mcp_client  # noqa: E402
+import tool_schema  # noqa: E402
+
+STUB = {"command": sys.executable, "args": [str(STUB_SERVER)]}
+
+SEARCH_TOOLS = [
+    {
+        "name": "webSearchPrime",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "search_query": {"type": "string"},
+                "count": {"type": "integer"},
+                "recency": {"type": ["number", "null"]},
+                "safe": {"type": "boolean"},
+                "domains": {"type": "array"},
+                "filters": {"type": "object"},
+            },
+            "required": ["search_query"],
+            "additionalProperties": False,
+        },
+    },
+    {"name": "webSearchLite", "inputSchema": {"type": "object"}},
+]
+
+
+class ToolSchemaTest(unittest.TestCase):
+    def setUp(self) -> None:
+        cache_home = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_home.cleanup)
+        environment = mock.patch.dict(os.environ, {"XDG_CACHE_HOME": cache_home.name})
+        environment.start()
+        self.addCleanup(environment.stop)
+        self.index = tool_schema.compile_tools(SEARCH_TOOLS)
+
+    def validate(self, command: str, arguments: str | dict) -> dict:
+        return tool_schema.validate_call("web-search-prime", command, arguments, self.index)
+
+    def test_string_values_are_coerced_to_declared_types(self) -> None:
+        arguments = self.validate("webSearchPrime", {
+            "search_query": "42",
+            "count": "10",
+            "recency": "0.5",
+            "safe": "yes",
+            "domains": "a.com, b.com",
+            "filters": '{"lang": "zh"}',
+        })
+
+        self.assertEqual({
+            "search_query": "42",
+            "count": 10,
+            "recency": 0.5,
+            "safe": True,
+            "domains": ["a.com", "b.com"],
+            "filters": {"lang": "zh"},
+        }, arguments)
+        self.assertEqual(arguments, self.validate("webSearchPrime", arguments))
+
+    def test_positional_values_fill_required_then_declared_order(self) -> None:
+        self.assertEqual({"search_query": "MCP 协议"}, self.validate("webSearchPrime", "MCP 协议"))
+        self.assertEqual(
+            {"search_query": "MCP", "count": 5},
+            self.validate("webSearchPrime", {"_args": ["MCP", "5"]}),
+        )
+        with self.assertRaisesRegex(tool_schema.ToolSchemaError, "未声明参数名，无法使用位置参数"):
+            self.validate("webSearchLite", "MCP")
+
+    def test_mistakes_are_reported_with_suggestions(self) -> None:
+        cases = [
+            ("webSerchPrime", {"search_query": "a"}, "没有命令 'webSerchPrime'，是否要使用: webSearchPrime"),
+            ("webSearchPrime", {"search_query": "a", "cuont": "1"}, "不接受参数 'cuont'，是否要使用: count"),
+            ("webSearchPrime", {"count": "1"}, "缺少必填参数: search_query"),
+            ("webSearchPrime", {"search_query": "a", "count": "ten"}, "count 应为 integer"),
+            ("webSearchPrime", {"search_query": "a", "safe": "maybe"}, "safe 应为 boolean"),
+            ("webSearchPrime", {"search_query": "a", "count": "²"}, "count 应为 integer"),
+            ("webSearchPrime", {"search_query": "a", "recency": "nan"}, "recency 应为 number/null"),
+            ("webSearchPrime", {"search_query": "a", "recency": "-inf"}, "recency 应为 number/null"),
+            ("webSearchPrime", {"search_query": "a", "recency": "1e999"}, "recency 应为 number/null"),
+        ]
+        for command, arguments, message in cases:
+            with self.subTest(command=command, arguments=arguments):
+                with self.assertRaisesRegex(tool_schema.ToolSchemaError, message):
+                    self.validate(command, arguments)
+
+    def test_cached_schema_expires_after_ttl(self) -> None:
+        tool_schema.save_schema("web-search-prime", SEARCH_TOOLS, fetched=1000.0)
+
+        self.assertIsNotNone(tool_schema.load_schema("web-search-prime", ttl=60, now=1059.0))
+        self.assertIsNone(tool_schema.load_schema("web-search-prime", ttl=60, now=1061.0))
+        self.assertIsNone(tool_schema.load_schema("context7", ttl=60, now=1000.0))
+
+    def test_only_execution_validates_against_fresh_schema(self) -> None:
+        instruction = "search webSerchPrime search_query=MCP"
+        tool_schema.save_schema("web-search-prime", SEARCH_TOOLS)
+        parsed = call_mcp.parse_mcp_call(instruction)
+        self.assertEqual("webSerchPrime", parsed["command"])
+        self.assertEqual({"search_query": "MCP"}, parsed["arguments"])
+
+        cases = [
+            (instruction, "是否要使用: webSearchPrime"),
+            ("search webSearchPrime MCP count=²", "count 应为 integer"),
+            ("search webSearchPrime MCP recency=nan", "recency 应为 number/null"),
+        ]
+        for text, message in cases:
+            with self.subTest(text=text):
+                with self.assertRaisesRegex(call_mcp.MCPParserError, message):
+                    call_mcp.execute_call(call_mcp.parse_mcp_call(text), mock.Mock())
+
+
+class ExecuteSchemaTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+        self.root = self.temporary_directory.name
+        environment = mock.patch.dict(os.environ, {"XDG_CACHE_HOME": self.root, "MCP_FAST_CALLER_NO_CACHE": "1"})
+        environment.start()
+        self.addCleanup(environment.stop)
+        self.pool = mcp_client.SessionPool({"web-search-prime": STUB}, timeout=10)
+        self.addCleanup(self.pool.close)
+
+    def test_first_execution_fetches_schema_and_rejects_typos_locally(self) -> None:
+        result = call_mcp.execute_call(call_mcp.parse_mcp_call("search sleep 0.01"), self.pool)
+        self.assertEqual({"seconds": 0.01}, result["arguments"])
+        self.assertTrue(os.path.exists(tool_schema.schema_path("web-search-prime")))
+
+        with self.assertRaisesRegex(call_mcp.MCPParserError, "是否要使用: sleep"):
+            call_mcp.execute_call(call_mcp.parse_mcp_call("search slep seconds=1"), self.pool)
+        echoed = call_mcp.execute_call(call_mcp.parse_mcp_call("search echo q=1"), self.pool)
+        self.assertEqual(2, echoed["result"]["structuredContent"]["calls"])
+
+    def test_cli_refresh_reports_each_server(self) -> None:
+        config = Path(self.root) / "servers.json"
+        config.write_text(json.dumps({"mcpServers": {"web-search-prime": STUB}}), encoding="utf-8")
+        result = subprocess.run(
+            [sys.executable, str(CALL_SCRIPT), "--refresh-tools", "web-search-prime", "mysql"],
+            env=dict(os.environ, MCP_FAST_CALLER_CONFIG=str(config), XDG_CONFIG_HOME=self.root),
+            cwd=self.root,
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+
+        self.assertEqual(1, result.returncode, result.stderr)
+        refreshed, failed = map(json.loads, result.stdout.splitlines())
+        self.assertEqual(["crash", "document", "echo", "fail", "sleep", "work"], refreshed["tools"])
+        self.assertIn("未配置 server 'mysql'", failed["error"])
+        self.assertIn("sleep", tool_schema.load_schema("web-search-prime"))
+
+
+if __name__ == "__main__":
+    unittest.main()